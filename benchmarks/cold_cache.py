@@ -0,0 +1,130 @@
+"""
+Benchmark of recursive searches over files evicted from the page cache.
+
+Files are evicted with ``POSIX_FADV_DONTNEED`` before every run, which
+needs no privileges, so the benchmark must run on a disk-backed file
+system, not on tmpfs. Each run reports throughput and the growth
+of the page cache reported by ``/proc/meminfo``, which is noisy on busy
+hosts.
+
+Usage: python -m benchmarks.cold_cache [--files N] [--size MIB] [--dir DIR]
+"""
+
+import contextlib
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from python_grep.main import main
+from python_grep.storage import io_hints
+
+MODES: Dict[str, Tuple[bool, List[str]]] = {
+    "no hints": (False, []),
+    "hints": (True, []),
+    "hints, no cache pollution": (True, ["--no-cache-pollution"]),
+}
+LINE = b"2024-05-01 10:00:00 INFO request served in 12 ms by worker 7\n"
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(
+        description="Benchmark searches over files evicted from the page cache"
+    )
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--size", type=int, default=16, metavar="MIB")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--dir",
+        type=Path,
+        default=Path("."),
+        help="directory to create a temporary data directory in "
+        "(default: the current directory)",
+    )
+    return parser.parse_args()
+
+
+def create_files(data_dir: Path, file_count: int, size: int) -> List[Path]:
+    block = LINE * (1024 * 1024 // len(LINE))
+    paths = []
+    for index in range(file_count):
+        path = data_dir / f"app-{index}.log"
+        with path.open("wb") as file:
+            for _ in range(size):
+                file.write(block)
+            file.flush()
+            os.fsync(file.fileno())
+        paths.append(path)
+    return paths
+
+
+def evict(paths: List[Path]) -> None:
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def read_cached_kib() -> Optional[int]:
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("Cached:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run(data_dir: Path, use_hints: bool, extra_args: List[str]) -> float:
+    io_hints.HAS_FADVISE = use_hints
+    args = ["-r", "-c", "--no-cache", *extra_args, "worker 9", str(data_dir)]
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            main(args)
+            return time.perf_counter() - start
+
+
+def main_benchmark() -> None:
+    args = parse_args()
+    if not hasattr(os, "posix_fadvise"):
+        raise SystemExit("posix_fadvise is not available on this platform")
+    data_dir = Path(tempfile.mkdtemp(prefix="cold-cache-", dir=args.dir))
+    try:
+        paths = create_files(data_dir, args.files, args.size)
+        total_mib = args.files * args.size
+        timings: Dict[str, List[float]] = {mode: [] for mode in MODES}
+        cache_growth: Dict[str, List[int]] = {mode: [] for mode in MODES}
+        for _ in range(args.runs):
+            for mode, (use_hints, extra_args) in MODES.items():
+                evict(paths)
+                cached_before = read_cached_kib()
+                timings[mode].append(run(data_dir, use_hints, extra_args))
+                cached_after = read_cached_kib()
+                if cached_before is not None and cached_after is not None:
+                    cache_growth[mode].append(cached_after - cached_before)
+        print(f"{args.files} files, {total_mib} MiB, {args.runs} runs")
+        for mode in MODES:
+            seconds = statistics.median(timings[mode])
+            growth = (
+                f"{statistics.median(cache_growth[mode]) / 1024:8.0f} MiB"
+                if cache_growth[mode]
+                else "     n/a"
+            )
+            print(
+                f"{mode:28} {seconds:7.2f} s {total_mib / seconds:8.1f} "
+                f"MiB/s  page cache growth {growth}"
+            )
+    finally:
+        shutil.rmtree(data_dir)
+
+
+if __name__ == "__main__":
+    main_benchmark()
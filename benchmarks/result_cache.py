@@ -0,0 +1,86 @@
+"""
+Benchmark of searches served from the on-disk result cache.
+
+Each run searches the same files without the cache, with a cold cache
+and with a warm one, every search in a fresh process so startup costs
+count. The cache pays off once searching a file costs more than looking
+up its fingerprint, so the default files are large; pass many small
+ones with ``--files 5000 --size 1`` to see the per-file overhead.
+
+Usage: python -m benchmarks.result_cache [--files N] [--size KIB]
+"""
+
+import os
+import shutil
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Dict, List
+
+MODES = ["no cache", "cold cache", "warm cache"]
+LINE = b"2024-05-01 10:00:00 INFO request served in 12 ms by worker 7\n"
+PATTERN = r"worker [89]\d"
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(
+        description="Benchmark searches served from the result cache"
+    )
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--size", type=int, default=8 * 1024, metavar="KIB")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--dir",
+        type=Path,
+        default=Path("."),
+        help="directory to create a temporary data directory in "
+        "(default: the current directory)",
+    )
+    return parser.parse_args()
+
+
+def create_files(data_dir: Path, file_count: int, size: int) -> None:
+    data = LINE * (size * 1024 // len(LINE))
+    for index in range(file_count):
+        (data_dir / f"app-{index}.log").write_bytes(data)
+
+
+def run(data_dir: Path, cache_home: Path, cache_arg: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(  # nosec
+        [sys.executable, "-m", "python_grep.main", "-r", cache_arg]
+        + [PATTERN, str(data_dir / "files")],
+        env={**os.environ, "XDG_CACHE_HOME": str(cache_home)},
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main_benchmark() -> None:
+    args = parse_args()
+    data_dir = Path(tempfile.mkdtemp(prefix="result-cache-", dir=args.dir))
+    try:
+        (data_dir / "files").mkdir()
+        create_files(data_dir / "files", args.files, args.size)
+        timings: Dict[str, List[float]] = {mode: [] for mode in MODES}
+        for index in range(args.runs):
+            cache_home = data_dir / f"cache-{index}"
+            timings["no cache"].append(run(data_dir, cache_home, "--no-cache"))
+            timings["cold cache"].append(run(data_dir, cache_home, "--cache"))
+            timings["warm cache"].append(run(data_dir, cache_home, "--cache"))
+        print(f"{args.files} files of {args.size} KiB, {args.runs} runs")
+        baseline = statistics.median(timings["no cache"])
+        for mode in MODES:
+            seconds = statistics.median(timings[mode])
+            print(f"{mode:12} {seconds:7.3f} s {baseline / seconds:6.2f}x")
+    finally:
+        shutil.rmtree(data_dir)
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -1,5 +1,25 @@
-from argparse import ArgumentParser, ArgumentTypeError, Namespace
-from typing import List, Optional
+import time
+from argparse import (
+    ArgumentParser,
+    ArgumentTypeError,
+    BooleanOptionalAction,
+    Namespace,
+)
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from python_grep.grep.context import (
+    DEFAULT_REGEX_ENGINE,
+    DEFAULT_SPLIT_SIZE,
+    DEFAULT_TIME_FORMAT,
+)
+from python_grep.match.regex_engine import REGEX_ENGINES
+from python_grep.storage.line_window import DEFAULT_MAX_LINE_LENGTH
+from python_grep.storage.path_filter import FILE_TYPES
+
+SIZE_SUFFIXES = {"K": 1024, "M": 1024**2, "G": 1024**3}
+AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
 
 
 def create_cli_parser() -> ArgumentParser:
@@ -11,7 +31,10 @@ def create_cli_parser() -> ArgumentParser:
     """
 
     parser = ArgumentParser(
-        description="Python implementation of grep command"
+        description="Python implementation of grep command",
+        epilog="Run with --server [--socket PATH] to start a daemon "
+        "serving searches, and pass --socket PATH or set PYGREP_SOCKET "
+        "to forward searches to it.",
     )
     parser.add_argument(
         "pattern", help="Pattern to search for in the file(s)."
@@ -24,6 +47,14 @@ def create_cli_parser() -> ArgumentParser:
         dest="patterns",
         help="Additional pattern(s) to search for",
     )
+    parser.add_argument(
+        "-f",
+        "--file",
+        action="append",
+        dest="pattern_files",
+        metavar="FILE",
+        help="take patterns from FILE, one per line",
+    )
     parser.add_argument(
         "-c",
         "--count",
@@ -58,18 +89,210 @@ def create_cli_parser() -> ArgumentParser:
         action="store_true",
         help="match only whole words",
     )
+    parser.add_argument(
+        "-x",
+        "--line-regexp",
+        action="store_true",
+        help="match only whole lines",
+    )
     parser.add_argument(
         "-i",
         "--ignore-case",
         action="store_true",
         help="ignore case distinctions in patterns and data",
     )
+    parser.add_argument(
+        "-U",
+        "--multiline",
+        action="store_true",
+        help="allow matches to span lines, ^ and $ matching at line ends",
+    )
+    parser.add_argument(
+        "--multiline-dotall",
+        action="store_true",
+        help="let . match newlines in multiline mode",
+    )
+    parser.add_argument(
+        "--regex-engine",
+        choices=sorted(REGEX_ENGINES),
+        default=DEFAULT_REGEX_ENGINE,
+        help="engine matching regex patterns: the backtracking re module, "
+        "automata running in linear time whatever the pattern, or auto, "
+        "using automata for patterns nesting repetitions only "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "-z",
+        "--null-data",
+        action="store_true",
+        help="lines of input and output are terminated by NUL, not newline",
+    )
     parser.add_argument(
         "-n",
         "--line-number",
         action="store_true",
         help="print line number with output lines",
     )
+    parser.add_argument(
+        "-b",
+        "--byte-offset",
+        action="store_true",
+        help="print the byte offset with output lines",
+    )
+    parser.add_argument(
+        "-t",
+        "--type",
+        action="append",
+        choices=sorted(FILE_TYPES),
+        dest="file_types",
+        metavar="TYPE",
+        help="search only files of TYPE, judged by their extensions; "
+        "can be repeated (types: %(choices)s)",
+    )
+    parser.add_argument(
+        "--max-filesize",
+        type=parse_size,
+        metavar="SIZE",
+        help="skip files larger than SIZE bytes, which can be suffixed "
+        "with K, M or G",
+    )
+    parser.add_argument(
+        "--newer",
+        type=parse_file_time,
+        metavar="TIME",
+        help="search only files modified after TIME, an ISO 8601 date "
+        "and time or an age such as 30m, 12h or 7d",
+    )
+    parser.add_argument(
+        "--older",
+        type=parse_file_time,
+        metavar="TIME",
+        help="search only files modified before TIME",
+    )
+    parser.add_argument(
+        "--skip-known-binary",
+        action="store_true",
+        help="skip files whose extensions mark them as binary, e.g. "
+        "archives, images and compiled code, without opening them",
+    )
+    parser.add_argument(
+        "--from-offset",
+        type=int,
+        default=0,
+        metavar="OFFSET",
+        help="start scanning each file at byte OFFSET",
+    )
+    parser.add_argument(
+        "--lines",
+        type=parse_line_range,
+        metavar="START:END",
+        help="search only lines START to END of each file, either of which "
+        "can be omitted",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="TIME",
+        help="search only lines of log files logged at TIME or later, "
+        "located by binary search over their timestamps",
+    )
+    parser.add_argument(
+        "--until",
+        metavar="TIME",
+        help="search only lines of log files logged at TIME or earlier",
+    )
+    parser.add_argument(
+        "--time-format",
+        default=DEFAULT_TIME_FORMAT,
+        metavar="FORMAT",
+        help="strptime format of timestamps starting log lines and of "
+        "--since and --until (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--line-index",
+        action="store_true",
+        help="keep indexes of line offsets of searched files next to "
+        "the result cache, so lines are located without counting them",
+    )
+    parser.add_argument(
+        "--cache",
+        action=BooleanOptionalAction,
+        help="serve results of files unchanged since they were last "
+        "searched from the on-disk result cache, and store them there, "
+        "along with regexes built of large pattern sets "
+        "(default: off, while a --server daemon caches them in memory "
+        "unless --no-cache is given)",
+    )
+    parser.add_argument(
+        "--no-cache-pollution",
+        action="store_true",
+        help="drop searched files from the page cache once read, so large "
+        "scans do not evict data other processes rely on",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes searching files, small files being "
+        "batched and large ones split between them",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=parse_positive_float,
+        metavar="SECONDS",
+        help="stop searching a file after SECONDS, reporting it and moving "
+        "on to the next one",
+    )
+    parser.add_argument(
+        "--split-size",
+        type=int,
+        default=DEFAULT_SPLIT_SIZE,
+        metavar="BYTES",
+        help="size of file parts scanned by separate processes",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="keep files open and search lines appended to them",
+    )
+    parser.add_argument(
+        "--follow-interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="interval between checks of followed files",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="record progress of the scan in FILE, so it can be resumed",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="resume the scan recorded in the --checkpoint file",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print results as JSON objects, one per line",
+    )
+    parser.add_argument(
+        "--max-columns",
+        type=parse_positive_int,
+        metavar="NUM",
+        help="print only NUM characters of longer lines, around their "
+        "first match",
+    )
+    parser.add_argument(
+        "--max-line-length",
+        type=parse_positive_int,
+        default=DEFAULT_MAX_LINE_LENGTH,
+        metavar="BYTES",
+        help="read lines longer than BYTES in overlapping windows of BYTES "
+        "and print the window holding the first match, so memory stays "
+        "bounded (default: %(default)s)",
+    )
     parser.add_argument(
         "-B",
         "--before-context",
@@ -86,6 +309,150 @@ def create_cli_parser() -> ArgumentParser:
     return parser
 
 
+def parse_line_range(value: str) -> Tuple[int, Optional[int]]:
+    """
+    Parse a range of line numbers.
+
+    :param str value: The range as START:END, START: or :END, lines being
+     numbered from 1 and both ends included.
+    :return: The first and the last line number, None if the range
+     reaches the end of a file.
+    :rtype: Tuple[int, Optional[int]]
+    :raises ArgumentTypeError: Raises exception if the range is malformed
+     or empty.
+    """
+
+    start, separator, end = value.partition(":")
+    try:
+        first_line = int(start) if start else 1
+        last_line = int(end) if end else None
+    except ValueError:
+        raise ArgumentTypeError(f"invalid line range: {value!r}")
+    if not separator or first_line < 1:
+        raise ArgumentTypeError(f"invalid line range: {value!r}")
+    if last_line is not None and last_line < first_line:
+        raise ArgumentTypeError(f"empty line range: {value!r}")
+
+    return first_line, last_line
+
+
+def parse_positive_int(value: str) -> int:
+    """
+    Parse a positive integer.
+
+    :param str value: The integer.
+    :return: The parsed integer.
+    :rtype: int
+    :raises ArgumentTypeError: Raises exception if the value is not
+     a positive integer.
+    """
+
+    try:
+        number = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid positive integer: {value!r}")
+    if number < 1:
+        raise ArgumentTypeError(f"invalid positive integer: {value!r}")
+
+    return number
+
+
+def parse_positive_float(value: str) -> float:
+    """
+    Parse a positive number.
+
+    :param str value: The number.
+    :return: The parsed number.
+    :rtype: float
+    :raises ArgumentTypeError: Raises exception if the value is not
+     a positive number.
+    """
+
+    try:
+        number = float(value)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid positive number: {value!r}")
+    if not number > 0 or number == float("inf"):
+        raise ArgumentTypeError(f"invalid positive number: {value!r}")
+
+    return number
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a size in bytes.
+
+    :param str value: The size, optionally suffixed with K, M or G.
+    :return: The size in bytes.
+    :rtype: int
+    :raises ArgumentTypeError: Raises exception if the value is not
+     a size.
+    """
+
+    multiplier = SIZE_SUFFIXES.get(value[-1:].upper())
+    try:
+        size = int(value[:-1] if multiplier else value) * (multiplier or 1)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid size: {value!r}")
+    if size < 0:
+        raise ArgumentTypeError(f"invalid size: {value!r}")
+
+    return size
+
+
+def parse_file_time(value: str) -> float:
+    """
+    Parse a time files are compared with by their modification times.
+
+    :param str value: The time as an ISO 8601 date with optional time
+     of day, or as an age, i.e. a number of seconds, minutes, hours, days
+     or weeks before now, such as 30s, 30m, 12h, 7d or 2w.
+    :return: The time as a timestamp.
+    :rtype: float
+    :raises ArgumentTypeError: Raises exception if the value is neither
+     a date nor an age.
+    """
+
+    if (unit := AGE_UNITS.get(value[-1:])) and value[:-1].isdigit():
+        return time.time() - int(value[:-1]) * unit
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ArgumentTypeError(f"invalid time: {value!r}")
+
+
+def add_patterns_from_files(args: Namespace) -> Namespace:
+    """
+    Add patterns read from pattern files, one pattern per line.
+    When patterns are given in files, the pattern argument is treated
+    as the first file to search in.
+
+    :param Namespace args: The namespace containing parsed arguments.
+    :return: The modified namespace.
+    :rtype: Namespace
+    :raises ArgumentTypeError: Raises exception if a pattern file
+     cannot be read.
+    """
+
+    if not args.pattern_files:
+        return args
+
+    patterns = list(args.patterns or [])
+    for pattern_file in args.pattern_files:
+        try:
+            patterns.extend(Path(pattern_file).read_text().splitlines())
+        except OSError as e:
+            raise ArgumentTypeError(
+                f"Cannot read pattern file {pattern_file}: {e.strerror}"
+            )
+    if args.pattern:
+        args.files.insert(0, args.pattern)
+        args.pattern = None
+    args.patterns = patterns
+
+    return args
+
+
 def merge_pattern_related_args(args: Namespace) -> Namespace:
     """
     Merge pattern-related arguments into a single list.
@@ -128,6 +495,165 @@ def add_file_path_for_recursive(args: Namespace) -> Namespace:
     return args
 
 
+def validate_follow_args(args: Namespace) -> Namespace:
+    """
+    Validate arguments combined with follow mode.
+
+    :param Namespace args: The namespace containing parsed arguments.
+    :return: The namespace.
+    :rtype: Namespace
+    :raises ArgumentTypeError: Raises exception if follow mode is combined
+     with counting, which only makes sense for complete files.
+    """
+
+    if args.follow and args.count:
+        raise ArgumentTypeError("--follow cannot be combined with -c")
+
+    return args
+
+
+def validate_multiline_args(args: Namespace) -> Namespace:
+    """
+    Validate arguments combined with multiline mode.
+
+    :param Namespace args: The namespace containing parsed arguments.
+    :return: The namespace.
+    :rtype: Namespace
+    :raises ArgumentTypeError: Raises exception if multiline mode is
+     combined with options selecting or resuming single lines.
+    """
+
+    if args.multiline_dotall and not args.multiline:
+        raise ArgumentTypeError("--multiline-dotall requires -U")
+    if not args.multiline:
+        return args
+    for enabled, option in (
+        (args.invert_match, "-v"),
+        (args.count, "-c"),
+        (args.before_context, "-B"),
+        (args.after_context, "-A"),
+        (args.null_data, "-z"),
+        (args.follow, "--follow"),
+        (args.checkpoint, "--checkpoint"),
+    ):
+        if enabled:
+            raise ArgumentTypeError(f"-U cannot be combined with {option}")
+
+    return args
+
+
+def validate_checkpoint_args(args: Namespace) -> Namespace:
+    """
+    Validate arguments related to checkpoints.
+
+    :param Namespace args: The namespace containing parsed arguments.
+    :return: The namespace.
+    :rtype: Namespace
+    :raises ArgumentTypeError: Raises exception if resuming is requested
+     without a checkpoint file, or if a checkpoint is combined with
+     follow mode, which never completes a scan.
+    """
+
+    if args.resume and not args.checkpoint:
+        raise ArgumentTypeError("--resume requires --checkpoint")
+    if args.checkpoint and args.follow:
+        raise ArgumentTypeError(
+            "--checkpoint cannot be combined with --follow"
+        )
+
+    return args
+
+
+def validate_line_range_args(args: Namespace) -> Namespace:
+    """
+    Validate arguments combined with a range of lines.
+
+    :param Namespace args: The namespace containing parsed arguments.
+    :return: The namespace.
+    :rtype: Namespace
+    :raises ArgumentTypeError: Raises exception if a range of lines is
+     combined with another start of the scan or with follow mode.
+    """
+
+    if not args.lines:
+        return args
+    if args.since or args.until:
+        raise ArgumentTypeError(
+            "--lines cannot be combined with --since or --until"
+        )
+    if args.from_offset:
+        raise ArgumentTypeError(
+            "--lines cannot be combined with --from-offset"
+        )
+    if args.follow:
+        raise ArgumentTypeError("--lines cannot be combined with --follow")
+
+    return args
+
+
+def validate_time_range_args(args: Namespace) -> Namespace:
+    """
+    Validate arguments selecting a time range of log files.
+
+    :param Namespace args: The namespace containing parsed arguments.
+    :return: The namespace.
+    :rtype: Namespace
+    :raises ArgumentTypeError: Raises exception if a time does not match
+     the timestamp format or the range is empty, or if it is combined
+     with another start of the scan or with follow mode.
+    """
+
+    if not args.since and not args.until:
+        return args
+    if args.from_offset:
+        raise ArgumentTypeError(
+            "--since and --until cannot be combined with --from-offset"
+        )
+    if args.follow:
+        raise ArgumentTypeError(
+            "--since and --until cannot be combined with --follow"
+        )
+
+    from python_grep.storage.time_range_reader import TimestampParser
+
+    timestamp_parser = TimestampParser(args.time_format)
+    times = []
+    for value, option in ((args.since, "--since"), (args.until, "--until")):
+        try:
+            times.append(timestamp_parser.parse(value) if value else None)
+        except ValueError:
+            raise ArgumentTypeError(
+                f"{option} {value!r} does not match format "
+                f"{args.time_format!r}"
+            )
+    since, until = times
+    if since and until and since > until:
+        raise ArgumentTypeError("--since is later than --until")
+
+    return args
+
+
+def validate_file_time_args(args: Namespace) -> Namespace:
+    """
+    Validate arguments selecting files by their modification times.
+
+    :param Namespace args: The namespace containing parsed arguments.
+    :return: The namespace.
+    :rtype: Namespace
+    :raises ArgumentTypeError: Raises exception if the window of times
+     is empty.
+    """
+
+    if (
+        args.newer is not None
+        and args.older is not None
+        and args.newer >= args.older
+    ):
+        raise ArgumentTypeError("--newer is not earlier than --older")
+
+    return args
+
+
 def get_parsed_args(
     cli_parser: ArgumentParser, args: Optional[List[str]]
 ) -> Namespace:
@@ -135,8 +661,8 @@ def get_parsed_args(
     Parses the command-line arguments using the provided
     `ArgumentParser` instance and returns a `Namespace` object
     containing the parsed arguments. Additionally,
-    merges pattern-related arguments and adds file paths for
-    recursive operations.
+    reads pattern files, merges pattern-related arguments and adds
+    file paths for recursive operations.
 
     :param ArgumentParser cli_parser: An instance of `ArgumentParser`
     configured with the desired command-line arguments and options.
@@ -148,6 +674,22 @@ def get_parsed_args(
     :rtype: Namespace
     """
 
-    return add_file_path_for_recursive(
-        merge_pattern_related_args(cli_parser.parse_args(args))
+    return validate_file_time_args(
+        validate_time_range_args(
+            validate_line_range_args(
+                validate_multiline_args(
+                    validate_checkpoint_args(
+                        validate_follow_args(
+                            add_file_path_for_recursive(
+                                merge_pattern_related_args(
+                                    add_patterns_from_files(
+                                        cli_parser.parse_args(args)
+                                    )
+                                )
+                            )
+                        )
+                    )
+                )
+            )
+        )
     )
@@ -1,3 +1,19 @@
-from python_grep.grep.factory import create_grep_from_cli_args
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from python_grep.grep.factory import create_grep_from_cli_args
 
 __all__ = ["create_grep_from_cli_args"]
+
+# Resolved on first access, so importing a single submodule, e.g. the
+# context by the CLI parser, does not pull in every command.
+_LAZY_EXPORTS = {"create_grep_from_cli_args": "python_grep.grep.factory"}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = __import__(_LAZY_EXPORTS[name], fromlist=[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
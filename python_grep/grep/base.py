@@ -3,7 +3,7 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Generator, List, Optional, Union
+from typing import Generator, List, Optional, Sequence, Union
 
 from python_grep.match import MatchPosition
 from python_grep.storage.base import InputType
@@ -53,11 +53,116 @@ class IInputProcessor(ABC):
         """
 
 
+class IResultCache(ABC):
+    """Interface for caches of processing outputs. Entries are keyed on
+    the search query and the processed file, and are only valid as long
+    as the file fingerprint does not change.
+    """
+
+    @abstractmethod
+    def get(
+        self, key: str, fingerprint: str
+    ) -> Optional[List[ProcessingOutput]]:
+        """
+        Get cached processing outputs.
+
+        :param str key: The key identifying the query and the file.
+        :param str fingerprint: The current fingerprint of the file.
+        :return: Cached processing outputs or None if there is no
+         entry matching the fingerprint.
+        :rtype: Optional[List[ProcessingOutput]]
+        """
+
+    @abstractmethod
+    def put(
+        self, key: str, fingerprint: str, outputs: List[ProcessingOutput]
+    ) -> None:
+        """
+        Store processing outputs in the cache.
+
+        :param str key: The key identifying the query and the file.
+        :param str fingerprint: The fingerprint of the processed file.
+        :param List[ProcessingOutput] outputs: The outputs to store.
+        """
+
+    @abstractmethod
+    def flush(self) -> None:
+        """
+        Write changes caches may defer, such as stored outputs and access
+        times, once a search is done.
+        """
+
+
+class ICheckpoint(ABC):
+    """Interface for journals of scan progress. A journal records files
+    scanned completely and the offset the file being scanned can be
+    resumed from, so an interrupted scan can continue without emitting
+    the same output again.
+    """
+
+    @abstractmethod
+    def is_completed(self, path: Path) -> bool:
+        """
+        Check whether a file was scanned completely by a previous run.
+
+        :param Path path: The path to the file.
+        :return: True if the file should be skipped.
+        :rtype: bool
+        """
+
+    @abstractmethod
+    def get_resume_offset(self, path: Path) -> int:
+        """
+        Get the byte offset a previous run stopped scanning a file at.
+
+        :param Path path: The path to the file.
+        :return: The offset or 0 if the file should be scanned from
+         the beginning.
+        :rtype: int
+        """
+
+    @abstractmethod
+    def start_file(self, path: Path) -> None:
+        """
+        Record the start of scanning a file.
+
+        :param Path path: The path to the file.
+        """
+
+    @abstractmethod
+    def record_offset(self, offset: int) -> None:
+        """
+        Record that the current file may be resumed from an offset,
+        all output preceding it having been emitted.
+
+        :param int offset: The byte offset.
+        """
+
+    @abstractmethod
+    def record_progress(self, offset: int) -> None:
+        """
+        Record an offset like record_offset, but at most once in a while.
+        The latest offset is recorded when the journal is closed.
+
+        :param int offset: The byte offset.
+        """
+
+    @abstractmethod
+    def complete_file(self) -> None:
+        """Record that the current file was scanned completely."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Close the journal."""
+
+
 @dataclass(frozen=True)
 class ProcessingOutput:
-    matches: Optional[List[MatchPosition]]
+    matches: Optional[Sequence[MatchPosition]]
     path: Path
     input_type: InputType
     line: Union[bytes, str]
-    line_number: int
+    line_number: Optional[int]
     match_count: int = 0
+    byte_offset: int = 0
+    line_count: int = 1
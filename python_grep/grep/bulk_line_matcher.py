@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+from python_grep.grep.context import PatternMatchingOptions
+from python_grep.match import IRegex
+from python_grep.match.pattern_matcher import compile_regexes, is_literal
+
+if TYPE_CHECKING:
+    from python_grep.match.multi_pattern_matcher import TrieRegexCache
+
+
+class BulkLineMatcher:
+    """
+    Finds and counts lines matching literal patterns in large blocks
+    of text.
+
+    Instead of searching every line on its own, a block of whole lines
+    is searched as a whole, and after each match the search resumes at
+    the start of the next line. Lines without matches are thus skipped
+    by a single ``str.find`` or regex search, without creating a string
+    per line. Literals cannot contain the line separator, so the results
+    are the same as those of searching line by line.
+
+    :param List[str] patterns: Literal patterns to match against.
+    :param PatternMatchingOptions pattern_matching_options: Options
+     for pattern matching.
+    :param str line_separator: The character separating lines.
+    :param Optional[TrieRegexCache] trie_regex_cache: The cache of trie
+     regex sources to use, if any.
+    """
+
+    def __init__(
+        self,
+        patterns: List[str],
+        pattern_matching_options: PatternMatchingOptions,
+        line_separator: str = "\n",
+        trie_regex_cache: Optional[TrieRegexCache] = None,
+    ) -> None:
+        self._invert_match = pattern_matching_options.invert_match
+        self._line_separator = line_separator
+        self._literal: Optional[str] = None
+        self._regex: Optional[IRegex[str]] = None
+        if len(set(patterns)) == 1 and not (
+            pattern_matching_options.ignore_case
+            or pattern_matching_options.word_regexp
+            or pattern_matching_options.line_regexp
+        ):
+            self._literal = patterns[0]
+            return
+
+        # Imported here, as a single literal is searched without a regex.
+        from python_grep.match.multi_pattern_matcher import build_trie_regex
+
+        regex_sources = (
+            (
+                trie_regex_cache.build_trie_regex(patterns)
+                if trie_regex_cache
+                else build_trie_regex(set(patterns))
+            ),
+        )
+        flags = re.IGNORECASE if pattern_matching_options.ignore_case else 0
+        if not (
+            pattern_matching_options.word_regexp
+            or pattern_matching_options.line_regexp
+        ):
+            (self._regex,) = compile_regexes(
+                regex_sources, flags, "backtracking"
+            )
+            return
+
+        # Imported here, as only word and line matching need it.
+        from python_grep.match.boundaries import compile_bounded_regexes
+
+        (self._regex,) = compile_bounded_regexes(
+            regex_sources,
+            flags,
+            "backtracking",
+            pattern_matching_options.line_regexp,
+            line_separator,
+        )
+
+    @staticmethod
+    def supports(
+        patterns: List[str],
+        pattern_matching_options: PatternMatchingOptions,
+        line_separator: str = "\n",
+    ) -> bool:
+        """
+        Check whether lines matching patterns can be counted in bulk.
+
+        :param List[str] patterns: Patterns to match against.
+        :param PatternMatchingOptions pattern_matching_options: Options
+         for pattern matching.
+        :param str line_separator: The character separating lines.
+        :return: True if all patterns are non-empty literals without line
+         separators.
+        :rtype: bool
+        """
+
+        return (
+            bool(patterns)
+            and not pattern_matching_options.multiline
+            and all(
+                pattern
+                and is_literal(pattern)
+                and line_separator not in pattern
+                for pattern in patterns
+            )
+        )
+
+    def count(self, block: str) -> int:
+        """
+        Count lines selected by the patterns in a block of whole lines.
+
+        :param str block: The block, ending with a line separator unless
+         it is the last block of a file.
+        :return: Number of matching lines, or of non-matching lines
+         when the match is inverted.
+        :rtype: int
+        """
+
+        matching_line_count = 0
+        position = 0
+        while (start := self._find(block, position)) >= 0:
+            matching_line_count += 1
+            position = block.find(self._line_separator, start) + 1
+            if not position:
+                break
+        if not self._invert_match:
+            return matching_line_count
+
+        line_count = block.count(self._line_separator)
+        if block and not block.endswith(self._line_separator):
+            line_count += 1
+        return line_count - matching_line_count
+
+    def iter_matching_lines(self, block: str) -> Iterator[Tuple[int, int]]:
+        """
+        Iterate over lines of a block of whole lines containing a match.
+        The match is not inverted.
+
+        :param str block: The block, ending with a line separator unless
+         it is the last block of a file.
+        :return: An iterator of (start, end) indexes of matching lines,
+         ends excluding line separators.
+        :rtype: Iterator[Tuple[int, int]]
+        """
+
+        position = 0
+        while (start := self._find(block, position)) >= 0:
+            line_start = block.rfind(self._line_separator, 0, start) + 1
+            line_end = block.find(self._line_separator, start)
+            if line_end < 0:
+                yield line_start, len(block)
+                return
+            yield line_start, line_end
+            position = line_end + 1
+
+    def _find(self, block: str, position: int) -> int:
+        if self._literal is not None:
+            return block.find(self._literal, position)
+        assert self._regex is not None
+        match = self._regex.search(block, position)
+        return match.start() if match else -1
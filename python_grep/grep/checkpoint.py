@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Generator, Optional, Set, Tuple, Union
+
+from python_grep.grep.base import ICheckpoint
+from python_grep.storage.base import IFileReader, InputType
+
+DEFAULT_PROGRESS_INTERVAL = 1.0
+DEFAULT_PROGRESS_LINES = 1000
+
+QUERY_RECORD = "Q"
+FILE_RECORD = "F"
+OFFSET_RECORD = "O"
+COMPLETED_RECORD = "C"
+
+
+class Checkpoint(ICheckpoint):
+    """
+    A checkpoint journal stored in a plain text file.
+
+    The journal is a sequence of one line records: the search query,
+    the start of a file, an offset the current file can be resumed from
+    and the completion of the current file. Standard output is flushed
+    right before each record is appended, so a record never precedes
+    output it does not cover. Progress offsets are recorded at most once
+    per a number of lines or an interval, the latest one when
+    the journal is closed, so output is not flushed line by line.
+    A resumed run continues behind the last recorded offset, emitting
+    again lines a killed run emitted after it. An offset recorded right
+    before the output line preceding it is emitted loses that line
+    instead, if the run is killed in between. A journal written for
+    another query is not resumed. When resuming, the journal is
+    compacted first.
+
+    :param Path journal_path: The path to the journal file.
+    :param str query_key: The key identifying the search query.
+    :param bool resume: Whether to resume the scan recorded in an existing
+     journal. Otherwise the journal is started anew.
+    :param float progress_interval: Interval in seconds after which
+     progress is recorded, unless progress_lines were reported earlier.
+    :param int progress_lines: Number of progress reports after which
+     progress is recorded, unless progress_interval elapsed earlier.
+    """
+
+    def __init__(
+        self,
+        journal_path: Path,
+        query_key: str,
+        resume: bool = False,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        progress_lines: int = DEFAULT_PROGRESS_LINES,
+    ) -> None:
+        self._journal_path = journal_path
+        self._query_key = query_key
+        self._progress_interval = progress_interval
+        self._progress_lines = progress_lines
+        self._completed_paths: Set[str] = set()
+        self._resume_path: Optional[str] = None
+        self._resume_offset = 0
+        self._current_path: Optional[str] = None
+        self._last_offset = 0
+        self._last_record_time = time.monotonic()
+        # The latest progress offset and the number of progress reports
+        # since the last record.
+        self._progress_offset = 0
+        self._progress_count = 0
+        self._fd: Optional[int] = None
+        if resume:
+            self._load()
+        self._create_journal()
+
+    def is_completed(self, path: Path) -> bool:
+        return str(path) in self._completed_paths
+
+    def get_resume_offset(self, path: Path) -> int:
+        return self._resume_offset if str(path) == self._resume_path else 0
+
+    def start_file(self, path: Path) -> None:
+        self._current_path = str(path)
+        self._last_offset = 0
+        self._progress_offset = 0
+        self._write(FILE_RECORD, json.dumps(self._current_path))
+        self.record_offset(self.get_resume_offset(path))
+
+    def record_offset(self, offset: int) -> None:
+        if self._current_path is None or offset <= self._last_offset:
+            return
+        self._last_offset = offset
+        self._last_record_time = time.monotonic()
+        self._progress_count = 0
+        self._write(OFFSET_RECORD, str(offset))
+
+    def record_progress(self, offset: int) -> None:
+        self._progress_offset = max(self._progress_offset, offset)
+        self._progress_count += 1
+        if (
+            self._progress_count >= self._progress_lines
+            or time.monotonic() - self._last_record_time
+            >= self._progress_interval
+        ):
+            self.record_offset(self._progress_offset)
+
+    def complete_file(self) -> None:
+        if self._current_path is None:
+            return
+        self._completed_paths.add(self._current_path)
+        self._current_path = None
+        self._write(COMPLETED_RECORD)
+
+    def close(self) -> None:
+        if self._progress_offset > self._last_offset:
+            self.record_offset(self._progress_offset)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _load(self) -> None:
+        try:
+            records = self._journal_path.read_text().split("\n")
+        except FileNotFoundError:
+            return
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"grep: cannot resume from checkpoint: {e}")
+            return
+        # The last element is either empty or a record torn by a crash.
+        records.pop()
+        if not records or records[0] != self._format_record(
+            QUERY_RECORD, self._query_key
+        ):
+            print(
+                f"grep: checkpoint {self._journal_path} was written "
+                f"for another search, starting over"
+            )
+            return
+
+        current_path, offset = None, 0
+        try:
+            for record in records[1:]:
+                kind, _, value = record.partition(" ")
+                if kind == FILE_RECORD:
+                    current_path, offset = json.loads(value), 0
+                elif kind == OFFSET_RECORD:
+                    offset = int(value)
+                elif kind == COMPLETED_RECORD and current_path is not None:
+                    self._completed_paths.add(current_path)
+                    current_path = None
+        except ValueError as e:
+            print(f"grep: cannot resume from checkpoint: {e}")
+            self._completed_paths.clear()
+            return
+        if current_path is not None and offset:
+            self._resume_path, self._resume_offset = current_path, offset
+
+    def _create_journal(self) -> None:
+        records = [self._format_record(QUERY_RECORD, self._query_key)]
+        for path in sorted(self._completed_paths):
+            records.append(self._format_record(FILE_RECORD, json.dumps(path)))
+            records.append(self._format_record(COMPLETED_RECORD))
+        if self._resume_path is not None:
+            records.append(
+                self._format_record(FILE_RECORD, json.dumps(self._resume_path))
+            )
+            records.append(
+                self._format_record(OFFSET_RECORD, str(self._resume_offset))
+            )
+        temporary_path = self._journal_path.with_name(
+            self._journal_path.name + ".tmp"
+        )
+        try:
+            temporary_path.write_text(
+                "".join(f"{record}\n" for record in records)
+            )
+            os.replace(temporary_path, self._journal_path)
+            self._fd = os.open(self._journal_path, os.O_WRONLY | os.O_APPEND)
+        except OSError as e:
+            self._disable(e)
+
+    def _write(self, kind: str, value: str = "") -> None:
+        if self._fd is None:
+            return
+        try:
+            sys.stdout.flush()
+            os.write(
+                self._fd, f"{self._format_record(kind, value)}\n".encode()
+            )
+        except OSError as e:
+            self._disable(e)
+
+    def _disable(self, error: Exception) -> None:
+        print(f"grep: checkpoint disabled: {error}")
+        self.close()
+
+    @staticmethod
+    def _format_record(kind: str, value: str = "") -> str:
+        return f"{kind} {value}" if value else kind
+
+
+class CheckpointFileReader(IFileReader):
+    """
+    Decorates a file reader with checkpoint support. Reading a file
+    a previous run stopped in continues at the recorded offset, and
+    offsets of read lines are recorded as progress of the scan.
+
+    Every line preceding a read line has to be processed and its output
+    emitted by then, so processors reading lines through it have to
+    match them one at a time rather than in batches.
+
+    :param IFileReader file_reader: The decorated file reader.
+    :param ICheckpoint checkpoint: The checkpoint journal.
+    """
+
+    def __init__(
+        self, file_reader: IFileReader, checkpoint: ICheckpoint
+    ) -> None:
+        self._file_reader = file_reader
+        self._checkpoint = checkpoint
+
+    def read_lines(
+        self, path: Path
+    ) -> Generator[Union[str, bytes], None, None]:
+        yield from self._file_reader.read_lines(path)
+
+    def read_lines_with_offsets(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        if start_offset is None:
+            start_offset = self._checkpoint.get_resume_offset(path) or None
+        for offset, line in self._file_reader.read_lines_with_offsets(
+            path, start_offset
+        ):
+            self._checkpoint.record_progress(offset)
+            yield offset, line
+
+    def read_blocks(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        # Blocks are read by processors consuming whole files, so they
+        # are not resumed in the middle.
+        yield from self._file_reader.read_blocks(path, start_offset)
+
+    def count_newlines(self, path: Path, end_offset: int) -> int:
+        return self._file_reader.count_newlines(path, end_offset)
+
+    def find_line_offset(self, path: Path, line_number: int) -> Optional[int]:
+        return self._file_reader.find_line_offset(path, line_number)
+
+    def before_file_traverse_hook(
+        self, callback: Callable[[InputType], None]
+    ) -> None:
+        self._file_reader.before_file_traverse_hook(callback)
@@ -2,7 +2,13 @@ from __future__ import annotations
 
 from argparse import Namespace
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional, Tuple
+
+from python_grep.storage.line_window import DEFAULT_MAX_LINE_LENGTH
+
+DEFAULT_SPLIT_SIZE = 32 * 1024 * 1024
+DEFAULT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_REGEX_ENGINE = "auto"
 
 
 @dataclass(frozen=True)
@@ -12,6 +18,7 @@ class Context:
     pattern_matching_options: PatternMatchingOptions
     output_control_options: OutputControlOptions
     context_control_options: ContextControlOptions
+    input_control_options: InputControlOptions
 
     @classmethod
     def from_parsed_cli_args(cls, parsed_args: Namespace) -> Context:
@@ -30,6 +37,11 @@ class Context:
                 invert_match=parsed_args.invert_match,
                 word_regexp=parsed_args.word_regexp,
                 ignore_case=parsed_args.ignore_case,
+                line_regexp=parsed_args.line_regexp,
+                multiline=parsed_args.multiline,
+                multiline_dotall=parsed_args.multiline_dotall,
+                regex_engine=parsed_args.regex_engine,
+                null_data=parsed_args.null_data,
             ),
             output_control_options=OutputControlOptions(
                 count=parsed_args.count,
@@ -37,11 +49,39 @@ class Context:
                 line_number=parsed_args.line_number,
                 treat_binary_as_text=parsed_args.text,
                 color=parsed_args.color,
+                byte_offset=parsed_args.byte_offset,
+                json=parsed_args.json,
+                max_columns=parsed_args.max_columns,
             ),
             context_control_options=ContextControlOptions(
                 before_context=parsed_args.before_context,
                 after_context=parsed_args.after_context,
             ),
+            input_control_options=InputControlOptions(
+                from_offset=parsed_args.from_offset,
+                cache=parsed_args.cache,
+                jobs=parsed_args.jobs,
+                split_size=parsed_args.split_size,
+                follow=parsed_args.follow,
+                follow_interval=parsed_args.follow_interval,
+                checkpoint=parsed_args.checkpoint,
+                resume=parsed_args.resume,
+                null_data=parsed_args.null_data,
+                first_line=parsed_args.lines[0] if parsed_args.lines else 1,
+                last_line=parsed_args.lines[1] if parsed_args.lines else None,
+                line_index=parsed_args.line_index,
+                since=parsed_args.since,
+                until=parsed_args.until,
+                time_format=parsed_args.time_format,
+                max_line_length=parsed_args.max_line_length,
+                max_filesize=parsed_args.max_filesize,
+                file_types=tuple(parsed_args.file_types or ()),
+                newer_than=parsed_args.newer,
+                older_than=parsed_args.older,
+                skip_known_binary=parsed_args.skip_known_binary,
+                no_cache_pollution=parsed_args.no_cache_pollution,
+                time_budget=parsed_args.time_budget,
+            ),
         )
 
 
@@ -50,6 +90,13 @@ class PatternMatchingOptions:
     invert_match: bool
     word_regexp: bool
     ignore_case: bool
+    line_regexp: bool = False
+    multiline: bool = False
+    multiline_dotall: bool = False
+    regex_engine: str = DEFAULT_REGEX_ENGINE
+    # Binary input is matched in buffers of lines separated by NUL
+    # rather than newline characters.
+    null_data: bool = False
 
 
 @dataclass(frozen=True)
@@ -59,9 +106,62 @@ class OutputControlOptions:
     line_number: bool
     treat_binary_as_text: bool
     color: bool
+    byte_offset: bool = False
+    json: bool = False
+    max_columns: Optional[int] = None
+
+    @property
+    def requires_line_numbers(self) -> bool:
+        return self.line_number or self.json
 
 
 @dataclass(frozen=True)
 class ContextControlOptions:
     before_context: int
     after_context: int
+
+
+@dataclass(frozen=True)
+class InputControlOptions:
+    from_offset: int = 0
+    # None leaves the on-disk cache off, but uses one kept by the caller.
+    cache: Optional[bool] = None
+    jobs: int = 1
+    split_size: int = DEFAULT_SPLIT_SIZE
+    follow: bool = False
+    follow_interval: float = 1.0
+    checkpoint: Optional[str] = None
+    resume: bool = False
+    null_data: bool = False
+    first_line: int = 1
+    last_line: Optional[int] = None
+    line_index: bool = False
+    since: Optional[str] = None
+    until: Optional[str] = None
+    time_format: str = DEFAULT_TIME_FORMAT
+    max_line_length: Optional[int] = DEFAULT_MAX_LINE_LENGTH
+    max_filesize: Optional[int] = None
+    file_types: Tuple[str, ...] = ()
+    newer_than: Optional[float] = None
+    older_than: Optional[float] = None
+    skip_known_binary: bool = False
+    no_cache_pollution: bool = False
+    time_budget: Optional[float] = None
+
+    @property
+    def selects_lines(self) -> bool:
+        return self.first_line > 1 or self.last_line is not None
+
+    @property
+    def selects_time_range(self) -> bool:
+        return self.since is not None or self.until is not None
+
+    @property
+    def filters_paths(self) -> bool:
+        return (
+            self.max_filesize is not None
+            or bool(self.file_types)
+            or self.newer_than is not None
+            or self.older_than is not None
+            or self.skip_known_binary
+        )
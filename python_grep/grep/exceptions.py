@@ -1,2 +1,10 @@
 class SuppressBinaryOutputError(Exception):
     pass
+
+
+class LineTooLongError(Exception):
+    pass
+
+
+class TimeBudgetExceededError(Exception):
+    pass
@@ -1,60 +1,269 @@
 from __future__ import annotations
 
 from argparse import Namespace
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
-from python_grep.grep.context import Context
+from python_grep.grep.base import (
+    ICheckpoint,
+    IOutputMessageBuilder,
+    IResultCache,
+)
+from python_grep.grep.context import Context, InputControlOptions
 from python_grep.grep.grep import (
     AfterContextLineMatchGrep,
     BeforeContextLineMatchGrep,
     Grep,
     LineMatchCounterGrep,
     LineMatchGrep,
+    MultilineMatchGrep,
 )
 from python_grep.grep.input_processor import InputTypeToPatternMatcherMapping
-from python_grep.grep.output import OutputMessageBuilder
-from python_grep.match import BinaryPatternMatcher, TextPatternMatcher
-from python_grep.storage.base import InputType
-from python_grep.storage.file_reader import FileReader
+from python_grep.grep.output import (
+    JsonOutputMessageBuilder,
+    OutputMessageBuilder,
+)
+from python_grep.match import (
+    BinaryPatternMatcher,
+    IPatternMatcher,
+    TextPatternMatcher,
+)
+from python_grep.storage.base import (
+    IFileReader,
+    InputType,
+    IPathFilter,
+    IPathResolver,
+)
+from python_grep.storage.file_reader import NEWLINE, NUL, FileReader
+from python_grep.storage.path_filter import (
+    FILE_TYPES,
+    KNOWN_BINARY_EXTENSIONS,
+    ExtensionFilter,
+    FileSizeFilter,
+    FilteringPathResolver,
+    ModificationTimeFilter,
+)
 from python_grep.storage.path_resolver import PathResolver
 
+if TYPE_CHECKING:
+    from python_grep.storage.directory_cache import DirectoryCache
+
+MULTI_PATTERN_MATCHER_THRESHOLD = 32
+LINE_INDEX_DIR_NAME = "line_index"
+TRIE_REGEX_DIR_NAME = "trie_regex"
 
-def create_grep_from_cli_args(parsed_cli_args: Namespace) -> Grep:
+
+def create_grep_from_cli_args(
+    parsed_cli_args: Namespace,
+    result_cache: Optional[IResultCache] = None,
+    directory_cache: Optional[DirectoryCache] = None,
+) -> Grep:
     """
     Create a Grep instance based on the parsed command-line arguments.
 
     :param Namespace parsed_cli_args: Parsed command-line arguments
     as a Namespace object.
+    :param Optional[IResultCache] result_cache: A result cache to use
+    instead of opening the on-disk one, e.g. one kept open by a server.
+    It is used unless the cache is disabled explicitly.
+    :param Optional[DirectoryCache] directory_cache: An optional cache
+    of directory listings for recursive searches.
     :return: A Grep instance based on the provided command-line arguments.
     :rtype: Grep.
     """
 
+    # Modules serving only some modes are imported where those modes
+    # are set up, so a plain search does not pay for loading them.
     context = Context.from_parsed_cli_args(parsed_cli_args)
-    file_reader = FileReader()
-    path_resolver = PathResolver(
+    input_control_options = context.input_control_options
+    line_separator = NUL if input_control_options.null_data else NEWLINE
+    file_reader: IFileReader
+    if input_control_options.follow:
+        from python_grep.storage.follow_reader import FollowFileReader
+
+        file_reader = FollowFileReader(
+            start_offset=input_control_options.from_offset,
+            line_separator=line_separator,
+        )
+    else:
+        file_reader = FileReader(
+            start_offset=input_control_options.from_offset,
+            line_separator=line_separator,
+            # Multiline matches span lines, so they are read whole.
+            max_line_length=(
+                None
+                if context.pattern_matching_options.multiline
+                else input_control_options.max_line_length
+            ),
+            drop_cache=input_control_options.no_cache_pollution,
+        )
+    if input_control_options.line_index and not input_control_options.follow:
+        from python_grep.grep.result_cache import (
+            create_file_fingerprint,
+            get_default_cache_dir,
+        )
+        from python_grep.storage.line_index import (
+            IndexedFileReader,
+            LineIndexStore,
+        )
+
+        file_reader = IndexedFileReader(
+            file_reader,
+            LineIndexStore(
+                get_default_cache_dir() / LINE_INDEX_DIR_NAME,
+                create_file_fingerprint,
+                line_separator,
+            ),
+        )
+    if input_control_options.selects_time_range:
+        from python_grep.storage.time_range_reader import (
+            TimeRangeFileReader,
+            TimestampParser,
+        )
+
+        timestamp_parser = TimestampParser(input_control_options.time_format)
+        file_reader = TimeRangeFileReader(
+            file_reader,
+            timestamp_parser,
+            (
+                timestamp_parser.parse(input_control_options.since)
+                if input_control_options.since
+                else None
+            ),
+            (
+                timestamp_parser.parse(input_control_options.until)
+                if input_control_options.until
+                else None
+            ),
+            line_separator,
+        )
+    if input_control_options.selects_lines:
+        from python_grep.storage.line_range_reader import LineRangeFileReader
+
+        file_reader = LineRangeFileReader(
+            file_reader,
+            input_control_options.first_line,
+            input_control_options.last_line,
+            line_separator,
+        )
+    checkpoint: Optional[ICheckpoint] = None
+    if input_control_options.checkpoint:
+        from python_grep.grep.checkpoint import (
+            Checkpoint,
+            CheckpointFileReader,
+        )
+        from python_grep.grep.result_cache import create_query_key
+
+        checkpoint = Checkpoint(
+            Path(input_control_options.checkpoint),
+            create_query_key(
+                context,
+                "count" if context.output_control_options.count else "match",
+            ),
+            input_control_options.resume,
+        )
+        file_reader = CheckpointFileReader(file_reader, checkpoint)
+    path_resolver: IPathResolver = PathResolver(
         context.file_paths,
         context.output_control_options.recursive,
+        directory_cache=directory_cache,
     )
-    output_message_builder = OutputMessageBuilder(
-        context.output_control_options
-    )
-    text_pattern_matcher = TextPatternMatcher(
-        context.patterns, context.pattern_matching_options
-    )
-    binary_pattern_matcher = BinaryPatternMatcher(
-        context.patterns, context.pattern_matching_options
+    if input_control_options.filters_paths:
+        path_resolver = FilteringPathResolver(
+            path_resolver, create_path_filters(input_control_options)
+        )
+    line_terminator = "\0" if input_control_options.null_data else "\n"
+    output_message_builder: IOutputMessageBuilder = (
+        JsonOutputMessageBuilder(
+            context.output_control_options, line_separator=line_terminator
+        )
+        if context.output_control_options.json
+        else OutputMessageBuilder(
+            context.output_control_options, line_terminator
+        )
     )
+    text_pattern_matcher: IPatternMatcher
+    binary_pattern_matcher: IPatternMatcher
+    if len(context.patterns) >= MULTI_PATTERN_MATCHER_THRESHOLD:
+        from python_grep.match.multi_pattern_matcher import (
+            BinaryMultiPatternMatcher,
+            TextMultiPatternMatcher,
+            TrieRegexCache,
+        )
+
+        trie_regex_cache: Optional[TrieRegexCache] = None
+        if input_control_options.cache:
+            from python_grep.grep.result_cache import get_default_cache_dir
+
+            trie_regex_cache = TrieRegexCache(
+                get_default_cache_dir() / TRIE_REGEX_DIR_NAME
+            )
+        text_pattern_matcher = TextMultiPatternMatcher(
+            context.patterns,
+            context.pattern_matching_options,
+            trie_regex_cache,
+        )
+        binary_pattern_matcher = BinaryMultiPatternMatcher(
+            context.patterns,
+            context.pattern_matching_options,
+            trie_regex_cache,
+        )
+    else:
+        trie_regex_cache = None
+        text_pattern_matcher = TextPatternMatcher(
+            context.patterns, context.pattern_matching_options
+        )
+        binary_pattern_matcher = BinaryPatternMatcher(
+            context.patterns, context.pattern_matching_options
+        )
     file_type_to_pattern_matcher_map: InputTypeToPatternMatcherMapping = {
         InputType.TEXT: text_pattern_matcher,
         InputType.BINARY: binary_pattern_matcher,
     }
+    if (
+        input_control_options.cache is False
+        or input_control_options.follow
+        or checkpoint is not None
+    ):
+        result_cache = None
+    elif result_cache is None and input_control_options.cache:
+        from python_grep.grep.result_cache import (
+            ResultCache,
+            get_default_cache_dir,
+        )
 
-    if context.output_control_options.count:
+        result_cache = ResultCache(get_default_cache_dir())
+    follow_interval = (
+        input_control_options.follow_interval
+        if input_control_options.follow
+        else None
+    )
+
+    if context.pattern_matching_options.multiline:
+        return MultilineMatchGrep(
+            file_reader,
+            path_resolver,
+            output_message_builder,
+            file_type_to_pattern_matcher_map,
+            context,
+            result_cache,
+            follow_interval,
+            checkpoint,
+            line_terminator,
+            trie_regex_cache,
+        )
+    elif context.output_control_options.count:
         return LineMatchCounterGrep(
             file_reader,
             path_resolver,
             output_message_builder,
             file_type_to_pattern_matcher_map,
             context,
+            result_cache,
+            follow_interval,
+            checkpoint,
+            line_terminator,
+            trie_regex_cache,
         )
     elif context.context_control_options.before_context:
         return BeforeContextLineMatchGrep(
@@ -63,6 +272,11 @@ def create_grep_from_cli_args(parsed_cli_args: Namespace) -> Grep:
             output_message_builder,
             file_type_to_pattern_matcher_map,
             context,
+            result_cache,
+            follow_interval,
+            checkpoint,
+            line_terminator,
+            trie_regex_cache,
         )
     elif context.context_control_options.after_context:
         return AfterContextLineMatchGrep(
@@ -71,6 +285,11 @@ def create_grep_from_cli_args(parsed_cli_args: Namespace) -> Grep:
             output_message_builder,
             file_type_to_pattern_matcher_map,
             context,
+            result_cache,
+            follow_interval,
+            checkpoint,
+            line_terminator,
+            trie_regex_cache,
         )
     else:
         return LineMatchGrep(
@@ -79,4 +298,49 @@ def create_grep_from_cli_args(parsed_cli_args: Namespace) -> Grep:
             output_message_builder,
             file_type_to_pattern_matcher_map,
             context,
+            result_cache,
+            follow_interval,
+            checkpoint,
+            line_terminator,
+            trie_regex_cache,
+        )
+
+
+def create_path_filters(
+    input_control_options: InputControlOptions,
+) -> List[IPathFilter]:
+    """
+    Create filters selecting files to search before they are opened.
+
+    :param InputControlOptions input_control_options: The input control
+     options.
+    :return: The filters, cheapest first.
+    :rtype: List[IPathFilter]
+    """
+
+    path_filters: List[IPathFilter] = []
+    if input_control_options.file_types:
+        path_filters.append(
+            ExtensionFilter(
+                extension
+                for file_type in input_control_options.file_types
+                for extension in FILE_TYPES[file_type]
+            )
+        )
+    if input_control_options.skip_known_binary:
+        path_filters.append(
+            ExtensionFilter(KNOWN_BINARY_EXTENSIONS, exclude=True)
+        )
+    if input_control_options.max_filesize is not None:
+        path_filters.append(FileSizeFilter(input_control_options.max_filesize))
+    if (
+        input_control_options.newer_than is not None
+        or input_control_options.older_than is not None
+    ):
+        path_filters.append(
+            ModificationTimeFilter(
+                input_control_options.newer_than,
+                input_control_options.older_than,
+            )
         )
+    return path_filters
@@ -1,22 +1,49 @@
 from __future__ import annotations
 
+import sys
+import time
 from abc import ABC, abstractmethod
+from dataclasses import replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
 
 from python_grep.grep.base import (
+    ICheckpoint,
     ICommand,
     IInputProcessor,
     IOutputMessageBuilder,
+    IResultCache,
 )
 from python_grep.grep.context import Context
-from python_grep.grep.exceptions import SuppressBinaryOutputError
+from python_grep.grep.exceptions import (
+    SuppressBinaryOutputError,
+    TimeBudgetExceededError,
+)
 from python_grep.grep.input_processor import (
+    MATCH_BATCH_SIZE,
     AfterContextLineMatchProcessor,
     BeforeContextLineMatchProcessor,
+    CachingInputProcessor,
     InputTypeToPatternMatcherMapping,
+    InvertMatchProcessor,
     LineMatchCounterProcessor,
     LineMatchProcessor,
+    MultilineMatchProcessor,
 )
-from python_grep.storage.base import IFileReader, IPathResolver
+from python_grep.grep.time_budget import time_budget
+from python_grep.storage.base import IFileReader, InputType, IPathResolver
+from python_grep.storage.io_hints import PrefetchingPathResolver
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from python_grep.grep.bulk_line_matcher import BulkLineMatcher
+    from python_grep.grep.parallel import RangeScanOptions
+    from python_grep.match.multi_pattern_matcher import TrieRegexCache
+
+# Minimum interval between resolving paths of followed files again, which
+# walks directories searched recursively, in seconds.
+FOLLOW_RESOLVE_INTERVAL = 5.0
 
 
 class Grep(ICommand, ABC):
@@ -31,6 +58,15 @@ class Grep(ICommand, ABC):
     Mapping of input types to pattern matchers.
     :param Context context: The context object containing options and
     controls for grep.
+    :param Optional[IResultCache] result_cache: An optional cache of
+    processing outputs.
+    :param Optional[float] follow_interval: If given, files are processed
+    again every follow_interval seconds, until interrupted.
+    :param Optional[ICheckpoint] checkpoint: An optional journal of
+    the scan progress. Files it records as completed are skipped.
+    :param str line_terminator: The string terminating output lines.
+    :param Optional[TrieRegexCache] trie_regex_cache: An optional cache
+    of regexes built of large sets of literal patterns.
     """
 
     def __init__(
@@ -40,6 +76,11 @@ class Grep(ICommand, ABC):
         output_message_builder: IOutputMessageBuilder,
         file_type_to_pattern_matcher_map: InputTypeToPatternMatcherMapping,
         context: Context,
+        result_cache: Optional[IResultCache] = None,
+        follow_interval: Optional[float] = None,
+        checkpoint: Optional[ICheckpoint] = None,
+        line_terminator: str = "\n",
+        trie_regex_cache: Optional[TrieRegexCache] = None,
     ) -> None:
         self._file_reader = file_reader
         self._path_resolver = path_resolver
@@ -48,65 +89,415 @@ class Grep(ICommand, ABC):
             file_type_to_pattern_matcher_map
         )
         self._context = context
+        self._result_cache = result_cache
+        self._follow_interval = follow_interval
+        self._checkpoint = checkpoint
+        self._line_terminator = line_terminator
+        self._trie_regex_cache = trie_regex_cache
 
     def execute(self) -> None:
+        if (
+            self._context.input_control_options.jobs > 1
+            and self._follow_interval is None
+            and self._checkpoint is None
+        ):
+            self._schedule_paths()
+            return
+
         input_processor = self.create_input_processor()
-        for path in self._path_resolver.get_resolved_file_paths():
+        if self._follow_interval is None:
             try:
-                for result in input_processor.process(path):
-                    output_message = self._output_message_builder.create(
-                        result
+                self._process_paths(
+                    input_processor,
+                    self._get_prefetched_paths(
+                        input_processor
+                        if isinstance(input_processor, CachingInputProcessor)
+                        else None
+                    ),
+                )
+            finally:
+                if self._checkpoint:
+                    self._checkpoint.close()
+                if self._result_cache:
+                    self._result_cache.flush()
+            return
+
+        # Paths are resolved again once in a while, so files appearing
+        # are followed too. Paths which stop resolving are still polled,
+        # as lines might have been appended before they were removed.
+        paths: Dict[Path, None] = {}
+        next_resolve_time = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() >= next_resolve_time:
+                    paths.update(
+                        dict.fromkeys(
+                            self._path_resolver.get_resolved_file_paths()
+                        )
                     )
-                    print(output_message)
+                    next_resolve_time = (
+                        time.monotonic() + FOLLOW_RESOLVE_INTERVAL
+                    )
+                self._process_paths(input_processor, paths)
+                sys.stdout.flush()
+                time.sleep(self._follow_interval)
+        except KeyboardInterrupt:
+            pass
+
+    def _process_paths(
+        self, input_processor: IInputProcessor, paths: Iterable[Path]
+    ) -> None:
+        seconds = self._context.input_control_options.time_budget
+        for path in paths:
+            if self._checkpoint:
+                if self._checkpoint.is_completed(path):
+                    continue
+                self._checkpoint.start_file(path)
+            try:
+                with time_budget(seconds):
+                    for result in input_processor.process(path):
+                        output_message = self._output_message_builder.create(
+                            result
+                        )
+                        if self._checkpoint:
+                            self._checkpoint.record_progress(
+                                result.byte_offset + 1
+                            )
+                        print(output_message, end=self._line_terminator)
             except SuppressBinaryOutputError:
                 print(f"Binary file {path} matches")
+            except TimeBudgetExceededError as error:
+                print(f"grep: {path}: {error}")
+            if self._checkpoint:
+                self._checkpoint.complete_file()
+
+    def _get_prefetched_paths(
+        self,
+        caching_input_processor: Optional[CachingInputProcessor] = None,
+    ) -> Iterable[Path]:
+        """
+        Resolve paths of files to search, prefetching the next file
+        while one is searched.
+
+        :param Optional[CachingInputProcessor] caching_input_processor:
+         The result cache, if any. Files answered from it are not read,
+         so they are not prefetched either.
+        :return: The resolved paths.
+        :rtype: Iterable[Path]
+        """
+
+        return PrefetchingPathResolver(
+            self._path_resolver,
+            needs_reading=(
+                caching_input_processor.needs_reading
+                if caching_input_processor
+                else None
+            ),
+        ).get_resolved_file_paths()
+
+    def _schedule_paths(self) -> None:
+        # Imported here, as it pulls in the parallel processing modules.
+        from python_grep.grep.scheduler import FileScheduler, FileSearcher
+
+        input_control_options = self._context.input_control_options
+        sequential_input_processor = self._create_input_processor()
+        with FileScheduler(
+            # Workers share the sequential processor, which the file reader
+            # reports input types of searched files to.
+            FileSearcher(
+                sequential_input_processor,
+                self._output_message_builder,
+                self._line_terminator,
+                input_control_options.time_budget,
+            ),
+            self._file_type_to_pattern_matcher_map[InputType.TEXT],
+            input_control_options.jobs,
+            2 * input_control_options.split_size,
+        ) as scheduler:
+            input_processor = self._add_parallelism(
+                sequential_input_processor, scheduler.executor
+            )
+            caching_input_processor = (
+                self._add_result_cache(input_processor)
+                if self._result_cache
+                else None
+            )
+            try:
+                scheduler.run(
+                    self._get_prefetched_paths(caching_input_processor),
+                    caching_input_processor or input_processor,
+                    caching_input_processor,
+                )
+            finally:
+                if self._result_cache:
+                    self._result_cache.flush()
 
-    @abstractmethod
     def create_input_processor(self) -> IInputProcessor:
         """
-        Create an input processor for the grep command.
+        Create an input processor for the grep command, decorated
+        according to the input control options.
+
+        :return: An instance of the input processor.
+        :rtype: IInputProcessor.
+        """
+
+        input_processor = self._add_parallelism(self._create_input_processor())
+        if self._result_cache:
+            input_processor = self._add_result_cache(input_processor)
+        return input_processor
+
+    def _add_parallelism(
+        self,
+        input_processor: IInputProcessor,
+        executor: Optional[Executor] = None,
+    ) -> IInputProcessor:
+        """
+        Decorate an input processor to scan large files in parallel, if
+        the command and the input control options allow.
+
+        :param IInputProcessor input_processor: The sequential processor.
+        :param Optional[Executor] executor: A pool of processes to scan
+         ranges in, instead of starting one per file.
+        :return: The decorated or the given input processor.
+        :rtype: IInputProcessor
+        """
+
+        input_control_options = self._context.input_control_options
+        range_scan_options = (
+            self._create_range_scan_options()
+            if input_control_options.jobs > 1
+            else None
+        )
+        if (
+            range_scan_options is not None
+            and self._follow_interval is None
+            and self._checkpoint is None
+            and not input_control_options.null_data
+            and not input_control_options.selects_lines
+            and not input_control_options.selects_time_range
+        ):
+            from python_grep.grep.parallel import (
+                ParallelInputProcessor,
+                RecordOutputOptions,
+            )
+
+            output_control_options = self._context.output_control_options
+            # Lines are written as read only when output messages would
+            # hold them unchanged, and are not needed as outputs by
+            # the result cache.
+            record_output = (
+                None
+                if self._result_cache is not None
+                or output_control_options.json
+                or output_control_options.color
+                or output_control_options.max_columns
+                else RecordOutputOptions(
+                    output_control_options.line_number,
+                    output_control_options.byte_offset,
+                )
+            )
+            input_processor = ParallelInputProcessor(
+                input_processor,
+                self._file_reader,
+                self._file_type_to_pattern_matcher_map[InputType.TEXT],
+                replace(
+                    range_scan_options,
+                    max_line_length=input_control_options.max_line_length,
+                    drop_cache=input_control_options.no_cache_pollution,
+                    time_budget=input_control_options.time_budget,
+                ),
+                input_control_options.jobs,
+                input_control_options.split_size,
+                self._context.output_control_options.requires_line_numbers,
+                input_control_options.from_offset,
+                executor,
+                record_output,
+            )
+        return input_processor
+
+    def _add_result_cache(
+        self, input_processor: IInputProcessor
+    ) -> CachingInputProcessor:
+        """
+        Decorate an input processor with the result cache.
+
+        :param IInputProcessor input_processor: The decorated processor.
+        :return: The caching input processor.
+        :rtype: CachingInputProcessor
+        """
+
+        # Imported here, as it loads sqlite3 and hashlib, which
+        # searches run without the cache do not need.
+        from python_grep.grep.result_cache import (
+            create_file_fingerprint,
+            create_query_key,
+        )
+
+        assert self._result_cache is not None
+        return CachingInputProcessor(
+            input_processor,
+            self._result_cache,
+            create_query_key(self._context, type(self).__name__),
+            create_file_fingerprint,
+        )
+
+    @abstractmethod
+    def _create_input_processor(self) -> IInputProcessor:
+        """
+        Create the sequential input processor of the grep command.
 
         :return: An instance of the input processor.
         :rtype: IInputProcessor.
         """
         pass
 
+    def _create_range_scan_options(self) -> Optional[RangeScanOptions]:
+        """
+        Create options for scanning byte ranges of a file in parallel.
+
+        :return: The options or None if the command cannot be run over
+         separate byte ranges.
+        :rtype: Optional[RangeScanOptions]
+        """
+
+        from python_grep.grep.parallel import RangeScanOptions
+
+        return RangeScanOptions()
+
+    def _create_bulk_line_matcher(self) -> Optional[BulkLineMatcher]:
+        """
+        Create a matcher locating lines in blocks, if the patterns allow.
+
+        :return: The matcher or None if the patterns are not literals.
+        :rtype: Optional[BulkLineMatcher]
+        """
+
+        from python_grep.grep.bulk_line_matcher import BulkLineMatcher
+
+        if not BulkLineMatcher.supports(
+            self._context.patterns,
+            self._context.pattern_matching_options,
+            self._line_terminator,
+        ):
+            return None
+        return BulkLineMatcher(
+            self._context.patterns,
+            self._context.pattern_matching_options,
+            self._line_terminator,
+            self._trie_regex_cache,
+        )
+
+    def _get_match_batch_size(self) -> int:
+        """
+        Get the number of lines input processors match at once. Progress
+        of a checkpointed scan is recorded as lines are read, so lines
+        must not be read ahead of the outputs covering them.
+
+        :return: The match batch size.
+        :rtype: int
+        """
+
+        return 1 if self._checkpoint is not None else MATCH_BATCH_SIZE
+
 
 class LineMatchGrep(Grep):
-    """A grep for line matching"""
+    """
+    A grep for line matching. Lines are selected in bulk, matching lines
+    of literal patterns and non-matching lines of any patterns, unless
+    files are followed or checkpointed, which requires reading them line
+    by line.
+    """
 
-    def create_input_processor(self) -> IInputProcessor:
-        return LineMatchProcessor(
-            self._file_reader, self._file_type_to_pattern_matcher_map
+    def _create_input_processor(self) -> IInputProcessor:
+        if self._follow_interval is not None or self._checkpoint is not None:
+            return LineMatchProcessor(
+                self._file_reader,
+                self._file_type_to_pattern_matcher_map,
+                self._context.output_control_options.requires_line_numbers,
+                match_batch_size=self._get_match_batch_size(),
+            )
+        processor_type = (
+            InvertMatchProcessor
+            if self._context.pattern_matching_options.invert_match
+            else LineMatchProcessor
+        )
+        return processor_type(
+            self._file_reader,
+            self._file_type_to_pattern_matcher_map,
+            self._context.output_control_options.requires_line_numbers,
+            self._create_bulk_line_matcher(),
+            self._line_terminator,
+            max_line_length=(
+                self._context.input_control_options.max_line_length
+            ),
         )
 
 
 class LineMatchCounterGrep(Grep):
     """A grep command for line match counting."""
 
-    def create_input_processor(self) -> IInputProcessor:
+    def _create_range_scan_options(self) -> RangeScanOptions:
+        from python_grep.grep.parallel import RangeScanOptions
+
+        return RangeScanOptions(count=True)
+
+    def _create_input_processor(self) -> IInputProcessor:
         return LineMatchCounterProcessor(
-            self._file_reader, self._file_type_to_pattern_matcher_map
+            self._file_reader,
+            self._file_type_to_pattern_matcher_map,
+            self._create_bulk_line_matcher(),
         )
 
 
 class BeforeContextLineMatchGrep(Grep):
     """A grep command for before context line matching."""
 
-    def create_input_processor(self) -> IInputProcessor:
+    def _create_range_scan_options(self) -> RangeScanOptions:
+        from python_grep.grep.parallel import RangeScanOptions
+
+        return RangeScanOptions(
+            before_context=self._context.context_control_options.before_context
+        )
+
+    def _create_input_processor(self) -> IInputProcessor:
         return BeforeContextLineMatchProcessor(
             self._file_reader,
             self._file_type_to_pattern_matcher_map,
             self._context.context_control_options,
+            self._context.output_control_options.requires_line_numbers,
+            self._get_match_batch_size(),
         )
 
 
 class AfterContextLineMatchGrep(Grep):
     """A grep command for after context line matching."""
 
-    def create_input_processor(self) -> IInputProcessor:
+    def _create_range_scan_options(self) -> RangeScanOptions:
+        from python_grep.grep.parallel import RangeScanOptions
+
+        return RangeScanOptions(
+            after_context=self._context.context_control_options.after_context
+        )
+
+    def _create_input_processor(self) -> IInputProcessor:
         return AfterContextLineMatchProcessor(
             self._file_reader,
             self._file_type_to_pattern_matcher_map,
             self._context.context_control_options,
+            self._context.output_control_options.requires_line_numbers,
+            self._get_match_batch_size(),
+        )
+
+
+class MultilineMatchGrep(Grep):
+    """A grep command for matches spanning several lines."""
+
+    def _create_range_scan_options(self) -> Optional[RangeScanOptions]:
+        return None
+
+    def _create_input_processor(self) -> IInputProcessor:
+        return MultilineMatchProcessor(
+            self._file_reader,
+            self._file_type_to_pattern_matcher_map,
+            self._context.output_control_options.requires_line_numbers,
         )
@@ -1,16 +1,46 @@
 from __future__ import annotations
 
+import os
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from itertools import chain
 from pathlib import Path
 from queue import Full, Queue
-from typing import Dict, Generator, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-from python_grep.grep.base import IInputProcessor, ProcessingOutput
+from python_grep.grep.base import (
+    IInputProcessor,
+    IResultCache,
+    ProcessingOutput,
+)
 from python_grep.grep.context import ContextControlOptions
-from python_grep.match import IPatternMatcher
-from python_grep.storage import IFileReader, InputType
+from python_grep.grep.line_counter import LineCounter
+from python_grep.match import IPatternMatcher, MatchPosition
+from python_grep.storage import DEFAULT_ENCODING, IFileReader, InputType
+from python_grep.storage.line_window import LongLine
+
+if TYPE_CHECKING:
+    from python_grep.grep.bulk_line_matcher import BulkLineMatcher
 
 InputTypeToPatternMatcherMapping = Dict[InputType, IPatternMatcher]
+NumberedLine = Tuple[Optional[int], int, Union[str, bytes]]
+T = TypeVar("T")
+
+MULTILINE_LOOKAHEAD = 64 * 1024
+MATCH_BATCH_SIZE = 4096
 
 
 class InputProcessorTemplate(IInputProcessor):
@@ -22,11 +52,26 @@ class InputProcessorTemplate(IInputProcessor):
     :param InputTypeToPatternMatcherMapping pattern_matcher_map:
      A dictionary mapping
     InputType to IPatternMatcher.
+    :param bool line_numbering: Whether line numbers should be tracked.
+     When disabled, no newline counting takes place and outputs carry
+     no line number.
+    :param int match_batch_size: The maximum number of lines matched
+     at once. Lines are read ahead of the outputs by up to a batch.
+
+    Lines read as LongLine instances are matched window by window and
+    represented by a single window, see _select_window. Lines read line
+    by line are matched in batches, see _iter_batches.
     """
 
     def __init__(
-        self, file_reader: IFileReader, pattern_matcher_map: Dict
+        self,
+        file_reader: IFileReader,
+        pattern_matcher_map: Dict,
+        line_numbering: bool = True,
+        match_batch_size: int = MATCH_BATCH_SIZE,
     ) -> None:
+        self._line_numbering = line_numbering
+        self._match_batch_size = match_batch_size
         self._pattern_matcher_map = pattern_matcher_map
         self._input_type = InputType.TEXT
         self._pattern_matcher = self._pattern_matcher_map[InputType.TEXT]
@@ -45,6 +90,94 @@ class InputProcessorTemplate(IInputProcessor):
     def _process(self, path: Path) -> Generator[ProcessingOutput, None, None]:
         pass
 
+    def _read_numbered_lines(
+        self, path: Path
+    ) -> Generator[NumberedLine, None, None]:
+        lines = self._file_reader.read_lines_with_offsets(path)
+        if not self._line_numbering:
+            for offset, line in lines:
+                if isinstance(line, LongLine):
+                    line = self._select_window(line)
+                yield None, offset, line
+            return
+
+        line_counter: Optional[LineCounter] = None
+        for offset, line in lines:
+            if isinstance(line, LongLine):
+                line = self._select_window(line)
+            if line_counter is None:
+                line_counter = LineCounter(
+                    self._get_first_line_number(path, offset)
+                )
+            yield line_counter.line_number, offset, line
+            if isinstance(line, bytes):
+                line_counter.count_buffer(line)
+            else:
+                line_counter.count_line()
+
+    def _iter_batches(
+        self, items: Iterable[T]
+    ) -> Generator[Tuple[InputType, List[T]], None, None]:
+        """
+        Collect items read from a file, such as lines, into batches of up
+        to the match batch size, so pattern matchers match a batch at
+        once instead of being called for every line.
+
+        The file reader switches to binary input when a file turns out
+        not to be decodable, so a batch is closed once the input type
+        changes and comes with the input type of its items.
+
+        :param Iterable[T] items: The items, read lazily.
+        :return: An iterator of input types with batches.
+        :rtype: Generator[Tuple[InputType, List[T]], None, None]
+        """
+
+        input_type = self._input_type
+        batch: List[T] = []
+        for item in items:
+            if self._input_type != input_type or len(batch) == (
+                self._match_batch_size
+            ):
+                if batch:
+                    yield input_type, batch
+                input_type = self._input_type
+                batch = []
+            batch.append(item)
+        if batch:
+            yield input_type, batch
+
+    def _select_window(self, line: LongLine) -> str:
+        """
+        Select the window standing in for a long line: the first one
+        the patterns match in or, if there is none, the first one.
+
+        Matching the selected window thus tells whether the line matches,
+        also when the match is inverted. A match starting in the overlap
+        at the end of a window is left to the next one, which holds it
+        whole if it is shorter than the overlap.
+
+        :param LongLine line: The line.
+        :return: The selected window.
+        :rtype: str
+        """
+
+        first_window: Optional[str] = None
+        for window, is_last in line.iter_windows():
+            if first_window is None:
+                first_window = window
+            accepted_end = (
+                len(window) if is_last else len(window) - line.overlap
+            )
+            match = next(self._pattern_matcher.iter_matches(window), None)
+            if match is not None and match.start < accepted_end:
+                return window
+        return first_window or ""
+
+    def _get_first_line_number(self, path: Path, offset: int) -> int:
+        return (
+            1 + self._file_reader.count_newlines(path, offset) if offset else 1
+        )
+
     def _switch_input_type(self, input_type: InputType) -> None:
         if input_type != self._input_type:
             self._pattern_matcher = self._pattern_matcher_map[input_type]
@@ -52,28 +185,455 @@ class InputProcessorTemplate(IInputProcessor):
 
 
 class LineMatchProcessor(InputProcessorTemplate):
-    """Processor for finding matching lines."""
+    """
+    Processor for finding matching lines.
+
+    If a BulkLineMatcher is given, text files are read in blocks of whole
+    lines and the matching lines of a block are located first, so only
+    they are split off and matched on their own. Binary files and files
+    from their first block holding a long line on are processed line by
+    line.
+
+    :param IFileReader file_reader: An instance of IFileReader
+     for reading files.
+    :param InputTypeToPatternMatcherMapping pattern_matcher_map:
+     A dictionary mapping InputType to IPatternMatcher.
+    :param bool line_numbering: Whether line numbers should be tracked.
+    :param Optional[BulkLineMatcher] bulk_line_matcher: An optional
+     matcher locating matching lines within blocks.
+    :param str line_separator: The character separating lines.
+    :param str encoding: Encoding used to compute byte offsets of lines.
+    :param Optional[int] max_line_length: The number of bytes lines
+     longer than which the file reader reads in windows, or None.
+    :param int match_batch_size: The maximum number of lines matched
+     at once.
+    """
+
+    def __init__(
+        self,
+        file_reader: IFileReader,
+        pattern_matcher_map: Dict,
+        line_numbering: bool = True,
+        bulk_line_matcher: Optional[BulkLineMatcher] = None,
+        line_separator: str = "\n",
+        encoding: str = DEFAULT_ENCODING,
+        max_line_length: Optional[int] = None,
+        match_batch_size: int = MATCH_BATCH_SIZE,
+    ) -> None:
+        super().__init__(
+            file_reader, pattern_matcher_map, line_numbering, match_batch_size
+        )
+        self._bulk_line_matcher = bulk_line_matcher
+        self._line_separator = line_separator
+        self._encoding = encoding
+        self._max_line_length = max_line_length
 
     def _process(self, path: Path) -> Generator[ProcessingOutput, None, None]:
-        for line_num, line in enumerate(self._file_reader.read_lines(path)):
-            if matched_positions := self._pattern_matcher.match(line):
+        if self._bulk_line_matcher is None:
+            yield from self._process_lines(path)
+            return
+
+        cursor: Optional[WindowCursor] = None
+        blocks = self._file_reader.read_blocks(path)
+        for offset, block in blocks:
+            if not self._is_bulk_block(block):
+                blocks.close()
+                # Blocks yielded before decoding failed or a long line
+                # was reached are not repeated.
+                end_offset = cursor.offset if cursor else 0
+                for output in self._process_lines(path):
+                    if output.byte_offset >= end_offset:
+                        yield output
+                return
+
+            cursor = WindowCursor(
+                offset=offset,
+                line_number=(
+                    cursor.line_number
+                    if cursor
+                    else (
+                        self._get_first_line_number(path, offset)
+                        if self._line_numbering
+                        else None
+                    )
+                ),
+            )
+            for start, end in self._bulk_line_matcher.iter_matching_lines(
+                block
+            ):
+                line = block[start:end]
+                if matched_positions := self._pattern_matcher.match(line):
+                    cursor.advance(
+                        block, start, self._encoding, self._line_separator
+                    )
+                    yield ProcessingOutput(
+                        matches=matched_positions,
+                        path=path,
+                        line=line,
+                        line_number=cursor.line_number,
+                        input_type=self._input_type,
+                        byte_offset=cursor.offset,
+                    )
+            cursor.advance(
+                block, len(block), self._encoding, self._line_separator
+            )
+
+    def _is_bulk_block(self, block: Union[str, bytes]) -> bool:
+        """
+        Check whether a block can be processed in bulk: it is text
+        without lines which are read in windows when read line by line.
+        Blocks hold whole lines of up to a block size, no matter
+        the maximum line length.
+
+        :param Union[str, bytes] block: The block.
+        :return: True if the block can be processed in bulk.
+        :rtype: bool
+        """
+
+        if not isinstance(block, str) or isinstance(block, LongLine):
+            return False
+        max_line_length = self._max_line_length
+        # No encoding takes more than four bytes per character.
+        if max_line_length is None or 4 * len(block) <= max_line_length:
+            return True
+        return all(
+            len(line.encode(self._encoding)) <= max_line_length
+            for line in block.split(self._line_separator)
+        )
+
+    def _process_lines(
+        self, path: Path
+    ) -> Generator[ProcessingOutput, None, None]:
+        for input_type, numbered_lines in self._iter_batches(
+            self._read_numbered_lines(path)
+        ):
+            match_batch = self._pattern_matcher_map[input_type].match_many(
+                [line for _, _, line in numbered_lines]
+            )
+            for line_index, matched_positions in match_batch.iter_lines():
+                line_num, offset, line = numbered_lines[line_index]
                 yield ProcessingOutput(
                     matches=matched_positions,
                     path=path,
                     line=line,
-                    line_number=line_num + 1,
+                    line_number=line_num,
+                    input_type=input_type,
+                    byte_offset=offset,
+                )
+
+
+@dataclass
+class MatchGroup:
+    start: int
+    end: int
+    matches: List[MatchPosition] = field(default_factory=list)
+
+
+@dataclass
+class WindowCursor:
+    index: int = 0
+    offset: int = 0
+    line_number: Optional[int] = None
+
+    def advance(
+        self,
+        window: Any,
+        index: int,
+        encoding: str,
+        line_separator: str = "\n",
+    ) -> None:
+        """
+        Move the cursor forward within a window of text or bytes.
+
+        :param Any window: The window the cursor points into.
+        :param int index: The index to move to.
+        :param str encoding: Encoding used to compute byte offsets of text.
+        :param str line_separator: The character separating lines of text.
+        """
+
+        segment = window[self.index : index]
+        self.offset += len(
+            segment.encode(encoding) if isinstance(segment, str) else segment
+        )
+        if self.line_number is not None:
+            self.line_number += segment.count(
+                line_separator if isinstance(segment, str) else b"\n"
+            )
+        self.index = index
+
+
+class InvertMatchProcessor(LineMatchProcessor):
+    """
+    Processor for selecting non-matching lines in bulk.
+
+    Text files are read in blocks of whole lines and the matching lines
+    of a block are located first. Every run of non-matching lines between
+    them is yielded as a single output holding all lines of the run, so
+    no output is created per line. Matching lines are located by
+    a BulkLineMatcher if given, otherwise every line of a block is
+    searched. Binary files and files from their first long line on are
+    processed line by line.
+
+    :param IFileReader file_reader: An instance of IFileReader
+     for reading files.
+    :param InputTypeToPatternMatcherMapping pattern_matcher_map:
+     A dictionary mapping InputType to IPatternMatcher, inverting
+     the match.
+    :param bool line_numbering: Whether line numbers should be tracked.
+    :param Optional[BulkLineMatcher] bulk_line_matcher: An optional
+     matcher locating matching lines within blocks.
+    :param str line_separator: The character separating lines.
+    :param str encoding: Encoding used to compute byte offsets of lines.
+    """
+
+    def _process(self, path: Path) -> Generator[ProcessingOutput, None, None]:
+        cursor: Optional[WindowCursor] = None
+        blocks = self._file_reader.read_blocks(path)
+        for offset, block in blocks:
+            if not self._is_bulk_block(block):
+                blocks.close()
+                # Blocks yielded before decoding failed or a long line
+                # was reached are not repeated.
+                end_offset = cursor.offset if cursor else 0
+                for output in self._process_lines(path):
+                    if output.byte_offset >= end_offset:
+                        yield output
+                return
+
+            if cursor is None:
+                cursor = WindowCursor(
+                    offset=offset,
+                    line_number=(
+                        self._get_first_line_number(path, offset)
+                        if self._line_numbering
+                        else None
+                    ),
+                )
+            else:
+                cursor = WindowCursor(
+                    offset=offset, line_number=cursor.line_number
+                )
+            for start, end in self._iter_non_matching_runs(block):
+                cursor.advance(
+                    block, start, self._encoding, self._line_separator
+                )
+                lines = block[start:end]
+                yield ProcessingOutput(
+                    # Pattern matchers match inverted lines at their start.
+                    matches=[MatchPosition(0, 0)],
+                    path=path,
                     input_type=self._input_type,
+                    line=lines,
+                    line_number=cursor.line_number,
+                    byte_offset=cursor.offset,
+                    line_count=lines.count(self._line_separator) + 1,
                 )
+            cursor.advance(
+                block, len(block), self._encoding, self._line_separator
+            )
+
+    def _iter_non_matching_runs(
+        self, block: str
+    ) -> Generator[Tuple[int, int], None, None]:
+        run_start = 0
+        for line_start, line_end in self._iter_matching_lines(block):
+            if line_start > run_start:
+                yield run_start, line_start - 1
+            run_start = line_end + 1
+        if run_start < len(block):
+            yield run_start, len(block) - block.endswith(self._line_separator)
+
+    def _iter_matching_lines(self, block: str) -> Iterator[Tuple[int, int]]:
+        if self._bulk_line_matcher:
+            return self._bulk_line_matcher.iter_matching_lines(block)
+        return self._search_lines(block)
+
+    def _search_lines(self, block: str) -> Iterator[Tuple[int, int]]:
+        lines = block.split(self._line_separator)
+        if block.endswith(self._line_separator):
+            lines.pop()
+        # The match is inverted, so matching lines are not found.
+        non_matching_indexes = set(
+            self._pattern_matcher.search_many(lines).line_indexes
+        )
+        line_start = 0
+        for line_index, line in enumerate(lines):
+            line_end = line_start + len(line)
+            if line_index not in non_matching_indexes:
+                yield line_start, line_end
+            line_start = line_end + 1
+
+
+class MultilineMatchProcessor(InputProcessorTemplate):
+    """
+    Processor for matches spanning several lines.
+
+    Patterns run over large blocks of whole lines instead of single
+    lines. A match close to the end of the text read so far could
+    continue in the next block, so it is only accepted once
+    MULTILINE_LOOKAHEAD characters follow it, the rest of the text being
+    searched again together with the next block. Matches shorter than
+    the lookahead are thus found exactly as in the whole file. Matches
+    sharing a line are grouped and every output holds all lines spanned
+    by a group, match positions being relative to its first line.
+
+    :param IFileReader file_reader: An instance of IFileReader
+     for reading files.
+    :param InputTypeToPatternMatcherMapping pattern_matcher_map:
+     A dictionary mapping InputType to IPatternMatcher.
+    :param bool line_numbering: Whether line numbers should be tracked.
+    :param str encoding: Encoding used to compute byte offsets of lines.
+    """
+
+    def __init__(
+        self,
+        file_reader: IFileReader,
+        pattern_matcher_map: Dict,
+        line_numbering: bool = True,
+        encoding: str = DEFAULT_ENCODING,
+    ) -> None:
+        super().__init__(file_reader, pattern_matcher_map, line_numbering)
+        self._encoding = encoding
+
+    def _process(self, path: Path) -> Generator[ProcessingOutput, None, None]:
+        window: Any = None
+        newline: Any = None
+        cursor = WindowCursor()
+        search_pos = 0
+        group: Optional[MatchGroup] = None
+        blocks = self._file_reader.read_blocks(path)
+        for offset, block in chain(blocks, [(0, None)]):
+            is_final = block is None
+            if window is None:
+                if is_final:
+                    return
+                window, newline = block, (
+                    "\n" if isinstance(block, str) else b"\n"
+                )
+                cursor = WindowCursor(
+                    offset=offset,
+                    line_number=(
+                        self._get_first_line_number(path, offset)
+                        if self._line_numbering
+                        else None
+                    ),
+                )
+            elif not is_final:
+                window += block
+
+            accepted_end = (
+                len(window) if is_final else len(window) - MULTILINE_LOOKAHEAD
+            )
+            for match in self._pattern_matcher.iter_matches(
+                window, search_pos
+            ):
+                if match.end > accepted_end:
+                    break
+                if match.start == len(window) and window.endswith(newline):
+                    # There is no line after the final line separator.
+                    break
+                start = window.rfind(newline, 0, match.start) + 1
+                end = window.find(newline, max(match.start, match.end - 1))
+                end = len(window) if end < 0 else end
+                if group and start <= group.end:
+                    group.end = max(group.end, end)
+                    group.matches.append(match)
+                else:
+                    if group:
+                        yield self._create_output(path, window, cursor, group)
+                    group = MatchGroup(start, end, [match])
+                search_pos = match.end + (match.start == match.end)
+            else:
+                search_pos = max(search_pos, accepted_end)
+
+            if group and (is_final or search_pos > group.end):
+                yield self._create_output(path, window, cursor, group)
+                group = None
+            if is_final:
+                return
+
+            keep_from = (
+                group.start
+                if group
+                else window.rfind(newline, 0, search_pos) + 1
+            )
+            cursor.advance(window, keep_from, self._encoding)
+            window = window[keep_from:]
+            cursor.index = 0
+            search_pos -= keep_from
+            if group:
+                group.start -= keep_from
+                group.end -= keep_from
+                group.matches = [
+                    MatchPosition(
+                        match.start - keep_from, match.end - keep_from
+                    )
+                    for match in group.matches
+                ]
+
+    def _create_output(
+        self, path: Path, window: Any, cursor: WindowCursor, group: MatchGroup
+    ) -> ProcessingOutput:
+        cursor.advance(window, group.start, self._encoding)
+        return ProcessingOutput(
+            matches=[
+                MatchPosition(
+                    match.start - group.start,
+                    min(match.end, group.end) - group.start,
+                )
+                for match in group.matches
+            ],
+            path=path,
+            line=window[group.start : group.end],
+            line_number=cursor.line_number,
+            input_type=self._input_type,
+            byte_offset=cursor.offset,
+        )
 
 
 class LineMatchCounterProcessor(InputProcessorTemplate):
-    """Processor for finding and counting matching lines."""
+    """
+    Processor for finding and counting matching lines.
+
+    :param IFileReader file_reader: An instance of IFileReader
+     for reading files.
+    :param InputTypeToPatternMatcherMapping pattern_matcher_map:
+     A dictionary mapping InputType to IPatternMatcher.
+    :param Optional[BulkLineMatcher] bulk_line_matcher: If given, text
+     files are read in blocks and matching lines are counted in bulk.
+     Other files and files with long lines are counted line by line.
+    """
+
+    def __init__(
+        self,
+        file_reader: IFileReader,
+        pattern_matcher_map: Dict,
+        bulk_line_matcher: Optional[BulkLineMatcher] = None,
+    ) -> None:
+        super().__init__(file_reader, pattern_matcher_map)
+        self._bulk_line_matcher = bulk_line_matcher
 
     def _process(self, path: Path) -> Generator[ProcessingOutput, None, None]:
-        match_count = 0
-        for line in self._file_reader.read_lines(path):
-            if self._pattern_matcher.search(line):
-                match_count += 1
+        match_count = None
+        if self._bulk_line_matcher:
+            match_count = self._count_in_bulk(path, self._bulk_line_matcher)
+        if match_count is None:
+            match_count = 0
+            lines = (
+                (
+                    self._select_window(line)
+                    if isinstance(line, LongLine)
+                    else line
+                )
+                for line in self._file_reader.read_lines(path)
+            )
+            for input_type, batch in self._iter_batches(lines):
+                # Every matching line has a single match.
+                match_count += len(
+                    self._pattern_matcher_map[input_type]
+                    .search_many(batch)
+                    .line_indexes
+                )
         yield ProcessingOutput(
             matches=None,
             path=path,
@@ -83,6 +643,18 @@ class LineMatchCounterProcessor(InputProcessorTemplate):
             match_count=match_count,
         )
 
+    def _count_in_bulk(
+        self, path: Path, bulk_line_matcher: BulkLineMatcher
+    ) -> Optional[int]:
+        match_count = 0
+        blocks = self._file_reader.read_blocks(path)
+        for _, block in blocks:
+            if not isinstance(block, str) or isinstance(block, LongLine):
+                blocks.close()
+                return None
+            match_count += bulk_line_matcher.count(block)
+        return match_count
+
 
 class ContextualLineMatchProcessor(InputProcessorTemplate, ABC):
     """Processor for finding matching lines with specified context."""
@@ -92,8 +664,12 @@ class ContextualLineMatchProcessor(InputProcessorTemplate, ABC):
         file_reader: IFileReader,
         pattern_matcher_map: Dict,
         context_control_options: ContextControlOptions,
+        line_numbering: bool = True,
+        match_batch_size: int = MATCH_BATCH_SIZE,
     ) -> None:
-        super().__init__(file_reader, pattern_matcher_map)
+        super().__init__(
+            file_reader, pattern_matcher_map, line_numbering, match_batch_size
+        )
         self._context_control_options = context_control_options
 
 
@@ -102,27 +678,39 @@ class AfterContextLineMatchProcessor(ContextualLineMatchProcessor):
 
     def _process(self, path: Path) -> Generator[ProcessingOutput, None, None]:
         current_lines_to_print = 0
-        for line_num, line in enumerate(self._file_reader.read_lines(path)):
-            if matched_positions := self._pattern_matcher.match(line):
-                yield ProcessingOutput(
-                    matches=matched_positions,
-                    path=path,
-                    line=line,
-                    input_type=self._input_type,
-                    line_number=line_num + 1,
-                )
-                current_lines_to_print = (
-                    self._context_control_options.after_context
-                )
-            elif current_lines_to_print:
-                yield ProcessingOutput(
-                    matches=None,
-                    path=path,
-                    line=line,
-                    input_type=self._input_type,
-                    line_number=line_num + 1,
-                )
-                current_lines_to_print -= 1
+        for input_type, numbered_lines in self._iter_batches(
+            self._read_numbered_lines(path)
+        ):
+            matched_lines = dict(
+                self._pattern_matcher_map[input_type]
+                .match_many([line for _, _, line in numbered_lines])
+                .iter_lines()
+            )
+            for line_index, (line_num, offset, line) in enumerate(
+                numbered_lines
+            ):
+                if matched_positions := matched_lines.get(line_index):
+                    yield ProcessingOutput(
+                        matches=matched_positions,
+                        path=path,
+                        line=line,
+                        input_type=input_type,
+                        line_number=line_num,
+                        byte_offset=offset,
+                    )
+                    current_lines_to_print = (
+                        self._context_control_options.after_context
+                    )
+                elif current_lines_to_print:
+                    yield ProcessingOutput(
+                        matches=None,
+                        path=path,
+                        line=line,
+                        input_type=input_type,
+                        line_number=line_num,
+                        byte_offset=offset,
+                    )
+                    current_lines_to_print -= 1
 
 
 class BeforeContextLineMatchProcessor(ContextualLineMatchProcessor):
@@ -132,32 +720,149 @@ class BeforeContextLineMatchProcessor(ContextualLineMatchProcessor):
         queue: Queue = Queue(
             maxsize=self._context_control_options.before_context
         )
-        for line_num, line in enumerate(self._file_reader.read_lines(path)):
-            if matched_positions := self._pattern_matcher.match(line):
-                while not queue.empty():
-                    output_line_number = line_num - queue.qsize() + 1
-                    output_line = queue.get()
+        for input_type, numbered_lines in self._iter_batches(
+            self._read_numbered_lines(path)
+        ):
+            matched_lines = dict(
+                self._pattern_matcher_map[input_type]
+                .match_many([line for _, _, line in numbered_lines])
+                .iter_lines()
+            )
+            for line_index, numbered_line in enumerate(numbered_lines):
+                line_num, offset, line = numbered_line
+                if matched_positions := matched_lines.get(line_index):
+                    while not queue.empty():
+                        output_line_num, output_offset, output_line = (
+                            queue.get()
+                        )
+                        yield ProcessingOutput(
+                            matches=None,
+                            path=path,
+                            line_number=output_line_num,
+                            line=output_line,
+                            input_type=input_type,
+                            byte_offset=output_offset,
+                        )
                     yield ProcessingOutput(
-                        matches=None,
+                        matches=matched_positions,
                         path=path,
-                        line_number=output_line_number,
-                        line=output_line,
-                        input_type=self._input_type,
+                        line=line,
+                        line_number=line_num,
+                        input_type=input_type,
+                        byte_offset=offset,
                     )
-                yield ProcessingOutput(
-                    matches=matched_positions,
-                    path=path,
-                    line=line,
-                    line_number=line_num + 1,
-                    input_type=self._input_type,
-                )
-            else:
-                self._add_line_to_queue(line, queue)
+                else:
+                    self._add_line_to_queue(numbered_line, queue)
 
     @staticmethod
-    def _add_line_to_queue(line: str, queue: Queue[Union[str, bytes]]) -> None:
+    def _add_line_to_queue(
+        numbered_line: NumberedLine, queue: Queue[NumberedLine]
+    ) -> None:
         try:
-            queue.put(line, block=False)
+            queue.put(numbered_line, block=False)
         except Full:
             queue.get()
-            queue.put(line, block=False)
+            queue.put(numbered_line, block=False)
+
+
+class CachingInputProcessor(IInputProcessor):
+    """
+    Decorates an input processor with a result cache. Outputs of files
+    whose fingerprint has not changed since they were last processed
+    are served from the cache, other files are processed and cached.
+
+    :param IInputProcessor input_processor: The decorated processor.
+    :param IResultCache result_cache: The cache to use.
+    :param str query_key: Key identifying the search query.
+    :param Callable[[Path], str] fingerprint: Function creating file
+     fingerprints.
+    """
+
+    def __init__(
+        self,
+        input_processor: IInputProcessor,
+        result_cache: IResultCache,
+        query_key: str,
+        fingerprint: Callable[[Path], str],
+    ) -> None:
+        self._input_processor = input_processor
+        self._result_cache = result_cache
+        self._query_key = query_key
+        self._fingerprint = fingerprint
+        # Lookups of files taken ahead of processing them, keyed on their
+        # paths, which the next lookup of each file takes over.
+        self._lookups_ahead: Dict[
+            Path, Tuple[Optional[str], Optional[List[ProcessingOutput]]]
+        ] = {}
+
+    def process(self, path: Path) -> Generator[ProcessingOutput, None, None]:
+        fingerprint, outputs = self.lookup(path)
+        if outputs is not None:
+            yield from outputs
+            return
+
+        outputs = []
+        for output in self._input_processor.process(path):
+            outputs.append(output)
+            yield output
+        if fingerprint is not None:
+            self.store(path, fingerprint, outputs)
+
+    def lookup(
+        self, path: Path
+    ) -> Tuple[Optional[str], Optional[List[ProcessingOutput]]]:
+        """
+        Look up cached outputs of a file.
+
+        :param Path path: The path to the file.
+        :return: The fingerprint of the file, None if it cannot be
+         fingerprinted, and its cached outputs, None if there are none.
+         Outputs carry the path as given here, not as given when they
+         were cached, as entries are shared by all paths of a file.
+        :rtype: Tuple[Optional[str], Optional[List[ProcessingOutput]]]
+        """
+
+        if (lookup := self._lookups_ahead.pop(path, None)) is not None:
+            return lookup
+        try:
+            fingerprint = self._fingerprint(path)
+        except OSError:
+            return None, None
+        outputs = self._result_cache.get(self._get_key(path), fingerprint)
+        if outputs is None:
+            return fingerprint, None
+        return fingerprint, [replace(output, path=path) for output in outputs]
+
+    def needs_reading(self, path: Path) -> bool:
+        """
+        Check ahead of processing a file whether it is going to be read,
+        as it has no cached outputs. The lookup is kept for the next
+        lookup of the file, so the file is fingerprinted once.
+
+        :param Path path: The path to the file.
+        :return: True if the file is going to be read, False otherwise.
+        :rtype: bool
+        """
+
+        lookup = self.lookup(path)
+        self._lookups_ahead[path] = lookup
+        return lookup[1] is None
+
+    def store(
+        self, path: Path, fingerprint: str, outputs: List[ProcessingOutput]
+    ) -> None:
+        """
+        Cache outputs of a file processed to the end, unless it could not
+        be read.
+
+        :param Path path: The path to the file.
+        :param str fingerprint: The fingerprint of the file taken before
+         it was processed.
+        :param List[ProcessingOutput] outputs: The outputs.
+        """
+
+        if os.access(path, os.R_OK):
+            self._result_cache.put(self._get_key(path), fingerprint, outputs)
+
+    def _get_key(self, path: Path) -> str:
+        return f"{self._query_key}\0{os.path.abspath(path)}"
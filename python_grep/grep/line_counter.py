@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Optional
+
+
+class LineCounter:
+    """
+    Keeps track of the current line number while input is traversed.
+
+    Lines can be counted one by one or in bulk over whole buffers,
+    in which case newlines are counted with ``bytes.count`` instead of
+    iterating over individual lines.
+
+    :param int line_number: Number of the line the counter starts at.
+    """
+
+    def __init__(self, line_number: int = 1) -> None:
+        self._line_number = line_number
+
+    @property
+    def line_number(self) -> int:
+        return self._line_number
+
+    def count_line(self) -> None:
+        """Advance the counter by a single line."""
+
+        self._line_number += 1
+
+    def count_buffer(
+        self, buffer: bytes, start: int = 0, end: Optional[int] = None
+    ) -> None:
+        """
+        Advance the counter by the number of newlines in a buffer slice.
+
+        :param bytes buffer: The buffer to count newlines in.
+        :param int start: Start index of the slice.
+        :param Optional[int] end: End index of the slice, defaults to the
+         end of the buffer.
+        """
+
+        self._line_number += buffer.count(
+            b"\n", start, len(buffer) if end is None else end
+        )
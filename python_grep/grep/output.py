@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import json
+from dataclasses import replace
 from enum import Enum
-from typing import List
+from typing import Any, Dict, Generator, Sequence, Union
 
 from python_grep.grep.base import ProcessingOutput, IOutputMessageBuilder
 from python_grep.grep.context import OutputControlOptions
@@ -10,25 +12,137 @@ from python_grep.match import MatchPosition
 from python_grep.storage import DEFAULT_ENCODING
 
 
+def split_into_lines(
+    processing_output: ProcessingOutput, line_separator: str, encoding: str
+) -> Generator[ProcessingOutput, None, None]:
+    """
+    Split a processing output holding several text lines into outputs
+    holding a single line each.
+
+    :param ProcessingOutput processing_output: The processing output.
+    :param str line_separator: The character separating the lines.
+    :param str encoding: Encoding used to compute byte offsets of lines.
+    :return: A generator of single line processing outputs.
+    :rtype: Generator[ProcessingOutput, None, None]
+    """
+
+    assert isinstance(processing_output.line, str)
+    line_number = processing_output.line_number
+    byte_offset = processing_output.byte_offset
+    for line in processing_output.line.split(line_separator):
+        yield replace(
+            processing_output,
+            line=line,
+            line_number=line_number,
+            byte_offset=byte_offset,
+            line_count=1,
+        )
+        if line_number is not None:
+            line_number += 1
+        byte_offset += len(line.encode(encoding)) + 1
+
+
+def create_preview(
+    processing_output: ProcessingOutput, max_columns: int, encoding: str
+) -> ProcessingOutput:
+    """
+    Cut a text line longer than max_columns characters down to a preview
+    of max_columns characters, its first match a quarter into it.
+
+    :param ProcessingOutput processing_output: The single line processing
+     output.
+    :param int max_columns: The length of the preview.
+    :param str encoding: Encoding used to compute the byte offset
+     of the preview.
+    :return: The processing output holding the preview, with match
+     positions relative to it and the byte offset of its start.
+    :rtype: ProcessingOutput
+    """
+
+    line = processing_output.line
+    if isinstance(line, bytes) or len(line) <= max_columns:
+        return processing_output
+    matches = processing_output.matches
+    first_match_start = matches[0].start if matches else 0
+    start = min(
+        max(first_match_start - max_columns // 4, 0), len(line) - max_columns
+    )
+    end = start + max_columns
+    return replace(
+        processing_output,
+        line=line[start:end],
+        matches=matches
+        and [
+            MatchPosition(
+                max(match.start, start) - start, min(match.end, end) - start
+            )
+            for match in matches
+            if match.start <= end and match.end >= start
+        ],
+        byte_offset=processing_output.byte_offset
+        + len(line[:start].encode(encoding)),
+    )
+
+
 class OutputMessageBuilder(IOutputMessageBuilder):
     """
     Constructs final output massage based on the
     output control options and processing output.
+    A processing output holding several lines results in
+    a message per line, joined by the line separator. Lines longer than
+    the maximum number of columns are cut down to previews.
 
     :param OutputControlOptions output_control_options:
     Options for output control.
+    :param str line_separator: The character separating lines
+     of a processing output and of the messages created of them.
+    :param str encoding: Encoding used to compute byte offsets of lines.
     """
 
-    def __init__(self, output_control_options: OutputControlOptions) -> None:
+    def __init__(
+        self,
+        output_control_options: OutputControlOptions,
+        line_separator: str = "\n",
+        encoding: str = DEFAULT_ENCODING,
+    ) -> None:
         self._output_control_options = output_control_options
+        self._line_separator = line_separator
+        self._encoding = encoding
 
     def create(self, processing_output: ProcessingOutput) -> str:
+        if processing_output.line_count > 1:
+            return self._create_for_lines(processing_output)
+        if max_columns := self._output_control_options.max_columns:
+            processing_output = create_preview(
+                processing_output, max_columns, self._encoding
+            )
         return (
             self._add_file_name(processing_output)
             + self._add_line_num(processing_output)
+            + self._add_byte_offset(processing_output)
             + self._add_line(processing_output)
         )
 
+    def _create_for_lines(self, processing_output: ProcessingOutput) -> str:
+        options = self._output_control_options
+        if not (
+            options.line_number
+            or options.byte_offset
+            or (options.color and processing_output.matches)
+            or options.max_columns
+            or isinstance(processing_output.line, bytes)
+        ):
+            file_name = self._add_file_name(processing_output)
+            return file_name + processing_output.line.replace(
+                self._line_separator, self._line_separator + file_name
+            )
+        return self._line_separator.join(
+            self.create(line_output)
+            for line_output in split_into_lines(
+                processing_output, self._line_separator, self._encoding
+            )
+        )
+
     @staticmethod
     def _add_file_name(
         processing_result: ProcessingOutput,
@@ -44,6 +158,16 @@ class OutputMessageBuilder(IOutputMessageBuilder):
             return f"{processing_result.line_number}:"
         return ""
 
+    def _add_byte_offset(
+        self,
+        processing_result: ProcessingOutput,
+    ) -> str:
+        # Counts of matching lines are not located at any byte offset.
+        options = self._output_control_options
+        if options.byte_offset and not options.count:
+            return f"{processing_result.byte_offset}:"
+        return ""
+
     def _add_line(
         self,
         processing_result: ProcessingOutput,
@@ -66,7 +190,7 @@ class OutputMessageBuilder(IOutputMessageBuilder):
             return processing_result.line
 
     def _colorize(
-        self, line: str, match_positions: List[MatchPosition]
+        self, line: str, match_positions: Sequence[MatchPosition]
     ) -> str:
         formatted_string = ""
         index = 0
@@ -84,6 +208,84 @@ class OutputMessageBuilder(IOutputMessageBuilder):
         return f"{color.value}{text}{Color.END.value}"
 
 
+class JsonOutputMessageBuilder(IOutputMessageBuilder):
+    """
+    Constructs JSON output messages, one object per processing output
+    line. Match positions are reported both relative to the line and as
+    absolute byte offsets within the file. Lines longer than the maximum
+    number of columns are cut down to previews.
+
+    :param OutputControlOptions output_control_options:
+    Options for output control.
+    :param str encoding: Encoding used to compute byte offsets of
+     matches found in text lines.
+    :param str line_separator: The character separating lines
+     of a processing output and of the messages created of them.
+    """
+
+    def __init__(
+        self,
+        output_control_options: OutputControlOptions,
+        encoding: str = DEFAULT_ENCODING,
+        line_separator: str = "\n",
+    ) -> None:
+        self._output_control_options = output_control_options
+        self._encoding = encoding
+        self._line_separator = line_separator
+
+    def create(self, processing_output: ProcessingOutput) -> str:
+        if processing_output.line_count > 1:
+            return self._line_separator.join(
+                self.create(line_output)
+                for line_output in split_into_lines(
+                    processing_output, self._line_separator, self._encoding
+                )
+            )
+
+        message: Dict[str, Any] = {"path": str(processing_output.path)}
+        if self._output_control_options.count:
+            message["count"] = processing_output.match_count
+            return json.dumps(message)
+
+        if max_columns := self._output_control_options.max_columns:
+            processing_output = create_preview(
+                processing_output, max_columns, self._encoding
+            )
+        line = processing_output.line
+        if isinstance(line, bytes):
+            if not self._output_control_options.treat_binary_as_text:
+                raise SuppressBinaryOutputError
+            message["line"] = line.decode(DEFAULT_ENCODING, "replace")
+        else:
+            message["line"] = line
+        message["line_number"] = processing_output.line_number
+        message["byte_offset"] = processing_output.byte_offset
+        message["matches"] = [
+            self._create_match(processing_output, match_position)
+            for match_position in processing_output.matches or []
+        ]
+        return json.dumps(message)
+
+    def _create_match(
+        self,
+        processing_output: ProcessingOutput,
+        match_position: MatchPosition,
+    ) -> Dict[str, int]:
+        return {
+            "start": match_position.start,
+            "end": match_position.end,
+            "byte_start": processing_output.byte_offset
+            + self._byte_length(processing_output.line, match_position.start),
+            "byte_end": processing_output.byte_offset
+            + self._byte_length(processing_output.line, match_position.end),
+        }
+
+    def _byte_length(self, line: Union[str, bytes], index: int) -> int:
+        if isinstance(line, bytes):
+            return index
+        return len(line[:index].encode(self._encoding))
+
+
 class Color(Enum):
     RED = "\033[91m"
     GREEN = "\033[92m"
@@ -0,0 +1,674 @@
+from __future__ import annotations
+
+import codecs
+import math
+import os
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from python_grep.grep.base import IInputProcessor, ProcessingOutput
+from python_grep.grep.context import DEFAULT_SPLIT_SIZE
+from python_grep.grep.exceptions import LineTooLongError
+from python_grep.grep.input_processor import MATCH_BATCH_SIZE
+from python_grep.grep.shared_records import (
+    CHUNK_SIZE,
+    LineRecord,
+    LineRecordWriter,
+    PackedLines,
+    RecordRing,
+    read_line_records,
+    share_resource_tracker,
+    write_line_records,
+)
+from python_grep.grep.time_budget import time_budget
+from python_grep.match import IPatternMatcher, MatchPosition
+from python_grep.storage import DEFAULT_ENCODING, IFileReader, InputType
+from python_grep.storage.io_hints import advise_dont_need, advise_sequential
+from python_grep.storage.line_window import DEFAULT_MAX_LINE_LENGTH
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+ByteRange = Tuple[int, int]
+OffsetLine = Tuple[int, str]
+# Packed lines of a range, followed by the result of its scan.
+RangeScanItem = Union[PackedLines, "RangeScanResult"]
+
+_worker_pattern_matcher: Optional[IPatternMatcher] = None
+
+
+@dataclass(frozen=True)
+class RangeScanOptions:
+    count: bool = False
+    before_context: int = 0
+    after_context: int = 0
+    encoding: str = DEFAULT_ENCODING
+    max_line_length: Optional[int] = DEFAULT_MAX_LINE_LENGTH
+    drop_cache: bool = False
+    time_budget: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class RecordOutputOptions:
+    line_number: bool = False
+    byte_offset: bool = False
+
+
+@dataclass
+class RangeScanResult:
+    """
+    Result of scanning a single byte range of a file.
+
+    Selected lines are packed into records, context lines having no match
+    positions, unless they were streamed through a ring. The first and
+    the last lines of the range are kept separately, so context crossing
+    range borders can be restored.
+    """
+
+    line_count: int = 0
+    match_count: int = 0
+    lines: PackedLines = field(default_factory=PackedLines)
+    head: List[OffsetLine] = field(default_factory=list)
+    tail: List[OffsetLine] = field(default_factory=list)
+
+
+def split_into_ranges(
+    path: Path,
+    start: int,
+    end: int,
+    range_count: int,
+    max_line_length: Optional[int] = None,
+) -> List[ByteRange]:
+    """
+    Split a part of a file into byte ranges aligned to line starts.
+
+    :param Path path: The path to the file.
+    :param int start: Byte offset of the first line to include.
+    :param int end: Byte offset the last range ends at.
+    :param int range_count: Requested number of ranges.
+    :param Optional[int] max_line_length: If given, a range is merged with
+     the next one when no line starts within this many bytes behind
+     the position it was to end at.
+    :return: A list of (start, end) byte ranges.
+    :rtype: List[ByteRange]
+    """
+
+    read_limit = -1 if max_line_length is None else max_line_length + 1
+    boundaries = [start]
+    with path.open("rb") as file:
+        for index in range(1, range_count):
+            position = start + (end - start) * index // range_count
+            if position <= boundaries[-1]:
+                continue
+            file.seek(position - 1)
+            if not file.readline(read_limit).endswith(b"\n"):
+                continue
+            if boundaries[-1] < (aligned := file.tell()) < end:
+                boundaries.append(aligned)
+    boundaries.append(end)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def init_range_worker(pattern_matcher: IPatternMatcher) -> None:
+    """
+    Initialise a worker process scanning byte ranges.
+
+    :param IPatternMatcher pattern_matcher: The matcher for text input.
+    """
+
+    global _worker_pattern_matcher
+    _worker_pattern_matcher = pattern_matcher
+
+
+def scan_range(
+    path: Path,
+    byte_range: ByteRange,
+    options: RangeScanOptions,
+    ring_name: Optional[str] = None,
+) -> RangeScanResult:
+    """
+    Scan a byte range of a text file in a worker process.
+
+    Context lines are selected the same way as by the sequential
+    processors, but only within the range. Selected lines are streamed
+    through the ring of the given name while the range is scanned, if
+    any, and returned in the result otherwise.
+
+    :raises LineTooLongError: If the range holds a line longer than
+     the maximum line length, which is left to the sequential processors.
+    :raises TimeBudgetExceededError: If the scan takes longer than
+     the time budget of the options.
+
+    :param Path path: The path to the file.
+    :param ByteRange byte_range: The range to scan.
+    :param RangeScanOptions options: Options of the scan.
+    :param Optional[str] ring_name: The name of a RecordRing created
+     by the parent process.
+    :return: The result of the scan.
+    :rtype: RangeScanResult
+    """
+
+    ring: Optional[RecordRing] = None
+    if ring_name is not None:
+        ring = RecordRing.attach(ring_name)
+        if ring is None:
+            # The parent stopped reading before the scan started.
+            return RangeScanResult()
+    try:
+        with time_budget(options.time_budget):
+            return _scan_range(path, byte_range, options, ring)
+    finally:
+        if ring is not None:
+            ring.close_writer()
+
+
+def _scan_range(
+    path: Path,
+    byte_range: ByteRange,
+    options: RangeScanOptions,
+    ring: Optional[RecordRing],
+) -> RangeScanResult:
+    assert _worker_pattern_matcher is not None
+    pattern_matcher = _worker_pattern_matcher
+    result = RangeScanResult()
+    line_record_writer = LineRecordWriter()
+    before: Deque[Tuple[int, int, bytes]] = deque(
+        maxlen=options.before_context
+    )
+    tail: Deque[OffsetLine] = deque(maxlen=options.before_context)
+    has_context = bool(options.before_context or options.after_context)
+    lines_to_print = 0
+    offset, end = byte_range
+    with path.open("rb") as file:
+        advise_sequential(file, offset, end - offset)
+        file.seek(offset)
+        for batch in _read_line_batches(file, offset, end, options):
+            if (
+                ring is not None
+                and line_record_writer.size >= CHUNK_SIZE
+                and not ring.write(line_record_writer.pack())
+            ):
+                # The parent stopped reading, e.g. as a range failed.
+                return result
+            lines = [
+                raw_line.decode(options.encoding).rstrip("\n")
+                for _, raw_line in batch
+            ]
+            first_index = result.line_count
+            result.line_count += len(batch)
+            offset = batch[-1][0] + len(batch[-1][1])
+            if options.count:
+                result.match_count += len(
+                    pattern_matcher.search_many(lines).line_indexes
+                )
+                continue
+            match_batch = pattern_matcher.match_many(lines)
+            if not has_context:
+                for batch_index, positions in match_batch.iter_lines():
+                    line_offset, raw_line = batch[batch_index]
+                    line_record_writer.add(
+                        first_index + batch_index,
+                        line_offset,
+                        raw_line.rstrip(b"\n"),
+                        positions,
+                    )
+                continue
+
+            matched_lines = dict(match_batch.iter_lines())
+            for batch_index, (line_offset, raw_line) in enumerate(batch):
+                index = first_index + batch_index
+                line = lines[batch_index]
+                if index < options.after_context:
+                    result.head.append((line_offset, line))
+                if matched_positions := matched_lines.get(batch_index):
+                    for before_line in before:
+                        line_record_writer.add(*before_line, None)
+                    before.clear()
+                    line_record_writer.add(
+                        index,
+                        line_offset,
+                        raw_line.rstrip(b"\n"),
+                        matched_positions,
+                    )
+                    lines_to_print = options.after_context
+                elif lines_to_print:
+                    line_record_writer.add(
+                        index, line_offset, raw_line.rstrip(b"\n"), None
+                    )
+                    lines_to_print -= 1
+                elif options.before_context:
+                    before.append((index, line_offset, raw_line.rstrip(b"\n")))
+                tail.append((line_offset, line))
+        if options.drop_cache:
+            advise_dont_need(file, byte_range[0], offset - byte_range[0])
+    result.tail = list(tail)
+    if ring is None:
+        result.lines = line_record_writer.pack()
+    elif line_record_writer.size:
+        ring.write(line_record_writer.pack())
+    return result
+
+
+def _read_line_batches(
+    file: BinaryIO, offset: int, end: int, options: RangeScanOptions
+) -> Generator[List[Tuple[int, bytes]], None, None]:
+    # Lines are matched in batches, as by the sequential processors.
+    read_limit = (
+        -1 if options.max_line_length is None else options.max_line_length + 1
+    )
+    batch: List[Tuple[int, bytes]] = []
+    while offset < end and (raw_line := file.readline(read_limit)):
+        if len(raw_line) == read_limit and not raw_line.endswith(b"\n"):
+            raise LineTooLongError
+        batch.append((offset, raw_line))
+        offset += len(raw_line)
+        if len(batch) == MATCH_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@dataclass
+class _RangeScan:
+    future: Future[RangeScanResult]
+    ring: Optional[RecordRing] = None
+
+
+class ParallelInputProcessor(IInputProcessor):
+    """
+    Decorates an input processor with intra-file parallelism.
+
+    Text files of at least two split sizes are divided into byte ranges
+    aligned to line starts, which are scanned by a pool of processes.
+    Lines selected by workers are packed into records streamed through
+    a ring in shared memory per range, so none of them is pickled on its
+    own. Without context, records are written to the standard output as
+    they arrive, if output is requested so, and are otherwise stitched
+    back in order, line numbers being restored from a prefix sum of
+    per-range line counts and context lines crossing range borders being
+    taken from neighbouring ranges. Other files are handled by
+    the decorated processor, as are files found to hold undecodable or
+    long lines, from the first line not output yet.
+
+    :param IInputProcessor input_processor: The decorated processor.
+    :param IFileReader file_reader: The file reader of the decorated
+     processor.
+    :param IPatternMatcher pattern_matcher: The matcher for text input.
+    :param RangeScanOptions range_scan_options: Options of range scans.
+    :param int jobs: Number of worker processes.
+    :param int split_size: Target size of a single range in bytes.
+    :param bool line_numbering: Whether line numbers should be tracked.
+    :param int start_offset: Byte offset to start scanning files from.
+    :param Optional[Executor] executor: A pool of processes initialised
+     with init_range_worker to scan ranges in, shared with other work.
+     If not given, a pool is started for every file scanned in parallel.
+    :param Optional[RecordOutputOptions] record_output: If given, lines
+     selected without context are written straight to the standard
+     output, the way grep prints them, instead of being yielded.
+    """
+
+    def __init__(
+        self,
+        input_processor: IInputProcessor,
+        file_reader: IFileReader,
+        pattern_matcher: IPatternMatcher,
+        range_scan_options: RangeScanOptions,
+        jobs: int,
+        split_size: int = DEFAULT_SPLIT_SIZE,
+        line_numbering: bool = True,
+        start_offset: int = 0,
+        executor: Optional[Executor] = None,
+        record_output: Optional[RecordOutputOptions] = None,
+    ) -> None:
+        self._input_processor = input_processor
+        self._file_reader = file_reader
+        self._pattern_matcher = pattern_matcher
+        self._options = range_scan_options
+        self._jobs = jobs
+        self._split_size = split_size
+        self._line_numbering = line_numbering
+        self._start_offset = start_offset
+        self._executor = executor
+        self._record_output = record_output
+        self._written_offset = -1
+
+    def process(self, path: Path) -> Generator[ProcessingOutput, None, None]:
+        try:
+            byte_ranges = self._get_byte_ranges(path)
+        except OSError:
+            byte_ranges = []
+        if len(byte_ranges) < 2:
+            yield from self._input_processor.process(path)
+            return
+        end_offset = -1
+        self._written_offset = -1
+        try:
+            for output in self._process_in_parallel(path, byte_ranges):
+                end_offset = output.byte_offset
+                yield output
+        except (UnicodeDecodeError, LineTooLongError):
+            end_offset = max(end_offset, self._written_offset)
+            for output in self._input_processor.process(path):
+                if output.byte_offset > end_offset:
+                    yield output
+
+    def _get_byte_ranges(self, path: Path) -> List[ByteRange]:
+        size = os.stat(path).st_size
+        if size < 2 * self._split_size:
+            return []
+        with path.open("rb") as file:
+            if b"\x00" in file.read(1024):
+                return []
+            start = self._start_offset
+            if 0 < start < size:
+                file.seek(start - 1)
+                line = file.readline(
+                    -1
+                    if self._options.max_line_length is None
+                    else self._options.max_line_length + 1
+                )
+                if not line.endswith(b"\n"):
+                    return []
+                start = file.tell()
+        if start >= size:
+            return []
+        range_count = max(
+            self._jobs, math.ceil((size - start) / self._split_size)
+        )
+        return split_into_ranges(
+            path, start, size, range_count, self._options.max_line_length
+        )
+
+    def _process_in_parallel(
+        self, path: Path, byte_ranges: List[ByteRange]
+    ) -> Generator[ProcessingOutput, None, None]:
+        if self._executor is not None:
+            yield from self._scan_ranges(self._executor, path, byte_ranges)
+            return
+
+        # Imported here, as it pulls in multiprocessing, which only
+        # parallel searches need.
+        from concurrent.futures import ProcessPoolExecutor
+
+        share_resource_tracker()
+        with ProcessPoolExecutor(
+            max_workers=self._jobs,
+            initializer=init_range_worker,
+            initargs=(self._pattern_matcher,),
+        ) as executor:
+            yield from self._scan_ranges(executor, path, byte_ranges)
+
+    def _scan_ranges(
+        self, executor: Executor, path: Path, byte_ranges: List[ByteRange]
+    ) -> Generator[ProcessingOutput, None, None]:
+        scans: List[_RangeScan] = []
+        try:
+            for byte_range in byte_ranges:
+                # Counts need no ring, as no lines are selected.
+                ring = None if self._options.count else RecordRing.create()
+                scans.append(
+                    _RangeScan(
+                        executor.submit(
+                            scan_range,
+                            path,
+                            byte_range,
+                            self._options,
+                            None if ring is None else ring.name,
+                        ),
+                        ring,
+                    )
+                )
+        except BaseException:
+            self._abandon(scans)
+            raise
+        results = self._iter_results(scans)
+        try:
+            if self._options.count:
+                yield ProcessingOutput(
+                    matches=None,
+                    path=path,
+                    input_type=InputType.TEXT,
+                    line="",
+                    line_number=0,
+                    match_count=sum(
+                        item.match_count
+                        for item in results
+                        if isinstance(item, RangeScanResult)
+                    ),
+                )
+                return
+
+            start = byte_ranges[0][0]
+            first_line_number = (
+                1 + self._file_reader.count_newlines(path, start)
+                if self._line_numbering and start
+                else 1
+            )
+            record_stream = self._get_record_stream(path)
+            if record_stream is not None and not (
+                self._options.before_context or self._options.after_context
+            ):
+                self._write_without_context(
+                    first_line_number, results, *record_stream
+                )
+            else:
+                yield from self._stitch(path, first_line_number, results)
+        finally:
+            results.close()
+
+    def _iter_results(
+        self, scans: List[_RangeScan]
+    ) -> Generator[RangeScanItem, None, None]:
+        """
+        Iterate over packed lines of range scans in order, each range
+        followed by the result of its scan.
+
+        Rings are released once read. Scans which are not reached, e.g.
+        after a range failed, are cancelled or their rings abandoned,
+        which stops their workers, once the iteration stops.
+
+        :param List[_RangeScan] scans: The scans.
+        :return: A generator yielding packed lines and results.
+        :rtype: Generator[RangeScanItem, None, None]
+        """
+
+        try:
+            for scan in scans:
+                if (ring := scan.ring) is not None:
+                    while (
+                        packed_lines := ring.read(scan.future.done)
+                    ) is not None:
+                        yield packed_lines
+                result = scan.future.result()
+                if ring is not None:
+                    ring.close_reader()
+                    scan.ring = None
+                if result.lines.line_count:
+                    yield result.lines
+                yield result
+        finally:
+            self._abandon(scans)
+
+    @staticmethod
+    def _abandon(scans: List[_RangeScan]) -> None:
+        for scan in scans:
+            scan.future.cancel()
+            if scan.ring is not None:
+                scan.ring.close_reader()
+                scan.ring = None
+
+    def _get_record_stream(
+        self, path: Path
+    ) -> Optional[Tuple[BinaryIO, bytes]]:
+        """
+        Get the binary stream under the standard output, which lines are
+        written to as read, along with the prefix of lines of a file.
+
+        :param Path path: The path to the file.
+        :return: The stream and the prefix, or None if lines are not
+         to be written or the encodings of the file and the standard
+         output differ.
+        :rtype: Optional[Tuple[BinaryIO, bytes]]
+        """
+
+        if self._record_output is None:
+            return None
+        stdout = sys.stdout
+        stream: Optional[BinaryIO] = getattr(stdout, "buffer", None)
+        encoding: Optional[str] = getattr(stdout, "encoding", None)
+        if (
+            stream is None
+            or encoding is None
+            or codecs.lookup(encoding).name
+            != codecs.lookup(self._options.encoding).name
+        ):
+            return None
+        return stream, f"{path}:".encode(encoding, stdout.errors or "strict")
+
+    def _write_without_context(
+        self,
+        first_line_number: int,
+        results: Iterable[RangeScanItem],
+        stream: BinaryIO,
+        prefix: bytes,
+    ) -> None:
+        # Without context, selected lines of a range are all matches,
+        # which are written as they arrive, no output being created.
+        assert self._record_output is not None
+        line_number = self._record_output.line_number
+        byte_offset = self._record_output.byte_offset
+        # Text printed before is flushed, so it precedes the lines.
+        sys.stdout.flush()
+        first_index = first_line_number
+        for item in results:
+            if isinstance(item, RangeScanResult):
+                first_index += item.line_count
+                continue
+            self._written_offset = max(
+                self._written_offset,
+                write_line_records(
+                    item,
+                    stream,
+                    prefix,
+                    first_index if line_number else None,
+                    byte_offset,
+                ),
+            )
+
+    def _stitch(
+        self,
+        path: Path,
+        first_line_number: int,
+        results: Iterable[RangeScanItem],
+    ) -> Generator[ProcessingOutput, None, None]:
+        before_context = self._options.before_context
+        after_context = self._options.after_context
+        encoding = self._options.encoding
+        if not before_context and not after_context:
+            yield from self._stitch_without_context(
+                path, first_line_number, results
+            )
+            return
+        before: Deque[Tuple[int, OffsetLine]] = deque(maxlen=before_context)
+        pending_after_context = 0
+        last_printed_index = -1
+        first_index = 0
+        lines: List[LineRecord] = []
+        for result in results:
+            if isinstance(result, PackedLines):
+                lines.extend(read_line_records(result, encoding))
+                continue
+            selected_lines: Dict[
+                int, Tuple[int, str, Optional[List[MatchPosition]]]
+            ] = {}
+            for index, (offset, line) in enumerate(
+                result.head[:pending_after_context]
+            ):
+                selected_lines[first_index + index] = (offset, line, None)
+            matched_indexes = [
+                index for index, _, _, matches in lines if matches
+            ]
+            if matched_indexes:
+                first_matched_index = first_index + matched_indexes[0]
+                for index, (offset, line) in before:
+                    if index >= first_matched_index - before_context:
+                        selected_lines[index] = (offset, line, None)
+            for index, offset, line, matches in lines:
+                selected_lines[first_index + index] = (offset, line, matches)
+            lines = []
+
+            for index in sorted(selected_lines):
+                if index <= last_printed_index:
+                    continue
+                offset, line, matches = selected_lines[index]
+                yield ProcessingOutput(
+                    matches=matches,
+                    path=path,
+                    input_type=InputType.TEXT,
+                    line=line,
+                    line_number=(
+                        first_line_number + index
+                        if self._line_numbering
+                        else None
+                    ),
+                    byte_offset=offset,
+                )
+                last_printed_index = index
+
+            pending_after_context = max(
+                0, pending_after_context - result.line_count
+            )
+            if matched_indexes:
+                pending_after_context = max(
+                    pending_after_context,
+                    after_context
+                    - (result.line_count - 1 - matched_indexes[-1]),
+                )
+            tail_index = first_index + result.line_count - len(result.tail)
+            before.extend(
+                (tail_index + index, offset_line)
+                for index, offset_line in enumerate(result.tail)
+            )
+            first_index += result.line_count
+
+    def _stitch_without_context(
+        self,
+        path: Path,
+        first_line_number: int,
+        results: Iterable[RangeScanItem],
+    ) -> Generator[ProcessingOutput, None, None]:
+        # Without context, selected lines of a range are all matches,
+        # which are output in order as they arrive.
+        first_index = first_line_number
+        for item in results:
+            if isinstance(item, RangeScanResult):
+                first_index += item.line_count
+                continue
+            for index, offset, line, matches in read_line_records(
+                item, self._options.encoding
+            ):
+                yield ProcessingOutput(
+                    matches=matches,
+                    path=path,
+                    input_type=InputType.TEXT,
+                    line=line,
+                    line_number=(
+                        first_index + index if self._line_numbering else None
+                    ),
+                    byte_offset=offset,
+                )
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from python_grep.grep.base import IResultCache, ProcessingOutput
+from python_grep.grep.context import Context
+from python_grep.match import MatchPosition
+from python_grep.storage import InputType
+
+DEFAULT_MAX_CACHE_SIZE = 256 * 1024 * 1024
+DEFAULT_MAX_MEMORY_CACHE_SIZE = 64 * 1024 * 1024
+OUTPUT_SIZE_OVERHEAD = 128
+# Pending writes are committed at least this often, in seconds, so a long
+# search does not keep other processes from writing to the cache.
+COMMIT_INTERVAL = 5.0
+CACHE_FILE_NAME = "results.sqlite3"
+
+
+def get_default_cache_dir() -> Path:
+    """
+    Get the default directory of the result cache.
+
+    :return: The cache directory, placed under XDG_CACHE_HOME
+     or ~/.cache if it is not set.
+    :rtype: Path
+    """
+
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home, "python_grep")
+
+
+def create_query_key(context: Context, mode: str) -> str:
+    """
+    Create a key identifying a search query, independent of searched files.
+
+    :param Context context: The application context.
+    :param str mode: Name of the processing mode, e.g. the Grep class name.
+    :return: The query key.
+    :rtype: str
+    """
+
+    return json.dumps(
+        [
+            mode,
+            context.patterns,
+            asdict(context.pattern_matching_options),
+            asdict(context.context_control_options),
+            context.input_control_options.from_offset,
+            context.input_control_options.first_line,
+            context.input_control_options.last_line,
+            context.input_control_options.since,
+            context.input_control_options.until,
+            context.input_control_options.time_format,
+            context.input_control_options.null_data,
+            context.input_control_options.max_line_length,
+            context.output_control_options.requires_line_numbers,
+        ]
+    )
+
+
+def create_file_fingerprint(path: Path) -> str:
+    """
+    Create a fingerprint of a file from its stat data.
+
+    :param Path path: The path to the file.
+    :return: The fingerprint built of device, inode, size and mtime.
+    :rtype: str
+    :raises OSError: If the file cannot be stat-ed.
+    """
+
+    stat = os.stat(path)
+    return f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class ResultCache(IResultCache):
+    """
+    An on-disk result cache backed by SQLite. Once the total size
+    of stored results exceeds the limit, least recently used entries
+    are evicted. Any database error disables the cache for the rest
+    of the run instead of failing the search.
+
+    Writes of a search are committed in a single transaction by flush,
+    rather than one per file. Hits only note the access time, which
+    is written by flush too, and the total size is kept as stored
+    results are replaced instead of being summed up again.
+
+    :param Path cache_dir: Directory holding the cache database.
+    :param int max_size: Maximum total size of stored results in bytes.
+    """
+
+    def __init__(
+        self, cache_dir: Path, max_size: int = DEFAULT_MAX_CACHE_SIZE
+    ) -> None:
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._total_size: Optional[int] = None
+        self._access_times: Dict[str, float] = {}
+        self._last_commit_time = time.monotonic()
+
+    def get(
+        self, key: str, fingerprint: str
+    ) -> Optional[List[ProcessingOutput]]:
+        if not (connection := self._connect()):
+            return None
+        hashed_key = self._hash(key)
+        try:
+            row = connection.execute(
+                "SELECT fingerprint, data FROM results WHERE key = ?",
+                (hashed_key,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        if not row or row[0] != fingerprint:
+            return None
+        self._access_times[hashed_key] = time.time()
+        return self._deserialize(row[1])
+
+    def put(
+        self, key: str, fingerprint: str, outputs: List[ProcessingOutput]
+    ) -> None:
+        if not (connection := self._connect()):
+            return
+        data = self._serialize(outputs)
+        if len(data) > self._max_size:
+            return
+        hashed_key = self._hash(key)
+        try:
+            if self._total_size is None:
+                (self._total_size,) = connection.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM results"
+                ).fetchone()
+            previous_row = connection.execute(
+                "SELECT size FROM results WHERE key = ?", (hashed_key,)
+            ).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO results "
+                "(key, fingerprint, data, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (hashed_key, fingerprint, data, len(data), time.time()),
+            )
+        except sqlite3.Error as e:
+            self._disable(e)
+            return
+        self._total_size += len(data) - (
+            previous_row[0] if previous_row else 0
+        )
+        self._access_times.pop(hashed_key, None)
+        if time.monotonic() - self._last_commit_time >= COMMIT_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        if not (connection := self._connection):
+            return
+        try:
+            connection.executemany(
+                "UPDATE results SET last_access = ? WHERE key = ?",
+                [
+                    (access_time, key)
+                    for key, access_time in self._access_times.items()
+                ],
+            )
+            self._evict(connection)
+            connection.commit()
+        except sqlite3.Error as e:
+            self._disable(e)
+        self._access_times.clear()
+        self._last_commit_time = time.monotonic()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._connection or self._disabled:
+            return self._connection
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                str(self._cache_dir / CACHE_FILE_NAME), timeout=5
+            )
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+                    "data BLOB NOT NULL, size INTEGER NOT NULL, "
+                    "last_access REAL NOT NULL)"
+                )
+            self._connection = connection
+        except (OSError, sqlite3.Error) as e:
+            self._disable(e)
+        return self._connection
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        if self._total_size is None or self._total_size <= self._max_size:
+            return
+        keys_to_evict = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM results ORDER BY last_access"
+        ):
+            keys_to_evict.append((key,))
+            self._total_size -= size
+            if self._total_size <= self._max_size:
+                break
+        connection.executemany(
+            "DELETE FROM results WHERE key = ?", keys_to_evict
+        )
+
+    def _disable(self, error: Exception) -> None:
+        print(f"grep: result cache disabled: {error}")
+        self._disabled = True
+        if self._connection:
+            self._connection.close()
+        self._connection = None
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def _serialize(outputs: List[ProcessingOutput]) -> bytes:
+        return json.dumps(
+            [
+                {
+                    "matches": (
+                        [[m.start, m.end] for m in output.matches]
+                        if output.matches is not None
+                        else None
+                    ),
+                    "input_type": output.input_type.value,
+                    "line": (
+                        output.line
+                        if isinstance(output.line, str)
+                        else {"b64": base64.b64encode(output.line).decode()}
+                    ),
+                    "line_number": output.line_number,
+                    "match_count": output.match_count,
+                    "byte_offset": output.byte_offset,
+                    "path": str(output.path),
+                    # Outputs of single lines, the vast majority, omit it.
+                    **(
+                        {"line_count": output.line_count}
+                        if output.line_count > 1
+                        else {}
+                    ),
+                }
+                for output in outputs
+            ]
+        ).encode()
+
+    @staticmethod
+    def _deserialize(data: bytes) -> List[ProcessingOutput]:
+        def _create_output(item: Dict[str, Any]) -> ProcessingOutput:
+            line = item["line"]
+            return ProcessingOutput(
+                matches=(
+                    [MatchPosition(*match) for match in item["matches"]]
+                    if item["matches"] is not None
+                    else None
+                ),
+                path=Path(item["path"]),
+                input_type=InputType(item["input_type"]),
+                line=(
+                    line
+                    if isinstance(line, str)
+                    else base64.b64decode(line["b64"])
+                ),
+                line_number=item["line_number"],
+                match_count=item["match_count"],
+                byte_offset=item["byte_offset"],
+                line_count=item.get("line_count", 1),
+            )
+
+        return [_create_output(item) for item in json.loads(data)]
+
+
+class MemoryResultCache(IResultCache):
+    """
+    An in-memory result cache for long-running processes. Unlike
+    the on-disk cache, hits cost no database access, which would outweigh
+    searching small files. Once the estimated total size of stored
+    results exceeds the limit, least recently used entries are evicted.
+
+    :param int max_size: Maximum estimated total size of stored results
+     in bytes.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_MEMORY_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        self._total_size = 0
+        self._entries: OrderedDict[
+            str, Tuple[str, List[ProcessingOutput], int]
+        ] = OrderedDict()
+
+    def get(
+        self, key: str, fingerprint: str
+    ) -> Optional[List[ProcessingOutput]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != fingerprint:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(
+        self, key: str, fingerprint: str, outputs: List[ProcessingOutput]
+    ) -> None:
+        size = sum(
+            len(output.line) + OUTPUT_SIZE_OVERHEAD for output in outputs
+        ) + len(key)
+        if size > self._max_size:
+            return
+        if (previous_entry := self._entries.pop(key, None)) is not None:
+            self._total_size -= previous_entry[2]
+        self._entries[key] = (fingerprint, outputs, size)
+        self._total_size += size
+        while self._total_size > self._max_size:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._total_size -= evicted_size
+
+    def flush(self) -> None:
+        pass
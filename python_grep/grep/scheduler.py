@@ -0,0 +1,424 @@
+from __future__ import annotations
+
+import io
+import os
+from collections import deque
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Deque,
+    Iterable,
+    List,
+    Optional,
+    Type,
+)
+
+from python_grep.grep.base import (
+    IInputProcessor,
+    IOutputMessageBuilder,
+    ProcessingOutput,
+)
+from python_grep.grep.context import DEFAULT_SPLIT_SIZE
+from python_grep.grep.exceptions import (
+    SuppressBinaryOutputError,
+    TimeBudgetExceededError,
+)
+from python_grep.grep.parallel import init_range_worker
+from python_grep.grep.shared_records import (
+    PackedLines,
+    pack_outputs,
+    share_resource_tracker,
+    unpack_outputs,
+)
+from python_grep.grep.time_budget import time_budget
+from python_grep.match import IPatternMatcher
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    from python_grep.grep.input_processor import CachingInputProcessor
+
+# Small files are batched until a task holds this many bytes or files,
+# so per-task overhead is paid once per batch, while tasks stay small
+# enough for idle workers to pick up the remaining ones near the end.
+BATCH_SIZE = 1024 * 1024
+MAX_BATCH_FILES = 128
+# Batches dispatched ahead of the one being output, per worker.
+PENDING_BATCHES_PER_JOB = 4
+
+_worker_file_searcher: Optional[FileSearcher] = None
+
+
+@dataclass
+class FileSearchResult:
+    """
+    Result of searching a single file in a worker process.
+
+    :param str text: Everything printed for the file.
+    :param Optional[PackedLines] outputs: Outputs of the file packed
+     by pack_outputs, so they are not pickled one by one, if they were
+     requested and it was processed to the end.
+    """
+
+    text: str
+    outputs: Optional[PackedLines] = None
+
+
+class FileSearcher:
+    """
+    Searches files and prints their output messages, as grep does.
+
+    :param IInputProcessor input_processor: The input processor.
+    :param IOutputMessageBuilder output_message_builder: The builder
+     of output messages.
+    :param str line_terminator: The string terminating output lines.
+    :param Optional[float] time_budget: Seconds a single file may be
+     searched for, if limited.
+    """
+
+    def __init__(
+        self,
+        input_processor: IInputProcessor,
+        output_message_builder: IOutputMessageBuilder,
+        line_terminator: str = "\n",
+        time_budget: Optional[float] = None,
+    ) -> None:
+        self._input_processor = input_processor
+        self._output_message_builder = output_message_builder
+        self._line_terminator = line_terminator
+        self._time_budget = time_budget
+
+    def using(self, input_processor: IInputProcessor) -> FileSearcher:
+        """
+        Create a searcher printing messages the same way, but using
+        another input processor.
+
+        :param IInputProcessor input_processor: The input processor.
+        :return: The searcher.
+        :rtype: FileSearcher
+        """
+
+        return FileSearcher(
+            input_processor,
+            self._output_message_builder,
+            self._line_terminator,
+            self._time_budget,
+        )
+
+    def search(
+        self, path: Path, outputs: Optional[List[ProcessingOutput]] = None
+    ) -> bool:
+        """
+        Search a file, printing its output messages.
+
+        :param Path path: The path to the file.
+        :param Optional[List[ProcessingOutput]] outputs: A list to collect
+         the outputs in, if given.
+        :return: Whether the file was processed to the end, rather than
+         reported as a matching binary file or cut short by the time
+         budget.
+        :rtype: bool
+        """
+
+        try:
+            with time_budget(self._time_budget):
+                for output in self._input_processor.process(path):
+                    if outputs is not None:
+                        outputs.append(output)
+                    self.print_output(output)
+        except SuppressBinaryOutputError:
+            print(f"Binary file {path} matches")
+            return False
+        except TimeBudgetExceededError as error:
+            print(f"grep: {path}: {error}")
+            return False
+        return True
+
+    def search_captured(
+        self, path: Path, keep_outputs: bool = False
+    ) -> FileSearchResult:
+        """
+        Search a file, capturing everything printed for it, errors
+        included.
+
+        :param Path path: The path to the file.
+        :param bool keep_outputs: Whether outputs should be returned too.
+        :return: The result of the search.
+        :rtype: FileSearchResult
+        """
+
+        outputs: Optional[List[ProcessingOutput]] = (
+            [] if keep_outputs else None
+        )
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            if not self.search(path, outputs):
+                outputs = None
+        return FileSearchResult(
+            buffer.getvalue(),
+            None if outputs is None else pack_outputs(outputs),
+        )
+
+    def print_output(self, output: ProcessingOutput) -> None:
+        """
+        Print the output message of a processing output.
+
+        :param ProcessingOutput output: The processing output.
+        """
+
+        print(
+            self._output_message_builder.create(output),
+            end=self._line_terminator,
+        )
+
+
+def _init_worker(
+    file_searcher: FileSearcher, pattern_matcher: IPatternMatcher
+) -> None:
+    global _worker_file_searcher
+    _worker_file_searcher = file_searcher
+    init_range_worker(pattern_matcher)
+
+
+def search_batch(
+    paths: List[Path], keep_outputs: bool = False
+) -> List[FileSearchResult]:
+    """
+    Search a batch of files in a worker process.
+
+    :param List[Path] paths: The paths to the files.
+    :param bool keep_outputs: Whether outputs should be returned too.
+    :return: Results of the files, in order.
+    :rtype: List[FileSearchResult]
+    """
+
+    assert _worker_file_searcher is not None
+    return [
+        _worker_file_searcher.search_captured(path, keep_outputs)
+        for path in paths
+    ]
+
+
+@dataclass
+class _Batch:
+    paths: List[Path] = field(default_factory=list)
+    size: int = 0
+    future: Optional[Future[List[FileSearchResult]]] = None
+    results: Optional[List[FileSearchResult]] = None
+
+
+@dataclass
+class _Entry:
+    # A file in output order: a member of a batch, a large file searched
+    # by the parent process or a file answered from the result cache.
+    path: Path
+    batch: Optional[_Batch] = None
+    index: int = 0
+    fingerprint: Optional[str] = None
+    cached_outputs: Optional[List[ProcessingOutput]] = None
+
+
+class FileScheduler:
+    """
+    Schedules searches of many files over a pool of processes.
+
+    Small files are batched into single tasks. Files of at least
+    large_file_size bytes are searched one at a time by the calling
+    process, with an input processor splitting them into byte ranges
+    scanned by the same pool, so a few big files do not leave all but
+    one worker idle. Tasks are queued in the order of the files and
+    every idle worker takes the next one, so none of them waits while
+    there is work left. Output is printed in the order of the files,
+    while the following batches are searched ahead.
+
+    A search not filling more than one batch is run by the calling
+    process, without starting the pool.
+
+    :param FileSearcher file_searcher: The searcher of small files, run
+     by workers.
+    :param IPatternMatcher pattern_matcher: The matcher for text input,
+     used by workers to scan byte ranges.
+    :param int jobs: Number of worker processes.
+    :param int large_file_size: Size of files searched one at a time.
+    :param int batch_size: Number of bytes of files batched into a task.
+    :param int max_batch_files: Maximum number of files in a task.
+    """
+
+    def __init__(
+        self,
+        file_searcher: FileSearcher,
+        pattern_matcher: IPatternMatcher,
+        jobs: int,
+        large_file_size: int = 2 * DEFAULT_SPLIT_SIZE,
+        batch_size: int = BATCH_SIZE,
+        max_batch_files: int = MAX_BATCH_FILES,
+    ) -> None:
+        self._file_searcher = file_searcher
+        self._pattern_matcher = pattern_matcher
+        self._jobs = jobs
+        self._large_file_size = large_file_size
+        self._batch_size = batch_size
+        self._max_batch_files = max_batch_files
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending_batches: Deque[_Batch] = deque()
+        self._has_submitted = False
+
+    def __enter__(self) -> FileScheduler:
+        # Imported here, as it pulls in multiprocessing, which only
+        # parallel searches need. Workers are started by the first task.
+        from concurrent.futures import ProcessPoolExecutor
+
+        share_resource_tracker()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._jobs,
+            initializer=_init_worker,
+            initargs=(self._file_searcher, self._pattern_matcher),
+        )
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        assert self._executor is not None
+        for batch in self._pending_batches:
+            if batch.future is not None:
+                batch.future.cancel()
+        self._pending_batches.clear()
+        self._executor.shutdown()
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        assert self._executor is not None, "the scheduler is not entered"
+        return self._executor
+
+    def run(
+        self,
+        paths: Iterable[Path],
+        input_processor: IInputProcessor,
+        caching_input_processor: Optional[CachingInputProcessor] = None,
+    ) -> None:
+        """
+        Search files, printing their output messages in order.
+
+        :param Iterable[Path] paths: The paths to the files.
+        :param IInputProcessor input_processor: The input processor
+         of large files.
+        :param Optional[CachingInputProcessor] caching_input_processor:
+         The result cache small files are looked up in and stored to,
+         if any.
+        """
+
+        large_file_searcher = self._file_searcher.using(input_processor)
+        keep_outputs = caching_input_processor is not None
+        entries: Deque[_Entry] = deque()
+        batch = _Batch()
+        max_pending_batches = PENDING_BATCHES_PER_JOB * self._jobs
+        max_entries = max_pending_batches * self._max_batch_files
+        for path in paths:
+            size = self._get_size(path)
+            if size >= self._large_file_size:
+                self._submit(batch, keep_outputs)
+                batch = _Batch()
+                entries.append(_Entry(path))
+            else:
+                fingerprint: Optional[str] = None
+                cached_outputs: Optional[List[ProcessingOutput]] = None
+                if caching_input_processor is not None:
+                    fingerprint, cached_outputs = (
+                        caching_input_processor.lookup(path)
+                    )
+                if cached_outputs is not None:
+                    entries.append(_Entry(path, cached_outputs=cached_outputs))
+                else:
+                    batch.paths.append(path)
+                    batch.size += size
+                    entries.append(
+                        _Entry(path, batch, len(batch.paths) - 1, fingerprint)
+                    )
+                    if (
+                        batch.size >= self._batch_size
+                        or len(batch.paths) >= self._max_batch_files
+                    ):
+                        self._submit(batch, keep_outputs)
+                        batch = _Batch()
+            while entries and (
+                len(self._pending_batches) >= max_pending_batches
+                or len(entries) >= max_entries
+            ):
+                if entries[0].batch is batch:
+                    self._submit(batch, keep_outputs)
+                    batch = _Batch()
+                self._complete(
+                    entries.popleft(),
+                    large_file_searcher,
+                    caching_input_processor,
+                )
+
+        if not self._has_submitted:
+            batch.results = [
+                self._file_searcher.search_captured(path, keep_outputs)
+                for path in batch.paths
+            ]
+        else:
+            self._submit(batch, keep_outputs)
+        while entries:
+            self._complete(
+                entries.popleft(), large_file_searcher, caching_input_processor
+            )
+
+    def _submit(self, batch: _Batch, keep_outputs: bool) -> None:
+        if not batch.paths:
+            return
+        batch.future = self.executor.submit(
+            search_batch, batch.paths, keep_outputs
+        )
+        self._has_submitted = True
+        self._pending_batches.append(batch)
+
+    def _complete(
+        self,
+        entry: _Entry,
+        large_file_searcher: FileSearcher,
+        caching_input_processor: Optional[CachingInputProcessor],
+    ) -> None:
+        if entry.cached_outputs is not None:
+            for output in entry.cached_outputs:
+                self._file_searcher.print_output(output)
+            return
+        if (batch := entry.batch) is None:
+            large_file_searcher.search(entry.path)
+            return
+
+        if batch.results is None:
+            assert batch.future is not None
+            batch.results = batch.future.result()
+        result = batch.results[entry.index]
+        print(result.text, end="")
+        if (
+            caching_input_processor is not None
+            and entry.fingerprint is not None
+            and result.outputs is not None
+        ):
+            caching_input_processor.store(
+                entry.path,
+                entry.fingerprint,
+                unpack_outputs(result.outputs, entry.path),
+            )
+        if entry.index == len(batch.paths) - 1 and batch.future is not None:
+            self._pending_batches.popleft()
+
+    @staticmethod
+    def _get_size(path: Path) -> int:
+        # Files which cannot be stat-ed are batched, so searching them
+        # reports the error.
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
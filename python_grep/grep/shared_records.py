@@ -0,0 +1,598 @@
+from __future__ import annotations
+
+import os
+import struct
+import time
+from array import array
+from dataclasses import dataclass
+from itertools import chain
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from python_grep.grep.base import ProcessingOutput
+from python_grep.match import MatchPosition, MatchPositions
+from python_grep.storage.base import InputType
+
+# Records are streamed in chunks of about this many bytes, so every
+# chunk pays for being framed once for many lines.
+CHUNK_SIZE = 64 * 1024
+# Bytes of records of a range held in its ring, which the worker
+# scanning the range waits on once the parent falls that far behind.
+RING_CAPACITY = 4 * 1024 * 1024
+# Longest pause between two polls of a ring waited on.
+MAX_POLL_INTERVAL = 0.005
+SHARED_MEMORY_DIR = "/dev/shm"
+LINE_SEPARATOR = b"\n"
+
+LineRecord = Tuple[int, int, str, Optional[List[MatchPosition]]]
+
+_FRAME_HEADER = struct.Struct("QQQ")
+# Fields of an output header: line number + 1 or 0 if None, byte offset,
+# number of match positions + 1 or 0 if None, match count, line count,
+# length of the line and whether the input, then the line, is binary.
+_OUTPUT_FIELD_COUNT = 8
+
+
+@dataclass
+class PackedLines:
+    """
+    Lines selected in a byte range, packed by a worker.
+
+    Records are laid out in columns: (line index within the range, byte
+    offset, match count) triples, then (start, end) pairs of match
+    positions, both as 64-bit integers, then the bytes of the lines
+    joined by newlines.
+
+    :param int line_count: Number of lines.
+    :param int position_count: Number of match positions.
+    :param bytes data: The records.
+    """
+
+    line_count: int = 0
+    position_count: int = 0
+    data: bytes = b""
+
+
+class LineRecordWriter:
+    """
+    Packs lines selected by a worker, so they reach the parent process
+    without pickling Python objects per line, and the parent decodes
+    or writes out all of them at once.
+
+    Lines are stored as read, so they must not hold newlines.
+    """
+
+    def __init__(self) -> None:
+        self._headers = array("Q")
+        self._positions = array("Q")
+        self._lines: List[bytes] = []
+        self._line_size = 0
+
+    @property
+    def size(self) -> int:
+        """Size of the added lines once packed, in bytes."""
+
+        return (
+            self._headers.itemsize
+            * (len(self._headers) + len(self._positions))
+            + self._line_size
+        )
+
+    def add(
+        self,
+        index: int,
+        offset: int,
+        raw_line: bytes,
+        matches: Optional[Sequence[MatchPosition]],
+    ) -> None:
+        """
+        Add a line.
+
+        :param int index: The index of the line within the range.
+        :param int offset: The byte offset of the line.
+        :param bytes raw_line: The line without its separator.
+        :param Optional[Sequence[MatchPosition]] matches: Positions
+         of matches or None for a context line.
+        """
+
+        self._headers.extend((index, offset, len(matches) if matches else 0))
+        if isinstance(matches, MatchPositions):
+            self._positions.extend(
+                chain.from_iterable(zip(matches.starts, matches.ends))
+            )
+        elif matches:
+            for match in matches:
+                self._positions.extend((match.start, match.end))
+        self._lines.append(raw_line)
+        self._line_size += len(raw_line) + 1
+
+    def pack(self) -> PackedLines:
+        """
+        Pack the lines added since the last call.
+
+        :return: The packed lines.
+        :rtype: PackedLines
+        """
+
+        if not self._lines:
+            return PackedLines()
+        packed_lines = PackedLines(
+            len(self._lines),
+            len(self._positions) // 2,
+            b"".join(
+                (
+                    memoryview(self._headers).cast("B"),
+                    memoryview(self._positions).cast("B"),
+                    LINE_SEPARATOR.join(self._lines),
+                )
+            ),
+        )
+        self._headers = array("Q")
+        self._positions = array("Q")
+        self._lines = []
+        self._line_size = 0
+        return packed_lines
+
+
+class RecordRing:
+    """
+    A ring buffer in shared memory, through which a worker streams
+    packed lines of a range to the parent process while it scans
+    the range, so the parent can output them before the scan ends and
+    neither process holds more than the capacity of the ring of them.
+
+    The ring has a single writer and a single reader. Its header holds
+    the numbers of bytes written and read in total, each only ever
+    stored by one side, and whether either side closed the ring. A side
+    which cannot proceed polls the other, as the process pool passes
+    no locks to tasks. Frames larger than the ring pass it in parts.
+
+    The parent creates rings and unlinks them once read or abandoned.
+    A worker writing to a ring abandoned by the parent stops writing.
+
+    :param SharedMemory segment: The shared memory block of the ring.
+    """
+
+    _STATE_SIZE = 64
+    _WRITTEN, _READ, _WRITER_CLOSED, _READER_CLOSED = range(4)
+
+    def __init__(self, segment: SharedMemory) -> None:
+        assert segment.buf is not None
+        self._segment = segment
+        self._state = segment.buf[: self._STATE_SIZE].cast("Q")
+        self._data = segment.buf[self._STATE_SIZE :]
+        self._capacity = len(self._data)
+
+    @classmethod
+    def create(cls, capacity: Optional[int] = None) -> Optional[RecordRing]:
+        """
+        Create a ring, if the file system backing shared memory has room
+        for it.
+
+        :param Optional[int] capacity: The capacity of the ring in bytes,
+         RING_CAPACITY if not given.
+        :return: The ring or None if it cannot be created.
+        :rtype: Optional[RecordRing]
+        """
+
+        if capacity is None:
+            capacity = RING_CAPACITY
+        if not _has_room(capacity):
+            return None
+        try:
+            segment = SharedMemory(
+                create=True, size=cls._STATE_SIZE + capacity
+            )
+        except OSError:
+            return None
+        return cls(segment)
+
+    @classmethod
+    def attach(cls, name: str) -> Optional[RecordRing]:
+        """
+        Attach to a ring created by another process.
+
+        :param str name: The name of the ring.
+        :return: The ring or None if it was already abandoned.
+        :rtype: Optional[RecordRing]
+        """
+
+        try:
+            return cls(SharedMemory(name))
+        except FileNotFoundError:
+            return None
+
+    @property
+    def name(self) -> str:
+        return self._segment.name
+
+    def write(self, packed_lines: PackedLines) -> bool:
+        """
+        Write a frame of packed lines, waiting for room in the ring.
+
+        :param PackedLines packed_lines: The packed lines.
+        :return: False if the reader abandoned the ring.
+        :rtype: bool
+        """
+
+        return self._write(
+            _FRAME_HEADER.pack(
+                len(packed_lines.data),
+                packed_lines.line_count,
+                packed_lines.position_count,
+            )
+        ) and self._write(packed_lines.data)
+
+    def read(
+        self, is_writer_done: Callable[[], bool]
+    ) -> Optional[PackedLines]:
+        """
+        Read the next frame of packed lines, waiting for the writer.
+
+        :param Callable[[], bool] is_writer_done: Tells whether the writer
+         is done, even if it did not close the ring, e.g. as it crashed.
+        :return: The packed lines or None once the writer is done.
+        :rtype: Optional[PackedLines]
+        """
+
+        header = self._read(_FRAME_HEADER.size, is_writer_done)
+        if header is None:
+            return None
+        size, line_count, position_count = _FRAME_HEADER.unpack(header)
+        data = self._read(size, is_writer_done)
+        if data is None:
+            return None
+        return PackedLines(line_count, position_count, bytes(data))
+
+    def close_writer(self) -> None:
+        """Mark the end of the frames and detach from the ring."""
+
+        self._state[self._WRITER_CLOSED] = 1
+        self._detach()
+
+    def close_reader(self) -> None:
+        """Detach from the ring and unlink it, abandoning unread frames."""
+
+        self._state[self._READER_CLOSED] = 1
+        self._detach()
+        self._segment.unlink()
+
+    def _write(self, data: bytes) -> bool:
+        state = self._state
+        view = memoryview(data)
+        position = 0
+        poll_interval = 0.0
+        while position < len(view):
+            if state[self._READER_CLOSED]:
+                return False
+            written = state[self._WRITTEN]
+            start = written % self._capacity
+            size = min(
+                len(view) - position,
+                self._capacity - (written - state[self._READ]),
+                self._capacity - start,
+            )
+            if not size:
+                poll_interval = _poll(poll_interval)
+                continue
+            self._data[start : start + size] = view[position : position + size]
+            state[self._WRITTEN] = written + size
+            position += size
+            poll_interval = 0.0
+        return True
+
+    def _read(
+        self, size: int, is_writer_done: Callable[[], bool]
+    ) -> Optional[bytearray]:
+        state = self._state
+        data = bytearray(size)
+        position = 0
+        poll_interval = 0.0
+        while position < size:
+            read = state[self._READ]
+            start = read % self._capacity
+            chunk_size = min(
+                size - position,
+                state[self._WRITTEN] - read,
+                self._capacity - start,
+            )
+            if not chunk_size:
+                # Bytes written before the writer closed the ring are
+                # seen once it is seen closed.
+                if (state[self._WRITER_CLOSED] or is_writer_done()) and state[
+                    self._WRITTEN
+                ] == read:
+                    return None
+                poll_interval = _poll(poll_interval)
+                continue
+            data[position : position + chunk_size] = self._data[
+                start : start + chunk_size
+            ]
+            state[self._READ] = read + chunk_size
+            position += chunk_size
+            poll_interval = 0.0
+        return data
+
+    def _detach(self) -> None:
+        self._state.release()
+        self._data.release()
+        self._segment.close()
+
+
+def read_line_records(
+    packed_lines: PackedLines, encoding: str
+) -> List[LineRecord]:
+    """
+    Read packed lines.
+
+    :param PackedLines packed_lines: The packed lines.
+    :param str encoding: The encoding of the lines.
+    :return: (line index within the range, byte offset, line, match
+     positions) tuples, match positions being None for context lines.
+    :rtype: List[LineRecord]
+    """
+
+    if not packed_lines.line_count:
+        return []
+    headers, positions, lines = _split_columns(packed_lines)
+    records: List[LineRecord] = []
+    fields = iter(headers)
+    position_values = iter(positions)
+    for line, index, offset, match_count in zip(
+        str(lines, encoding).split(LINE_SEPARATOR.decode()),
+        fields,
+        fields,
+        fields,
+    ):
+        records.append(
+            (
+                index,
+                offset,
+                line,
+                (
+                    [
+                        MatchPosition(start, end)
+                        for _, start, end in zip(
+                            range(match_count),
+                            position_values,
+                            position_values,
+                        )
+                    ]
+                    if match_count
+                    else None
+                ),
+            )
+        )
+    return records
+
+
+def write_line_records(
+    packed_lines: PackedLines,
+    stream: BinaryIO,
+    prefix: bytes,
+    first_line_number: Optional[int] = None,
+    byte_offsets: bool = False,
+) -> int:
+    """
+    Write packed lines to a binary stream as grep prints them, each
+    line preceded by a prefix and, if requested, its line number and
+    byte offset, without decoding the lines.
+
+    :param PackedLines packed_lines: The packed lines.
+    :param BinaryIO stream: The stream to write to.
+    :param bytes prefix: The prefix of every line, e.g. the file name.
+    :param Optional[int] first_line_number: The line number of the line
+     of index 0, if line numbers are to be written.
+    :param bool byte_offsets: Whether byte offsets are to be written.
+    :return: The byte offset of the last line written or -1 if none.
+    :rtype: int
+    """
+
+    if not packed_lines.line_count:
+        return -1
+    headers, _, lines = _split_columns(packed_lines)
+    if first_line_number is None and not byte_offsets:
+        stream.write(
+            prefix
+            + lines.replace(LINE_SEPARATOR, LINE_SEPARATOR + prefix)
+            + LINE_SEPARATOR
+        )
+        return headers[-2]
+
+    fields = iter(headers)
+    parts: List[bytes] = []
+    for line, index, offset, _ in zip(
+        lines.split(LINE_SEPARATOR), fields, fields, fields
+    ):
+        parts.append(prefix)
+        if first_line_number is not None:
+            parts.append(b"%d:" % (first_line_number + index))
+        if byte_offsets:
+            parts.append(b"%d:" % offset)
+        parts.append(line)
+        parts.append(LINE_SEPARATOR)
+    stream.write(b"".join(parts))
+    return headers[-2]
+
+
+def pack_outputs(outputs: List[ProcessingOutput]) -> PackedLines:
+    """
+    Pack processing outputs of a file, so a worker returns them without
+    pickling Python objects per output.
+
+    Outputs are laid out like lines, in columns of headers, match
+    positions and lines, text lines encoded in UTF-8. Their path is
+    left out, as outputs of a file share it.
+
+    :param List[ProcessingOutput] outputs: The outputs.
+    :return: The packed outputs.
+    :rtype: PackedLines
+    """
+
+    headers = array("Q")
+    positions = array("Q")
+    lines: List[bytes] = []
+    for output in outputs:
+        line = output.line
+        raw_line = (
+            line
+            if isinstance(line, bytes)
+            else line.encode("utf-8", "surrogatepass")
+        )
+        matches = output.matches
+        headers.extend(
+            (
+                0 if output.line_number is None else output.line_number + 1,
+                output.byte_offset,
+                0 if matches is None else len(matches) + 1,
+                output.match_count,
+                output.line_count,
+                len(raw_line),
+                output.input_type is InputType.BINARY,
+                isinstance(line, bytes),
+            )
+        )
+        for match in matches or ():
+            positions.extend((match.start, match.end))
+        lines.append(raw_line)
+    return PackedLines(
+        len(outputs),
+        len(positions) // 2,
+        b"".join(
+            (
+                memoryview(headers).cast("B"),
+                memoryview(positions).cast("B"),
+                *lines,
+            )
+        ),
+    )
+
+
+def unpack_outputs(
+    packed_outputs: PackedLines, path: Path
+) -> List[ProcessingOutput]:
+    """
+    Unpack processing outputs packed by pack_outputs.
+
+    :param PackedLines packed_outputs: The packed outputs.
+    :param Path path: The path of the file the outputs are of.
+    :return: The outputs.
+    :rtype: List[ProcessingOutput]
+    """
+
+    headers = array("Q")
+    headers_end = (
+        _OUTPUT_FIELD_COUNT * packed_outputs.line_count * headers.itemsize
+    )
+    data = memoryview(packed_outputs.data)
+    headers.frombytes(data[:headers_end])
+    positions = array("Q")
+    positions_end = (
+        headers_end + 2 * packed_outputs.position_count * positions.itemsize
+    )
+    positions.frombytes(data[headers_end:positions_end])
+
+    outputs: List[ProcessingOutput] = []
+    line_start = positions_end
+    position_index = 0
+    for output_index in range(packed_outputs.line_count):
+        (
+            line_number,
+            byte_offset,
+            position_count,
+            match_count,
+            line_count,
+            line_length,
+            is_binary_input,
+            is_binary_line,
+        ) = headers[
+            _OUTPUT_FIELD_COUNT
+            * output_index : _OUTPUT_FIELD_COUNT
+            * (output_index + 1)
+        ]
+        raw_line = bytes(data[line_start : line_start + line_length])
+        line_start += line_length
+        matches: Optional[List[MatchPosition]] = None
+        if position_count:
+            matches = [
+                MatchPosition(positions[index], positions[index + 1])
+                for index in range(
+                    2 * position_index,
+                    2 * (position_index + position_count - 1),
+                    2,
+                )
+            ]
+            position_index += position_count - 1
+        outputs.append(
+            ProcessingOutput(
+                matches=matches,
+                path=path,
+                input_type=(
+                    InputType.BINARY if is_binary_input else InputType.TEXT
+                ),
+                line=(
+                    raw_line
+                    if is_binary_line
+                    else raw_line.decode("utf-8", "surrogatepass")
+                ),
+                line_number=line_number - 1 if line_number else None,
+                match_count=match_count,
+                byte_offset=byte_offset,
+                line_count=line_count,
+            )
+        )
+    return outputs
+
+
+def share_resource_tracker() -> None:
+    """
+    Start the resource tracker of the current process, so worker
+    processes started later register blocks they attach to with it
+    instead of their own. Blocks are then unregistered by the parent
+    process unlinking them, and those left behind by a crash are removed
+    when it exits.
+    """
+
+    if os.name == "posix":
+        resource_tracker.ensure_running()
+
+
+def _split_columns(
+    packed_lines: PackedLines,
+) -> Tuple[array[int], array[int], bytes]:
+    data = memoryview(packed_lines.data)
+    headers = array("Q")
+    headers_end = 3 * packed_lines.line_count * headers.itemsize
+    headers.frombytes(data[:headers_end])
+    positions = array("Q")
+    positions_end = (
+        headers_end + 2 * packed_lines.position_count * positions.itemsize
+    )
+    positions.frombytes(data[headers_end:positions_end])
+    return headers, positions, packed_lines.data[positions_end:]
+
+
+def _poll(poll_interval: float) -> float:
+    # Waits for the other side of a ring, backing off while it is idle.
+    time.sleep(poll_interval)
+    return min(MAX_POLL_INTERVAL, 2 * poll_interval or 0.0001)
+
+
+def _has_room(size: int) -> bool:
+    # Writing past the capacity of the file system backing shared memory
+    # kills the writer with SIGBUS, so blocks are only created with
+    # a margin to spare.
+    try:
+        stat = os.statvfs(SHARED_MEMORY_DIR)
+    except (AttributeError, OSError):
+        return True
+    return stat.f_bavail * stat.f_frsize >= 2 * size
@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+from types import FrameType
+from typing import Generator, Optional
+
+from python_grep.grep.exceptions import TimeBudgetExceededError
+
+
+@contextmanager
+def time_budget(seconds: Optional[float]) -> Generator[None, None, None]:
+    """
+    Limit the wall-clock time spent in a block, interrupting it with
+    TimeBudgetExceededError once the budget is spent.
+
+    The budget is kept by an interval timer, so it also interrupts
+    a regex search stuck in backtracking, which the re module checks for
+    signals. It is only kept in the main thread on platforms providing
+    setitimer, elsewhere the block runs without a limit.
+
+    :param Optional[float] seconds: The budget or None for no limit.
+    """
+
+    if seconds is None:
+        yield
+        return
+    # Imported here, as only searches with a time budget need it.
+    import signal
+
+    def handle_alarm(signal_number: int, frame: Optional[FrameType]) -> None:
+        raise TimeBudgetExceededError(
+            f"time budget of {seconds:g} s exceeded, rest of the file "
+            "skipped"
+        )
+
+    try:
+        previous_handler = signal.signal(signal.SIGALRM, handle_alarm)
+    except (AttributeError, ValueError):
+        yield
+        return
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import os
+import struct
+import sys
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import socket
+
+SOCKET_ENV_VAR = "PYGREP_SOCKET"
+
+REQUEST_CHANNEL = b"a"
+STDOUT_CHANNEL = b"o"
+STDERR_CHANNEL = b"e"
+EXIT_CHANNEL = b"x"
+
+FRAME_HEADER = struct.Struct(">cI")
+
+Frame = Tuple[bytes, bytes]
+
+
+def get_default_socket_path() -> Path:
+    """
+    Get the default path of the server socket.
+
+    :return: The socket path, placed under XDG_RUNTIME_DIR or, if it is
+     not set, next to the result cache.
+    :rtype: Path
+    """
+
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(runtime_dir, "python_grep.sock")
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home, "python_grep", "server.sock")
+
+
+def parse_server_args(
+    args: Optional[List[str]],
+) -> Tuple[Namespace, List[str]]:
+    """
+    Separate the server related command-line arguments from the rest.
+
+    :param Optional[List[str]] args: A list of strings representing
+     the command-line arguments. If None, sys.argv is used.
+    :return: The parsed server arguments and the remaining arguments.
+    :rtype: Tuple[Namespace, List[str]]
+    """
+
+    parser = ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--server", action="store_true")
+    parser.add_argument("--socket")
+    return parser.parse_known_args(args)
+
+
+def send_frame(connection: socket.socket, channel: bytes, data: bytes) -> None:
+    """
+    Send a frame of data over a connection.
+
+    :param socket.socket connection: The connection.
+    :param bytes channel: The channel the data belongs to.
+    :param bytes data: The data.
+    """
+
+    connection.sendall(FRAME_HEADER.pack(channel, len(data)) + data)
+
+
+def receive_frame(reader: BinaryIO) -> Optional[Frame]:
+    """
+    Receive a frame of data from a connection.
+
+    :param BinaryIO reader: A file reading from the connection.
+    :return: The channel and the data, or None if the connection
+     was closed.
+    :rtype: Optional[Frame]
+    """
+
+    header = reader.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    channel, size = FRAME_HEADER.unpack(header)
+    data = reader.read(size)
+    if len(data) < size:
+        return None
+    return channel, data
+
+
+def forward_to_server(args: List[str], socket_path: Path) -> Optional[int]:
+    """
+    Run a search on a server and write its output to the standard
+    streams.
+
+    :param List[str] args: The command-line arguments of the search.
+     Relative paths are resolved against the current directory.
+    :param Path socket_path: The path to the server socket.
+    :return: The exit status of the search or None if no server
+     is listening on the socket.
+    :rtype: Optional[int]
+    """
+
+    # Imported here rather than at the top, so searches run in this
+    # process do not pay for them.
+    import json
+    import socket
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(str(socket_path))
+    except OSError:
+        connection.close()
+        return None
+
+    with connection, connection.makefile("rb") as reader:
+        send_frame(
+            connection,
+            REQUEST_CHANNEL,
+            json.dumps({"args": args, "cwd": os.getcwd()}).encode(),
+        )
+        while frame := receive_frame(reader):
+            channel, data = frame
+            if channel == EXIT_CHANNEL:
+                return int(data)
+            stream = sys.stderr if channel == STDERR_CHANNEL else sys.stdout
+            stream.buffer.write(data)
+            stream.buffer.flush()
+    print("grep: the server closed the connection", file=sys.stderr)
+    return 1
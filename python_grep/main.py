@@ -1,12 +1,41 @@
+import os
+import sys
+from pathlib import Path
 from typing import List, Optional
 
-from python_grep.cli import create_cli_parser, get_parsed_args
-from python_grep.grep import create_grep_from_cli_args
+from python_grep.ipc import (
+    SOCKET_ENV_VAR,
+    forward_to_server,
+    get_default_socket_path,
+    parse_server_args,
+)
 
 
 def main(args: Optional[List[str]] = None) -> None:
+    server_args, grep_args = parse_server_args(args)
+    if server_args.server:
+        from python_grep.server import GrepServer
+
+        GrepServer(
+            Path(server_args.socket or get_default_socket_path())
+        ).serve_forever()
+        return
+
+    socket_path = server_args.socket or os.environ.get(SOCKET_ENV_VAR)
+    if socket_path:
+        status = forward_to_server(grep_args, Path(socket_path))
+        if status:
+            sys.exit(status)
+        if status is not None:
+            return
+
+    # Imported only when searching in this process, so forwarding
+    # a search to a server does not pay for them.
+    from python_grep.cli import create_cli_parser, get_parsed_args
+    from python_grep.grep import create_grep_from_cli_args
+
     cli_parser = create_cli_parser()
-    parsed_args = get_parsed_args(cli_parser, args)
+    parsed_args = get_parsed_args(cli_parser, grep_args)
     grep = create_grep_from_cli_args(parsed_args)
     grep.execute()
 
@@ -1,14 +1,59 @@
-from python_grep.match.base import IPatternMatcher, MatchPosition
-from python_grep.match.pattern_matcher import (
-    BinaryPatternMatcher,
-    PatternMatcherTemplate,
-    TextPatternMatcher,
+from typing import TYPE_CHECKING, Any
+
+from python_grep.match.base import (
+    IPatternMatcher,
+    IRegex,
+    IRegexEngine,
+    MatchBatch,
+    MatchPosition,
+    MatchPositions,
 )
 
+if TYPE_CHECKING:
+    from python_grep.match.multi_pattern_matcher import (
+        BinaryMultiPatternMatcher,
+        MultiPatternMatcherTemplate,
+        TextMultiPatternMatcher,
+    )
+    from python_grep.match.pattern_matcher import (
+        BinaryPatternMatcher,
+        PatternMatcherTemplate,
+        TextPatternMatcher,
+    )
+
 __all__ = [
+    "BinaryMultiPatternMatcher",
     "BinaryPatternMatcher",
     "IPatternMatcher",
+    "IRegex",
+    "IRegexEngine",
+    "MatchBatch",
     "MatchPosition",
+    "MatchPositions",
+    "MultiPatternMatcherTemplate",
     "PatternMatcherTemplate",
+    "TextMultiPatternMatcher",
     "TextPatternMatcher",
 ]
+
+# Matchers are resolved on first access, so modules needing only
+# the interface do not compile the regular expression machinery.
+_LAZY_EXPORTS = {
+    "BinaryMultiPatternMatcher": "python_grep.match.multi_pattern_matcher",
+    "MultiPatternMatcherTemplate": "python_grep.match.multi_pattern_matcher",
+    "TextMultiPatternMatcher": "python_grep.match.multi_pattern_matcher",
+    "BinaryPatternMatcher": "python_grep.match.pattern_matcher",
+    "PatternMatcherTemplate": "python_grep.match.pattern_matcher",
+    "TextPatternMatcher": "python_grep.match.pattern_matcher",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Unlike importlib.import_module, __import__ shows up in the output
+    # of -X importtime.
+    module = __import__(_LAZY_EXPORTS[name], fromlist=[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
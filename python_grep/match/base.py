@@ -1,8 +1,25 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import AnyStr, Generic, List, Optional
+from array import array
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import (
+    AnyStr,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
+
+AnyStr_contra = TypeVar("AnyStr_contra", str, bytes, contravariant=True)
 
 
 class IPatternMatcher(ABC, Generic[AnyStr]):
@@ -38,8 +55,278 @@ class IPatternMatcher(ABC, Generic[AnyStr]):
         """
         pass
 
+    @abstractmethod
+    def iter_matches(
+        self, input_val: AnyStr, pos: int = 0
+    ) -> Iterator[MatchPosition]:
+        """
+        Iterate over matches of all patterns in the order of their
+        positions, without inverting the match.
+
+        Overlapping matches of different patterns are resolved in favour
+        of the one starting first and, among those, the longest one.
+
+        :param AnyStr input_val: The input value to search within.
+        :param int pos: The index to start searching at. Text before it
+         is still seen by lookbehinds, anchors and word boundaries.
+        :return: An iterator of non-overlapping MatchPosition objects.
+        :rtype: Iterator[MatchPosition]
+        """
+
+    @abstractmethod
+    def search_many(self, lines: Sequence[AnyStr]) -> MatchBatch:
+        """
+        Perform a search operation on every line of a batch.
+
+        Gives the same matches as calling search on every line, while
+        lines the patterns cannot match are ruled out without a call per
+        line.
+
+        :param Sequence[AnyStr] lines: The lines to search within.
+        :return: The first match found in every matching line.
+        :rtype: MatchBatch
+        """
+
+    @abstractmethod
+    def match_many(self, lines: Sequence[AnyStr]) -> MatchBatch:
+        """
+        Perform a full match operation on every line of a batch.
+
+        Gives the same matches as calling match on every line, while
+        lines the patterns cannot match are ruled out without a call per
+        line.
+
+        :param Sequence[AnyStr] lines: The lines to match.
+        :return: Every match of every matching line.
+        :rtype: MatchBatch
+        """
+
 
 @dataclass(frozen=True)
 class MatchPosition:
     start: int
     end: int
+
+
+class MatchPositions(Sequence[MatchPosition]):
+    """
+    Positions of the matches of a single line of a MatchBatch, viewed
+    in its arrays. MatchPosition objects are only created as items are
+    accessed, so outputs not showing their matches cost none. The view
+    equals any sequence of the same positions and is pickled as a list.
+
+    :param array[int] starts: Starts of all matches of the batch.
+    :param array[int] ends: Ends of all matches of the batch.
+    :param int first: The index of the first match of the line.
+    :param int stop: The index following the last match of the line.
+    """
+
+    __slots__ = ("_all_starts", "_all_ends", "_first", "_stop")
+
+    def __init__(
+        self, starts: array[int], ends: array[int], first: int, stop: int
+    ) -> None:
+        self._all_starts = starts
+        self._all_ends = ends
+        self._first = first
+        self._stop = stop
+
+    @property
+    def starts(self) -> array[int]:
+        return self._all_starts[self._first : self._stop]
+
+    @property
+    def ends(self) -> array[int]:
+        return self._all_ends[self._first : self._stop]
+
+    def __len__(self) -> int:
+        return self._stop - self._first
+
+    @overload
+    def __getitem__(self, index: int) -> MatchPosition:
+        pass
+
+    @overload
+    def __getitem__(self, index: slice) -> List[MatchPosition]:
+        pass
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[MatchPosition, List[MatchPosition]]:
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("match position index out of range")
+        return MatchPosition(
+            self._all_starts[self._first + index],
+            self._all_ends[self._first + index],
+        )
+
+    def __iter__(self) -> Iterator[MatchPosition]:
+        return map(MatchPosition, self.starts, self.ends)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def __reduce__(self) -> Tuple[type, Tuple[List[MatchPosition]]]:
+        return list, (list(self),)
+
+
+@dataclass
+class MatchBatch:
+    """
+    Matches found in a batch of lines. Indexes of matching lines are kept
+    in ascending order, next to bounds: the index following the last
+    match of every line in the parallel arrays of starts and ends of all
+    matches, ordered by line and then by position.
+    """
+
+    line_indexes: array[int] = field(default_factory=lambda: array("l"))
+    bounds: array[int] = field(default_factory=lambda: array("l"))
+    starts: array[int] = field(default_factory=lambda: array("l"))
+    ends: array[int] = field(default_factory=lambda: array("l"))
+
+    def add(self, line_index: int, spans: Iterable[Tuple[int, int]]) -> None:
+        """
+        Add matches of a line following the lines added so far.
+
+        :param int line_index: The index of the line.
+        :param Iterable[Tuple[int, int]] spans: Starts and ends
+         of the matches in order.
+        """
+
+        for start, end in spans:
+            self.starts.append(start)
+            self.ends.append(end)
+        self._end_line(line_index)
+
+    def add_regex_matches(
+        self, line_index: int, matches: Iterable[IRegexMatch]
+    ) -> None:
+        """
+        Add matches of a line found by a regex, following the lines added
+        so far.
+
+        :param int line_index: The index of the line.
+        :param Iterable[IRegexMatch] matches: The matches in order.
+        """
+
+        for match in matches:
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+        self._end_line(line_index)
+
+    def add_empty(self, line_indexes: Sequence[int]) -> None:
+        """
+        Add an empty match at the start of every one of lines following
+        the lines added so far, as inverted matches are represented.
+
+        :param Sequence[int] line_indexes: Indexes of the lines in order.
+        """
+
+        match_count = len(self.starts)
+        self.line_indexes.extend(line_indexes)
+        self.bounds.extend(
+            range(match_count + 1, match_count + len(line_indexes) + 1)
+        )
+        self.starts.extend(repeat(0, len(line_indexes)))
+        self.ends.extend(repeat(0, len(line_indexes)))
+
+    def iter_lines(self) -> Iterator[Tuple[int, MatchPositions]]:
+        """
+        Iterate over matching lines.
+
+        :return: An iterator of indexes of lines with their matches.
+        :rtype: Iterator[Tuple[int, MatchPositions]]
+        """
+
+        first = 0
+        for line_index, stop in zip(self.line_indexes, self.bounds):
+            yield line_index, MatchPositions(
+                self.starts, self.ends, first, stop
+            )
+            first = stop
+
+    def _end_line(self, line_index: int) -> None:
+        # Lines without matches are left out.
+        if len(self.starts) > (self.bounds[-1] if self.bounds else 0):
+            self.line_indexes.append(line_index)
+            self.bounds.append(len(self.starts))
+
+
+class IRegexMatch(Protocol):
+    """Interface of matches found by compiled regexes."""
+
+    def start(self) -> int:
+        """Return the index the match starts at."""
+
+    def end(self) -> int:
+        """Return the index the match ends at."""
+
+
+class IRegex(Protocol[AnyStr_contra]):
+    """
+    Interface of compiled regexes, the part of ``re.Pattern`` used by
+    pattern matchers.
+    """
+
+    def search(
+        self, string: AnyStr_contra, pos: int = ...
+    ) -> Optional[IRegexMatch]:
+        """
+        Search for the first match.
+
+        :param AnyStr_contra string: The input to search within.
+        :param int pos: The index to start searching at.
+        :return: The match or None if there is none.
+        :rtype: Optional[IRegexMatch]
+        """
+
+    def match(
+        self, string: AnyStr_contra, pos: int = ...
+    ) -> Optional[IRegexMatch]:
+        """
+        Match at a position only.
+
+        :param AnyStr_contra string: The input to match.
+        :param int pos: The index the match has to start at.
+        :return: The match or None if there is none.
+        :rtype: Optional[IRegexMatch]
+        """
+
+    def finditer(
+        self, string: AnyStr_contra, pos: int = ...
+    ) -> Iterator[IRegexMatch]:
+        """
+        Iterate over non-overlapping matches.
+
+        :param AnyStr_contra string: The input to search within.
+        :param int pos: The index to start searching at.
+        :return: An iterator of matches in order.
+        :rtype: Iterator[IRegexMatch]
+        """
+
+
+class IRegexEngine(ABC):
+    """Interface for regex engines compiling patterns of matchers."""
+
+    @abstractmethod
+    def compile(self, pattern: AnyStr, flags: int) -> IRegex[AnyStr]:
+        """
+        Compile a regex pattern.
+
+        :param AnyStr pattern: The regex pattern.
+        :param int flags: Flags of the re module.
+        :return: The compiled regex.
+        :rtype: IRegex[AnyStr]
+        :raises re.error: If the pattern is invalid.
+        """
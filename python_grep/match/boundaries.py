@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import re
+from re import _constants, _parser  # type: ignore[attr-defined]
+from typing import (
+    Any,
+    AnyStr,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from python_grep.match.base import IRegex, IRegexMatch
+from python_grep.match.pattern_matcher import compile_regexes
+
+WORD_CHAR_REGEX = re.compile(r"\w")
+WORD_BYTE_REGEX = re.compile(rb"\w")
+# Global inline flags, which have to stay at the start of a pattern
+# wrapped in assertions.
+GLOBAL_FLAGS_REGEX = re.compile(r"(?:\(\?[aiLmsux]+\))*")
+
+
+class BoundedRegex(Generic[AnyStr]):
+    """
+    Finds matches of a regex which form whole words or whole lines, as
+    grep -w and -x select them.
+
+    A word match is preceded and followed by a non-word character or
+    an edge of the input, and a line match by a line separator or an
+    edge of the input. Matches are found by the regex alone, keeping
+    the fast searches of literals by the engine, and then only
+    the characters around them are checked. Once a match fails the check,
+    a shorter one starting at the same index may still pass it, which
+    the regex wrapped in assertions of the boundaries is matched there
+    for, before searching on from the next index.
+
+    Use compile_bounded_regexes to create it.
+
+    :param IRegex[AnyStr] regex: The regex finding candidate matches.
+    :param IRegex[AnyStr] bounded_regex: The same regex wrapped in
+     assertions of the boundaries.
+    :param bool line_regexp: Whether matches have to form whole lines,
+     rather than whole words.
+    :param Optional[AnyStr] line_separator: The separator of lines in
+     the input, or None if it is a single line.
+    """
+
+    def __init__(
+        self,
+        regex: IRegex[AnyStr],
+        bounded_regex: IRegex[AnyStr],
+        line_regexp: bool,
+        line_separator: Optional[AnyStr] = None,
+    ) -> None:
+        self._regex: IRegex[AnyStr] = regex
+        self._bounded_regex: IRegex[AnyStr] = bounded_regex
+        self._line_regexp = line_regexp
+        self._line_separator: Optional[AnyStr] = line_separator
+
+    def search(self, string: AnyStr, pos: int = 0) -> Optional[IRegexMatch]:
+        """
+        Search for the first match on boundaries.
+
+        :param AnyStr string: The input to search within.
+        :param int pos: The index to start searching at.
+        :return: The match or None if there is none.
+        :rtype: Optional[IRegexMatch]
+        """
+
+        end = len(string)
+        while pos <= end:
+            match = self._regex.search(string, pos)
+            if match is None or self.is_bounded(string, match):
+                return match
+            pos = match.start()
+            bounded_match = self._bounded_regex.match(string, pos)
+            if bounded_match is not None:
+                return bounded_match
+            pos += 1
+        return None
+
+    def match(self, string: AnyStr, pos: int = 0) -> Optional[IRegexMatch]:
+        """
+        Match on boundaries at a position only.
+
+        :param AnyStr string: The input to match.
+        :param int pos: The index the match has to start at.
+        :return: The match or None if there is none.
+        :rtype: Optional[IRegexMatch]
+        """
+
+        match = self._regex.match(string, pos)
+        if match is None or self.is_bounded(string, match):
+            return match
+        return self._bounded_regex.match(string, pos)
+
+    def finditer(self, string: AnyStr, pos: int = 0) -> Iterator[IRegexMatch]:
+        """
+        Iterate over non-overlapping matches on boundaries.
+
+        :param AnyStr string: The input to search within.
+        :param int pos: The index to start searching at.
+        :return: An iterator of matches in order.
+        :rtype: Iterator[IRegexMatch]
+        """
+
+        matches = list(self._regex.finditer(string, pos))
+        for match in matches:
+            if not self.is_bounded(string, match):
+                return self._bounded_regex.finditer(string, pos)
+        return iter(matches)
+
+    def is_bounded(self, string: AnyStr, match: IRegexMatch) -> bool:
+        """
+        Check whether a match starts and ends on boundaries.
+
+        :param AnyStr string: The input the match was found in.
+        :param IRegexMatch match: The match.
+        :return: True if the match forms a whole word or line.
+        :rtype: bool
+        """
+
+        start, end = match.start(), match.end()
+        if self._line_regexp:
+            if self._line_separator is None:
+                return start == 0 and end == len(string)
+            return (
+                start == 0 or string[start - 1 : start] == self._line_separator
+            ) and (
+                end == len(string)
+                or string[end : end + 1] == self._line_separator
+            )
+
+        word_regex = (
+            WORD_BYTE_REGEX if isinstance(string, bytes) else WORD_CHAR_REGEX
+        )
+        return not (
+            start and word_regex.match(string, start - 1)
+        ) and not word_regex.match(string, end)
+
+
+def wrap_pattern(
+    pattern: AnyStr,
+    line_regexp: bool,
+    line_separator: Optional[AnyStr] = None,
+) -> AnyStr:
+    """
+    Wrap a regex pattern in assertions that its matches form whole words
+    or whole lines.
+
+    :param AnyStr pattern: The regex pattern.
+    :param bool line_regexp: Whether matches have to form whole lines,
+     rather than whole words.
+    :param Optional[AnyStr] line_separator: The separator of lines in
+     the input, or None if it is a single line.
+    :return: The wrapped pattern.
+    :rtype: AnyStr
+    """
+
+    if isinstance(pattern, bytes):
+        # Bytes map one to one onto latin-1 characters.
+        return wrap_pattern(
+            pattern.decode("latin-1"),
+            line_regexp,
+            (
+                None
+                if line_separator is None
+                else line_separator.decode("latin-1")
+            ),
+        ).encode("latin-1")
+
+    if not line_regexp:
+        prefix, suffix = r"(?<!\w)", r"(?!\w)"
+    elif line_separator is None:
+        prefix, suffix = r"\A", r"\Z"
+    elif line_separator == "\n":
+        prefix, suffix = "(?m:^)", "(?m:$)"
+    else:
+        separator = re.escape(line_separator)
+        prefix, suffix = rf"(?:\A|(?<={separator}))", rf"(?={separator}|\Z)"
+    global_flags = GLOBAL_FLAGS_REGEX.match(pattern)
+    assert global_flags is not None
+    flags_end = global_flags.end()
+    # A comment ending a verbose pattern must not swallow the suffix.
+    end_of_pattern = "\n" if "x" in pattern[:flags_end] else ""
+    return (
+        f"{pattern[:flags_end]}{prefix}(?:{pattern[flags_end:]}"
+        f"{end_of_pattern}){suffix}"
+    )
+
+
+def compile_bounded_regexes(
+    patterns: Tuple[AnyStr, ...],
+    flags: int,
+    regex_engine: str,
+    line_regexp: bool,
+    line_separator: Optional[AnyStr] = None,
+) -> Tuple[IRegex[AnyStr], ...]:
+    """
+    Compile regex patterns into regexes matching whole words or whole
+    lines only.
+
+    Patterns whose matches start with a literal are compiled into
+    a BoundedRegex, as the engine finds candidate matches of them by
+    searching for the literal. Others are only wrapped in assertions of
+    the boundaries, which rule out most positions before a match is
+    tried there.
+
+    :param Tuple[AnyStr, ...] patterns: Regex patterns to compile.
+    :param int flags: Regex flags.
+    :param str regex_engine: Name of the engine in REGEX_ENGINES.
+    :param bool line_regexp: Whether matches have to form whole lines,
+     rather than whole words.
+    :param Optional[AnyStr] line_separator: The separator of lines in
+     the input, or None if it is a single line.
+    :return: Compiled regexes.
+    :rtype: Tuple[IRegex[AnyStr], ...]
+    """
+
+    bounded_regexes = compile_regexes(
+        tuple(
+            wrap_pattern(pattern, line_regexp, line_separator)
+            for pattern in patterns
+        ),
+        flags,
+        regex_engine,
+    )
+    regexes: List[IRegex[AnyStr]] = []
+    for pattern, bounded_regex in zip(patterns, bounded_regexes):
+        if _starts_with_literal(_parser.parse(pattern, flags).data):
+            (regex,) = compile_regexes((pattern,), flags, regex_engine)
+            regexes.append(
+                BoundedRegex(regex, bounded_regex, line_regexp, line_separator)
+            )
+        else:
+            regexes.append(bounded_regex)
+    return tuple(regexes)
+
+
+def _starts_with_literal(items: List[Any]) -> bool:
+    # Whether every match of parsed items starts with a literal
+    # character.
+    if not items:
+        return False
+    opcode, argument = items[0]
+    if opcode is _constants.LITERAL:
+        return True
+    if opcode is _constants.SUBPATTERN:
+        return _starts_with_literal(argument[-1].data)
+    if opcode is _constants.BRANCH:
+        return all(
+            _starts_with_literal(subpattern.data) for subpattern in argument[1]
+        )
+    return False
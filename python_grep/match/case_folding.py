@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import re
+from re import _compiler, _constants, _parser  # type: ignore[attr-defined]
+from typing import (
+    Any,
+    AnyStr,
+    Generic,
+    Iterator,
+    List,
+    Match,
+    Optional,
+    Pattern,
+    Tuple,
+)
+
+_UPPERCASE_CODES = range(ord("A"), ord("Z") + 1)
+_CASE_OFFSET = ord("a") - ord("A")
+# Opcodes whose argument does not depend on the case of characters.
+_CASELESS_OPCODES = frozenset(
+    (
+        _constants.ANY,
+        _constants.AT,
+        _constants.CATEGORY,
+        _constants.GROUPREF,
+        _constants.NEGATE,
+    )
+)
+
+
+class CaseFoldedRegex(Generic[AnyStr]):
+    """
+    A case-insensitive regex matched by searching lowercased input with
+    a case-sensitive regex, which the re module runs several times
+    faster than an IGNORECASE one and, for literals, with a fast string
+    search instead of comparing characters one by one.
+
+    Lowercasing keeps the positions of characters only for bytes and
+    ASCII text, so other text is searched by the IGNORECASE regex.
+    The last input lowercased by a search or match is kept, so repeated
+    searches of a block from further positions lowercase it once.
+
+    Use compile_case_folded to create it.
+
+    :param AnyStr pattern: The regex pattern.
+    :param int flags: Flags of the re module, including IGNORECASE.
+    :param Pattern[AnyStr] folded_regex: The case-sensitive regex
+     matching lowercased input.
+    """
+
+    def __init__(
+        self, pattern: AnyStr, flags: int, folded_regex: Pattern[AnyStr]
+    ) -> None:
+        self.pattern: AnyStr = pattern
+        self.flags = flags
+        self._folded_regex: Pattern[AnyStr] = folded_regex
+        self._regex: Pattern[AnyStr] = re.compile(pattern, flags)
+        self._is_bytes = isinstance(pattern, bytes)
+        self._last_folded: Tuple[Any, Optional[AnyStr]] = (None, None)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return compile_case_folded, (self.pattern, self.flags)
+
+    def __repr__(self) -> str:
+        return f"CaseFoldedRegex({self.pattern!r}, {self.flags!r})"
+
+    def search(self, string: AnyStr, pos: int = 0) -> Optional[Match[AnyStr]]:
+        """
+        Search for the first match.
+
+        :param AnyStr string: The input to search within.
+        :param int pos: The index to start searching at.
+        :return: The match or None if there is none. Its groups are
+         lowercased, unless the input is non-ASCII text.
+        :rtype: Optional[Match[AnyStr]]
+        """
+
+        folded_string = self._fold(string)
+        if folded_string is None:
+            return self._regex.search(string, pos)
+        return self._folded_regex.search(folded_string, pos)
+
+    def match(self, string: AnyStr, pos: int = 0) -> Optional[Match[AnyStr]]:
+        """
+        Match at a position only.
+
+        :param AnyStr string: The input to match.
+        :param int pos: The index the match has to start at.
+        :return: The match or None if there is none. Its groups are
+         lowercased, unless the input is non-ASCII text.
+        :rtype: Optional[Match[AnyStr]]
+        """
+
+        folded_string = self._fold(string)
+        if folded_string is None:
+            return self._regex.match(string, pos)
+        return self._folded_regex.match(folded_string, pos)
+
+    def finditer(
+        self, string: AnyStr, pos: int = 0
+    ) -> Iterator[Match[AnyStr]]:
+        """
+        Iterate over non-overlapping matches.
+
+        :param AnyStr string: The input to search within.
+        :param int pos: The index to start searching at.
+        :return: An iterator of matches in order.
+        :rtype: Iterator[Match[AnyStr]]
+        """
+
+        if self._is_bytes or string.isascii():
+            return self._folded_regex.finditer(string.lower(), pos)
+        return self._regex.finditer(string, pos)
+
+    def _fold(self, string: AnyStr) -> Optional[AnyStr]:
+        last_string, folded_string = self._last_folded
+        if string is not last_string:
+            if self._is_bytes or string.isascii():
+                folded_string = string.lower()
+            else:
+                folded_string = None
+            # Stored as one tuple, so a search in another thread never
+            # sees the input of one call with the lowercased input of
+            # another.
+            self._last_folded = (string, folded_string)
+        return folded_string
+
+
+def compile_case_folded(
+    pattern: AnyStr, flags: int
+) -> Optional[CaseFoldedRegex[AnyStr]]:
+    """
+    Compile a case-insensitive regex into one matching lowercased input,
+    if case folding can be moved from the regex to its input.
+
+    That is the case if every letter in the pattern is ASCII, or in bytes
+    patterns any letter, character ranges either span only uppercase
+    ASCII letters or none, and case sensitivity is not switched within
+    the pattern.
+
+    :param AnyStr pattern: The regex pattern.
+    :param int flags: Flags of the re module, including IGNORECASE.
+    :return: The compiled regex or None if the pattern cannot be folded.
+    :rtype: Optional[CaseFoldedRegex[AnyStr]]
+    :raises re.error: If the pattern is invalid.
+    """
+
+    parsed_pattern = _parser.parse(pattern, flags)
+    all_flags = flags | parsed_pattern.state.flags
+    if not all_flags & re.IGNORECASE or all_flags & re.LOCALE:
+        return None
+    max_code = 0xFF if isinstance(pattern, bytes) else 0x7F
+    if not _fold_items(parsed_pattern.data, max_code):
+        return None
+    parsed_pattern.state.flags &= ~re.IGNORECASE
+    folded_regex = _compiler.compile(parsed_pattern, flags & ~re.IGNORECASE)
+    return CaseFoldedRegex(pattern, flags, folded_regex)
+
+
+def _fold_items(items: List[Any], max_code: int) -> bool:
+    # Lowercases literals of parsed items in place, returning False if
+    # an item cannot be folded.
+    for index, (opcode, argument) in enumerate(items):
+        if opcode in (_constants.LITERAL, _constants.NOT_LITERAL):
+            if argument > max_code:
+                return False
+            items[index] = (opcode, _fold_code(argument))
+        elif opcode is _constants.RANGE:
+            low, high = argument
+            if high > max_code:
+                return False
+            if low in _UPPERCASE_CODES and high in _UPPERCASE_CODES:
+                items[index] = (
+                    opcode,
+                    (low + _CASE_OFFSET, high + _CASE_OFFSET),
+                )
+            elif low <= _UPPERCASE_CODES[-1] and high >= _UPPERCASE_CODES[0]:
+                return False
+        elif opcode is _constants.IN:
+            if not _fold_items(argument, max_code):
+                return False
+        elif opcode is _constants.SUBPATTERN:
+            _, add_flags, del_flags, subpattern = argument
+            if (add_flags | del_flags) & re.IGNORECASE:
+                return False
+            if not _fold_items(subpattern.data, max_code):
+                return False
+        elif opcode in (
+            _constants.MAX_REPEAT,
+            _constants.MIN_REPEAT,
+            _constants.POSSESSIVE_REPEAT,
+            _constants.ASSERT,
+            _constants.ASSERT_NOT,
+        ):
+            if not _fold_items(argument[-1].data, max_code):
+                return False
+        elif opcode is _constants.ATOMIC_GROUP:
+            if not _fold_items(argument.data, max_code):
+                return False
+        elif opcode is _constants.BRANCH:
+            if not all(
+                _fold_items(subpattern.data, max_code)
+                for subpattern in argument[1]
+            ):
+                return False
+        elif opcode not in _CASELESS_OPCODES:
+            return False
+    return True
+
+
+def _fold_code(code: int) -> int:
+    return code + _CASE_OFFSET if code in _UPPERCASE_CODES else code
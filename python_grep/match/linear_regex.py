@@ -0,0 +1,631 @@
+from __future__ import annotations
+
+import re
+from re import _compiler, _constants, _parser  # type: ignore[attr-defined]
+from typing import (
+    Any,
+    AnyStr,
+    Dict,
+    FrozenSet,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+# Automata larger than this, e.g. of big counted repetitions, are left
+# to the re module.
+MAX_NFA_NODES = 10000
+# Cached DFA states are dropped once there are this many, which bounds
+# memory while every character still costs at most one new state.
+MAX_DFA_STATES = 10000
+
+# Flags which may be switched on and off within a pattern.
+_SCOPED_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE
+_CHAR_OPCODES = frozenset(
+    (_constants.LITERAL, _constants.NOT_LITERAL, _constants.ANY, _constants.IN)
+)
+_REPEAT_OPCODES = frozenset((_constants.MAX_REPEAT,))
+
+# Kinds of NFA nodes.
+_CHAR, _SPLIT, _ASSERT, _MATCH = range(4)
+
+# Classes of the characters around a position, which decide assertions.
+_START, _END, _WORD, _NEWLINE, _FINAL_NEWLINE, _OTHER = range(6)
+_LINE_START_CLASSES = frozenset((_START, _NEWLINE, _FINAL_NEWLINE))
+_LINE_END_CLASSES = frozenset((_END, _NEWLINE, _FINAL_NEWLINE))
+
+# Key of a newline ending the input, before which $ matches as well.
+_FINAL_NEWLINE_KEY = object()
+
+# Assertions of no word character before or after a position, made of
+# the lookarounds (?<!\w) and (?!\w), which word matching wraps
+# patterns in.
+_NOT_WORD_BEFORE, _NOT_WORD_AFTER = object(), object()
+_WORD_ITEMS = [
+    (_constants.IN, [(_constants.CATEGORY, _constants.CATEGORY_WORD)])
+]
+
+Key = Union[str, int, object]
+
+
+class UnsupportedPatternError(Exception):
+    pass
+
+
+class LinearMatch:
+    """
+    A match found by a LinearRegex.
+
+    :param int start: The index the match starts at.
+    :param int end: The index the match ends at.
+    """
+
+    __slots__ = ("_start", "_end")
+
+    def __init__(self, start: int, end: int) -> None:
+        self._start = start
+        self._end = end
+
+    def start(self) -> int:
+        return self._start
+
+    def end(self) -> int:
+        return self._end
+
+    def span(self) -> Tuple[int, int]:
+        return self._start, self._end
+
+    def __repr__(self) -> str:
+        return f"<LinearMatch span=({self._start}, {self._end})>"
+
+
+class _DFAState:
+    __slots__ = ("kernel", "left", "transitions", "accepts_at_end")
+
+    def __init__(self, kernel: FrozenSet[int], left: int) -> None:
+        self.kernel = kernel
+        self.left = left
+        self.transitions: Dict[Key, Tuple[_DFAState, bool]] = {}
+        self.accepts_at_end: Optional[bool] = None
+
+
+class _SpanState:
+    __slots__ = (
+        "groups",
+        "left",
+        "is_searching",
+        "transitions",
+        "end_transition",
+    )
+
+    def __init__(
+        self, groups: Tuple[FrozenSet[int], ...], left: int, is_searching: bool
+    ) -> None:
+        self.groups = groups
+        self.left = left
+        self.is_searching = is_searching
+        self.transitions: Dict[Key, SpanTransition] = {}
+        self.end_transition: Optional[SpanTransition] = None
+
+
+# The next state, the index of the first group of threads reaching
+# a match before the character, or -1, and indexes of the groups
+# the next ones continue, None if they continue the first ones.
+SpanTransition = Tuple[_SpanState, int, Optional[Tuple[int, ...]]]
+
+
+class LinearRegex(Generic[AnyStr]):
+    """
+    A regex searched in time linear in the length of the input, whatever
+    the pattern.
+
+    The pattern is parsed by the re module and compiled into a Thompson
+    NFA. Inputs are scanned by a DFA built lazily from it, state by state
+    as characters are met, which rejects inputs without a match or finds
+    where the earliest match ends, at the cost of a dictionary lookup per
+    character. Spans of matches are then found by another lazily built
+    DFA, tracking where matches start, over the matching part only.
+    Unlike the backtracking re module, the leftmost match is extended
+    to the longest one, as POSIX and grep do, so alternatives may match
+    longer than with re.
+
+    Single characters are tested by regexes compiled by the re module
+    from the same parsed atoms, so character classes and case folding
+    behave as with re. Backreferences, lookarounds other than those
+    asserting there is no word character before or after a position,
+    lazy, possessive and atomic constructs, and scoped ASCII,
+    LOCALE or UNICODE flags are not supported.
+
+    :param AnyStr pattern: The regex pattern.
+    :param int flags: Flags of the re module.
+    :raises UnsupportedPatternError: If the pattern uses an unsupported
+     construct or its automaton would be too large.
+    :raises re.error: If the pattern is invalid.
+    """
+
+    def __init__(self, pattern: AnyStr, flags: int = 0) -> None:
+        self.pattern: AnyStr = pattern
+        self.flags = flags
+        parsed_pattern = _parser.parse(pattern, flags)
+        self._flags = flags | parsed_pattern.state.flags
+        if self._flags & re.LOCALE:
+            raise UnsupportedPatternError("LOCALE flag")
+        self._is_bytes = isinstance(pattern, bytes)
+        self._newline: Union[str, bytes] = b"\n" if self._is_bytes else "\n"
+        self._word_regex: Any = re.compile(
+            rb"\w" if self._is_bytes else r"\w",
+            self._flags & (re.ASCII | re.UNICODE),
+        )
+        self._kinds: List[int] = []
+        self._args: List[Any] = []
+        self._outs: List[List[int]] = []
+        self._char_regexes: List[Any] = []
+        self._char_regex_indexes: Dict[Tuple[str, int], int] = {}
+        self._char_memo: List[Dict[Key, bool]] = []
+        self._has_assertions = False
+        self._uses_final_newline = False
+        self._match_node = self._add_node(_MATCH, None, [])
+        self._start_node = self._build(
+            parsed_pattern, self._match_node, self._flags
+        )
+        self._dfa_states: Dict[Tuple[FrozenSet[int], int], _DFAState] = {}
+        self._span_states: Dict[
+            Tuple[Tuple[FrozenSet[int], ...], int, bool], _SpanState
+        ] = {}
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.pattern, self.flags)
+
+    def __repr__(self) -> str:
+        return f"LinearRegex({self.pattern!r}, {self.flags!r})"
+
+    def search(self, string: AnyStr, pos: int = 0) -> Optional[LinearMatch]:
+        """
+        Search for the leftmost-longest match.
+
+        :param AnyStr string: The input to search within.
+        :param int pos: The index to start searching at. Text before it
+         is still seen by anchors and word boundaries.
+        :return: The match or None if there is none.
+        :rtype: Optional[LinearMatch]
+        """
+
+        pos = min(max(pos, 0), len(string))
+        if self._find_earliest_end(string, pos) < 0:
+            return None
+        return LinearMatch(*self._find_leftmost_longest(string, pos))
+
+    def match(self, string: AnyStr, pos: int = 0) -> Optional[LinearMatch]:
+        """
+        Find the longest match starting at a position.
+
+        :param AnyStr string: The input to match.
+        :param int pos: The index the match has to start at.
+        :return: The match or None if there is none.
+        :rtype: Optional[LinearMatch]
+        """
+
+        pos = min(max(pos, 0), len(string))
+        start, end = self._find_leftmost_longest(string, pos, True)
+        return LinearMatch(start, end) if start >= 0 else None
+
+    def finditer(self, string: AnyStr, pos: int = 0) -> Iterator[LinearMatch]:
+        """
+        Iterate over non-overlapping leftmost-longest matches.
+
+        :param AnyStr string: The input to search within.
+        :param int pos: The index to start searching at.
+        :return: An iterator of matches in order.
+        :rtype: Iterator[LinearMatch]
+        """
+
+        while pos <= len(string):
+            match = self.search(string, pos)
+            if match is None:
+                return
+            yield match
+            # An empty match is the longest one at its position, so
+            # the next match starts further.
+            pos = match.end() + (match.end() == match.start())
+
+    def _build(self, items: Iterable[Any], next_node: int, flags: int) -> int:
+        # Nodes are built from the end, each one knowing its successor.
+        for opcode, argument in reversed(list(items)):
+            next_node = self._build_item(opcode, argument, next_node, flags)
+        return next_node
+
+    def _build_item(
+        self, opcode: Any, argument: Any, next_node: int, flags: int
+    ) -> int:
+        if opcode in _CHAR_OPCODES:
+            return self._add_node(
+                _CHAR,
+                self._get_char_regex_index(opcode, argument, flags),
+                [next_node],
+            )
+        if opcode is _constants.SUBPATTERN:
+            _, add_flags, del_flags, items = argument
+            if (add_flags | del_flags) & ~_SCOPED_FLAGS:
+                raise UnsupportedPatternError("scoped flags")
+            return self._build(
+                items, next_node, (flags | add_flags) & ~del_flags
+            )
+        if opcode is _constants.BRANCH:
+            return self._add_node(
+                _SPLIT,
+                None,
+                [
+                    self._build(items, next_node, flags)
+                    for items in argument[1]
+                ],
+            )
+        if opcode in _REPEAT_OPCODES:
+            min_count, max_count, items = argument
+            return self._build_repeat(
+                min_count, max_count, items, next_node, flags
+            )
+        if opcode is _constants.AT:
+            return self._build_assertion(argument, next_node, flags)
+        if opcode is _constants.ASSERT_NOT and argument[1].data == _WORD_ITEMS:
+            return self._build_assertion(
+                _NOT_WORD_BEFORE if argument[0] < 0 else _NOT_WORD_AFTER,
+                next_node,
+                flags,
+            )
+        raise UnsupportedPatternError(str(opcode))
+
+    def _build_repeat(
+        self,
+        min_count: int,
+        max_count: int,
+        items: Any,
+        next_node: int,
+        flags: int,
+    ) -> int:
+        if max_count is _constants.MAXREPEAT:
+            loop_node = self._add_node(_SPLIT, None, [])
+            self._outs[loop_node] = [
+                self._build(items, loop_node, flags),
+                next_node,
+            ]
+            next_node = loop_node
+        else:
+            # Optional copies are nested, so each one is only tried after
+            # the previous one matched.
+            optional_next_node = next_node
+            for _ in range(max_count - min_count):
+                optional_next_node = self._add_node(
+                    _SPLIT,
+                    None,
+                    [
+                        self._build(items, optional_next_node, flags),
+                        next_node,
+                    ],
+                )
+            next_node = optional_next_node
+        for _ in range(min_count):
+            next_node = self._build(items, next_node, flags)
+        return next_node
+
+    def _build_assertion(self, code: Any, next_node: int, flags: int) -> int:
+        if flags & re.MULTILINE:
+            code = _constants.AT_MULTILINE.get(code, code)
+        if code is _constants.AT_END:
+            self._uses_final_newline = True
+        self._has_assertions = True
+        return self._add_node(_ASSERT, code, [next_node])
+
+    def _add_node(self, kind: int, argument: Any, outs: List[int]) -> int:
+        if len(self._kinds) >= MAX_NFA_NODES:
+            raise UnsupportedPatternError("automaton too large")
+        self._kinds.append(kind)
+        self._args.append(argument)
+        self._outs.append(outs)
+        return len(self._kinds) - 1
+
+    def _get_char_regex_index(
+        self, opcode: Any, argument: Any, flags: int
+    ) -> int:
+        key = (str((opcode, argument)), flags)
+        if (index := self._char_regex_indexes.get(key)) is None:
+            index = self._char_regex_indexes[key] = len(self._char_regexes)
+            self._char_regexes.append(
+                _compiler.compile(
+                    _parser.SubPattern(_parser.State(), [(opcode, argument)]),
+                    flags,
+                )
+            )
+            self._char_memo.append({})
+        return index
+
+    def _matches_char(self, char_regex_index: int, key: Key) -> bool:
+        memo = self._char_memo[char_regex_index]
+        if (is_matching := memo.get(key)) is None:
+            is_matching = memo[key] = bool(
+                self._char_regexes[char_regex_index].fullmatch(
+                    self._to_text(key)
+                )
+            )
+        return is_matching
+
+    def _to_text(self, key: Key) -> Union[str, bytes]:
+        if key is _FINAL_NEWLINE_KEY:
+            return self._newline
+        if isinstance(key, int):
+            return bytes((key,))
+        assert isinstance(key, str)
+        return key
+
+    def _classify(self, key: Key) -> int:
+        if not self._has_assertions:
+            return _OTHER
+        if key is _FINAL_NEWLINE_KEY:
+            return _FINAL_NEWLINE
+        text = self._to_text(key)
+        if text == self._newline:
+            return _NEWLINE
+        return _WORD if self._word_regex.fullmatch(text) else _OTHER
+
+    def _classify_before(self, string: AnyStr, pos: int) -> int:
+        if not self._has_assertions:
+            return _OTHER
+        return self._classify(string[pos - 1]) if pos else _START
+
+    def _get_key(self, string: AnyStr, index: int) -> Key:
+        key: Key = string[index]
+        if (
+            self._uses_final_newline
+            and index == len(string) - 1
+            and string[index:] == self._newline
+        ):
+            return _FINAL_NEWLINE_KEY
+        return key
+
+    def _holds(self, code: Any, left: int, right: int) -> bool:
+        if code in (_constants.AT_BEGINNING, _constants.AT_BEGINNING_STRING):
+            return left == _START
+        if code is _constants.AT_BEGINNING_LINE:
+            return left in _LINE_START_CLASSES
+        if code is _constants.AT_END:
+            return right in (_END, _FINAL_NEWLINE)
+        if code is _constants.AT_END_LINE:
+            return right in _LINE_END_CLASSES
+        if code is _constants.AT_END_STRING:
+            return right == _END
+        if code is _constants.AT_BOUNDARY:
+            return (left == _WORD) != (right == _WORD)
+        if code is _NOT_WORD_BEFORE:
+            return left != _WORD
+        if code is _NOT_WORD_AFTER:
+            return right != _WORD
+        if code is _constants.AT_NON_BOUNDARY:
+            # As with re, \B does not match an empty input.
+            return (left == _WORD) == (right == _WORD) and not (
+                left == _START and right == _END
+            )
+        raise UnsupportedPatternError(str(code))
+
+    def _follow_epsilons(
+        self, node: int, left: int, right: int, seen: set
+    ) -> Iterator[int]:
+        # Yields character and match nodes reachable from a node without
+        # consuming a character, in order of preference.
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            kind = self._kinds[node]
+            if kind == _SPLIT:
+                stack.extend(reversed(self._outs[node]))
+            elif kind == _ASSERT:
+                if self._holds(self._args[node], left, right):
+                    stack.append(self._outs[node][0])
+            else:
+                yield node
+
+    def _get_dfa_state(self, kernel: FrozenSet[int], left: int) -> _DFAState:
+        if (state := self._dfa_states.get((kernel, left))) is None:
+            if len(self._dfa_states) >= MAX_DFA_STATES:
+                for cached_state in self._dfa_states.values():
+                    cached_state.transitions.clear()
+                self._dfa_states.clear()
+            state = self._dfa_states[kernel, left] = _DFAState(kernel, left)
+        return state
+
+    def _get_closure(self, state: _DFAState, right: int) -> List[int]:
+        # The start node is part of every state, so a match may start
+        # at any position.
+        seen: set = set()
+        closure: List[int] = []
+        for node in (*state.kernel, self._start_node):
+            closure.extend(
+                self._follow_epsilons(node, state.left, right, seen)
+            )
+        return closure
+
+    def _add_transition(
+        self, state: _DFAState, key: Key
+    ) -> Tuple[_DFAState, bool]:
+        right = self._classify(key)
+        closure = self._get_closure(state, right)
+        kernel = frozenset(
+            self._outs[node][0]
+            for node in closure
+            if self._kinds[node] == _CHAR
+            and self._matches_char(self._args[node], key)
+        )
+        transition = (
+            self._get_dfa_state(kernel, right),
+            self._match_node in closure,
+        )
+        state.transitions[key] = transition
+        return transition
+
+    def _find_earliest_end(self, string: AnyStr, pos: int) -> int:
+        """
+        Find where the earliest match ends, by scanning with the DFA.
+
+        :param AnyStr string: The input to search within.
+        :param int pos: The index to start searching at.
+        :return: The index or -1 if there is no match.
+        :rtype: int
+        """
+
+        state = self._get_dfa_state(
+            frozenset(), self._classify_before(string, pos)
+        )
+        length = len(string)
+        stop = length
+        if self._uses_final_newline and string[-1:] == self._newline:
+            stop -= 1
+        index = pos
+        keys: Iterable[Key] = (
+            string[pos:stop] if pos or stop < length else string
+        )
+        for key in keys:
+            transition = state.transitions.get(key)
+            if transition is None:
+                transition = self._add_transition(state, key)
+            state, is_accepting = transition
+            if is_accepting:
+                return index
+            index += 1
+        if index < length:
+            state, is_accepting = state.transitions.get(
+                _FINAL_NEWLINE_KEY
+            ) or self._add_transition(state, _FINAL_NEWLINE_KEY)
+            if is_accepting:
+                return index
+        if state.accepts_at_end is None:
+            state.accepts_at_end = self._match_node in self._get_closure(
+                state, _END
+            )
+        return length if state.accepts_at_end else -1
+
+    def _get_span_state(
+        self, groups: Tuple[FrozenSet[int], ...], left: int, is_searching: bool
+    ) -> _SpanState:
+        key = (groups, left, is_searching)
+        if (state := self._span_states.get(key)) is None:
+            if len(self._span_states) >= MAX_DFA_STATES:
+                for cached_state in self._span_states.values():
+                    cached_state.transitions.clear()
+                self._span_states.clear()
+            state = self._span_states[key] = _SpanState(
+                groups, left, is_searching
+            )
+        return state
+
+    def _add_span_transition(
+        self, state: _SpanState, key: Optional[Key]
+    ) -> SpanTransition:
+        right = _END if key is None else self._classify(key)
+        groups = state.groups
+        if state.is_searching:
+            groups += (frozenset((self._start_node,)),)
+        seen: set = set()
+        reached: set = set()
+        accepting_index = -1
+        next_groups = []
+        sources = []
+        for index, group in enumerate(groups):
+            next_group = set()
+            for group_node in group:
+                for node in self._follow_epsilons(
+                    group_node, state.left, right, seen
+                ):
+                    if node == self._match_node:
+                        accepting_index = index
+                    elif (
+                        key is not None
+                        and self._outs[node][0] not in reached
+                        and self._matches_char(self._args[node], key)
+                    ):
+                        next_group.add(self._outs[node][0])
+            if next_group:
+                reached.update(next_group)
+                next_groups.append(frozenset(next_group))
+                sources.append(index)
+            # Threads starting after those of a match cannot make
+            # the leftmost one.
+            if accepting_index >= 0:
+                break
+        transition = (
+            self._get_span_state(
+                tuple(next_groups),
+                right,
+                state.is_searching and accepting_index < 0,
+            ),
+            accepting_index,
+            (None if sources == list(range(len(sources))) else tuple(sources)),
+        )
+        if key is None:
+            state.end_transition = transition
+        else:
+            state.transitions[key] = transition
+        return transition
+
+    def _find_leftmost_longest(
+        self, string: AnyStr, pos: int, is_anchored: bool = False
+    ) -> Tuple[int, int]:
+        """
+        Find the span of the leftmost-longest match.
+
+        Threads of the NFA are followed for all match starts at once,
+        grouped by start. A thread reaching a node already reached by one
+        starting earlier is dropped, as only the earlier start may make
+        the leftmost match. Steps between groups of threads are cached
+        as a DFA, while the starts of the groups are tracked aside.
+
+        :param AnyStr string: The input, which has a match unless
+         the search is anchored.
+        :param int pos: The index to start searching at.
+        :param bool is_anchored: Whether the match has to start at pos.
+        :return: The start and end indexes of the match, or -1 for both
+         if there is none.
+        :rtype: Tuple[int, int]
+        """
+
+        length = len(string)
+        state = self._get_span_state(
+            (), self._classify_before(string, pos), True
+        )
+        starts: List[int] = []
+        best_start, best_end = -1, -1
+        for index in range(pos, length + 1):
+            if index < length:
+                key = self._get_key(string, index)
+                transition = state.transitions.get(
+                    key
+                ) or self._add_span_transition(state, key)
+            else:
+                transition = state.end_transition or self._add_span_transition(
+                    state, None
+                )
+            next_state, accepting_index, sources = transition
+            if state.is_searching:
+                starts.append(index)
+            if accepting_index >= 0:
+                start = starts[accepting_index]
+                if best_start < 0 or start < best_start:
+                    best_start, best_end = start, index
+                elif start == best_start:
+                    best_end = index
+            if sources is None:
+                del starts[len(next_state.groups) :]
+            else:
+                starts = [starts[source] for source in sources]
+            if is_anchored and next_state.is_searching:
+                next_state = self._get_span_state(
+                    next_state.groups, next_state.left, False
+                )
+            state = next_state
+            if not state.groups and not state.is_searching:
+                break
+        return best_start, best_end
@@ -0,0 +1,482 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from abc import abstractmethod
+from pathlib import Path
+from re import _constants, _parser  # type: ignore[attr-defined]
+from typing import (
+    Any,
+    AnyStr,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+)
+
+from python_grep.grep.context import PatternMatchingOptions
+from python_grep.match.base import (
+    IPatternMatcher,
+    IRegex,
+    MatchBatch,
+    MatchPosition,
+)
+from python_grep.match.pattern_matcher import (
+    compile_patterns,
+    compile_regexes,
+    find_matching_lines,
+    is_literal,
+    iter_leftmost_matches,
+)
+
+MIN_REQUIRED_LITERAL_LENGTH = 3
+# Version of trie regex sources kept by TrieRegexCache, changed whenever
+# build_trie_regex builds them differently.
+TRIE_REGEX_FORMAT = "trie-regex-v1"
+
+
+def build_trie_regex(literals: Iterable[str]) -> str:
+    """
+    Build a regex source matching any of the given literals.
+
+    Literals are merged into a trie first, so the regex engine walks
+    a single shared prefix tree instead of trying every alternative
+    one after another. Longer literals are preferred at each position.
+
+    :param Iterable[str] literals: Non-empty literals to match.
+    :return: The regex source.
+    :rtype: str
+    """
+
+    trie: Dict[str, Any] = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_node_to_regex(trie)
+
+
+def _trie_node_to_regex(node: Dict[str, Any]) -> str:
+    alternatives = []
+    for char in sorted(node):
+        if not char:
+            continue
+        chain, child = re.escape(char), node[char]
+        while len(child) == 1 and "" not in child:
+            ((char, child),) = child.items()
+            chain += re.escape(char)
+        alternatives.append(chain + _trie_node_to_regex(child))
+    if not alternatives:
+        return ""
+    if len(alternatives) == 1 and "" not in node:
+        return alternatives[0]
+    regex = "(?:" + "|".join(alternatives) + ")"
+    return regex + "?" if "" in node else regex
+
+
+class TrieRegexCache:
+    """
+    Trie regex sources kept as files in a directory, so literals of
+    a large pattern set are not merged into a trie again by every search.
+
+    A file is named after a hash of the set of literals its source
+    matches. Failing to read or write a file only costs building
+    the source again.
+
+    :param Path cache_dir: The directory holding the sources.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self._cache_dir = cache_dir
+
+    def build_trie_regex(self, literals: Iterable[str]) -> str:
+        """
+        Build a regex source matching any of the given literals, reading
+        it from the cache if it was built before.
+
+        :param Iterable[str] literals: Non-empty literals to match.
+        :return: The regex source.
+        :rtype: str
+        """
+
+        literals = sorted(set(literals))
+        source_path = self._get_source_path(literals)
+        try:
+            return source_path.read_text("utf-8", "surrogatepass")
+        except (OSError, UnicodeDecodeError):
+            pass
+        source = build_trie_regex(literals)
+        temporary_path = source_path.with_name(source_path.name + ".tmp")
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            temporary_path.write_text(source, "utf-8", "surrogatepass")
+            os.replace(temporary_path, source_path)
+        except OSError:
+            pass
+        return source
+
+    def _get_source_path(self, literals: List[str]) -> Path:
+        digest = hashlib.sha256(TRIE_REGEX_FORMAT.encode())
+        for literal in literals:
+            encoded_literal = literal.encode("utf-8", "surrogatepass")
+            digest.update(b"%d:%b" % (len(encoded_literal), encoded_literal))
+        return self._cache_dir / f"{digest.hexdigest()}.re"
+
+
+def find_required_literal(pattern: AnyStr, flags: int) -> Optional[str]:
+    """
+    Find the longest literal which every match of a regex has to contain.
+
+    Characters of bytes patterns are mapped one to one onto latin-1.
+
+    :param AnyStr pattern: The regex pattern.
+    :param int flags: Flags the pattern is compiled with.
+    :return: The required literal or None if there is none long enough
+     to be useful for prefiltering.
+    :rtype: Optional[str]
+    """
+
+    try:
+        parsed_pattern = _parser.parse(pattern, flags)
+    except re.error:
+        return None
+    if parsed_pattern.state.flags & re.IGNORECASE and not (
+        flags & re.IGNORECASE
+    ):
+        return None
+    required_literal = max(_find_literal_runs(parsed_pattern), key=len)
+    if len(required_literal) < MIN_REQUIRED_LITERAL_LENGTH:
+        return None
+    return required_literal
+
+
+def _find_literal_runs(items: Iterable[Any]) -> List[str]:
+    runs, current_run = [], ""
+    for opcode, argument in items:
+        if opcode == _constants.LITERAL:
+            current_run += chr(argument)
+            continue
+        runs.append(current_run)
+        current_run = ""
+        if opcode == _constants.SUBPATTERN and not argument[1]:
+            runs.extend(_find_literal_runs(argument[-1]))
+        elif (
+            opcode in (_constants.MAX_REPEAT, _constants.MIN_REPEAT)
+            and argument[0] >= 1
+        ):
+            runs.extend(_find_literal_runs(argument[-1]))
+    runs.append(current_run)
+    return runs
+
+
+class MultiPatternMatcherTemplate(IPatternMatcher[AnyStr]):
+    """
+    A template for pattern matchers designed for large pattern sets.
+
+    Literal patterns are matched together by a single trie-shaped
+    regex. Other patterns are bucketed by a literal every match of them
+    has to contain, and a bucket is only tried on inputs in which
+    its literal was found. Patterns without such a literal are tried
+    on every input. All structures are built lazily, on the first
+    match or search. Lines of a batch are first searched by the trie,
+    the prefilter of buckets and unbucketed regexes at once and only
+    lines they find a match in are matched one by one, their matches
+    being stored straight into the batch.
+
+    :param List[str] patterns: A list of patterns to match against.
+    :param PatternMatchingOptions pattern_matching_options: Options
+     for pattern matching.
+    :param Optional[TrieRegexCache] trie_regex_cache: The cache of trie
+     regex sources to use, if any.
+    """
+
+    def __init__(
+        self,
+        patterns: List[str],
+        pattern_matching_options: PatternMatchingOptions,
+        trie_regex_cache: Optional[TrieRegexCache] = None,
+    ) -> None:
+        self._patterns = patterns
+        self._options = pattern_matching_options
+        self._trie_regex_cache = trie_regex_cache
+        self._flags = (
+            (re.IGNORECASE if self._options.ignore_case else 0)
+            | (re.MULTILINE if self._options.multiline else 0)
+            | (re.DOTALL if self._options.multiline_dotall else 0)
+        )
+        self._is_built = False
+        self._literal_regex: Optional[IRegex[AnyStr]] = None
+        self._prefilter_regex: Optional[Pattern[AnyStr]] = None
+        self._unfiltered_regexes: List[IRegex[AnyStr]] = []
+        self._regexes: Sequence[IRegex[AnyStr]] = ()
+        self._literal_to_regex_indexes: Dict[str, List[int]] = {}
+
+    def search(self, input_val: AnyStr) -> Optional[MatchPosition]:
+        first_span = self._search_span(input_val)
+        if self._options.invert_match:
+            return None if first_span else MatchPosition(0, 0)
+        return MatchPosition(*first_span) if first_span else None
+
+    def match(self, input_val: AnyStr) -> Optional[List[MatchPosition]]:
+        spans = self._find_spans(input_val)
+        if self._options.invert_match:
+            return None if spans else [MatchPosition(0, 0)]
+        return [MatchPosition(*span) for span in spans] or None
+
+    def iter_matches(
+        self, input_val: AnyStr, pos: int = 0
+    ) -> Iterator[MatchPosition]:
+        return iter_leftmost_matches(
+            self._get_candidate_regexes(input_val), input_val, pos
+        )
+
+    def search_many(self, lines: Sequence[AnyStr]) -> MatchBatch:
+        return self._match_many(lines, first_only=True)
+
+    def match_many(self, lines: Sequence[AnyStr]) -> MatchBatch:
+        return self._match_many(lines, first_only=False)
+
+    @abstractmethod
+    def _encode(self, pattern: str) -> AnyStr:
+        """Encode a pattern given by the user into the matched type."""
+
+    @abstractmethod
+    def _encode_latin1(self, source: str) -> AnyStr:
+        """Encode a built regex source into the matched type."""
+
+    @abstractmethod
+    def _to_key(self, found_literal: AnyStr) -> str:
+        """Convert a literal found by the prefilter into a bucket key."""
+
+    def _get_candidate_regexes(
+        self, input_val: AnyStr
+    ) -> List[IRegex[AnyStr]]:
+        if not self._is_built:
+            self._build()
+        candidate_regexes: List[IRegex[AnyStr]] = list(
+            self._unfiltered_regexes
+        )
+        if self._literal_regex:
+            candidate_regexes.append(self._literal_regex)
+        if self._prefilter_regex:
+            indexes = {
+                index
+                for match in self._prefilter_regex.finditer(input_val)
+                for index in self._literal_to_regex_indexes.get(
+                    self._to_key(match.group(1)), ()
+                )
+            }
+            candidate_regexes.extend(
+                self._regexes[index] for index in sorted(indexes)
+            )
+        return candidate_regexes
+
+    def _find_candidate_lines(self, lines: Sequence[AnyStr]) -> List[int]:
+        # Bucketed regexes may only match lines the prefilter finds
+        # a literal in.
+        if not self._is_built:
+            self._build()
+        regexes: List[IRegex[AnyStr]] = list(self._unfiltered_regexes)
+        if self._literal_regex:
+            regexes.append(self._literal_regex)
+        if self._prefilter_regex:
+            regexes.append(self._prefilter_regex)
+        return find_matching_lines(regexes, lines)
+
+    def _search_span(self, input_val: AnyStr) -> Optional[Tuple[int, int]]:
+        first_span = None
+        for regex in self._get_candidate_regexes(input_val):
+            match = regex.search(input_val)
+            if match and (first_span is None or match.start() < first_span[0]):
+                first_span = match.start(), match.end()
+        return first_span
+
+    def _find_spans(self, input_val: AnyStr) -> List[Tuple[int, int]]:
+        found_matches = sorted(
+            (match.start(), -match.end())
+            for regex in self._get_candidate_regexes(input_val)
+            for match in regex.finditer(input_val)
+        )
+        spans: List[Tuple[int, int]] = []
+        for start, negated_end in found_matches:
+            if not spans or start >= spans[-1][1]:
+                spans.append((start, -negated_end))
+        return spans
+
+    def _match_many(
+        self, lines: Sequence[AnyStr], first_only: bool
+    ) -> MatchBatch:
+        # Lines the candidate regexes find nothing in have no matches
+        # or, if the match is inverted, an empty one at their start.
+        match_batch = MatchBatch()
+        invert_match = self._options.invert_match
+        next_index = 0
+        for line_index in self._find_candidate_lines(lines):
+            line = lines[line_index]
+            spans: Sequence[Tuple[int, int]]
+            if first_only:
+                first_span = self._search_span(line)
+                spans = (first_span,) if first_span else ()
+            else:
+                spans = self._find_spans(line)
+            if invert_match:
+                match_batch.add_empty(
+                    range(next_index, line_index + (not spans))
+                )
+            else:
+                match_batch.add(line_index, spans)
+            next_index = line_index + 1
+        if invert_match:
+            match_batch.add_empty(range(next_index, len(lines)))
+        return match_batch
+
+    def _build(self) -> None:
+        literals = {
+            self._normalize(pattern)
+            for pattern in self._patterns
+            if is_literal(pattern)
+        }
+        if literals:
+            # Tries of literals never backtrack much, while the re module
+            # searches them faster than automata, and case-insensitive
+            # ones faster still over lowercased input.
+            (self._literal_regex,) = self._compile(
+                (self._encode_latin1(self._build_trie_regex(literals)),),
+                "backtracking",
+            )
+
+        regex_patterns = tuple(
+            self._encode(pattern)
+            for pattern in self._patterns
+            if not is_literal(pattern)
+        )
+        self._regexes = self._compile(
+            regex_patterns, self._options.regex_engine
+        )
+        regex_indexes_by_literal: Dict[str, List[int]] = {}
+        for index, pattern in enumerate(regex_patterns):
+            required_literal = find_required_literal(pattern, self._flags)
+            if required_literal is None:
+                self._unfiltered_regexes.append(self._regexes[index])
+            else:
+                regex_indexes_by_literal.setdefault(
+                    self._normalize(required_literal), []
+                ).append(index)
+
+        if regex_indexes_by_literal:
+            (self._prefilter_regex,) = compile_patterns(
+                (
+                    self._encode_latin1(
+                        "(?=("
+                        + self._build_trie_regex(regex_indexes_by_literal)
+                        + "))"
+                    ),
+                ),
+                self._flags,
+            )
+            self._literal_to_regex_indexes = self._include_prefix_buckets(
+                regex_indexes_by_literal
+            )
+        self._is_built = True
+
+    @staticmethod
+    def _include_prefix_buckets(
+        regex_indexes_by_literal: Dict[str, List[int]],
+    ) -> Dict[str, List[int]]:
+        # The prefilter reports only the longest literal found at each
+        # position, so buckets of literals which are its prefixes
+        # have to be tried as well.
+        return {
+            literal: [
+                index
+                for length in range(
+                    MIN_REQUIRED_LITERAL_LENGTH, len(literal) + 1
+                )
+                for index in regex_indexes_by_literal.get(literal[:length], [])
+            ]
+            for literal in regex_indexes_by_literal
+        }
+
+    def _build_trie_regex(self, literals: Iterable[str]) -> str:
+        if self._trie_regex_cache is None:
+            return build_trie_regex(literals)
+        return self._trie_regex_cache.build_trie_regex(literals)
+
+    def _normalize(self, literal: str) -> str:
+        return literal.lower() if self._options.ignore_case else literal
+
+    def _compile(
+        self, patterns: Tuple[AnyStr, ...], regex_engine: str
+    ) -> Sequence[IRegex[AnyStr]]:
+        if not (self._options.word_regexp or self._options.line_regexp):
+            return compile_regexes(patterns, self._flags, regex_engine)
+
+        # Imported here, as only word and line matching need it.
+        from python_grep.match.boundaries import compile_bounded_regexes
+
+        return compile_bounded_regexes(
+            patterns,
+            self._flags,
+            regex_engine,
+            self._options.line_regexp,
+            self._get_line_separator(),
+        )
+
+    def _get_line_separator(self) -> Optional[AnyStr]:
+        return self._encode("\n") if self._options.multiline else None
+
+
+class BinaryMultiPatternMatcher(MultiPatternMatcherTemplate[bytes]):
+    """MultiPatternMatcher for bytes input"""
+
+    def _encode(self, pattern: str) -> bytes:
+        return pattern.encode()
+
+    def _encode_latin1(self, source: str) -> bytes:
+        return source.encode("latin-1")
+
+    def _to_key(self, found_literal: bytes) -> str:
+        return self._normalize(found_literal.decode("latin-1"))
+
+    def _get_line_separator(self) -> Optional[bytes]:
+        # Buffers of binary input span lines, whose separators bound
+        # line matches.
+        return b"\0" if self._options.null_data else b"\n"
+
+    def _normalize(self, literal: str) -> str:
+        # Bytes regexes fold the case of ASCII letters only.
+        if not self._options.ignore_case:
+            return literal
+        return literal.encode("latin-1").lower().decode("latin-1")
+
+    def _build(self) -> None:
+        # Literals are matched as UTF-8 bytes, while the trie is built
+        # over latin-1 characters mapping one to one onto bytes.
+        self._patterns = [
+            (
+                pattern.encode().decode("latin-1")
+                if is_literal(pattern)
+                else pattern
+            )
+            for pattern in self._patterns
+        ]
+        super()._build()
+
+
+class TextMultiPatternMatcher(MultiPatternMatcherTemplate[str]):
+    """MultiPatternMatcher for str input"""
+
+    def _encode(self, pattern: str) -> str:
+        return pattern
+
+    def _encode_latin1(self, source: str) -> str:
+        return source
+
+    def _to_key(self, found_literal: str) -> str:
+        return self._normalize(found_literal)
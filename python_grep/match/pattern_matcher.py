@@ -1,11 +1,195 @@
 from __future__ import annotations
 
+import heapq
 import re
 from abc import abstractmethod
-from typing import AnyStr, List, Optional, Pattern
+from functools import lru_cache
+from itertools import chain, compress, filterfalse, repeat
+from typing import (
+    AnyStr,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from python_grep.grep.context import PatternMatchingOptions
-from python_grep.match.base import IPatternMatcher, MatchPosition
+from python_grep.match.base import (
+    IPatternMatcher,
+    IRegex,
+    IRegexMatch,
+    MatchBatch,
+    MatchPosition,
+)
+from python_grep.match.regex_engine import REGEX_ENGINES
+
+COMPILED_PATTERNS_CACHE_SIZE = 64
+REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+
+@lru_cache(maxsize=COMPILED_PATTERNS_CACHE_SIZE)
+def compile_patterns(
+    patterns: Tuple[AnyStr, ...], flags: int
+) -> Tuple[Pattern[AnyStr], ...]:
+    """
+    Compile regex patterns. Results are memoized, so matchers created
+    for the same patterns within one process share compiled regexes,
+    independently of the size limit of the ``re`` module cache.
+
+    :param Tuple[AnyStr, ...] patterns: Regex patterns to compile.
+    :param int flags: Regex flags.
+    :return: Compiled regex patterns.
+    :rtype: Tuple[Pattern[AnyStr], ...]
+    """
+
+    return tuple(re.compile(pattern, flags) for pattern in patterns)
+
+
+@lru_cache(maxsize=COMPILED_PATTERNS_CACHE_SIZE)
+def compile_regexes(
+    patterns: Tuple[AnyStr, ...], flags: int, regex_engine: str
+) -> Tuple[IRegex[AnyStr], ...]:
+    """
+    Compile regex patterns given by the user with a regex engine.
+    Results are memoized, as those of compile_patterns.
+
+    :param Tuple[AnyStr, ...] patterns: Regex patterns to compile.
+    :param int flags: Regex flags.
+    :param str regex_engine: Name of the engine in REGEX_ENGINES.
+    :return: Compiled regexes.
+    :rtype: Tuple[IRegex[AnyStr], ...]
+    """
+
+    engine = REGEX_ENGINES[regex_engine]
+    return tuple(engine.compile(pattern, flags) for pattern in patterns)
+
+
+def is_literal(pattern: str) -> bool:
+    """
+    Check whether a pattern contains no regex metacharacters.
+
+    :param str pattern: The pattern to check.
+    :return: True if the pattern matches only itself.
+    :rtype: bool
+    """
+
+    return bool(pattern) and not REGEX_METACHARACTERS.intersection(pattern)
+
+
+def iter_leftmost_matches(
+    regexes: Iterable[IRegex[AnyStr]], input_val: AnyStr, pos: int = 0
+) -> Iterator[MatchPosition]:
+    """
+    Iterate over non-overlapping matches of several regexes in order.
+
+    Matches of all regexes are merged lazily by their start. A match
+    starting inside a previously yielded one is skipped.
+
+    :param Iterable[IRegex[AnyStr]] regexes: Compiled regexes.
+    :param AnyStr input_val: The input value to search within.
+    :param int pos: The index to start searching at.
+    :return: An iterator of MatchPosition objects.
+    :rtype: Iterator[MatchPosition]
+    """
+
+    found_matches = heapq.merge(
+        *(
+            (
+                (match.start(), -match.end())
+                for match in regex.finditer(input_val, pos)
+            )
+            for regex in regexes
+        )
+    )
+    last_start, last_end = -1, -1
+    for start, negated_end in found_matches:
+        if start > last_start and start >= last_end:
+            last_start, last_end = start, -negated_end
+            yield MatchPosition(start, last_end)
+
+
+def find_matching_lines(
+    regexes: Iterable[IRegex[AnyStr]], lines: Sequence[AnyStr]
+) -> List[int]:
+    """
+    Find the lines any of several regexes finds a match in. Every regex
+    searches all lines by mapping its search over them, which for regexes
+    of the re module runs without executing any Python code per line.
+
+    :param Iterable[IRegex[AnyStr]] regexes: Compiled regexes.
+    :param Sequence[AnyStr] lines: The lines to search within.
+    :return: Indexes of the lines in ascending order.
+    :rtype: List[int]
+    """
+
+    line_indexes: Set[int] = set()
+    for regex in regexes:
+        line_indexes.update(
+            compress(range(len(lines)), map(regex.search, lines))
+        )
+    return sorted(line_indexes)
+
+
+def find_first_matches(
+    regexes: Iterable[IRegex[AnyStr]], lines: Sequence[AnyStr]
+) -> Dict[int, Tuple[IRegex[AnyStr], IRegexMatch]]:
+    """
+    Find the first match in every line any of several regexes finds one
+    in, by the first regex finding one. Every regex searches the lines
+    the preceding ones found nothing in by mapping its search over them,
+    which for regexes of the re module runs without executing any Python
+    code per line.
+
+    :param Iterable[IRegex[AnyStr]] regexes: Compiled regexes.
+    :param Sequence[AnyStr] lines: The lines to search within.
+    :return: The regex and its first match by index of every line
+     a match was found in.
+    :rtype: Dict[int, Tuple[IRegex[AnyStr], IRegexMatch]]
+    """
+
+    first_matches: Dict[int, Tuple[IRegex[AnyStr], IRegexMatch]] = {}
+    line_indexes: Sequence[int] = range(len(lines))
+    searched_lines = lines
+    for regex in regexes:
+        if first_matches:
+            line_indexes = [
+                index for index in line_indexes if index not in first_matches
+            ]
+            searched_lines = [lines[index] for index in line_indexes]
+        found_matches = list(map(regex.search, searched_lines))
+        first_matches.update(
+            zip(
+                compress(line_indexes, found_matches),
+                zip(repeat(regex), filter(None, found_matches)),
+            )
+        )
+    return first_matches
+
+
+def iter_all_matches(
+    regex: IRegex[AnyStr], input_val: AnyStr, first_match: IRegexMatch
+) -> Iterator[IRegexMatch]:
+    """
+    Iterate over all matches of a regex in an input, given the first one
+    found by a search, without searching for it again.
+
+    :param IRegex[AnyStr] regex: The compiled regex.
+    :param AnyStr input_val: The input value to search within.
+    :param IRegexMatch first_match: The first match of the regex.
+    :return: An iterator of non-overlapping matches in order.
+    :rtype: Iterator[IRegexMatch]
+    """
+
+    if first_match.end() == first_match.start():
+        # An empty match may not be followed by another one at the same
+        # index, which a new iteration from there would find.
+        return regex.finditer(input_val)
+    return chain((first_match,), regex.finditer(input_val, first_match.end()))
 
 
 class PatternMatcherTemplate(IPatternMatcher[AnyStr]):
@@ -13,6 +197,12 @@ class PatternMatcherTemplate(IPatternMatcher[AnyStr]):
     A template for pattern matchers.
 
     Provides a template for implementing pattern matching operations.
+    Patterns are compiled lazily, on the first match or search, by
+    the regex engine named in the pattern matching options. With word or
+    line matching, patterns starting with a literal find matches as given
+    and only their boundaries are checked afterwards. Lines of a batch are
+    first searched by each regex at once and the matches found are
+    carried on from, rather than searched for again.
 
     :param List[str] patterns: A list of patterns to match against.
     :param PatternMatchingOptions pattern_matching_options: Options
@@ -26,9 +216,13 @@ class PatternMatcherTemplate(IPatternMatcher[AnyStr]):
     ) -> None:
         self._patterns = patterns
         self._options = pattern_matching_options
-        self._compiled_regex_patterns: List[Pattern[AnyStr]] = (
-            self._compile_regex_patterns()
-        )
+        self._compiled_patterns: Optional[List[IRegex[AnyStr]]] = None
+
+    @property
+    def _compiled_regex_patterns(self) -> List[IRegex[AnyStr]]:
+        if self._compiled_patterns is None:
+            self._compiled_patterns = self._compile_regex_patterns()
+        return self._compiled_patterns
 
     def search(self, input_val: AnyStr) -> Optional[MatchPosition]:
         for compiled_regex in self._compiled_regex_patterns:
@@ -42,14 +236,91 @@ class PatternMatcherTemplate(IPatternMatcher[AnyStr]):
             return MatchPosition(0, 0)
         return None
 
+    def iter_matches(
+        self, input_val: AnyStr, pos: int = 0
+    ) -> Iterator[MatchPosition]:
+        return iter_leftmost_matches(
+            self._compiled_regex_patterns, input_val, pos
+        )
+
+    def search_many(self, lines: Sequence[AnyStr]) -> MatchBatch:
+        return self._match_many(lines, first_only=True)
+
+    def match_many(self, lines: Sequence[AnyStr]) -> MatchBatch:
+        return self._match_many(lines, first_only=False)
+
     @abstractmethod
-    def _compile_regex_patterns(self) -> List[re.Pattern[AnyStr]]:
+    def _compile_regex_patterns(self) -> List[IRegex[AnyStr]]:
         pass
 
+    def _match_many(
+        self, lines: Sequence[AnyStr], first_only: bool
+    ) -> MatchBatch:
+        match_batch = MatchBatch()
+        if self._options.invert_match:
+            # Lines the regexes find nothing in are exactly the inverted
+            # matches, which need no further matching.
+            matching_indexes = set(
+                find_matching_lines(self._compiled_regex_patterns, lines)
+            )
+            match_batch.add_empty(
+                list(
+                    filterfalse(
+                        matching_indexes.__contains__, range(len(lines))
+                    )
+                )
+            )
+            return match_batch
+
+        first_matches = find_first_matches(
+            self._compiled_regex_patterns, lines
+        )
+        for line_index in sorted(first_matches):
+            regex, first_match = first_matches[line_index]
+            match_batch.add_regex_matches(
+                line_index,
+                (
+                    (first_match,)
+                    if first_only
+                    else iter_all_matches(
+                        regex, lines[line_index], first_match
+                    )
+                ),
+            )
+        return match_batch
+
+    def _compile(
+        self,
+        patterns: Tuple[AnyStr, ...],
+        line_separator: Optional[AnyStr],
+    ) -> List[IRegex[AnyStr]]:
+        flags = self._get_flags()
+        if not (self._options.word_regexp or self._options.line_regexp):
+            return list(
+                compile_regexes(patterns, flags, self._options.regex_engine)
+            )
+
+        # Imported here, as only word and line matching need it.
+        from python_grep.match.boundaries import compile_bounded_regexes
+
+        return list(
+            compile_bounded_regexes(
+                patterns,
+                flags,
+                self._options.regex_engine,
+                self._options.line_regexp,
+                line_separator,
+            )
+        )
+
     def _get_flags(self) -> int:
         flags = 0
         if self._options.ignore_case:
             flags |= re.IGNORECASE
+        if self._options.multiline:
+            flags |= re.MULTILINE
+        if self._options.multiline_dotall:
+            flags |= re.DOTALL
 
         return flags
 
@@ -62,27 +333,24 @@ class BinaryPatternMatcher(PatternMatcherTemplate[bytes]):
             return [match_position]
         return None
 
-    def _compile_regex_patterns(self) -> List[Pattern[bytes]]:
-        flags = self._get_flags()
-        compiled_patterns = []
-
-        for pattern in self._patterns:
-            encoded_pattern = pattern.encode()
-            regex_pattern = (
-                rb"\b%s\b" % encoded_pattern
-                if self._options.word_regexp
-                else rb"%s" % encoded_pattern
-            )
-
-            compiled_patterns.append(re.compile(regex_pattern, flags=flags))
+    def match_many(self, lines: Sequence[bytes]) -> MatchBatch:
+        return self.search_many(lines)
 
-        return compiled_patterns
+    def _compile_regex_patterns(self) -> List[IRegex[bytes]]:
+        # Buffers of binary input span lines, whose separators bound
+        # line matches.
+        return self._compile(
+            tuple(pattern.encode() for pattern in self._patterns),
+            b"\0" if self._options.null_data else b"\n",
+        )
 
 
 class TextPatternMatcher(PatternMatcherTemplate[str]):
     """PatternMatcher for str input"""
 
     def match(self, input_val: str) -> Optional[List[MatchPosition]]:
+        if self._options.invert_match:
+            return [MatchPosition(0, 0)] if self.search(input_val) else None
         for compiled_regex in self._compiled_regex_patterns:
             if matched_positions := self._get_matched_positions(
                 input_val, compiled_regex
@@ -90,37 +358,22 @@ class TextPatternMatcher(PatternMatcherTemplate[str]):
                 return matched_positions
         return None
 
-    def _compile_regex_patterns(self) -> List[re.Pattern[str]]:
-        flags = self._get_flags()
-
-        return [
-            re.compile(
-                (
-                    rf"\b{re.escape(pattern)}\b"
-                    if self._options.word_regexp
-                    else pattern
-                ),
-                flags,
-            )
-            for pattern in self._patterns
-        ]
+    def _compile_regex_patterns(self) -> List[IRegex[str]]:
+        return self._compile(
+            tuple(self._patterns), "\n" if self._options.multiline else None
+        )
 
     def _get_matched_positions(
-        self, input_val: str, compiled_regex: re.Pattern[str]
+        self, input_val: str, compiled_regex: IRegex[str]
     ) -> Optional[List[MatchPosition]]:
         matches = [
             MatchPosition(match.start(), match.end())
             for match in compiled_regex.finditer(input_val)
         ]
-        if self._options.invert_match and not matches:
-            return [MatchPosition(0, 0)]
-        elif matches and not self._options.invert_match:
-            return matches
-        else:
-            return None
+        return matches or None
 
     @staticmethod
     def _is_match_found(
-        input_val: AnyStr, compiled_regex: re.Pattern[AnyStr]
+        input_val: AnyStr, compiled_regex: IRegex[AnyStr]
     ) -> bool:
         return bool(compiled_regex.search(input_val))
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import re
+from re import _constants, _parser  # type: ignore[attr-defined]
+from typing import Any, AnyStr, Dict, Iterable
+
+from python_grep.match.base import IRegex, IRegexEngine
+
+
+class BacktrackingRegexEngine(IRegexEngine):
+    """
+    Compiles patterns with the backtracking re module. Case-insensitive
+    patterns are compiled into regexes matching lowercased input where
+    possible, as re searches them much faster without IGNORECASE.
+    """
+
+    def compile(self, pattern: AnyStr, flags: int) -> IRegex[AnyStr]:
+        if flags & re.IGNORECASE:
+            # Imported here, as only case-insensitive searches need it.
+            from python_grep.match.case_folding import compile_case_folded
+
+            if (regex := compile_case_folded(pattern, flags)) is not None:
+                return regex
+        return re.compile(pattern, flags)
+
+
+class LinearRegexEngine(IRegexEngine):
+    """
+    Compiles patterns into automata searched in linear time, falling
+    back to the re module for patterns using constructs they do not
+    support, such as backreferences and lookarounds.
+    """
+
+    def compile(self, pattern: AnyStr, flags: int) -> IRegex[AnyStr]:
+        # Imported here, as only patterns prone to backtracking are
+        # compiled into automata by default.
+        from python_grep.match.linear_regex import (
+            LinearRegex,
+            UnsupportedPatternError,
+        )
+
+        try:
+            return LinearRegex(pattern, flags)
+        except UnsupportedPatternError:
+            return re.compile(pattern, flags)
+
+
+class AutoRegexEngine(IRegexEngine):
+    """
+    Compiles patterns prone to catastrophic backtracking with the linear
+    engine and other patterns with the re module, which is faster.
+    """
+
+    def compile(self, pattern: AnyStr, flags: int) -> IRegex[AnyStr]:
+        if is_backtracking_prone(pattern, flags):
+            return REGEX_ENGINES["linear"].compile(pattern, flags)
+        return REGEX_ENGINES["backtracking"].compile(pattern, flags)
+
+
+REGEX_ENGINES: Dict[str, IRegexEngine] = {
+    "auto": AutoRegexEngine(),
+    "backtracking": BacktrackingRegexEngine(),
+    "linear": LinearRegexEngine(),
+}
+
+
+def is_backtracking_prone(pattern: AnyStr, flags: int) -> bool:
+    """
+    Check whether a pattern repeats a subpattern which itself repeats
+    or alternates, the shapes which lead a backtracking engine into
+    exponential time on inputs almost matching them, e.g. ``(a+)+$``.
+
+    :param AnyStr pattern: The regex pattern.
+    :param int flags: Flags the pattern is compiled with.
+    :return: True if the pattern has a repetition of that shape.
+    :rtype: bool
+    :raises re.error: If the pattern is invalid.
+    """
+
+    return _has_nested_repetition(_parser.parse(pattern, flags), False)
+
+
+def _has_nested_repetition(items: Iterable[Any], is_repeated: bool) -> bool:
+    for opcode, argument in items:
+        if opcode in (_constants.MAX_REPEAT, _constants.MIN_REPEAT):
+            _, max_count, subpattern = argument
+            if max_count > 1 and is_repeated:
+                return True
+            if _has_nested_repetition(
+                subpattern, is_repeated or max_count > 1
+            ):
+                return True
+        elif opcode is _constants.BRANCH:
+            if is_repeated:
+                return True
+            if any(
+                _has_nested_repetition(subpattern, False)
+                for subpattern in argument[1]
+            ):
+                return True
+        elif opcode in (
+            _constants.SUBPATTERN,
+            _constants.ASSERT,
+            _constants.ASSERT_NOT,
+        ):
+            if _has_nested_repetition(argument[-1], is_repeated):
+                return True
+    return False
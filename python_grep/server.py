@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import socket
+import stat
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Any, List, TextIO
+
+from python_grep.cli import create_cli_parser, get_parsed_args
+from python_grep.grep import create_grep_from_cli_args
+from python_grep.grep.result_cache import MemoryResultCache
+from python_grep.ipc import (
+    EXIT_CHANNEL,
+    REQUEST_CHANNEL,
+    STDERR_CHANNEL,
+    STDOUT_CHANNEL,
+    receive_frame,
+    send_frame,
+)
+from python_grep.storage import DirectoryCache
+
+SOCKET_BACKLOG = 64
+
+
+class FrameWriter(io.RawIOBase):
+    """
+    A raw binary stream sending everything written to it as frames.
+
+    :param socket.socket connection: The connection to send frames over.
+    :param bytes channel: The channel of the frames.
+    """
+
+    def __init__(self, connection: socket.socket, channel: bytes) -> None:
+        super().__init__()
+        self._connection = connection
+        self._channel = channel
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        send_frame(self._connection, self._channel, bytes(data))
+        return len(data)
+
+
+class GrepServer:
+    """
+    A daemon running searches forwarded by clients over a Unix socket.
+
+    Imports, compiled patterns, results of searched files keyed on their
+    fingerprints and listings of searched directories stay warm between
+    searches, so a search costs little more than the work on the files
+    themselves. Results are cached in memory rather than on disk.
+    Searches are run one at a time, in the working directory of the
+    client, with their output streamed back as it is written. Following
+    files is refused, as it would block the server.
+
+    :param Path socket_path: The path to the socket to listen on.
+    """
+
+    def __init__(self, socket_path: Path) -> None:
+        self._socket_path = socket_path
+        self._cli_parser = create_cli_parser()
+        self._cli_parser.prog = "pygrep"
+        self._result_cache = MemoryResultCache()
+        self._directory_cache = DirectoryCache()
+
+    def serve_forever(self) -> None:
+        """Listen on the socket until interrupted."""
+
+        if not self._claim_socket_path():
+            return
+        self._socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            server_socket.bind(str(self._socket_path))
+        finally:
+            os.umask(umask)
+        server_socket.listen(SOCKET_BACKLOG)
+        try:
+            while True:
+                connection, _ = server_socket.accept()
+                with connection:
+                    self._handle(connection)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server_socket.close()
+            self._socket_path.unlink(missing_ok=True)
+
+    def run(self, args: List[str], stdout: TextIO, stderr: TextIO) -> int:
+        """
+        Run a single search in the current working directory.
+
+        :param List[str] args: The command-line arguments of the search.
+        :param TextIO stdout: The stream for the output of the search.
+        :param TextIO stderr: The stream for errors of the search.
+        :return: The exit status of the search.
+        :rtype: int
+        """
+
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                parsed_args = get_parsed_args(self._cli_parser, args)
+                if parsed_args.follow:
+                    self._cli_parser.error(
+                        "--follow is not supported by the server"
+                    )
+                create_grep_from_cli_args(
+                    parsed_args, self._result_cache, self._directory_cache
+                ).execute()
+            except SystemExit as e:
+                return e.code if isinstance(e.code, int) else int(bool(e.code))
+            except Exception:
+                traceback.print_exc()
+                return 1
+            finally:
+                stdout.flush()
+                stderr.flush()
+        return 0
+
+    def _handle(self, connection: socket.socket) -> None:
+        try:
+            with connection.makefile("rb") as reader:
+                frame = receive_frame(reader)
+            if frame is None or frame[0] != REQUEST_CHANNEL:
+                return
+            request = json.loads(frame[1])
+            server_cwd = os.getcwd()
+            try:
+                os.chdir(request["cwd"])
+                status = self.run(
+                    request["args"],
+                    self._create_stream(connection, STDOUT_CHANNEL),
+                    self._create_stream(connection, STDERR_CHANNEL),
+                )
+            finally:
+                os.chdir(server_cwd)
+            send_frame(connection, EXIT_CHANNEL, str(status).encode())
+        except (OSError, ValueError, KeyError) as e:
+            print(f"grep: request failed: {e}")
+
+    def _claim_socket_path(self) -> bool:
+        try:
+            mode = self._socket_path.lstat().st_mode
+        except FileNotFoundError:
+            return True
+        if not stat.S_ISSOCK(mode):
+            print(f"grep: {self._socket_path} exists and is not a socket")
+            return False
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self._socket_path))
+        except OSError:
+            # Left behind by a server which did not shut down cleanly.
+            self._socket_path.unlink(missing_ok=True)
+            return True
+        finally:
+            probe.close()
+        print(f"grep: a server is already listening on {self._socket_path}")
+        return False
+
+    @staticmethod
+    def _create_stream(connection: socket.socket, channel: bytes) -> TextIO:
+        return io.TextIOWrapper(
+            io.BufferedWriter(FrameWriter(connection, channel)),
+            encoding="utf-8",
+        )
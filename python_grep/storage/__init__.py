@@ -1,17 +1,75 @@
+from typing import TYPE_CHECKING, Any
+
 from python_grep.storage.base import (
     DEFAULT_ENCODING,
     IFileReader,
     InputType,
+    IPathFilter,
     IPathResolver,
 )
-from python_grep.storage.file_reader import FileReader
-from python_grep.storage.path_resolver import PathResolver
+
+if TYPE_CHECKING:
+    from python_grep.storage.directory_cache import DirectoryCache
+    from python_grep.storage.file_reader import FileReader
+    from python_grep.storage.follow_reader import FollowFileReader
+    from python_grep.storage.line_index import (
+        IndexedFileReader,
+        LineIndex,
+        LineIndexStore,
+    )
+    from python_grep.storage.line_range_reader import LineRangeFileReader
+    from python_grep.storage.line_window import LineWindowReader, LongLine
+    from python_grep.storage.time_range_reader import (
+        TimeRangeFileReader,
+        TimestampParser,
+    )
+    from python_grep.storage.path_filter import FilteringPathResolver
+    from python_grep.storage.path_resolver import PathResolver
 
 __all__ = [
     "DEFAULT_ENCODING",
+    "DirectoryCache",
     "FileReader",
+    "FilteringPathResolver",
+    "FollowFileReader",
+    "IndexedFileReader",
     "InputType",
     "IFileReader",
+    "IPathFilter",
     "IPathResolver",
+    "LineIndex",
+    "LineIndexStore",
+    "LineRangeFileReader",
+    "LineWindowReader",
+    "LongLine",
     "PathResolver",
+    "TimeRangeFileReader",
+    "TimestampParser",
 ]
+
+# Implementations are resolved on first access, so e.g. following files
+# costs nothing to searches which do not.
+_LAZY_EXPORTS = {
+    "DirectoryCache": "python_grep.storage.directory_cache",
+    "FileReader": "python_grep.storage.file_reader",
+    "FilteringPathResolver": "python_grep.storage.path_filter",
+    "FollowFileReader": "python_grep.storage.follow_reader",
+    "IndexedFileReader": "python_grep.storage.line_index",
+    "LineIndex": "python_grep.storage.line_index",
+    "LineIndexStore": "python_grep.storage.line_index",
+    "LineRangeFileReader": "python_grep.storage.line_range_reader",
+    "LineWindowReader": "python_grep.storage.line_window",
+    "LongLine": "python_grep.storage.line_window",
+    "PathResolver": "python_grep.storage.path_resolver",
+    "TimeRangeFileReader": "python_grep.storage.time_range_reader",
+    "TimestampParser": "python_grep.storage.time_range_reader",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = __import__(_LAZY_EXPORTS[name], fromlist=[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
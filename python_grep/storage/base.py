@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import os
 import sys
 from abc import ABC, abstractmethod
 from enum import Enum
 from pathlib import Path
-from typing import AnyStr, Callable, Generator, Generic
+from typing import AnyStr, Callable, Generator, Generic, Optional, Tuple
 
 DEFAULT_ENCODING = sys.getdefaultencoding()
 
@@ -23,6 +24,61 @@ class IFileReader(ABC, Generic[AnyStr]):
         """
         pass
 
+    @abstractmethod
+    def read_lines_with_offsets(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, AnyStr], None, None]:
+        """
+        Read lines from a file together with their absolute byte offsets.
+
+        :param Path path: The path to the file.
+        :param Optional[int] start_offset: Byte offset to start reading
+         from, overriding the reader's default start offset.
+        :return: A generator yielding (byte offset, line) tuples.
+        :rtype: Generator[Tuple[int, AnyStr], None, None].
+        """
+        pass
+
+    @abstractmethod
+    def read_blocks(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, AnyStr], None, None]:
+        """
+        Read a file in large blocks consisting of whole lines, together
+        with their absolute byte offsets. Line separators are kept.
+
+        :param Path path: The path to the file.
+        :param Optional[int] start_offset: Byte offset to start reading
+         from, overriding the reader's default start offset.
+        :return: A generator yielding (byte offset, block) tuples.
+        :rtype: Generator[Tuple[int, AnyStr], None, None].
+        """
+        pass
+
+    @abstractmethod
+    def count_newlines(self, path: Path, end_offset: int) -> int:
+        """
+        Count line separators in a file up to a given byte offset.
+
+        :param Path path: The path to the file.
+        :param int end_offset: The byte offset to stop counting at.
+        :return: Number of newlines found before the offset.
+        :rtype: int.
+        """
+        pass
+
+    @abstractmethod
+    def find_line_offset(self, path: Path, line_number: int) -> Optional[int]:
+        """
+        Find the byte offset a line of a file starts at.
+
+        :param Path path: The path to the file.
+        :param int line_number: The number of the line, starting at 1.
+        :return: The byte offset or None if the file has fewer lines.
+        :rtype: Optional[int].
+        """
+        pass
+
     @abstractmethod
     def before_file_traverse_hook(
         self, callback: Callable[[InputType], None]
@@ -47,6 +103,45 @@ class IPathResolver(ABC):
         :rtype: Generator[Path, None, None]
         """
 
+    def get_resolved_files_with_stats(
+        self,
+    ) -> Generator[Tuple[Path, Optional[os.stat_result]], None, None]:
+        """
+        Get resolved file paths with stat data of the files, if it was
+        taken while resolving them.
+
+        :return: A generator yielding resolved file paths and their stat
+         data, None if the files were not stat-ed.
+        :rtype: Generator[Tuple[Path, Optional[os.stat_result]], None, None]
+        """
+
+        for path in self.get_resolved_file_paths():
+            yield path, None
+
+
+class IPathFilter(ABC):
+    """
+    Interface for predicates selecting files to search before they are
+    opened, from their paths and stat data only.
+    """
+
+    @property
+    @abstractmethod
+    def requires_stat(self) -> bool:
+        """Whether the predicate needs stat data of files."""
+
+    @abstractmethod
+    def accepts(self, path: Path, stat: Optional[os.stat_result]) -> bool:
+        """
+        Check whether a file is to be searched.
+
+        :param Path path: The path to the file.
+        :param Optional[os.stat_result] stat: Stat data of the file, given
+         if the predicate requires it.
+        :return: True if the file is to be searched.
+        :rtype: bool
+        """
+
 
 class InputType(Enum):
     TEXT = "TEXT"
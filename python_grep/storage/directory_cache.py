@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generator, List, Optional, Tuple
+
+DEFAULT_MAX_DIRECTORIES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class DirectoryListing:
+    stamp: Tuple[int, int, int]
+    dir_names: Tuple[str, ...]
+    file_names: Tuple[str, ...]
+
+
+class DirectoryCache:
+    """
+    A cache of directory listings for long-running processes searching
+    the same trees repeatedly.
+
+    A listing is reused as long as the device, the inode and
+    the modification time of its directory are unchanged, the latter
+    changing whenever an entry is added to, removed from or renamed
+    within the directory. So only a stat call is needed per directory
+    instead of reading it. Least recently used listings are dropped once
+    the limit is exceeded.
+
+    :param int max_directories: Maximum number of cached listings.
+    """
+
+    def __init__(self, max_directories: int = DEFAULT_MAX_DIRECTORIES) -> None:
+        self._max_directories = max_directories
+        self._listings: OrderedDict[str, DirectoryListing] = OrderedDict()
+
+    def walk(self, dir_path: Path) -> Generator[Path, None, None]:
+        """
+        Yield paths of all files within a directory tree in the order
+        of ``os.walk``. Symbolic links to directories are not followed
+        and unreadable directories are skipped.
+
+        :param Path dir_path: The root of the tree.
+        :return: A generator of file paths.
+        :rtype: Generator[Path, None, None]
+        """
+
+        pending = [str(dir_path)]
+        while pending:
+            root = pending.pop()
+            listing = self._get_listing(root)
+            if listing is None:
+                continue
+            for file_name in listing.file_names:
+                yield Path(root, file_name)
+            pending.extend(
+                os.path.join(root, dir_name)
+                for dir_name in reversed(listing.dir_names)
+            )
+
+    def _get_listing(self, root: str) -> Optional[DirectoryListing]:
+        try:
+            stat = os.stat(root)
+        except OSError:
+            self._listings.pop(root, None)
+            return None
+        stamp = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        listing = self._listings.get(root)
+        if listing and listing.stamp == stamp:
+            self._listings.move_to_end(root)
+            return listing
+
+        listing = self._read_listing(root, stamp)
+        if listing is None:
+            self._listings.pop(root, None)
+            return None
+        self._listings[root] = listing
+        self._listings.move_to_end(root)
+        while len(self._listings) > self._max_directories:
+            self._listings.popitem(last=False)
+        return listing
+
+    @staticmethod
+    def _read_listing(
+        root: str, stamp: Tuple[int, int, int]
+    ) -> Optional[DirectoryListing]:
+        dir_names: List[str] = []
+        file_names: List[str] = []
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        file_names.append(entry.name)
+                    elif not entry.is_symlink():
+                        dir_names.append(entry.name)
+        except OSError:
+            return None
+        return DirectoryListing(stamp, tuple(dir_names), tuple(file_names))
@@ -1,8 +1,33 @@
-from io import BufferedReader
+import os
+import stat
+from contextlib import contextmanager
+from io import DEFAULT_BUFFER_SIZE, BufferedReader, BytesIO
 from pathlib import Path
-from typing import Callable, Generator, Optional, Union
+from typing import (
+    BinaryIO,
+    Callable,
+    Generator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
 from python_grep.storage.base import DEFAULT_ENCODING, IFileReader, InputType
+from python_grep.storage.io_hints import advise_dont_need, advise_sequential
+from python_grep.storage.line_window import (
+    DEFAULT_MAX_LINE_LENGTH,
+    LineWindowReader,
+    LongLine,
+)
+
+READ_BLOCK_SIZE = 1024 * 1024
+# Regular files up to this size are read whole with a single system call
+# instead of through a buffered reader.
+SMALL_FILE_SIZE = 64 * 1024
+NEWLINE = b"\n"
+NUL = b"\x00"
 
 
 class FileReader(IFileReader):
@@ -10,13 +35,39 @@ class FileReader(IFileReader):
     A file reader implementation for reading text and binary files.
 
     :param str encoding: The encoding to use for reading text files.
+    :param int start_offset: Byte offset to start reading each file from.
+     If it falls inside a line, reading resumes at the next line start.
+    :param bytes line_separator: The single byte separating lines,
+     e.g. NUL for records produced by ``find -print0``. Files are not
+     considered binary for containing the separator.
+    :param Optional[int] max_line_length: Text lines longer than this many
+     bytes are yielded as LongLine instances, read in windows of this
+     size, so no line is held in memory whole. None reads lines whole.
+    :param bool drop_cache: Flag indicating whether files are dropped from
+     the page cache once read, so scans do not evict data other processes
+     rely on (default is False).
+
+    Small files are read whole into memory before they are searched, so
+    opening them costs no more than a few system calls.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING) -> None:
+    def __init__(
+            self,
+            encoding: str = DEFAULT_ENCODING,
+            start_offset: int = 0,
+            line_separator: bytes = NEWLINE,
+            max_line_length: Optional[int] = DEFAULT_MAX_LINE_LENGTH,
+            drop_cache: bool = False,
+    ) -> None:
         self._encoding = encoding
+        self._start_offset = start_offset
+        self._line_separator = line_separator
+        self._max_line_length = max_line_length
+        self._drop_cache = drop_cache
         self._before_file_traverse: Optional[Callable[[InputType], None]] = (
             None
         )
+        self._undecodable_path: Optional[Path] = None
 
     def before_file_traverse_hook(
             self, callback: Callable[[InputType], None]
@@ -26,45 +77,288 @@ class FileReader(IFileReader):
     def read_lines(
             self, path: Path
     ) -> Generator[Union[str, bytes], None, None]:
+        for _, line in self.read_lines_with_offsets(path):
+            yield line
+
+    def read_lines_with_offsets(
+            self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        if start_offset is None:
+            start_offset = self._start_offset
         try:
-            yield from self._read_lines(path)
+            yield from self._read_lines(path, start_offset)
         except UnicodeDecodeError:
-            with path.open("rb") as file:
-                print(
-                    f"grep: unicode decode error. "
-                    f"Trying to read {path} as binary"
-                )
-                yield from self._read_as_binary(file)
+            with self._open_file(path, start_offset) as file:
+                self._report_undecodable(path)
+                if start_offset:
+                    file.seek(start_offset)
+                yield from self._read_as_binary(file, start_offset)
 
-    def _read_lines(
-            self, path: Path
-    ) -> Generator[Union[str, bytes], None, None]:
+    def read_blocks(
+            self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        if start_offset is None:
+            start_offset = self._start_offset
+        try:
+            with self._open_file(path, start_offset) as file:
+                if self._is_binary_file(file):
+                    if start_offset:
+                        file.seek(start_offset)
+                    self._notify_before_file_traverse(InputType.BINARY)
+                    yield from self._read_raw_blocks(file, start_offset)
+                    return
+                offset = self._seek_to_line_start(file, start_offset)
+                self._notify_before_file_traverse(InputType.TEXT)
+                yield from self._read_text_blocks(file, offset)
+        except UnicodeDecodeError:
+            with self._open_file(path, start_offset) as file:
+                self._report_undecodable(path)
+                if start_offset:
+                    file.seek(start_offset)
+                self._notify_before_file_traverse(InputType.BINARY)
+                yield from self._read_raw_blocks(file, start_offset)
+
+    def count_newlines(self, path: Path, end_offset: int) -> int:
+        newline_count = 0
         with path.open("rb") as file:
+            remaining = end_offset
+            while remaining > 0 and (
+                    chunk := file.read(min(remaining, READ_BLOCK_SIZE))
+            ):
+                newline_count += chunk.count(self._line_separator)
+                remaining -= len(chunk)
+        return newline_count
+
+    def find_line_offset(
+            self, path: Path, line_number: int
+    ) -> Optional[int]:
+        from python_grep.storage.line_index import LineIndex
+
+        return LineIndex(path, self._line_separator).find_line_start(
+            line_number
+        )
+
+    def _read_lines(
+            self, path: Path, start_offset: int
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        with self._open_file(path, start_offset) as file:
             if self._is_binary_file(file):
-                yield from self._read_as_binary(file)
+                if start_offset:
+                    file.seek(start_offset)
+                yield from self._read_as_binary(file, start_offset)
             else:
-                yield from self._read_as_text(file)
+                offset = self._seek_to_line_start(file, start_offset)
+                yield from self._read_as_text(file, offset)
 
-    @staticmethod
-    def _is_binary_file(file: BufferedReader) -> bool:
+    def _report_undecodable(self, path: Path) -> None:
+        # Consumers of blocks fall back to reading lines of a file which
+        # cannot be decoded, which is then only reported once.
+        if path == self._undecodable_path:
+            return
+        self._undecodable_path = path
+        print(f"grep: unicode decode error. Trying to read {path} as binary")
+
+    @contextmanager
+    def _open_file(
+            self, path: Path, start_offset: int = 0
+    ) -> Generator[BinaryIO, None, None]:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            # Opening the file as usual raises the error its callers
+            # report.
+            fd = -1
+        if fd < 0:
+            with path.open("rb") as file:
+                yield file
+            return
         try:
-            data = file.peek(1024)
-            if b"\x00" in data:
+            data = self._read_small_file(fd)
+        except BaseException:
+            os.close(fd)
+            raise
+        if data is not None:
+            os.close(fd)
+            yield BytesIO(data)
+            return
+        with open(fd, "rb") as file:
+            advise_sequential(file, start_offset)
+            try:
+                yield file
+            finally:
+                if self._drop_cache:
+                    advise_dont_need(file)
+
+    def _read_small_file(self, fd: int) -> Optional[bytes]:
+        """
+        Read a small regular file whole.
+
+        :param int fd: The descriptor of the opened file.
+        :return: The content of the file or None if it is not a regular
+         file or is larger than SMALL_FILE_SIZE, in which case the file
+         is left at its start to be read as usual.
+        :rtype: Optional[bytes]
+        """
+
+        file_stat = os.fstat(fd)
+        if (
+                not stat.S_ISREG(file_stat.st_mode)
+                or file_stat.st_size > SMALL_FILE_SIZE
+        ):
+            return None
+        # One byte more than the file holds is requested, so a file which
+        # has grown since it was stat-ed, or whose size is not reported,
+        # like those in /proc, is read as usual.
+        data = os.read(fd, file_stat.st_size + 1)
+        if len(data) > file_stat.st_size:
+            os.lseek(fd, 0, os.SEEK_SET)
+            return None
+        if self._drop_cache:
+            advise_dont_need(fd)
+        return data
+
+    def _is_binary_file(self, file: BinaryIO) -> bool:
+        if self._line_separator == NUL:
+            return False
+        try:
+            # Peeking returns the whole buffer of a reader, so files read
+            # whole are checked as far.
+            data = (
+                file.getvalue()[:DEFAULT_BUFFER_SIZE]
+                if isinstance(file, BytesIO)
+                else cast(BufferedReader, file).peek(1024)
+            )
+            if NUL in data:
                 return True
         except Exception as e:
             print(f"Error checking file {file.name}: {e}")
         return False
 
-    def _read_as_text(self, file) -> Generator[str, None, None]:
+    def _seek_to_line_start(self, file: BinaryIO, offset: int) -> int:
+        if offset <= 0:
+            return 0
+        file.seek(offset - 1)
+        if file.read(1) == self._line_separator:
+            return offset
+        while block := file.read(READ_BLOCK_SIZE):
+            if (index := block.find(self._line_separator)) >= 0:
+                offset += index + 1
+                file.seek(offset)
+                return offset
+            offset += len(block)
+        return offset
+
+    def _read_as_text(
+            self, file, offset: int = 0
+    ) -> Generator[Tuple[int, str], None, None]:
         self._notify_before_file_traverse(InputType.TEXT)
-        for line in file:
-            yield line.decode(self._encoding).rstrip("\n")
+        data = b""
+        while True:
+            block = file.read(READ_BLOCK_SIZE)
+            chunk = data + block
+            lines = chunk.split(self._line_separator)
+            data = lines.pop()
+            # Lines are only measured when they might be long at all.
+            if self._is_long(len(chunk) - len(data)):
+                for index, line in enumerate(lines):
+                    if self._is_long(len(line)):
+                        data = self._line_separator.join(
+                            lines[index:] + [data]
+                        )
+                        del lines[index:]
+                        break
+            for line in lines:
+                yield offset, line.decode(self._encoding)
+                offset += len(line) + 1
+            if self._is_long(len(data)):
+                offset, data = yield from self._read_long_line(
+                    file, offset, data
+                )
+            elif not block:
+                if data:
+                    yield offset, data.decode(self._encoding)
+                return
+
+    def _read_text_blocks(
+            self, file, offset: int = 0
+    ) -> Generator[Tuple[int, str], None, None]:
+        parts: List[bytes] = []
+        part_size = 0
+        while block := file.read(READ_BLOCK_SIZE):
+            cut = block.rfind(self._line_separator) + 1
+            if not cut:
+                parts.append(block)
+                part_size += len(block)
+                if not self._is_long(part_size):
+                    continue
+                offset, data = yield from self._read_long_line(
+                    file, offset, b"".join(parts)
+                )
+                if cut := data.rfind(self._line_separator) + 1:
+                    yield offset, data[:cut].decode(self._encoding)
+                    offset += cut
+                parts = [data[cut:]]
+                part_size = len(parts[0])
+                continue
+            parts.append(block[:cut])
+            data = b"".join(parts)
+            yield offset, data.decode(self._encoding)
+            offset += len(data)
+            parts = [block[cut:]]
+            part_size = len(parts[0])
+        if data := b"".join(parts):
+            yield offset, data.decode(self._encoding)
+
+    def _read_long_line(
+            self, file, offset: int, data: bytes
+    ) -> Generator[Tuple[int, str], None, Tuple[int, bytes]]:
+        window_reader = LineWindowReader(
+            file,
+            data,
+            self._line_separator,
+            self._max_line_length or len(data),
+            encoding=self._encoding,
+        )
+        yield offset, LongLine(window_reader)
+        line_length, has_separator, data = window_reader.finish()
+        return offset + line_length + has_separator, data
+
+    def _is_long(self, line_length: int) -> bool:
+        max_line_length = self._max_line_length
+        return max_line_length is not None and line_length > max_line_length
+
+    def _read_raw_blocks(
+            self, file, offset: int = 0
+    ) -> Generator[Tuple[int, bytes], None, None]:
+        parts: List[bytes] = []
+        part_size = 0
+        while block := file.read(READ_BLOCK_SIZE):
+            cut = block.rfind(self._line_separator) + 1
+            if not cut:
+                parts.append(block)
+                part_size += len(block)
+                # Binary data is not split into lines by its consumers.
+                if not self._is_long(part_size):
+                    continue
+                cut = len(block)
+            else:
+                parts.append(block[:cut])
+            data = b"".join(parts)
+            yield offset, data
+            offset += len(data)
+            parts = [block[cut:]]
+            part_size = len(parts[0])
+        if data := b"".join(parts):
+            yield offset, data
 
-    def _read_as_binary(self, file) -> Generator[bytes, None, None]:
+    def _read_as_binary(
+            self, file, offset: int = 0
+    ) -> Generator[Tuple[int, bytes], None, None]:
         self._notify_before_file_traverse(InputType.BINARY)
         while chunk := file.read(1024):
-            yield chunk
+            yield offset, chunk
+            offset += len(chunk)
 
     def _notify_before_file_traverse(self, file_type: InputType) -> None:
         if self._before_file_traverse:
-            self._before_file_traverse(file_type)
\ No newline at end of file
+            self._before_file_traverse(file_type)
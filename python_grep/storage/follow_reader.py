@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Generator, Optional, Tuple
+
+from python_grep.storage.base import DEFAULT_ENCODING, InputType
+from python_grep.storage.file_reader import (
+    NEWLINE,
+    READ_BLOCK_SIZE,
+    FileReader,
+)
+
+
+@dataclass
+class FollowedFile:
+    file: BinaryIO
+    inode: int
+    position: int
+    pending: bytes = b""
+    newline_count: Optional[int] = 0
+    newline_count_offset: int = 0
+
+
+class FollowFileReader(FileReader):
+    """
+    A file reader which keeps files open after reaching their end.
+
+    Every read of a path yields only the complete lines appended since
+    the previous read of it. A file is considered rotated when the inode
+    behind its path changes, in which case the rest of the old file is
+    read and the new file is followed from the next read on. A path read
+    for the first time which a followed or rotated file was renamed to,
+    e.g. as paths are resolved again, continues that file where it was
+    left instead of reading it again. A file shrinking below the read
+    position is considered truncated and is read again from the start.
+    Undecodable bytes are replaced, so a followed file is never switched
+    to binary mode.
+
+    :param str encoding: The encoding to use for reading text files.
+    :param int start_offset: Byte offset to start reading each file from
+     when it is read for the first time.
+    :param bytes line_separator: The single byte separating lines.
+    """
+
+    def __init__(
+        self,
+        encoding: str = DEFAULT_ENCODING,
+        start_offset: int = 0,
+        line_separator: bytes = NEWLINE,
+    ) -> None:
+        super().__init__(encoding, start_offset, line_separator)
+        self._followed_files: Dict[Path, FollowedFile] = {}
+        self._paths_by_inode: Dict[int, Path] = {}
+        # Files read to the end after their paths were rotated, closed
+        # until they are found under another path, keyed on inodes.
+        self._rotated_files: Dict[int, FollowedFile] = {}
+
+    def read_lines_with_offsets(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, str], None, None]:
+        followed_file = self._followed_files.get(path)
+        if followed_file is None:
+            followed_file = self._find_renamed_file(path) or self._open(
+                path,
+                self._start_offset if start_offset is None else start_offset,
+            )
+        self._notify_before_file_traverse(InputType.TEXT)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+
+        if stat and stat.st_ino != followed_file.inode:
+            yield from self._read_appended_lines(followed_file, final=True)
+            followed_file.file.close()
+            self._rotated_files[followed_file.inode] = followed_file
+            self._paths_by_inode.pop(followed_file.inode, None)
+            self._open(path)
+            return
+        if os.fstat(followed_file.file.fileno()).st_size < (
+            followed_file.position
+        ):
+            followed_file.file.seek(0)
+            followed_file.position = 0
+            followed_file.pending = b""
+            followed_file.newline_count = 0
+            followed_file.newline_count_offset = 0
+        yield from self._read_appended_lines(followed_file)
+
+    def count_newlines(self, path: Path, end_offset: int) -> int:
+        followed_file = self._followed_files.get(path)
+        if followed_file and end_offset == followed_file.newline_count_offset:
+            if followed_file.newline_count is None:
+                followed_file.newline_count = super().count_newlines(
+                    path, end_offset
+                )
+            return followed_file.newline_count
+        return super().count_newlines(path, end_offset)
+
+    def close(self) -> None:
+        """Close all followed files."""
+
+        for followed_file in self._followed_files.values():
+            followed_file.file.close()
+        self._followed_files.clear()
+        self._paths_by_inode.clear()
+        self._rotated_files.clear()
+
+    def _open(self, path: Path, start_offset: int = 0) -> FollowedFile:
+        file = path.open("rb")
+        offset = self._seek_to_line_start(file, start_offset)
+        followed_file = FollowedFile(
+            file=file,
+            inode=os.fstat(file.fileno()).st_ino,
+            position=offset,
+            newline_count=0 if offset == 0 else None,
+            newline_count_offset=offset,
+        )
+        self._followed_files[path] = followed_file
+        self._paths_by_inode[followed_file.inode] = path
+        return followed_file
+
+    def _find_renamed_file(self, path: Path) -> Optional[FollowedFile]:
+        inode = self._get_inode(path)
+        if inode is None:
+            return None
+        if (followed_file := self._rotated_files.pop(inode, None)) is not None:
+            followed_file.file = path.open("rb")
+            followed_file.file.seek(followed_file.position)
+        else:
+            # A followed file is taken over only once it is gone from its
+            # old path, as hard links share inodes.
+            old_path = self._paths_by_inode.get(inode)
+            if old_path is None or self._get_inode(old_path) == inode:
+                return None
+            followed_file = self._followed_files.pop(old_path)
+        self._followed_files[path] = followed_file
+        self._paths_by_inode[inode] = path
+        return followed_file
+
+    @staticmethod
+    def _get_inode(path: Path) -> Optional[int]:
+        try:
+            return os.stat(path).st_ino
+        except OSError:
+            return None
+
+    def _read_appended_lines(
+        self, followed_file: FollowedFile, final: bool = False
+    ) -> Generator[Tuple[int, str], None, None]:
+        while chunk := followed_file.file.read(READ_BLOCK_SIZE):
+            followed_file.position += len(chunk)
+            *raw_lines, followed_file.pending = (
+                followed_file.pending + chunk
+            ).split(self._line_separator)
+            for raw_line in raw_lines:
+                yield from self._yield_line(followed_file, raw_line)
+        if final and followed_file.pending:
+            raw_line, followed_file.pending = followed_file.pending, b""
+            yield from self._yield_line(followed_file, raw_line)
+
+    def _yield_line(
+        self, followed_file: FollowedFile, raw_line: bytes
+    ) -> Generator[Tuple[int, str], None, None]:
+        offset = followed_file.newline_count_offset
+        yield offset, raw_line.decode(self._encoding, "replace")
+        followed_file.newline_count_offset = offset + len(raw_line) + 1
+        if followed_file.newline_count is not None:
+            followed_file.newline_count += 1
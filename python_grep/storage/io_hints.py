@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import BinaryIO, Callable, Generator, Optional, Tuple, Union
+
+from python_grep.storage.base import IPathResolver
+
+# Bytes of a file read ahead when it is opened or queued next, after
+# which sequential readahead keeps up with the scan.
+PREFETCH_SIZE = 4 * 1024 * 1024
+# Size of files below which they are not prefetched, the default
+# readahead window, which reading a smaller file takes in one request
+# anyway.
+MIN_PREFETCH_SIZE = 128 * 1024
+# posix_fadvise is missing on e.g. macOS and Windows, where hints are
+# skipped.
+HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+def advise_sequential(
+    file: Union[BinaryIO, int], offset: int = 0, length: int = 0
+) -> None:
+    """
+    Tell the kernel a file is about to be read sequentially from
+    an offset, so it reads ahead more aggressively and starts reading
+    right away.
+
+    :param Union[BinaryIO, int] file: The opened file or its descriptor.
+    :param int offset: The byte offset reading starts at.
+    :param int length: The number of bytes to be read, 0 reaching the end
+     of the file.
+    """
+
+    if HAS_FADVISE:
+        fd = _get_fd(file)
+        _advise(fd, offset, length, os.POSIX_FADV_SEQUENTIAL)
+        _advise(
+            fd,
+            offset,
+            min(length, PREFETCH_SIZE) if length else PREFETCH_SIZE,
+            os.POSIX_FADV_WILLNEED,
+        )
+
+
+def advise_dont_need(
+    file: Union[BinaryIO, int], offset: int = 0, length: int = 0
+) -> None:
+    """
+    Tell the kernel a part of a file is not going to be read again, so
+    its clean pages are dropped from the page cache instead of evicting
+    pages other processes rely on. Pages cached before it was read are
+    dropped too.
+
+    :param Union[BinaryIO, int] file: The opened file or its descriptor.
+    :param int offset: The byte offset the part starts at.
+    :param int length: The length of the part, 0 reaching the end
+     of the file.
+    """
+
+    if HAS_FADVISE:
+        _advise(_get_fd(file), offset, length, os.POSIX_FADV_DONTNEED)
+
+
+def prefetch(path: Path) -> None:
+    """
+    Start reading the beginning of a file into the page cache in
+    the background, without waiting for it.
+
+    :param Path path: The path to the file.
+    """
+
+    if not HAS_FADVISE:
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    except OSError:
+        return
+    try:
+        _advise(fd, 0, PREFETCH_SIZE, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def _get_fd(file: Union[BinaryIO, int]) -> int:
+    return file if isinstance(file, int) else file.fileno()
+
+
+def _advise(fd: int, offset: int, length: int, advice: int) -> None:
+    # Hints are best effort, e.g. pipes reject them.
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except OSError:
+        pass
+
+
+class PrefetchingPathResolver(IPathResolver):
+    """
+    Decorates a path resolver to prefetch the file following the one
+    being searched, so its first blocks are read from disk while
+    the current file is matched.
+
+    Only files of at least a minimum size are prefetched, judged by stat
+    data the decorated resolver took, if any, so small files cost a stat
+    call at most instead of opening them.
+
+    :param IPathResolver path_resolver: The decorated path resolver.
+    :param int min_size: The minimum size of prefetched files in bytes.
+    :param Optional[Callable[[Path], bool]] needs_reading: Function telling
+     whether a file is going to be read, e.g. as it is not answered from
+     the result cache, asked only about files large enough to prefetch.
+    """
+
+    def __init__(
+        self,
+        path_resolver: IPathResolver,
+        min_size: int = MIN_PREFETCH_SIZE,
+        needs_reading: Optional[Callable[[Path], bool]] = None,
+    ) -> None:
+        self._path_resolver = path_resolver
+        self._min_size = min_size
+        self._needs_reading = needs_reading
+
+    def get_resolved_file_paths(self) -> Generator[Path, None, None]:
+        for path, _ in self.get_resolved_files_with_stats():
+            yield path
+
+    def get_resolved_files_with_stats(
+        self,
+    ) -> Generator[Tuple[Path, Optional[os.stat_result]], None, None]:
+        files = self._path_resolver.get_resolved_files_with_stats()
+        if (current_file := next(files, None)) is None:
+            return
+        for next_file in files:
+            self._prefetch(*next_file)
+            yield current_file
+            current_file = next_file
+        yield current_file
+
+    def _prefetch(self, path: Path, stat: Optional[os.stat_result]) -> None:
+        if not HAS_FADVISE:
+            return
+        if stat is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return
+        if stat.st_size < self._min_size:
+            return
+        if self._needs_reading is None or self._needs_reading(path):
+            prefetch(path)
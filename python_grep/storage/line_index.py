@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Generator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from python_grep.storage.base import IFileReader, InputType
+from python_grep.storage.file_reader import NEWLINE, READ_BLOCK_SIZE
+
+DEFAULT_STRIDE = 64 * 1024
+INDEX_FORMAT = "python_grep-line-index-1"
+
+
+class LineIndex:
+    """
+    Counts of line separators preceding every stride-th byte of a file.
+
+    Counting the lines before a byte offset or locating the start
+    of a line then reads a single stride of the file instead of all
+    of it up to the offset. The index is built lazily, only as far into
+    the file as lookups reach, and each stride is counted with
+    ``bytes.count``, so building it costs no more than counting lines
+    once. It takes 8 bytes per stride.
+
+    :param Path path: The path to the indexed file.
+    :param bytes line_separator: The single byte separating lines.
+    :param int stride: Distance in bytes between indexed offsets.
+    :param Optional[array] newline_counts: Counts of separators preceding
+     offsets 0, stride, 2 * stride..., e.g. loaded from a sidecar file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        line_separator: bytes = NEWLINE,
+        stride: int = DEFAULT_STRIDE,
+        newline_counts: Optional[array[int]] = None,
+    ) -> None:
+        self._path = path
+        self._line_separator = line_separator
+        self._stride = stride
+        self._newline_counts = (
+            array("Q", [0]) if newline_counts is None else newline_counts
+        )
+
+    @property
+    def newline_counts(self) -> array[int]:
+        return self._newline_counts
+
+    def count_newlines(self, end_offset: int) -> int:
+        """
+        Count line separators in the file up to a given byte offset.
+
+        :param int end_offset: The byte offset to stop counting at.
+        :return: Number of separators found before the offset.
+        :rtype: int
+        """
+
+        with self._path.open("rb") as file:
+            self._extend(file, stride_count=end_offset // self._stride)
+            stride_index = min(
+                end_offset // self._stride, len(self._newline_counts) - 1
+            )
+            start = stride_index * self._stride
+            file.seek(start)
+            tail = file.read(min(end_offset - start, self._stride))
+        return self._newline_counts[stride_index] + tail.count(
+            self._line_separator
+        )
+
+    def find_line_start(self, line_number: int) -> Optional[int]:
+        """
+        Find the byte offset a line of the file starts at.
+
+        :param int line_number: The number of the line, starting at 1.
+        :return: The byte offset or None if the file has fewer lines.
+        :rtype: Optional[int]
+        """
+
+        preceding_count = line_number - 1
+        if preceding_count <= 0:
+            return 0
+        with self._path.open("rb") as file:
+            self._extend(file, newline_count=preceding_count)
+            # The separator ending the preceding line lies in the stride
+            # before the first offset preceded by enough separators,
+            # or past the last indexed offset.
+            stride_index = (
+                bisect_left(self._newline_counts, preceding_count) - 1
+            )
+            start = stride_index * self._stride
+            file.seek(start)
+            stride = file.read(self._stride)
+            remaining_count = (
+                preceding_count - self._newline_counts[stride_index]
+            )
+            parts = stride.split(self._line_separator, remaining_count)
+            if len(parts) <= remaining_count:
+                return None
+            offset = start + len(stride) - len(parts[-1])
+            if not parts[-1] and not file.read(1):
+                return None
+        return offset
+
+    def _extend(
+        self, file: BinaryIO, stride_count: int = 0, newline_count: int = 0
+    ) -> None:
+        newline_counts = self._newline_counts
+        if (
+            len(newline_counts) > stride_count
+            and newline_counts[-1] >= newline_count
+        ):
+            return
+        read_size = max(READ_BLOCK_SIZE // self._stride, 1) * self._stride
+        file.seek((len(newline_counts) - 1) * self._stride)
+        while (
+            len(newline_counts) <= stride_count
+            or newline_counts[-1] < newline_count
+        ):
+            block = file.read(read_size)
+            for start in range(0, len(block) - self._stride + 1, self._stride):
+                newline_counts.append(
+                    newline_counts[-1]
+                    + block.count(
+                        self._line_separator, start, start + self._stride
+                    )
+                )
+            if len(block) < read_size:
+                break
+
+
+class LineIndexStore:
+    """
+    Line indexes of files kept as sidecar files in a directory.
+
+    A sidecar is named after the path of its file and records
+    the fingerprint of the file it was built for, so it is rebuilt once
+    the file changes. Indexes extended by lookups are written back.
+    Failing to read or write a sidecar only costs rebuilding the index.
+
+    :param Path index_dir: The directory holding the sidecar files.
+    :param Callable[[Path], str] create_fingerprint: A function creating
+     fingerprints of files.
+    :param bytes line_separator: The single byte separating lines.
+    :param int stride: Distance in bytes between indexed offsets.
+    """
+
+    def __init__(
+        self,
+        index_dir: Path,
+        create_fingerprint: Callable[[Path], str],
+        line_separator: bytes = NEWLINE,
+        stride: int = DEFAULT_STRIDE,
+    ) -> None:
+        self._index_dir = index_dir
+        self._create_fingerprint = create_fingerprint
+        self._line_separator = line_separator
+        self._stride = stride
+        self._indexes: Dict[Path, Tuple[LineIndex, str, int]] = {}
+
+    def get(self, path: Path) -> LineIndex:
+        """
+        Get the index of a file, loading it from its sidecar if valid.
+
+        :param Path path: The path to the file.
+        :return: The line index.
+        :rtype: LineIndex
+        """
+
+        try:
+            fingerprint = self._create_fingerprint(path)
+        except OSError:
+            return LineIndex(path, self._line_separator, self._stride)
+        if (entry := self._indexes.get(path)) and entry[1] == fingerprint:
+            return entry[0]
+        newline_counts = self._load(path, fingerprint)
+        line_index = LineIndex(
+            path, self._line_separator, self._stride, newline_counts
+        )
+        self._indexes[path] = (
+            line_index,
+            fingerprint,
+            len(line_index.newline_counts),
+        )
+        return line_index
+
+    def save(self, path: Path) -> None:
+        """
+        Write the index of a file to its sidecar, if it was extended.
+
+        :param Path path: The path to the file.
+        """
+
+        if not (entry := self._indexes.get(path)):
+            return
+        line_index, fingerprint, saved_length = entry
+        if len(line_index.newline_counts) == saved_length:
+            return
+        sidecar_path = self._get_sidecar_path(path)
+        temporary_path = sidecar_path.with_name(sidecar_path.name + ".tmp")
+        try:
+            self._index_dir.mkdir(parents=True, exist_ok=True)
+            with temporary_path.open("wb") as file:
+                file.write(self._create_header(fingerprint))
+                line_index.newline_counts.tofile(file)
+            os.replace(temporary_path, sidecar_path)
+        except OSError:
+            return
+        self._indexes[path] = (
+            line_index,
+            fingerprint,
+            len(line_index.newline_counts),
+        )
+
+    def _load(self, path: Path, fingerprint: str) -> Optional[array[int]]:
+        try:
+            with self._get_sidecar_path(path).open("rb") as file:
+                if file.readline() != self._create_header(fingerprint):
+                    return None
+                newline_counts = array("Q")
+                newline_counts.frombytes(file.read())
+        except (OSError, ValueError):
+            return None
+        return newline_counts if newline_counts else None
+
+    def _get_sidecar_path(self, path: Path) -> Path:
+        key = hashlib.sha256(
+            os.fsencode(os.path.abspath(path)) + self._line_separator
+        ).hexdigest()
+        return self._index_dir / f"{key}.idx"
+
+    def _create_header(self, fingerprint: str) -> bytes:
+        return f"{INDEX_FORMAT} {self._stride} {fingerprint}\n".encode()
+
+
+class IndexedFileReader(IFileReader):
+    """
+    Decorates a file reader to count lines and locate them with line
+    indexes, so line numbers of lines read from inside a file, e.g.
+    of ranges scanned in parallel or of a resumed scan, are not counted
+    from its start over and over again.
+
+    :param IFileReader file_reader: The decorated file reader.
+    :param LineIndexStore line_index_store: The store of line indexes.
+    """
+
+    def __init__(
+        self, file_reader: IFileReader, line_index_store: LineIndexStore
+    ) -> None:
+        self._file_reader = file_reader
+        self._line_index_store = line_index_store
+
+    def read_lines(
+        self, path: Path
+    ) -> Generator[Union[str, bytes], None, None]:
+        yield from self._file_reader.read_lines(path)
+
+    def read_lines_with_offsets(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        yield from self._file_reader.read_lines_with_offsets(
+            path, start_offset
+        )
+
+    def read_blocks(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        yield from self._file_reader.read_blocks(path, start_offset)
+
+    def count_newlines(self, path: Path, end_offset: int) -> int:
+        newline_count = self._line_index_store.get(path).count_newlines(
+            end_offset
+        )
+        self._line_index_store.save(path)
+        return newline_count
+
+    def find_line_offset(self, path: Path, line_number: int) -> Optional[int]:
+        offset = self._line_index_store.get(path).find_line_start(line_number)
+        self._line_index_store.save(path)
+        return offset
+
+    def before_file_traverse_hook(
+        self, callback: Callable[[InputType], None]
+    ) -> None:
+        self._file_reader.before_file_traverse_hook(callback)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+from python_grep.storage.base import IFileReader
+from python_grep.storage.file_reader import NEWLINE
+from python_grep.storage.range_reader import Bounds, RangeFileReaderTemplate
+
+
+class LineRangeFileReader(RangeFileReaderTemplate):
+    """
+    Decorates a file reader to read only a range of lines of each file.
+
+    The first line of the range is located with the decorated reader,
+    which seeks directly to it when it keeps line indexes. The lines
+    preceding the range are known, so numbering read lines does not
+    count them again.
+
+    :param IFileReader file_reader: The decorated file reader.
+    :param int first_line: The number of the first line to read.
+    :param Optional[int] last_line: The number of the last line to read
+     or None to read up to the end of each file.
+    :param bytes line_separator: The single byte separating lines.
+    """
+
+    def __init__(
+        self,
+        file_reader: IFileReader,
+        first_line: int = 1,
+        last_line: Optional[int] = None,
+        line_separator: bytes = NEWLINE,
+    ) -> None:
+        super().__init__(file_reader, line_separator)
+        self._first_line = first_line
+        self._last_line = last_line
+        self._range_start: Optional[Tuple[Path, int]] = None
+
+    def count_newlines(self, path: Path, end_offset: int) -> int:
+        if self._range_start == (path, end_offset):
+            return self._first_line - 1
+        return self._file_reader.count_newlines(path, end_offset)
+
+    def _get_bounds(
+        self, path: Path, start_offset: Optional[int]
+    ) -> Optional[Bounds]:
+        range_start = self._file_reader.find_line_offset(
+            path, self._first_line
+        )
+        if range_start is None:
+            return None
+        self._range_start = (path, range_start)
+        if start_offset is None or start_offset <= range_start:
+            start_offset, first_line = range_start, self._first_line
+        else:
+            first_line = 1 + self._file_reader.count_newlines(
+                path, start_offset
+            )
+        if self._last_line is None:
+            return start_offset, None
+        if first_line > self._last_line:
+            return None
+        return start_offset, self._last_line - first_line + 1
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import codecs
+from typing import BinaryIO, Generator, Optional, Tuple
+
+from python_grep.storage.base import DEFAULT_ENCODING
+
+DEFAULT_MAX_LINE_LENGTH = 16 * 1024 * 1024
+DEFAULT_WINDOW_OVERLAP = 4 * 1024
+SKIP_READ_SIZE = 1024 * 1024
+
+
+class LineWindowReader:
+    """
+    Reads a line too long to be held in memory in windows.
+
+    Every window holds up to window_size bytes of the line, decoded,
+    the last overlap characters of a window being repeated at the start
+    of the next one, so matches shorter than the overlap are found whole
+    in one of them. Undecodable bytes are replaced.
+
+    :param BinaryIO file: The file, positioned behind the data already
+     read from it.
+    :param bytes data: Data read from the file but not consumed yet,
+     starting with the line.
+    :param bytes line_separator: The single byte separating lines.
+    :param int window_size: The number of bytes of the line per window.
+    :param int overlap: The number of characters windows overlap by,
+     at most half of a window.
+    :param str encoding: The encoding of the line.
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        data: bytes,
+        line_separator: bytes,
+        window_size: int = DEFAULT_MAX_LINE_LENGTH,
+        overlap: int = DEFAULT_WINDOW_OVERLAP,
+        encoding: str = DEFAULT_ENCODING,
+    ) -> None:
+        self._file = file
+        self._data = data
+        self._line_separator = line_separator
+        self._overlap = min(overlap, window_size // 2)
+        self._read_size = window_size - self._overlap
+        self._decoder = codecs.getincrementaldecoder(encoding)("replace")
+        self._window_tail = ""
+        self._length = 0
+        self._is_complete = False
+        self._has_separator = False
+
+    @property
+    def overlap(self) -> int:
+        return self._overlap
+
+    @property
+    def is_complete(self) -> bool:
+        return self._is_complete
+
+    def read_window(self) -> Optional[str]:
+        """
+        Read the next window of the line.
+
+        :return: The window or None if the whole line was read.
+        :rtype: Optional[str]
+        """
+
+        if self._is_complete:
+            return None
+        window = self._window_tail + self._decoder.decode(
+            self._read(self._read_size), final=self._is_complete
+        )
+        self._window_tail = window[len(window) - self._overlap :]
+        return window
+
+    def finish(self) -> Tuple[int, bool, bytes]:
+        """
+        Skip the rest of the line.
+
+        :return: The length of the line in bytes, whether it is terminated
+         by a separator and the data read behind it.
+        :rtype: Tuple[int, bool, bytes]
+        """
+
+        while not self._is_complete:
+            self._read(SKIP_READ_SIZE)
+        return self._length, self._has_separator, self._data
+
+    def _read(self, size: int) -> bytes:
+        data = self._data
+        if len(data) < size:
+            data += self._file.read(size - len(data))
+        if (end := data.find(self._line_separator, 0, size)) >= 0:
+            self._is_complete = self._has_separator = True
+            self._data = data[end + 1 :]
+        elif len(data) < size:
+            end = len(data)
+            self._is_complete = True
+            self._data = b""
+        else:
+            end = size
+            self._data = data[size:]
+        self._length += end
+        return data[:end]
+
+
+class LongLine(str):
+    """
+    The first window of a line longer than the maximum line length,
+    yielded by file readers in place of the line.
+
+    Consumers unaware of long lines see the line truncated to its first
+    window, while others can iterate over all of its windows once, before
+    the reader moves on to the next line.
+
+    :param LineWindowReader window_reader: The reader of the windows
+     of the line, none of them read yet.
+    """
+
+    _window_reader: LineWindowReader
+
+    def __new__(cls, window_reader: LineWindowReader) -> LongLine:
+        long_line = super().__new__(cls, window_reader.read_window() or "")
+        long_line._window_reader = window_reader
+        return long_line
+
+    @property
+    def overlap(self) -> int:
+        return self._window_reader.overlap
+
+    def iter_windows(self) -> Generator[Tuple[str, bool], None, None]:
+        """
+        Iterate over windows of the line.
+
+        :return: A generator yielding (window, whether it is the last one)
+         tuples.
+        :rtype: Generator[Tuple[str, bool], None, None]
+        """
+
+        window_reader = self._window_reader
+        window: Optional[str] = str(self)
+        while window is not None:
+            yield window, window_reader.is_complete
+            window = window_reader.read_window()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import (
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from python_grep.storage.base import IPathFilter, IPathResolver
+
+# Extensions of files selected by --type, keyed on type names.
+FILE_TYPES: Dict[str, FrozenSet[str]] = {
+    "c": frozenset({".c", ".h"}),
+    "cpp": frozenset({".cc", ".cpp", ".cxx", ".h", ".hh", ".hpp", ".hxx"}),
+    "css": frozenset({".css", ".less", ".sass", ".scss"}),
+    "csv": frozenset({".csv", ".tsv"}),
+    "go": frozenset({".go"}),
+    "html": frozenset({".htm", ".html", ".xhtml"}),
+    "java": frozenset({".java"}),
+    "js": frozenset({".cjs", ".js", ".jsx", ".mjs"}),
+    "json": frozenset({".json", ".jsonl", ".ndjson"}),
+    "log": frozenset({".log"}),
+    "md": frozenset({".markdown", ".md"}),
+    "py": frozenset({".py", ".pyi"}),
+    "rust": frozenset({".rs"}),
+    "sh": frozenset({".bash", ".sh", ".zsh"}),
+    "sql": frozenset({".sql"}),
+    "toml": frozenset({".toml"}),
+    "ts": frozenset({".ts", ".tsx"}),
+    "txt": frozenset({".rst", ".txt"}),
+    "xml": frozenset({".xml", ".xsd", ".xsl"}),
+    "yaml": frozenset({".yaml", ".yml"}),
+}
+
+# Extensions of files known to be binary, which are skipped without
+# opening them to detect their type.
+KNOWN_BINARY_EXTENSIONS: FrozenSet[str] = frozenset(
+    (
+        # Archives and compressed files.
+        ".7z .bz2 .gz .jar .lz4 .rar .tar .tgz .whl .xz .zip .zst "
+        # Compiled code and libraries.
+        ".a .class .dll .dylib .exe .o .obj .pyc .pyo .so .wasm "
+        # Images, audio and video.
+        ".bmp .gif .ico .jpeg .jpg .mkv .mov .mp3 .mp4 .ogg .png .tif "
+        ".tiff .wav .webm .webp "
+        # Documents, fonts and databases.
+        ".db .docx .otf .pdf .sqlite .ttf .woff .woff2 .xlsx"
+    ).split()
+)
+
+
+class ExtensionFilter(IPathFilter):
+    """
+    Selects files by their extensions, compared case-insensitively.
+
+    :param Iterable[str] extensions: Extensions including the leading dot.
+    :param bool exclude: Flag indicating whether files with the extensions
+     are skipped instead of selected (default is False).
+    """
+
+    def __init__(
+        self, extensions: Iterable[str], exclude: bool = False
+    ) -> None:
+        self._extensions = frozenset(
+            extension.lower() for extension in extensions
+        )
+        self._exclude = exclude
+
+    @property
+    def requires_stat(self) -> bool:
+        return False
+
+    def accepts(self, path: Path, stat: Optional[os.stat_result]) -> bool:
+        return (path.suffix.lower() in self._extensions) != self._exclude
+
+
+class FileSizeFilter(IPathFilter):
+    """
+    Selects files not larger than a size.
+
+    :param int max_size: The maximum size of files in bytes.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+
+    @property
+    def requires_stat(self) -> bool:
+        return True
+
+    def accepts(self, path: Path, stat: Optional[os.stat_result]) -> bool:
+        return stat is None or stat.st_size <= self._max_size
+
+
+class ModificationTimeFilter(IPathFilter):
+    """
+    Selects files modified within a time window.
+
+    :param Optional[float] newer_than: The timestamp files must have been
+     modified after, or None.
+    :param Optional[float] older_than: The timestamp files must have been
+     modified before, or None.
+    """
+
+    def __init__(
+        self,
+        newer_than: Optional[float] = None,
+        older_than: Optional[float] = None,
+    ) -> None:
+        self._newer_than = newer_than
+        self._older_than = older_than
+
+    @property
+    def requires_stat(self) -> bool:
+        return True
+
+    def accepts(self, path: Path, stat: Optional[os.stat_result]) -> bool:
+        if stat is None:
+            return True
+        if self._newer_than is not None and stat.st_mtime <= self._newer_than:
+            return False
+        if self._older_than is not None and stat.st_mtime >= self._older_than:
+            return False
+        return True
+
+
+class FilteringPathResolver(IPathResolver):
+    """
+    Decorates a path resolver to yield only files accepted by filters.
+
+    Filters judging files by their paths run first, so files they skip
+    are not even stat-ed, and each remaining file is stat-ed once for all
+    of the other filters. No file is opened. Files which cannot be stat-ed
+    are yielded, so searching them reports the error. Stat data taken is
+    yielded along with the paths, so it is not taken again.
+
+    :param IPathResolver path_resolver: The decorated path resolver.
+    :param List[IPathFilter] path_filters: The filters, all of which must
+     accept a file.
+    """
+
+    def __init__(
+        self, path_resolver: IPathResolver, path_filters: List[IPathFilter]
+    ) -> None:
+        self._path_resolver = path_resolver
+        self._path_filters = [
+            path_filter
+            for path_filter in path_filters
+            if not path_filter.requires_stat
+        ]
+        self._stat_filters = [
+            path_filter
+            for path_filter in path_filters
+            if path_filter.requires_stat
+        ]
+
+    def get_resolved_file_paths(self) -> Generator[Path, None, None]:
+        for path, _ in self.get_resolved_files_with_stats():
+            yield path
+
+    def get_resolved_files_with_stats(
+        self,
+    ) -> Generator[Tuple[Path, Optional[os.stat_result]], None, None]:
+        for path in self._path_resolver.get_resolved_file_paths():
+            if not all(
+                path_filter.accepts(path, None)
+                for path_filter in self._path_filters
+            ):
+                continue
+            stat = None
+            if self._stat_filters:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    yield path, None
+                    continue
+                if not all(
+                    path_filter.accepts(path, stat)
+                    for path_filter in self._stat_filters
+                ):
+                    continue
+            yield path, stat
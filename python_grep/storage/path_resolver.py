@@ -1,19 +1,28 @@
+from __future__ import annotations
+
 import os
 from pathlib import Path
-from typing import Generator, List
+from typing import TYPE_CHECKING, Generator, List, Optional, Set
 
 from python_grep.storage.base import IPathResolver
 
+if TYPE_CHECKING:
+    from python_grep.storage.directory_cache import DirectoryCache
+
 
 class PathResolver(IPathResolver):
     """
-    A path resolver implementation.
+    A path resolver implementation. Directories given to a search which
+    is not recursive are reported once, however many times paths are
+    resolved.
 
     :param List[str] file_paths: A list of file path patterns.
     :param bool include_hidden: Flag indicating whether to include
      hidden files (default is True).
     :param bool recursive: Flag indicating whether to recursively
      search for files in directories (default is False).
+    :param Optional[DirectoryCache] directory_cache: An optional cache
+     of directory listings used when searching recursively.
     """
 
     def __init__(
@@ -21,10 +30,13 @@ class PathResolver(IPathResolver):
         file_paths: List[str],
         recursive: bool = False,
         include_hidden: bool = True,
+        directory_cache: Optional[DirectoryCache] = None,
     ) -> None:
         self._file_paths = file_paths
         self._recursive = recursive
         self._include_hidden = include_hidden
+        self._directory_cache = directory_cache
+        self._reported_dirs: Set[Path] = set()
 
     def get_resolved_file_paths(self) -> Generator[Path, None, None]:
         for path_str in self._file_paths:
@@ -42,9 +54,12 @@ class PathResolver(IPathResolver):
         if resolved_path.name.startswith(".") and not self._include_hidden:
             return
         elif resolved_path.is_dir():
-            if self._recursive:
+            if self._recursive and self._directory_cache:
+                yield from self._directory_cache.walk(resolved_path)
+            elif self._recursive:
                 yield from self._get_paths_from_dirs_recursively(resolved_path)
-            else:
+            elif resolved_path not in self._reported_dirs:
+                self._reported_dirs.add(resolved_path)
                 print(f"grep: {resolved_path.name} is a directory")
         else:
             yield resolved_path
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+from pathlib import Path
+from typing import AnyStr, Callable, Generator, Optional, Tuple, Union
+
+from python_grep.storage.base import IFileReader, InputType
+from python_grep.storage.file_reader import NEWLINE
+from python_grep.storage.line_window import LongLine
+
+# The offset to start reading a file at and the number of lines to read
+# from it, None meaning all of them.
+Bounds = Tuple[int, Optional[int]]
+
+
+def cut_lines(
+    data: AnyStr, separator: AnyStr, line_count: int
+) -> Tuple[AnyStr, int]:
+    """
+    Cut data behind a number of lines.
+
+    :param AnyStr data: Data consisting of lines with their separators.
+    :param AnyStr separator: The line separator.
+    :param int line_count: The number of lines to keep.
+    :return: The kept data and the number of lines still to be read
+     after it.
+    :rtype: Tuple[AnyStr, int]
+    """
+
+    separator_count = data.count(separator)
+    if separator_count < line_count:
+        return data, line_count - separator_count
+    rest = data.split(separator, line_count)[-1]
+    return data[: len(data) - len(rest)], 0
+
+
+class RangeFileReaderTemplate(IFileReader):
+    """
+    A template for file reader decorators reading only a range of lines
+    of each file.
+
+    Subclasses locate the range. Reading starts right at its first line
+    and stops after its last line, read blocks being cut behind it.
+
+    :param IFileReader file_reader: The decorated file reader.
+    :param bytes line_separator: The single byte separating lines.
+    """
+
+    def __init__(
+        self, file_reader: IFileReader, line_separator: bytes = NEWLINE
+    ) -> None:
+        self._file_reader = file_reader
+        self._line_separator = line_separator
+
+    def read_lines(
+        self, path: Path
+    ) -> Generator[Union[str, bytes], None, None]:
+        for _, line in self.read_lines_with_offsets(path):
+            yield line
+
+    def read_lines_with_offsets(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        if (bounds := self._get_bounds(path, start_offset)) is None:
+            return
+        start_offset, line_count = bounds
+        for offset, line in self._file_reader.read_lines_with_offsets(
+            path, start_offset
+        ):
+            if line_count is None:
+                yield offset, line
+                continue
+            if isinstance(line, bytes):
+                # Chunks of binary files are not split into lines.
+                line, line_count = self._cut(line, line_count)
+            else:
+                line_count -= 1
+            yield offset, line
+            if not line_count:
+                return
+
+    def read_blocks(
+        self, path: Path, start_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, Union[str, bytes]], None, None]:
+        if (bounds := self._get_bounds(path, start_offset)) is None:
+            return
+        start_offset, line_count = bounds
+        for offset, block in self._file_reader.read_blocks(path, start_offset):
+            if line_count is None:
+                yield offset, block
+                continue
+            if isinstance(block, LongLine):
+                # Stands in for a single line without its separator.
+                line_count -= 1
+            else:
+                block, line_count = self._cut(block, line_count)
+            yield offset, block
+            if not line_count:
+                return
+
+    def count_newlines(self, path: Path, end_offset: int) -> int:
+        return self._file_reader.count_newlines(path, end_offset)
+
+    def find_line_offset(self, path: Path, line_number: int) -> Optional[int]:
+        return self._file_reader.find_line_offset(path, line_number)
+
+    def before_file_traverse_hook(
+        self, callback: Callable[[InputType], None]
+    ) -> None:
+        self._file_reader.before_file_traverse_hook(callback)
+
+    @abstractmethod
+    def _get_bounds(
+        self, path: Path, start_offset: Optional[int]
+    ) -> Optional[Bounds]:
+        """
+        Get the offset to start reading a file at and the number of lines
+        to read from it.
+
+        :param Path path: The path to the file.
+        :param Optional[int] start_offset: An offset inside the range to
+         start reading at instead of its first line, e.g. when resuming.
+        :return: The offset and the number of lines, None meaning all
+         of them, or None if the file ends before the range.
+        :rtype: Optional[Bounds]
+        """
+        pass
+
+    def _cut(
+        self, data: Union[str, bytes], line_count: int
+    ) -> Tuple[Union[str, bytes], int]:
+        if isinstance(data, bytes):
+            return cut_lines(data, self._line_separator, line_count)
+        return cut_lines(data, self._line_separator.decode(), line_count)
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Callable, Generator, Optional, Tuple
+
+from python_grep.storage.base import DEFAULT_ENCODING, IFileReader
+from python_grep.storage.file_reader import NEWLINE
+from python_grep.storage.range_reader import Bounds, RangeFileReaderTemplate
+
+SCAN_THRESHOLD = 64 * 1024
+PROBE_READ_SIZE = 16 * 1024
+COUNT_READ_SIZE = 1024 * 1024
+# Renders every field of a format at its widest.
+SAMPLE_TIME = datetime(2000, 12, 28, 23, 59, 59, 999999)
+
+TimestampPredicate = Callable[[datetime], bool]
+
+
+class TimestampParser:
+    """
+    Parses timestamps starting lines of logs.
+
+    A timestamp is taken from the start of a line, as wide as the format
+    renders, so formats with fields of varying width, e.g. full month
+    names, are not supported.
+
+    :param str time_format: The ``strptime`` format of timestamps.
+    :param str encoding: The encoding of lines.
+    """
+
+    def __init__(
+        self, time_format: str, encoding: str = DEFAULT_ENCODING
+    ) -> None:
+        self._time_format = time_format
+        self._encoding = encoding
+        self._width = len(SAMPLE_TIME.strftime(time_format).encode(encoding))
+
+    def parse(self, value: str) -> datetime:
+        """
+        Parse a timestamp.
+
+        :param str value: The timestamp.
+        :return: The time.
+        :rtype: datetime
+        :raises ValueError: If the timestamp does not match the format.
+        """
+
+        return datetime.strptime(value, self._time_format)
+
+    def parse_line(self, line: bytes) -> Optional[datetime]:
+        """
+        Parse the timestamp starting a line.
+
+        :param bytes line: The line.
+        :return: The time or None if the line does not start with
+         a timestamp, e.g. a continuation of a multi-line log entry.
+        :rtype: Optional[datetime]
+        """
+
+        try:
+            return self.parse(line[: self._width].decode(self._encoding))
+        except ValueError:
+            return None
+
+
+class TimeRangeFileReader(RangeFileReaderTemplate):
+    """
+    Decorates a file reader to read only lines of each file logged within
+    a time range.
+
+    The range is located by binary search over byte offsets, parsing
+    the timestamp of the first line after each probed offset, so only
+    a few blocks are read outside of it. Lines are expected to be ordered
+    by time, while few lines out of order only shift the range by a line
+    or two. Lines without a timestamp belong to the entry preceding them.
+
+    :param IFileReader file_reader: The decorated file reader.
+    :param TimestampParser timestamp_parser: The parser of timestamps.
+    :param Optional[datetime] since: The earliest time of read lines.
+    :param Optional[datetime] until: The latest time of read lines.
+    :param bytes line_separator: The single byte separating lines.
+    """
+
+    def __init__(
+        self,
+        file_reader: IFileReader,
+        timestamp_parser: TimestampParser,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        line_separator: bytes = NEWLINE,
+    ) -> None:
+        super().__init__(file_reader, line_separator)
+        self._timestamp_parser = timestamp_parser
+        self._since = since
+        self._until = until
+
+    def _get_bounds(
+        self, path: Path, start_offset: Optional[int]
+    ) -> Optional[Bounds]:
+        since, until = self._since, self._until
+        with path.open("rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            range_start = (
+                self._find_first(file, size, lambda time: time >= since)
+                if since is not None
+                else 0
+            )
+            range_end = (
+                self._find_first(file, size, lambda time: time > until)
+                if until is not None
+                else size
+            )
+            if start_offset is not None:
+                range_start = max(range_start, start_offset)
+            if range_start >= range_end:
+                return None
+            if range_end >= size:
+                return range_start, None
+            return range_start, self._count_lines(file, range_start, range_end)
+
+    def _find_first(
+        self, file: BinaryIO, size: int, predicate: TimestampPredicate
+    ) -> int:
+        """
+        Find the first line whose timestamp satisfies a predicate.
+
+        :param BinaryIO file: The file.
+        :param int size: The size of the file.
+        :param TimestampPredicate predicate: The predicate, expected to be
+         satisfied by all timestamps following the first one which does.
+        :return: The offset of the line or the size of the file if there
+         is none.
+        :rtype: int
+        """
+
+        # Lines starting before low do not satisfy the predicate. High
+        # narrows the search, while the line found by the final scan may
+        # start a little after it.
+        low, high = 0, size
+        while high - low > SCAN_THRESHOLD:
+            middle = (low + high) // 2
+            for offset, line in self._iter_lines(file, middle):
+                if offset >= high:
+                    high = middle
+                    break
+                if (
+                    timestamp := self._timestamp_parser.parse_line(line)
+                ) is None:
+                    continue
+                if predicate(timestamp):
+                    high = middle
+                else:
+                    low = offset + len(line) + 1
+                break
+            else:
+                high = middle
+
+        for offset, line in self._iter_lines(file, low):
+            timestamp = self._timestamp_parser.parse_line(line)
+            if timestamp is not None and predicate(timestamp):
+                return offset
+        return size
+
+    def _iter_lines(
+        self, file: BinaryIO, offset: int
+    ) -> Generator[Tuple[int, bytes], None, None]:
+        """
+        Iterate over lines starting at or after an offset.
+
+        :param BinaryIO file: The file.
+        :param int offset: The offset.
+        :return: A generator yielding (byte offset, line) tuples, lines
+         without their separators.
+        :rtype: Generator[Tuple[int, bytes], None, None]
+        """
+
+        # The line ending right before the offset is read to skip the one
+        # the offset falls into.
+        data_offset = max(offset - 1, 0)
+        skip_line = offset > 0
+        file.seek(data_offset)
+        pending = b""
+        while block := file.read(PROBE_READ_SIZE):
+            data = pending + block
+            line_start = 0
+            while (
+                line_end := data.find(self._line_separator, line_start)
+            ) >= 0:
+                if skip_line:
+                    skip_line = False
+                else:
+                    yield data_offset + line_start, data[line_start:line_end]
+                line_start = line_end + 1
+            data_offset += line_start
+            pending = data[line_start:]
+        if pending and not skip_line:
+            yield data_offset, pending
+
+    def _count_lines(self, file: BinaryIO, start: int, end: int) -> int:
+        file.seek(start)
+        line_count = 0
+        remaining = end - start
+        while remaining > 0 and (
+            block := file.read(min(remaining, COUNT_READ_SIZE))
+        ):
+            line_count += block.count(self._line_separator)
+            remaining -= len(block)
+        return line_count
@@ -6,9 +6,24 @@ import pytest
 from pytest_mock import MockFixture
 
 from python_grep.cli import create_cli_parser
+from python_grep.ipc import SOCKET_ENV_VAR
 from python_grep.storage import FileReader
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_home(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv(
+        "XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache_home"))
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_server_socket(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(SOCKET_ENV_VAR, raising=False)
+
+
 @pytest.fixture
 def open_mock_with_set_read_data(
     mocker: MockFixture,
@@ -1,9 +1,13 @@
+import builtins
 from argparse import ArgumentParser
 from pathlib import Path
-from typing import Callable
+from typing import Any, Callable
 
+import pytest
 from _pytest.capture import CaptureFixture
 
+from python_grep.grep import grep as grep_module
+from python_grep.grep.checkpoint import Checkpoint
 from python_grep.main import main
 
 FILE_CONTENT = """Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n
@@ -50,3 +54,153 @@ def test_e2e_count(
     captured_out = capsys.readouterr().out
     expected_output = f"{file_path}:3\n"
     assert captured_out == expected_output
+
+
+def test_e2e_line_range_with_line_index(
+    tmp_text_file: Callable[[str], Path],
+    capsys: CaptureFixture[str],
+):
+    file = tmp_text_file(FILE_CONTENT)
+    file_path = str(file)
+    for _ in range(2):
+        main(["-n", "--line-index", "--lines", "6:12", "example", file_path])
+        captured_out = capsys.readouterr().out
+        expected_output = (
+            f"{file_path}:9:example2@example.com id consectetur"
+            f"\n{file_path}:12:example3@example.com\n"
+        )
+        assert captured_out == expected_output
+
+
+def test_e2e_long_line_preview(
+    tmp_text_file: Callable[[str], Path],
+    capsys: CaptureFixture[str],
+):
+    file = tmp_text_file("a" * 100 + "example" + "b" * 100 + "\nexample\n")
+    file_path = str(file)
+    main(
+        [
+            "-n",
+            "--max-line-length",
+            "64",
+            "--max-columns",
+            "12",
+            "example",
+            file_path,
+        ]
+    )
+    captured_out = capsys.readouterr().out
+    expected_output = f"{file_path}:1:aaaexamplebb\n{file_path}:2:example\n"
+    assert captured_out == expected_output
+
+
+def test_e2e_recursive_file_filters(
+    tmp_path: Path,
+    capsys: CaptureFixture[str],
+):
+    (tmp_path / "app.log").write_text("example\n")
+    (tmp_path / "large.log").write_text("example\n" * 1000)
+    (tmp_path / "app.py").write_text("example\n")
+    (tmp_path / "archive.gz").write_bytes(b"example\0")
+    main(
+        ["-r", "--type", "log", "--max-filesize", "1K", "example"]
+        + [str(tmp_path)]
+    )
+    captured_out = capsys.readouterr().out
+    assert captured_out == f"{tmp_path / 'app.log'}:example\n"
+
+
+def test_e2e_recursive_jobs(
+    tmp_path: Path,
+    capsys: CaptureFixture[str],
+):
+    for index in range(300):
+        (tmp_path / f"file{index:03}.log").write_text(
+            f"example {index}\nother\n"
+        )
+    main(["-r", "--no-cache", "example", str(tmp_path)])
+    sequential_out = capsys.readouterr().out
+    main(["-r", "--no-cache", "-j", "2", "example", str(tmp_path)])
+    captured_out = capsys.readouterr().out
+    assert captured_out == sequential_out
+    assert len(captured_out.splitlines()) == 300
+
+
+def test_e2e_cached_file_via_other_relative_path(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: CaptureFixture[str],
+):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    (tmp_path / "play").mkdir()
+    (tmp_path / "play" / "a.txt").write_text("hello world\n")
+
+    monkeypatch.chdir(tmp_path / "play")
+    main(["--cache", "hello", "a.txt"])
+    monkeypatch.chdir(tmp_path)
+    main(["--cache", "hello", "play/a.txt"])
+
+    assert capsys.readouterr().out == (
+        "a.txt:hello world\nplay/a.txt:hello world\n"
+    )
+
+
+def test_e2e_checkpoint_resumes_run_killed_after_first_output(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: CaptureFixture[str],
+):
+    (tmp_path / "f.txt").write_text(
+        "hit first\n" + "miss\n" * 3000 + "hit second\n" + "miss\n" * 100
+    )
+    monkeypatch.chdir(tmp_path)
+    # Progress is recorded for every read line, as in a slow scan.
+    monkeypatch.setattr(
+        Checkpoint, "record_progress", Checkpoint.record_offset
+    )
+
+    def print_and_kill(*args: Any, **kwargs: Any) -> None:
+        builtins.print(*args, **kwargs)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(grep_module, "print", print_and_kill, raising=False)
+    with pytest.raises(KeyboardInterrupt):
+        main(["-n", "--checkpoint", "j", "hit", "f.txt"])
+    monkeypatch.delattr(grep_module, "print")
+    main(["-n", "--checkpoint", "j", "--resume", "hit", "f.txt"])
+
+    assert capsys.readouterr().out == (
+        "f.txt:1:hit first\nf.txt:3002:hit second\n"
+    )
+
+
+def test_e2e_result_cache_is_opt_in(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: CaptureFixture[str],
+):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    (tmp_path / "a.txt").write_text("hello world\n")
+
+    main(["hello", str(tmp_path / "a.txt")])
+
+    assert not (tmp_path / "cache").exists()
+
+    main(["--cache", "hello", str(tmp_path / "a.txt")])
+    main(["--cache", "hello", str(tmp_path / "a.txt")])
+
+    assert (tmp_path / "cache" / "python_grep" / "results.sqlite3").exists()
+    assert capsys.readouterr().out == f"{tmp_path / 'a.txt'}:hello world\n" * 3
+
+
+def test_e2e_line_regexp_in_binary_file(
+    tmp_path: Path,
+    capsys: CaptureFixture[str],
+):
+    file = tmp_path / "a.bin"
+    file.write_bytes(b"foo\0\nbar\nfoo bar\n")
+
+    main(["-x", "foo", str(file)])
+    main(["-x", "bar", str(file)])
+
+    assert capsys.readouterr().out == f"Binary file {file} matches\n"
@@ -0,0 +1,104 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pytest
+
+import python_grep
+
+PACKAGE_ROOT = Path(python_grep.__file__).parent.parent
+
+# Import time of a plain search on top of the interpreter startup, best
+# of several runs. It is kept generous for slow machines, while the set
+# of loaded modules is checked exactly.
+STARTUP_BUDGET_MS = 150
+STARTUP_RUNS = 3
+
+# Modules serving only some modes, which a plain search must not load.
+LAZY_MODULES = [
+    "concurrent.futures",
+    "multiprocessing",
+    "signal",
+    "socket",
+    "sqlite3",
+    "python_grep.grep.checkpoint",
+    "python_grep.grep.parallel",
+    "python_grep.grep.result_cache",
+    "python_grep.grep.scheduler",
+    "python_grep.grep.shared_records",
+    "python_grep.match.boundaries",
+    "python_grep.match.case_folding",
+    "python_grep.match.linear_regex",
+    "python_grep.match.multi_pattern_matcher",
+    "python_grep.server",
+    "python_grep.storage.directory_cache",
+    "python_grep.storage.follow_reader",
+    "python_grep.storage.line_index",
+    "python_grep.storage.line_range_reader",
+    "python_grep.storage.range_reader",
+    "python_grep.storage.time_range_reader",
+]
+
+
+def measure_import_times(code: str) -> Dict[str, int]:
+    """
+    Run code in a fresh interpreter with ``-X importtime``.
+
+    :param str code: The code to run.
+    :return: Self import times in microseconds keyed on module names.
+    :rtype: Dict[str, int]
+    """
+
+    completed_process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        cwd=PACKAGE_ROOT,
+        text=True,
+    )
+    import_times = {}
+    for line in completed_process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, _, name = line[len("import time:") :].split("|")
+        if self_time.strip().isdigit():
+            import_times[name.strip()] = int(self_time)
+    return import_times
+
+
+def create_search_code(args: List[str]) -> str:
+    return f"from python_grep.main import main; main({args!r})"
+
+
+# The result cache is off by default, so both runs search the same way.
+@pytest.fixture(params=[[], ["--no-cache"]], ids=["defaults", "no-cache"])
+def search_args(
+    request: pytest.FixtureRequest, tmp_text_file: Callable[[str], Path]
+) -> List[str]:
+    return [*request.param, "hello", str(tmp_text_file("hello\nworld\n"))]
+
+
+def test_plain_search_does_not_import_other_modes(search_args: List[str]):
+    imported_modules = measure_import_times(create_search_code(search_args))
+
+    assert "python_grep.grep.factory" in imported_modules
+    assert [
+        module for module in LAZY_MODULES if module in imported_modules
+    ] == []
+
+
+def test_plain_search_startup_within_budget(search_args: List[str]):
+    interpreter_modules = measure_import_times("pass").keys()
+    startup_times = []
+    for _ in range(STARTUP_RUNS):
+        import_times = measure_import_times(create_search_code(search_args))
+        startup_times.append(
+            sum(
+                self_time
+                for name, self_time in import_times.items()
+                if name not in interpreter_modules
+            )
+        )
+
+    assert min(startup_times) / 1000 < STARTUP_BUDGET_MS
@@ -0,0 +1,110 @@
+from typing import List
+
+import pytest
+
+from python_grep.grep.context import PatternMatchingOptions
+from python_grep.grep.bulk_line_matcher import BulkLineMatcher
+
+
+@pytest.mark.parametrize(
+    "patterns, options, block, expected_count",
+    [
+        (["ab"], PatternMatchingOptions(False, False, False), "", 0),
+        (
+            ["ab"],
+            PatternMatchingOptions(False, False, False),
+            "ab ab\nx\nab\nxab",
+            3,
+        ),
+        (
+            ["ab", "x"],
+            PatternMatchingOptions(False, False, False),
+            "ab x\ny\nx\n",
+            2,
+        ),
+        (
+            ["AB"],
+            PatternMatchingOptions(False, False, True),
+            "ab\naB\nx\n",
+            2,
+        ),
+        (
+            ["AB", "cd"],
+            PatternMatchingOptions(False, False, True),
+            "é ab\nx\nCd Ab\n",
+            2,
+        ),
+        (
+            ["ab"],
+            PatternMatchingOptions(False, True, False),
+            "abc\nab c\nxab\n",
+            1,
+        ),
+        (
+            ["ab"],
+            PatternMatchingOptions(True, False, False),
+            "ab\nx\n\ny",
+            3,
+        ),
+        (
+            ["ab", "c"],
+            PatternMatchingOptions(False, False, False, line_regexp=True),
+            "ab\nabc\nc\nxab",
+            2,
+        ),
+    ],
+)
+def test_count(
+    patterns: List[str],
+    options: PatternMatchingOptions,
+    block: str,
+    expected_count: int,
+) -> None:
+    assert BulkLineMatcher(patterns, options).count(block) == expected_count
+
+
+def test_iter_matching_lines() -> None:
+    bulk_line_matcher = BulkLineMatcher(
+        ["ab", "c"], PatternMatchingOptions(True, False, False)
+    )
+
+    assert list(bulk_line_matcher.iter_matching_lines("xab c\nd\n\nc")) == [
+        (0, 5),
+        (9, 10),
+    ]
+
+
+def test_count_with_null_separator() -> None:
+    bulk_line_matcher = BulkLineMatcher(
+        ["ab"], PatternMatchingOptions(False, False, False), "\0"
+    )
+
+    assert bulk_line_matcher.count("ab\nab\0x\nab\0x\0") == 2
+
+
+@pytest.mark.parametrize(
+    "patterns, options, line_separator, expected",
+    [
+        (["ab", "c"], PatternMatchingOptions(False, True, True), "\n", True),
+        (["a.b"], PatternMatchingOptions(False, False, False), "\n", False),
+        ([""], PatternMatchingOptions(False, False, False), "\n", False),
+        (["a\nb"], PatternMatchingOptions(False, False, False), "\0", True),
+        (["a\0b"], PatternMatchingOptions(False, False, False), "\0", False),
+        ([], PatternMatchingOptions(False, False, False), "\n", False),
+        (
+            ["ab"],
+            PatternMatchingOptions(False, False, False, multiline=True),
+            "\n",
+            False,
+        ),
+    ],
+)
+def test_supports(
+    patterns: List[str],
+    options: PatternMatchingOptions,
+    line_separator: str,
+    expected: bool,
+) -> None:
+    assert (
+        BulkLineMatcher.supports(patterns, options, line_separator) == expected
+    )
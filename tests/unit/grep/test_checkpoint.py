@@ -0,0 +1,107 @@
+from pathlib import Path
+
+from pytest_mock import MockFixture
+
+from python_grep.grep.checkpoint import Checkpoint, CheckpointFileReader
+from python_grep.storage import FileReader
+
+
+def test_checkpoint_resumes_recorded_scan(tmp_path: Path) -> None:
+    journal_path = tmp_path / "scan.checkpoint"
+    checkpoint = Checkpoint(journal_path, "query")
+    checkpoint.start_file(Path("done.txt"))
+    checkpoint.record_offset(10)
+    checkpoint.complete_file()
+    checkpoint.start_file(Path("current.txt"))
+    checkpoint.record_offset(20)
+    checkpoint.record_offset(5)
+    checkpoint.close()
+
+    resumed_checkpoint = Checkpoint(journal_path, "query", resume=True)
+    resumed_checkpoint.close()
+
+    assert resumed_checkpoint.is_completed(Path("done.txt"))
+    assert not resumed_checkpoint.is_completed(Path("current.txt"))
+    assert resumed_checkpoint.get_resume_offset(Path("current.txt")) == 20
+    assert resumed_checkpoint.get_resume_offset(Path("other.txt")) == 0
+
+
+def test_checkpoint_ignores_torn_record(tmp_path: Path) -> None:
+    journal_path = tmp_path / "scan.checkpoint"
+    journal_path.write_text('Q query\nF "current.txt"\nO 20\nO 4')
+
+    checkpoint = Checkpoint(journal_path, "query", resume=True)
+    checkpoint.close()
+
+    assert checkpoint.get_resume_offset(Path("current.txt")) == 20
+
+
+def test_checkpoint_starts_over_for_another_query(tmp_path: Path) -> None:
+    journal_path = tmp_path / "scan.checkpoint"
+    checkpoint = Checkpoint(journal_path, "query")
+    checkpoint.start_file(Path("done.txt"))
+    checkpoint.complete_file()
+    checkpoint.close()
+
+    other_checkpoint = Checkpoint(journal_path, "other query", resume=True)
+    other_checkpoint.close()
+
+    assert not other_checkpoint.is_completed(Path("done.txt"))
+    assert journal_path.read_text() == "Q other query\n"
+
+
+def test_checkpoint_without_resume_starts_anew(tmp_path: Path) -> None:
+    journal_path = tmp_path / "scan.checkpoint"
+    checkpoint = Checkpoint(journal_path, "query")
+    checkpoint.start_file(Path("done.txt"))
+    checkpoint.complete_file()
+    checkpoint.close()
+
+    new_checkpoint = Checkpoint(journal_path, "query")
+    new_checkpoint.close()
+
+    assert not new_checkpoint.is_completed(Path("done.txt"))
+
+
+def test_checkpoint_file_reader_resumes_and_records_progress(
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "test.txt"
+    path.write_bytes(b"first\nsecond\nthird\n")
+    journal_path = tmp_path / "scan.checkpoint"
+    journal_path.write_text(f'Q query\nF "{path}"\nO 7\n')
+    checkpoint = Checkpoint(
+        journal_path, "query", resume=True, progress_interval=0
+    )
+    checkpoint_file_reader = CheckpointFileReader(FileReader(), checkpoint)
+
+    checkpoint.start_file(path)
+    lines = list(checkpoint_file_reader.read_lines_with_offsets(path))
+    checkpoint.close()
+
+    assert lines == [(13, "third")]
+    assert journal_path.read_text().endswith("O 7\nO 13\n")
+
+
+def test_checkpoint_records_progress_every_few_lines(
+    tmp_path: Path, mocker: MockFixture
+) -> None:
+    stdout_mock = mocker.patch("python_grep.grep.checkpoint.sys.stdout")
+    journal_path = tmp_path / "scan.checkpoint"
+    checkpoint = Checkpoint(
+        journal_path, "query", progress_interval=3600, progress_lines=2
+    )
+    checkpoint.start_file(Path("current.txt"))
+    flush_count = stdout_mock.flush.call_count
+
+    checkpoint.record_progress(5)
+    checkpoint.record_progress(3)
+    recorded_after_two_lines = journal_path.read_text()
+    checkpoint.record_progress(9)
+    recorded_after_three_lines = journal_path.read_text()
+    checkpoint.close()
+
+    assert recorded_after_two_lines.endswith('F "current.txt"\nO 5\n')
+    assert recorded_after_three_lines == recorded_after_two_lines
+    assert journal_path.read_text().endswith("O 5\nO 9\n")
+    assert stdout_mock.flush.call_count == flush_count + 2
@@ -1,4 +1,5 @@
 from argparse import ArgumentParser
+from pathlib import Path
 from typing import List, Type
 
 import pytest
@@ -11,7 +12,14 @@ from python_grep.grep.grep import (
     Grep,
     LineMatchCounterGrep,
     LineMatchGrep,
+    MultilineMatchGrep,
 )
+from python_grep.match import (
+    IPatternMatcher,
+    TextMultiPatternMatcher,
+    TextPatternMatcher,
+)
+from python_grep.storage import FilteringPathResolver, InputType
 
 
 @pytest.mark.parametrize(
@@ -21,6 +29,7 @@ from python_grep.grep.grep import (
         (["-c"], LineMatchCounterGrep),
         (["-A", "4"], AfterContextLineMatchGrep),
         (["-B", "1"], BeforeContextLineMatchGrep),
+        (["-U"], MultilineMatchGrep),
     ],
 )
 def test_create_grep_from_cli_args(
@@ -34,3 +43,46 @@ def test_create_grep_from_cli_args(
     )
     grep = create_grep_from_cli_args(parsed_args)
     assert isinstance(grep, grep_type)
+
+
+@pytest.mark.parametrize(
+    "pattern_count, pattern_matcher_type",
+    [(1, TextPatternMatcher), (100, TextMultiPatternMatcher)],
+)
+def test_create_grep_from_cli_args_pattern_matcher(
+    cli_parser: ArgumentParser,
+    tmp_path: Path,
+    pattern_count: int,
+    pattern_matcher_type: Type[IPatternMatcher],
+) -> None:
+    pattern_file = tmp_path / "patterns.txt"
+    pattern_file.write_text(
+        "\n".join(f"pattern{i}" for i in range(pattern_count))
+    )
+    parsed_args = get_parsed_args(
+        cli_parser, ["-f", str(pattern_file), "test_file.txt"]
+    )
+    grep = create_grep_from_cli_args(parsed_args)
+
+    assert isinstance(
+        grep._file_type_to_pattern_matcher_map[InputType.TEXT],
+        pattern_matcher_type,
+    )
+
+
+def test_create_grep_from_cli_args_path_filters(
+    cli_parser: ArgumentParser, tmp_path: Path
+) -> None:
+    for name in ["main.py", "image.png", "notes.txt"]:
+        (tmp_path / name).write_text("test_pattern\n")
+    parsed_args = get_parsed_args(
+        cli_parser,
+        ["-r", "--type", "py", "--type", "txt", "--skip-known-binary"]
+        + ["--max-filesize", "1K", "test_pattern", str(tmp_path)],
+    )
+    grep = create_grep_from_cli_args(parsed_args)
+
+    assert isinstance(grep._path_resolver, FilteringPathResolver)
+    assert sorted(
+        path.name for path in grep._path_resolver.get_resolved_file_paths()
+    ) == ["main.py", "notes.txt"]
@@ -14,9 +14,13 @@ from python_grep.storage import InputType
 @pytest.fixture
 def line_match_grep(mocker: MockFixture) -> LineMatchGrep:
     context = mocker.Mock()
+    context.input_control_options.jobs = 1
+    context.input_control_options.time_budget = None
     reader = mocker.Mock()
     path_resolver = mocker.Mock()
-    path_resolver.get_resolved_file_paths.return_value = ["file.txt"]
+    path_resolver.get_resolved_files_with_stats.side_effect = lambda: iter(
+        [("file.txt", None)]
+    )
     output_message_builder = mocker.Mock()
     output_message_builder.create.return_value = "file.txt:line match 1"
     input_processor = mocker.Mock()
@@ -72,3 +76,63 @@ def test_suppress_binary_output_error_handling(
     captured_output = capsys.readouterr().out
 
     assert captured_output == "Binary file file.txt matches\n"
+
+
+def test_grep_records_checkpoint(
+    line_match_grep, capsys: CaptureFixture[str], mocker: MockFixture
+) -> None:
+    checkpoint = mocker.Mock()
+    checkpoint.is_completed.return_value = False
+    line_match_grep._checkpoint = checkpoint
+
+    line_match_grep.execute()
+
+    assert capsys.readouterr().out == "file.txt:line match 1\n"
+    assert checkpoint.mock_calls == [
+        mocker.call.is_completed("file.txt"),
+        mocker.call.start_file("file.txt"),
+        mocker.call.record_progress(1),
+        mocker.call.complete_file(),
+        mocker.call.close(),
+    ]
+
+
+def test_grep_skips_files_completed_in_checkpoint(
+    line_match_grep, capsys: CaptureFixture[str], mocker: MockFixture
+) -> None:
+    checkpoint = mocker.Mock()
+    checkpoint.is_completed.return_value = True
+    line_match_grep._checkpoint = checkpoint
+
+    line_match_grep.execute()
+
+    assert capsys.readouterr().out == ""
+    checkpoint.start_file.assert_not_called()
+
+
+def test_grep_follow_resolves_paths_again(
+    line_match_grep, capsys: CaptureFixture[str], mocker: MockFixture
+) -> None:
+    line_match_grep._follow_interval = 0.1
+    mocker.patch("python_grep.grep.grep.FOLLOW_RESOLVE_INTERVAL", 0)
+    mocker.patch(
+        "python_grep.grep.grep.time.sleep",
+        side_effect=[None, None, KeyboardInterrupt],
+    )
+    line_match_grep._path_resolver.get_resolved_file_paths.side_effect = [
+        iter([Path("a.txt")]),
+        iter([Path("b.txt")]),
+        iter([Path("a.txt"), Path("b.txt")]),
+    ]
+    input_processor = line_match_grep.create_input_processor()
+    input_processor.process.side_effect = lambda path: iter([])
+
+    line_match_grep.execute()
+
+    assert input_processor.process.call_args_list == [
+        mocker.call(Path("a.txt")),
+        mocker.call(Path("a.txt")),
+        mocker.call(Path("b.txt")),
+        mocker.call(Path("a.txt")),
+        mocker.call(Path("b.txt")),
+    ]
@@ -1,27 +1,54 @@
 from pathlib import Path, PosixPath
+from typing import Callable, List, Tuple
 
+import pytest
 from _pytest.capture import CaptureFixture
 from pytest_mock import MockFixture
 
 from python_grep.grep.base import ProcessingOutput
-from python_grep.grep.context import ContextControlOptions
+from python_grep.grep.context import (
+    ContextControlOptions,
+    PatternMatchingOptions,
+)
 from python_grep.grep.input_processor import (
     AfterContextLineMatchProcessor,
     BeforeContextLineMatchProcessor,
+    InvertMatchProcessor,
     LineMatchCounterProcessor,
     LineMatchProcessor,
+    MultilineMatchProcessor,
+)
+from python_grep.grep.bulk_line_matcher import BulkLineMatcher
+from python_grep.match import (
+    BinaryPatternMatcher,
+    MatchBatch,
+    MatchPosition,
+    TextPatternMatcher,
 )
-from python_grep.match import MatchPosition
-from python_grep.storage import InputType
+from python_grep.storage import FileReader, InputType
+
+
+def create_match_batch(
+    *matched_lines: Tuple[int, List[MatchPosition]]
+) -> MatchBatch:
+    match_batch = MatchBatch()
+    for line_index, positions in matched_lines:
+        match_batch.add(
+            line_index,
+            [(position.start, position.end) for position in positions],
+        )
+    return match_batch
 
 
 def test_line_match_processor(mocker: MockFixture) -> None:
     mocked_file_reader = mocker.Mock()
     mocked_pattern_matcher = mocker.Mock()
-    mocked_file_reader.read_lines.return_value = (
-        x for x in ["test1 line", "test2 line"]
+    mocked_file_reader.read_lines_with_offsets.return_value = (
+        x for x in [(0, "test1 line"), (11, "test2 line")]
+    )
+    mocked_pattern_matcher.match_many.return_value = create_match_batch(
+        (0, [MatchPosition(0, 4)])
     )
-    mocked_pattern_matcher.match.side_effect = [[MatchPosition(0, 4)], None]
     result = (
         LineMatchProcessor(
             mocked_file_reader, {InputType.TEXT: mocked_pattern_matcher}
@@ -48,10 +75,9 @@ def test_line_match_counter_processor(mocker: MockFixture) -> None:
     mocked_file_reader.read_lines.return_value = (
         x for x in ["test1 line x", "test2 line x"]
     )
-    mocked_pattern_matcher.match.return_value = [
-        [MatchPosition(0, 1)],
-        [MatchPosition(0, 1)],
-    ]
+    mocked_pattern_matcher.search_many.return_value = create_match_batch(
+        (0, [MatchPosition(0, 1)]), (1, [MatchPosition(0, 1)])
+    )
     result = (
         LineMatchCounterProcessor(
             mocked_file_reader, {InputType.TEXT: mocked_pattern_matcher}
@@ -71,19 +97,197 @@ def test_line_match_counter_processor(mocker: MockFixture) -> None:
     assert result == expected_result
 
 
+def test_line_match_counter_processor_counts_in_bulk(
+    mocker: MockFixture,
+) -> None:
+    mocked_file_reader = mocker.Mock()
+    mocked_file_reader.read_blocks.return_value = (
+        x for x in [(0, "a test\nb\n"), (9, "test\ntest test\n")]
+    )
+    bulk_line_matcher = BulkLineMatcher(
+        ["test"], PatternMatchingOptions(False, False, False)
+    )
+    result = next(
+        LineMatchCounterProcessor(
+            mocked_file_reader,
+            {InputType.TEXT: mocker.Mock()},
+            bulk_line_matcher,
+        ).process(Path("path"))
+    )
+
+    assert result.match_count == 3
+    mocked_file_reader.read_lines.assert_not_called()
+
+
+def test_line_match_counter_processor_falls_back_for_binary_blocks(
+    mocker: MockFixture,
+) -> None:
+    mocked_file_reader = mocker.Mock()
+    mocked_pattern_matcher = mocker.Mock()
+    mocked_file_reader.read_blocks.return_value = (
+        x for x in [(0, b"test\x00\n")]
+    )
+    mocked_file_reader.read_lines.return_value = (x for x in [b"test\x00"])
+    mocked_pattern_matcher.search_many.return_value = create_match_batch(
+        (0, [MatchPosition(0, 4)])
+    )
+    bulk_line_matcher = BulkLineMatcher(
+        ["test"], PatternMatchingOptions(False, False, False)
+    )
+    result = next(
+        LineMatchCounterProcessor(
+            mocked_file_reader,
+            {InputType.TEXT: mocked_pattern_matcher},
+            bulk_line_matcher,
+        ).process(Path("path"))
+    )
+
+    assert result.match_count == 1
+    mocked_file_reader.read_lines.assert_called_once_with(Path("path"))
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_invert_match_processor(mocker: MockFixture, bulk: bool) -> None:
+    mocked_file_reader = mocker.Mock()
+    mocked_file_reader.read_blocks.return_value = (
+        x for x in [(3, "té\nx\ny\n"), (12, "tt\n\nz")]
+    )
+    mocked_file_reader.count_newlines.return_value = 1
+    options = PatternMatchingOptions(True, False, False)
+    results = list(
+        InvertMatchProcessor(
+            mocked_file_reader,
+            {InputType.TEXT: TextPatternMatcher(["t"], options)},
+            bulk_line_matcher=(
+                BulkLineMatcher(["t"], options) if bulk else None
+            ),
+        ).process(Path("path"))
+    )
+
+    assert [
+        (
+            result.line,
+            result.line_number,
+            result.byte_offset,
+            result.line_count,
+        )
+        for result in results
+    ] == [("x\ny", 3, 7, 2), ("\nz", 6, 15, 2)]
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_line_match_processor_bulk(
+    tmp_text_file: Callable[[str], Path], bulk: bool
+) -> None:
+    path = tmp_text_file("été\nthe tea\n\nno\nteté te\n")
+    options = PatternMatchingOptions(False, False, False)
+    input_processor = LineMatchProcessor(
+        FileReader(),
+        {InputType.TEXT: TextPatternMatcher(["te"], options)},
+        bulk_line_matcher=BulkLineMatcher(["te"], options) if bulk else None,
+    )
+
+    assert [
+        (output.line_number, output.byte_offset, output.line, output.matches)
+        for output in input_processor.process(path)
+    ] == [
+        (2, 6, "the tea", [MatchPosition(4, 6)]),
+        (
+            5,
+            18,
+            "teté te",
+            [MatchPosition(0, 2), MatchPosition(5, 7)],
+        ),
+    ]
+
+
+def test_line_match_processor_in_batches(
+    tmp_text_file: Callable[[str], Path],
+) -> None:
+    path = tmp_text_file("ab\nx\nab ab\nx\nab\n")
+    input_processor = LineMatchProcessor(
+        FileReader(),
+        {
+            InputType.TEXT: TextPatternMatcher(
+                ["ab"], PatternMatchingOptions(False, False, False)
+            )
+        },
+        match_batch_size=2,
+    )
+
+    assert [
+        (output.line_number, output.byte_offset, output.matches)
+        for output in input_processor.process(path)
+    ] == [
+        (1, 0, [MatchPosition(0, 2)]),
+        (3, 5, [MatchPosition(0, 2), MatchPosition(3, 5)]),
+        (5, 13, [MatchPosition(0, 2)]),
+    ]
+
+
+def test_line_match_processor_batches_by_input_type(tmp_path: Path) -> None:
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"ab\nab\xff\n")
+    options = PatternMatchingOptions(False, False, False)
+    input_processor = LineMatchProcessor(
+        FileReader(),
+        {
+            InputType.TEXT: TextPatternMatcher(["ab"], options),
+            InputType.BINARY: BinaryPatternMatcher(["ab"], options),
+        },
+    )
+
+    assert [
+        (output.input_type, output.line)
+        for output in input_processor.process(path)
+    ] == [
+        (InputType.TEXT, "ab"),
+        (InputType.BINARY, b"ab\nab\xff\n"),
+    ]
+
+
+def test_invert_match_processor_falls_back_for_binary_blocks(
+    mocker: MockFixture,
+) -> None:
+    mocked_file_reader = mocker.Mock()
+    mocked_pattern_matcher = mocker.Mock()
+    mocked_file_reader.read_blocks.return_value = (
+        x for x in [(0, "x\n"), (2, b"\xff\n")]
+    )
+    mocked_file_reader.read_lines_with_offsets.return_value = (
+        x for x in [(0, "x"), (2, b"\xff")]
+    )
+    mocked_pattern_matcher.search_many.return_value = create_match_batch(
+        (0, [MatchPosition(0, 0)])
+    )
+    mocked_pattern_matcher.match_many.return_value = create_match_batch(
+        (0, [MatchPosition(0, 0)]), (1, [MatchPosition(0, 0)])
+    )
+    results = list(
+        InvertMatchProcessor(
+            mocked_file_reader, {InputType.TEXT: mocked_pattern_matcher}
+        ).process(Path("path"))
+    )
+
+    assert [result.line for result in results] == ["x", b"\xff"]
+
+
 def test_after_context_line_match_processor(mocker: MockFixture) -> None:
     mocked_file_reader = mocker.Mock()
     mocked_pattern_matcher = mocker.Mock()
     context_control_options = ContextControlOptions(0, 2)
-    mocked_file_reader.read_lines.return_value = (
-        x for x in ["test1 line", "test2 line", "test3 line", "test4 line"]
+    mocked_file_reader.read_lines_with_offsets.return_value = (
+        x
+        for x in [
+            (0, "test1 line"),
+            (11, "test2 line"),
+            (22, "test3 line"),
+            (33, "test4 line"),
+        ]
+    )
+    mocked_pattern_matcher.match_many.return_value = create_match_batch(
+        (0, [MatchPosition(0, 4)])
     )
-    mocked_pattern_matcher.match.side_effect = [
-        [MatchPosition(0, 4)],
-        None,
-        None,
-        None,
-    ]
 
     results = list(
         AfterContextLineMatchProcessor(
@@ -109,6 +313,7 @@ def test_after_context_line_match_processor(mocker: MockFixture) -> None:
             line="test2 line",
             line_number=2,
             match_count=0,
+            byte_offset=11,
         ),
         ProcessingOutput(
             matches=None,
@@ -117,6 +322,7 @@ def test_after_context_line_match_processor(mocker: MockFixture) -> None:
             line="test3 line",
             line_number=3,
             match_count=0,
+            byte_offset=22,
         ),
     ]
 
@@ -127,15 +333,18 @@ def test_before_context_line_match_processor(mocker: MockFixture) -> None:
     mocked_file_reader = mocker.Mock()
     mocked_pattern_matcher = mocker.Mock()
     context_control_options = ContextControlOptions(2, 0)
-    mocked_file_reader.read_lines.return_value = (
-        x for x in ["test1 line", "test2 line", "test3 line", "test4 line"]
+    mocked_file_reader.read_lines_with_offsets.return_value = (
+        x
+        for x in [
+            (0, "test1 line"),
+            (11, "test2 line"),
+            (22, "test3 line"),
+            (33, "test4 line"),
+        ]
+    )
+    mocked_pattern_matcher.match_many.return_value = create_match_batch(
+        (2, [MatchPosition(0, 4)])
     )
-    mocked_pattern_matcher.match.side_effect = [
-        None,
-        None,
-        [MatchPosition(0, 4)],
-        None,
-    ]
 
     results = list(
         BeforeContextLineMatchProcessor(
@@ -161,6 +370,7 @@ def test_before_context_line_match_processor(mocker: MockFixture) -> None:
             line="test2 line",
             line_number=2,
             match_count=0,
+            byte_offset=11,
         ),
         ProcessingOutput(
             matches=[MatchPosition(start=0, end=4)],
@@ -169,6 +379,7 @@ def test_before_context_line_match_processor(mocker: MockFixture) -> None:
             line="test3 line",
             line_number=3,
             match_count=0,
+            byte_offset=22,
         ),
     ]
 
@@ -183,7 +394,7 @@ def test_file_permission_error_handling(
 
     mocked_file_reader = mocker.Mock()
     mocked_pattern_matcher = mocker.Mock()
-    mocked_file_reader.read_lines = _raise_file_permission_error
+    mocked_file_reader.read_lines_with_offsets = _raise_file_permission_error
 
     list(
         LineMatchProcessor(
@@ -205,7 +416,7 @@ def test_file_not_found_error_handling(
 
     mocked_file_reader = mocker.Mock()
     mocked_pattern_matcher = mocker.Mock()
-    mocked_file_reader.read_lines = _raise_file_not_found_error
+    mocked_file_reader.read_lines_with_offsets = _raise_file_not_found_error
 
     list(
         LineMatchProcessor(
@@ -217,3 +428,188 @@ def test_file_not_found_error_handling(
     captured_output = captured.out
 
     assert captured_output == "grep: path: No such file or directory\n"
+
+
+def test_line_match_processor_line_number_from_offset(
+    mocker: MockFixture,
+) -> None:
+    mocked_file_reader = mocker.Mock()
+    mocked_pattern_matcher = mocker.Mock()
+    mocked_file_reader.read_lines_with_offsets.return_value = (
+        x for x in [(22, "test3 line")]
+    )
+    mocked_file_reader.count_newlines.return_value = 2
+    mocked_pattern_matcher.match_many.return_value = create_match_batch(
+        (0, [MatchPosition(0, 4)])
+    )
+    result = (
+        LineMatchProcessor(
+            mocked_file_reader, {InputType.TEXT: mocked_pattern_matcher}
+        )
+        .process(Path("path"))
+        .__next__()
+    )
+
+    mocked_file_reader.count_newlines.assert_called_once_with(Path("path"), 22)
+    assert result.line_number == 3
+    assert result.byte_offset == 22
+
+
+def test_line_match_processor_without_line_numbering(
+    mocker: MockFixture,
+) -> None:
+    mocked_file_reader = mocker.Mock()
+    mocked_pattern_matcher = mocker.Mock()
+    mocked_file_reader.read_lines_with_offsets.return_value = (
+        x for x in [(22, "test3 line")]
+    )
+    mocked_pattern_matcher.match_many.return_value = create_match_batch(
+        (0, [MatchPosition(0, 4)])
+    )
+    result = (
+        LineMatchProcessor(
+            mocked_file_reader,
+            {InputType.TEXT: mocked_pattern_matcher},
+            line_numbering=False,
+        )
+        .process(Path("path"))
+        .__next__()
+    )
+
+    mocked_file_reader.count_newlines.assert_not_called()
+    assert result.line_number is None
+    assert result.byte_offset == 22
+
+
+def test_multiline_match_processor(mocker: MockFixture) -> None:
+    mocker.patch("python_grep.grep.input_processor.MULTILINE_LOOKAHEAD", 24)
+    mocked_file_reader = mocker.Mock()
+    mocked_file_reader.read_blocks.return_value = (
+        x for x in [(0, "x\nError:\n"), (9, " at a\n at b\nok\n"), (24, "é\n")]
+    )
+    pattern_matcher = TextPatternMatcher(
+        [r"Error:\n( at \w\n)+", "é"],
+        PatternMatchingOptions(False, False, False, multiline=True),
+    )
+
+    result = list(
+        MultilineMatchProcessor(
+            mocked_file_reader, {InputType.TEXT: pattern_matcher}
+        ).process(Path("path"))
+    )
+
+    assert result == [
+        ProcessingOutput(
+            matches=[MatchPosition(0, 18)],
+            path=Path("path"),
+            input_type=InputType.TEXT,
+            line="Error:\n at a\n at b",
+            line_number=2,
+            byte_offset=2,
+        ),
+        ProcessingOutput(
+            matches=[MatchPosition(0, 1)],
+            path=Path("path"),
+            input_type=InputType.TEXT,
+            line="é",
+            line_number=6,
+            byte_offset=24,
+        ),
+    ]
+
+
+LONG_LINE_CONTENT = "short\nabcdefghijklmnopqrst\nend\n"
+
+
+@pytest.mark.parametrize(
+    "pattern, invert_match, expected_lines",
+    [
+        ("mnop", False, [(2, 6, "mnopqrst", [MatchPosition(0, 4)])]),
+        (
+            "s",
+            False,
+            [
+                (1, 0, "short", [MatchPosition(0, 1)]),
+                (2, 6, "qrst", [MatchPosition(2, 3)]),
+            ],
+        ),
+        (
+            "mnop",
+            True,
+            [
+                (1, 0, "short", [MatchPosition(0, 0)]),
+                (3, 27, "end", [MatchPosition(0, 0)]),
+            ],
+        ),
+        (
+            "xyz",
+            True,
+            [
+                (1, 0, "short", [MatchPosition(0, 0)]),
+                (2, 6, "abcd", [MatchPosition(0, 0)]),
+                (3, 27, "end", [MatchPosition(0, 0)]),
+            ],
+        ),
+    ],
+)
+@pytest.mark.parametrize("bulk", [True, False])
+def test_line_match_processor_long_lines(
+    tmp_text_file: Callable[[str], Path],
+    pattern: str,
+    invert_match: bool,
+    expected_lines: List[tuple],
+    bulk: bool,
+) -> None:
+    path = tmp_text_file(LONG_LINE_CONTENT)
+    options = PatternMatchingOptions(invert_match, False, False)
+    input_processor = LineMatchProcessor(
+        FileReader(max_line_length=8),
+        {InputType.TEXT: TextPatternMatcher([pattern], options)},
+        bulk_line_matcher=(
+            BulkLineMatcher([pattern], options) if bulk else None
+        ),
+        max_line_length=8,
+    )
+
+    assert [
+        (output.line_number, output.byte_offset, output.line, output.matches)
+        for output in input_processor.process(path)
+    ] == expected_lines
+
+
+@pytest.mark.parametrize("invert_match", [False, True])
+def test_line_match_counter_processor_long_lines(
+    tmp_text_file: Callable[[str], Path],
+    monkeypatch: pytest.MonkeyPatch,
+    invert_match: bool,
+) -> None:
+    monkeypatch.setattr("python_grep.storage.file_reader.READ_BLOCK_SIZE", 4)
+    path = tmp_text_file(LONG_LINE_CONTENT)
+    options = PatternMatchingOptions(invert_match, False, False)
+    input_processor = LineMatchCounterProcessor(
+        FileReader(max_line_length=8),
+        {InputType.TEXT: TextPatternMatcher(["t"], options)},
+        BulkLineMatcher(["t"], options),
+    )
+
+    (result,) = input_processor.process(path)
+
+    assert result.match_count == (1 if invert_match else 2)
+
+
+def test_invert_match_processor_long_lines(
+    tmp_text_file: Callable[[str], Path], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("python_grep.storage.file_reader.READ_BLOCK_SIZE", 4)
+    path = tmp_text_file(LONG_LINE_CONTENT)
+    pattern_matcher = TextPatternMatcher(
+        ["end"], PatternMatchingOptions(True, False, False)
+    )
+    input_processor = InvertMatchProcessor(
+        FileReader(max_line_length=8), {InputType.TEXT: pattern_matcher}
+    )
+
+    assert [
+        (output.line_number, output.byte_offset, output.line)
+        for output in input_processor.process(path)
+    ] == [(1, 0, "short"), (2, 6, "abcd")]
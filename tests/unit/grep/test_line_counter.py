@@ -0,0 +1,16 @@
+from python_grep.grep.line_counter import LineCounter
+
+
+def test_line_counter_count_line() -> None:
+    line_counter = LineCounter()
+    line_counter.count_line()
+    line_counter.count_line()
+
+    assert line_counter.line_number == 3
+
+
+def test_line_counter_count_buffer() -> None:
+    line_counter = LineCounter(10)
+    line_counter.count_buffer(b"a\nb\nc\nd", 2)
+
+    assert line_counter.line_number == 12
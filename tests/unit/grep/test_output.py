@@ -1,4 +1,6 @@
+import json
 from pathlib import Path
+from typing import List, Optional
 
 import pytest
 
@@ -6,7 +8,11 @@ from python_grep.grep.base import ProcessingOutput
 from python_grep.grep.context import (
     OutputControlOptions,
 )
-from python_grep.grep.output import OutputMessageBuilder
+from python_grep.grep.output import (
+    JsonOutputMessageBuilder,
+    OutputMessageBuilder,
+    create_preview,
+)
 from python_grep.match import MatchPosition
 from python_grep.storage import InputType
 
@@ -47,6 +53,25 @@ OUTPUT_MESSAGE_BUILD_TEST_INPUT = [
         ),
         "file.txt:10:15",
     ),
+    (
+        ProcessingOutput(
+            matches=[MatchPosition(start=5, end=7)],
+            path=Path("file.txt"),
+            input_type=InputType.TEXT,
+            line_number=10,
+            line="Test line",
+            byte_offset=120,
+        ),
+        OutputControlOptions(
+            line_number=True,
+            recursive=False,
+            color=False,
+            count=False,
+            treat_binary_as_text=False,
+            byte_offset=True,
+        ),
+        "file.txt:10:120:Test line",
+    ),
 ]
 
 
@@ -63,3 +88,210 @@ def test_output_message_builder_create(
         processing_output
     )
     assert message == expected_output_str
+
+
+def test_json_output_message_builder_create() -> None:
+    processing_output = ProcessingOutput(
+        matches=[MatchPosition(start=2, end=5)],
+        path=Path("file.txt"),
+        input_type=InputType.TEXT,
+        line_number=3,
+        line="zé abc",
+        byte_offset=100,
+    )
+    output_control_options = OutputControlOptions(
+        line_number=False,
+        recursive=False,
+        color=False,
+        count=False,
+        treat_binary_as_text=False,
+        json=True,
+    )
+    message = JsonOutputMessageBuilder(output_control_options, "utf-8").create(
+        processing_output
+    )
+
+    assert json.loads(message) == {
+        "path": "file.txt",
+        "line": "zé abc",
+        "line_number": 3,
+        "byte_offset": 100,
+        "matches": [
+            {"start": 2, "end": 5, "byte_start": 103, "byte_end": 106}
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "line_number, byte_offset, expected_output_str",
+    [
+        (False, False, "file.txt:a\nfile.txt:\nfile.txt:é"),
+        (True, True, "file.txt:3:10:a\nfile.txt:4:12:\nfile.txt:5:13:é"),
+    ],
+)
+def test_output_message_builder_create_for_several_lines(
+    line_number: bool, byte_offset: bool, expected_output_str: str
+) -> None:
+    processing_output = ProcessingOutput(
+        matches=None,
+        path=Path("file.txt"),
+        input_type=InputType.TEXT,
+        line_number=3,
+        line="a\n\né",
+        byte_offset=10,
+        line_count=3,
+    )
+    output_control_options = OutputControlOptions(
+        line_number=line_number,
+        recursive=False,
+        color=False,
+        count=False,
+        treat_binary_as_text=False,
+        byte_offset=byte_offset,
+    )
+    message = OutputMessageBuilder(output_control_options).create(
+        processing_output
+    )
+
+    assert message == expected_output_str
+
+
+def test_output_message_builder_create_count_without_byte_offset() -> None:
+    processing_output = ProcessingOutput(
+        matches=None,
+        path=Path("t.txt"),
+        input_type=InputType.TEXT,
+        line="",
+        line_number=0,
+        byte_offset=0,
+        match_count=3,
+    )
+    output_control_options = OutputControlOptions(
+        line_number=False,
+        recursive=False,
+        color=False,
+        count=True,
+        treat_binary_as_text=False,
+        byte_offset=True,
+    )
+
+    message = OutputMessageBuilder(output_control_options).create(
+        processing_output
+    )
+
+    assert message == "t.txt:3"
+
+
+def test_json_output_message_builder_create_for_several_lines() -> None:
+    processing_output = ProcessingOutput(
+        matches=None,
+        path=Path("file.txt"),
+        input_type=InputType.TEXT,
+        line_number=None,
+        line="é\0b",
+        byte_offset=4,
+        line_count=2,
+    )
+    output_control_options = OutputControlOptions(
+        line_number=False,
+        recursive=False,
+        color=False,
+        count=False,
+        treat_binary_as_text=False,
+        json=True,
+    )
+    messages = JsonOutputMessageBuilder(
+        output_control_options, line_separator="\0"
+    ).create(processing_output)
+
+    assert [json.loads(message) for message in messages.split("\0")] == [
+        {
+            "path": "file.txt",
+            "line": "é",
+            "line_number": None,
+            "byte_offset": 4,
+            "matches": [],
+        },
+        {
+            "path": "file.txt",
+            "line": "b",
+            "line_number": None,
+            "byte_offset": 7,
+            "matches": [],
+        },
+    ]
+
+
+@pytest.mark.parametrize(
+    "line, matches, expected_line, expected_matches, expected_byte_offset",
+    [
+        ("short", [MatchPosition(0, 2)], "short", [MatchPosition(0, 2)], 7),
+        (
+            "0123456789abcdef",
+            [MatchPosition(10, 12), MatchPosition(14, 16)],
+            "9abc",
+            [MatchPosition(1, 3)],
+            16,
+        ),
+        (
+            "é123456789",
+            [MatchPosition(5, 6)],
+            "4567",
+            [MatchPosition(1, 2)],
+            12,
+        ),
+        ("0123456789", None, "0123", None, 7),
+    ],
+)
+def test_create_preview(
+    line: str,
+    matches: Optional[List[MatchPosition]],
+    expected_line: str,
+    expected_matches: Optional[List[MatchPosition]],
+    expected_byte_offset: int,
+) -> None:
+    preview = create_preview(
+        ProcessingOutput(
+            matches=matches,
+            path=Path("file.txt"),
+            input_type=InputType.TEXT,
+            line=line,
+            line_number=1,
+            byte_offset=7,
+        ),
+        max_columns=5 if line == "short" else 4,
+        encoding="utf-8",
+    )
+
+    assert (preview.line, preview.matches, preview.byte_offset) == (
+        expected_line,
+        expected_matches,
+        expected_byte_offset,
+    )
+
+
+def test_output_message_builder_create_with_max_columns() -> None:
+    output_message_builder = OutputMessageBuilder(
+        OutputControlOptions(
+            line_number=False,
+            recursive=False,
+            color=False,
+            count=False,
+            treat_binary_as_text=False,
+            max_columns=4,
+        )
+    )
+
+    assert (
+        output_message_builder.create(
+            ProcessingOutput(
+                matches=None,
+                path=Path("file.txt"),
+                input_type=InputType.TEXT,
+                line="first line\nsecond line",
+                line_number=1,
+                line_count=2,
+            )
+        )
+        == "file.txt:firs\nfile.txt:seco"
+    )
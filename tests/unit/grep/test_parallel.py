@@ -0,0 +1,203 @@
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from pytest_mock import MockerFixture
+
+from python_grep.grep.context import (
+    ContextControlOptions,
+    PatternMatchingOptions,
+)
+from python_grep.grep import shared_records
+from python_grep.grep.input_processor import (
+    AfterContextLineMatchProcessor,
+    BeforeContextLineMatchProcessor,
+    LineMatchCounterProcessor,
+    LineMatchProcessor,
+)
+from python_grep.grep.parallel import (
+    ParallelInputProcessor,
+    RangeScanOptions,
+    RecordOutputOptions,
+    init_range_worker,
+    scan_range,
+    split_into_ranges,
+)
+from python_grep.match import BinaryPatternMatcher, TextPatternMatcher
+from python_grep.storage import FileReader, InputType
+
+FILE_CONTENT = "".join(
+    f"line {i} {'match' if i % 7 in (0, 1) else 'other'}\n" for i in range(60)
+)
+OPTIONS = PatternMatchingOptions(
+    invert_match=False, word_regexp=False, ignore_case=False
+)
+
+
+@pytest.fixture
+def pattern_matcher_map():
+    return {
+        InputType.TEXT: TextPatternMatcher(["match"], OPTIONS),
+        InputType.BINARY: BinaryPatternMatcher(["match"], OPTIONS),
+    }
+
+
+def test_split_into_ranges(tmp_text_file: Callable[[str], Path]) -> None:
+    path = tmp_text_file("aaaa\nbbbb\ncccc\ndddd\n")
+
+    assert split_into_ranges(path, 0, 20, 3) == [(0, 10), (10, 15), (15, 20)]
+
+
+@pytest.mark.parametrize(
+    "context_control_options, processor_type, range_scan_options",
+    [
+        (
+            ContextControlOptions(3, 0),
+            BeforeContextLineMatchProcessor,
+            RangeScanOptions(before_context=3),
+        ),
+        (
+            ContextControlOptions(0, 9),
+            AfterContextLineMatchProcessor,
+            RangeScanOptions(after_context=9),
+        ),
+    ],
+)
+def test_parallel_input_processor_context_across_ranges(
+    tmp_text_file: Callable[[str], Path],
+    pattern_matcher_map,
+    context_control_options: ContextControlOptions,
+    processor_type,
+    range_scan_options: RangeScanOptions,
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    input_processor = processor_type(
+        FileReader(), pattern_matcher_map, context_control_options
+    )
+    parallel_input_processor = ParallelInputProcessor(
+        input_processor,
+        FileReader(),
+        pattern_matcher_map[InputType.TEXT],
+        range_scan_options,
+        jobs=2,
+        split_size=50,
+    )
+
+    assert list(parallel_input_processor.process(path)) == list(
+        input_processor.process(path)
+    )
+
+
+def test_parallel_input_processor_count(
+    tmp_text_file: Callable[[str], Path], pattern_matcher_map
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    parallel_input_processor = ParallelInputProcessor(
+        LineMatchCounterProcessor(FileReader(), pattern_matcher_map),
+        FileReader(),
+        pattern_matcher_map[InputType.TEXT],
+        RangeScanOptions(count=True),
+        jobs=2,
+        split_size=100,
+    )
+
+    (result,) = parallel_input_processor.process(path)
+
+    assert result.match_count == 18
+
+
+def test_split_into_ranges_skips_long_lines(
+    tmp_text_file: Callable[[str], Path],
+) -> None:
+    path = tmp_text_file("a" * 30 + "\nbbbb\ncccc\n")
+
+    assert split_into_ranges(path, 0, 41, 4, max_line_length=8) == [
+        (0, 31),
+        (31, 41),
+    ]
+
+
+def test_parallel_input_processor_falls_back_for_long_lines(
+    tmp_text_file: Callable[[str], Path],
+    pattern_matcher_map,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Lines are streamed through rings, which are released, including
+    # those of ranges following the failed one.
+    monkeypatch.setattr("python_grep.grep.parallel.CHUNK_SIZE", 0)
+    monkeypatch.setattr(shared_records, "RING_CAPACITY", 64)
+    shared_memory_dir = Path(shared_records.SHARED_MEMORY_DIR)
+    segments = set(shared_memory_dir.glob("psm_*"))
+    path = tmp_text_file(FILE_CONTENT + "match " * 20 + "\n" + FILE_CONTENT)
+    input_processor = AfterContextLineMatchProcessor(
+        FileReader(max_line_length=64),
+        pattern_matcher_map,
+        ContextControlOptions(0, 1),
+    )
+    parallel_input_processor = ParallelInputProcessor(
+        input_processor,
+        FileReader(),
+        pattern_matcher_map[InputType.TEXT],
+        RangeScanOptions(after_context=1, max_line_length=64),
+        jobs=2,
+        split_size=200,
+    )
+
+    assert list(parallel_input_processor.process(path)) == list(
+        input_processor.process(path)
+    )
+    assert set(shared_memory_dir.glob("psm_*")) == segments
+
+
+@pytest.mark.parametrize(
+    "record_output, line_prefix",
+    [
+        (RecordOutputOptions(), ""),
+        (RecordOutputOptions(line_number=True, byte_offset=True), "{}:{}:"),
+    ],
+)
+def test_parallel_input_processor_writes_records(
+    tmp_text_file: Callable[[str], Path],
+    pattern_matcher_map,
+    capsys: pytest.CaptureFixture[str],
+    record_output: RecordOutputOptions,
+    line_prefix: str,
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    parallel_input_processor = ParallelInputProcessor(
+        LineMatchProcessor(FileReader(), pattern_matcher_map),
+        FileReader(),
+        pattern_matcher_map[InputType.TEXT],
+        RangeScanOptions(),
+        jobs=2,
+        split_size=100,
+        record_output=record_output,
+    )
+    print("before")
+
+    assert list(parallel_input_processor.process(path)) == []
+    offsets = [0]
+    for line in FILE_CONTENT.splitlines(keepends=True):
+        offsets.append(offsets[-1] + len(line))
+    assert capsys.readouterr().out == "before\n" + "".join(
+        f"{path}:{line_prefix.format(index + 1, offsets[index])}{line}\n"
+        for index, line in enumerate(FILE_CONTENT.splitlines())
+        if "match" in line
+    )
+
+
+def test_scan_range_drops_range_from_page_cache(
+    tmp_text_file: Callable[[str], Path],
+    pattern_matcher_map,
+    mocker: MockerFixture,
+) -> None:
+    advise_dont_need_mock = mocker.patch(
+        "python_grep.grep.parallel.advise_dont_need"
+    )
+    path = tmp_text_file(FILE_CONTENT)
+    init_range_worker(pattern_matcher_map[InputType.TEXT])
+
+    result = scan_range(path, (0, 26), RangeScanOptions(drop_cache=True))
+
+    assert result.line_count == 2
+    advise_dont_need_mock.assert_called_once_with(mocker.ANY, 0, 26)
@@ -0,0 +1,182 @@
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from pytest_mock import MockFixture
+
+from python_grep.grep.base import ProcessingOutput
+from python_grep.grep.input_processor import CachingInputProcessor
+from python_grep.grep.result_cache import MemoryResultCache, ResultCache
+from python_grep.match import MatchPosition
+from python_grep.storage import InputType
+
+TEXT_OUTPUT = ProcessingOutput(
+    matches=[MatchPosition(0, 4)],
+    path=Path("file.txt"),
+    input_type=InputType.TEXT,
+    line="test line",
+    line_number=3,
+    byte_offset=20,
+)
+BINARY_OUTPUT = ProcessingOutput(
+    matches=None,
+    path=Path("file.bin"),
+    input_type=InputType.BINARY,
+    line=b"\x00test",
+    line_number=None,
+)
+
+
+def test_result_cache_put_and_get(tmp_path: Path) -> None:
+    result_cache = ResultCache(tmp_path)
+    result_cache.put("key", "fingerprint", [TEXT_OUTPUT, BINARY_OUTPUT])
+
+    assert result_cache.get("key", "fingerprint") == [
+        TEXT_OUTPUT,
+        BINARY_OUTPUT,
+    ]
+
+
+def test_result_cache_get_with_changed_fingerprint(tmp_path: Path) -> None:
+    result_cache = ResultCache(tmp_path)
+    result_cache.put("key", "fingerprint", [TEXT_OUTPUT])
+
+    assert result_cache.get("key", "other fingerprint") is None
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    result_cache = ResultCache(tmp_path, max_size=300)
+    result_cache.put("key1", "fingerprint", [TEXT_OUTPUT])
+    result_cache.put("key2", "fingerprint", [TEXT_OUTPUT])
+    result_cache.get("key1", "fingerprint")
+    result_cache.put("key3", "fingerprint", [TEXT_OUTPUT])
+    result_cache.flush()
+
+    assert result_cache.get("key1", "fingerprint") == [TEXT_OUTPUT]
+    assert result_cache.get("key2", "fingerprint") is None
+    assert result_cache.get("key3", "fingerprint") == [TEXT_OUTPUT]
+
+
+def test_result_cache_commits_writes_on_flush(tmp_path: Path) -> None:
+    result_cache = ResultCache(tmp_path)
+    result_cache.put("key1", "fingerprint", [TEXT_OUTPUT])
+    result_cache.put("key2", "fingerprint", [BINARY_OUTPUT])
+
+    assert ResultCache(tmp_path).get("key1", "fingerprint") is None
+
+    result_cache.flush()
+    other_result_cache = ResultCache(tmp_path)
+
+    assert other_result_cache.get("key1", "fingerprint") == [TEXT_OUTPUT]
+    assert other_result_cache.get("key2", "fingerprint") == [BINARY_OUTPUT]
+
+
+def test_result_cache_keeps_total_size_of_replaced_entries(
+    tmp_path: Path,
+) -> None:
+    result_cache = ResultCache(tmp_path, max_size=300)
+    result_cache.put("key1", "fingerprint", [TEXT_OUTPUT])
+    for _ in range(3):
+        result_cache.put("key2", "fingerprint", [TEXT_OUTPUT])
+    result_cache.flush()
+
+    assert result_cache.get("key1", "fingerprint") == [TEXT_OUTPUT]
+    assert result_cache.get("key2", "fingerprint") == [TEXT_OUTPUT]
+
+
+def test_memory_result_cache_put_and_get() -> None:
+    result_cache = MemoryResultCache()
+    result_cache.put("key", "fingerprint", [TEXT_OUTPUT, BINARY_OUTPUT])
+
+    assert result_cache.get("key", "fingerprint") == [
+        TEXT_OUTPUT,
+        BINARY_OUTPUT,
+    ]
+    assert result_cache.get("key", "other fingerprint") is None
+
+
+def test_memory_result_cache_evicts_least_recently_used() -> None:
+    result_cache = MemoryResultCache(max_size=300)
+    result_cache.put("key1", "fingerprint", [TEXT_OUTPUT])
+    result_cache.put("key2", "fingerprint", [TEXT_OUTPUT])
+    result_cache.get("key1", "fingerprint")
+    result_cache.put("key3", "fingerprint", [TEXT_OUTPUT])
+
+    assert result_cache.get("key1", "fingerprint") == [TEXT_OUTPUT]
+    assert result_cache.get("key2", "fingerprint") is None
+    assert result_cache.get("key3", "fingerprint") == [TEXT_OUTPUT]
+
+
+def test_caching_input_processor_serves_cached_outputs(
+    tmp_path: Path, mocker: MockFixture
+) -> None:
+    path = tmp_path / "file.txt"
+    path.write_text("test line")
+    output = replace(TEXT_OUTPUT, path=path)
+    input_processor = mocker.Mock()
+    input_processor.process.return_value = iter([output])
+    caching_input_processor = CachingInputProcessor(
+        input_processor,
+        ResultCache(tmp_path / "cache"),
+        "query",
+        lambda _: "fingerprint",
+    )
+
+    first_results = list(caching_input_processor.process(path))
+    second_results = list(caching_input_processor.process(path))
+
+    input_processor.process.assert_called_once_with(path)
+    assert first_results == second_results == [output]
+
+
+def test_caching_input_processor_serves_outputs_with_given_path(
+    tmp_path: Path, mocker: MockFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "play").mkdir()
+    (tmp_path / "play" / "file.txt").write_text("test line")
+    input_processor = mocker.Mock()
+    input_processor.process.side_effect = lambda path: iter(
+        [replace(TEXT_OUTPUT, path=path)]
+    )
+    caching_input_processor = CachingInputProcessor(
+        input_processor,
+        MemoryResultCache(),
+        "query",
+        lambda _: "fingerprint",
+    )
+
+    monkeypatch.chdir(tmp_path / "play")
+    first_results = list(caching_input_processor.process(Path("file.txt")))
+    monkeypatch.chdir(tmp_path)
+    second_results = list(
+        caching_input_processor.process(Path("play/file.txt"))
+    )
+
+    input_processor.process.assert_called_once_with(Path("file.txt"))
+    assert [result.path for result in first_results] == [Path("file.txt")]
+    assert [result.path for result in second_results] == [
+        Path("play/file.txt")
+    ]
+
+
+def test_caching_input_processor_looks_files_up_ahead(
+    tmp_path: Path, mocker: MockFixture
+) -> None:
+    path = tmp_path / "file.txt"
+    path.write_text("test line")
+    output = replace(TEXT_OUTPUT, path=path)
+    input_processor = mocker.Mock()
+    input_processor.process.return_value = iter([output])
+    fingerprint_mock = mocker.Mock(return_value="fingerprint")
+    caching_input_processor = CachingInputProcessor(
+        input_processor, MemoryResultCache(), "query", fingerprint_mock
+    )
+
+    assert caching_input_processor.needs_reading(path)
+    assert list(caching_input_processor.process(path)) == [output]
+    assert not caching_input_processor.needs_reading(path)
+    assert list(caching_input_processor.process(path)) == [output]
+
+    assert fingerprint_mock.call_count == 2
+    input_processor.process.assert_called_once_with(path)
@@ -0,0 +1,202 @@
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+from _pytest.capture import CaptureFixture
+from pytest_mock import MockFixture
+
+from python_grep.grep.base import ProcessingOutput
+from python_grep.grep.context import PatternMatchingOptions
+from python_grep.grep.input_processor import LineMatchProcessor
+from python_grep.grep.output import OutputMessageBuilder
+from python_grep.grep.scheduler import FileScheduler, FileSearcher
+from python_grep.grep.shared_records import unpack_outputs
+from python_grep.match import (
+    BinaryPatternMatcher,
+    MatchPosition,
+    TextPatternMatcher,
+)
+from python_grep.storage import FileReader, InputType
+
+OPTIONS = PatternMatchingOptions(
+    invert_match=False, word_regexp=False, ignore_case=False
+)
+
+
+@pytest.fixture
+def file_searcher(mocker: MockFixture) -> FileSearcher:
+    pattern_matcher_map = {
+        InputType.TEXT: TextPatternMatcher(["match"], OPTIONS),
+        InputType.BINARY: BinaryPatternMatcher(["match"], OPTIONS),
+    }
+    output_control_options = mocker.Mock(
+        with_filename=True,
+        line_number=False,
+        byte_offset=False,
+        color=False,
+        json=False,
+        max_columns=None,
+        treat_binary_as_text=False,
+        count=False,
+    )
+    return FileSearcher(
+        LineMatchProcessor(FileReader(), pattern_matcher_map, False),
+        OutputMessageBuilder(output_control_options),
+    )
+
+
+@pytest.fixture
+def files(tmp_path: Path) -> List[Path]:
+    paths = []
+    for index in range(7):
+        path = tmp_path / f"file{index}.txt"
+        path.write_text(f"match {index}\nother {index}\n")
+        paths.append(path)
+    return paths
+
+
+def test_file_searcher_search_captured(
+    file_searcher: FileSearcher, tmp_path: Path
+) -> None:
+    text_path = tmp_path / "text.txt"
+    text_path.write_text("match\nother\n")
+    binary_path = tmp_path / "binary.bin"
+    binary_path.write_bytes(b"\0match\0")
+
+    text_result = file_searcher.search_captured(text_path, keep_outputs=True)
+    binary_result = file_searcher.search_captured(
+        binary_path, keep_outputs=True
+    )
+    missing_result = file_searcher.search_captured(tmp_path / "missing.txt")
+
+    assert text_result.text == f"{text_path}:match\n"
+    assert text_result.outputs is not None
+    assert unpack_outputs(text_result.outputs, text_path) == [
+        ProcessingOutput(
+            matches=[MatchPosition(0, 5)],
+            path=text_path,
+            input_type=InputType.TEXT,
+            line="match",
+            line_number=None,
+        )
+    ]
+    assert binary_result.text == f"Binary file {binary_path} matches\n"
+    assert binary_result.outputs is None
+    assert missing_result.text == (
+        f"grep: {tmp_path / 'missing.txt'}: No such file or directory\n"
+    )
+
+
+def test_file_scheduler_batches_files_in_order(
+    file_searcher: FileSearcher,
+    files: List[Path],
+    capsys: CaptureFixture[str],
+) -> None:
+    large_file = files[3]
+    large_file.write_text("match large\n" * 10)
+    input_processor = LineMatchProcessor(
+        FileReader(),
+        {InputType.TEXT: TextPatternMatcher(["large"], OPTIONS)},
+        False,
+    )
+
+    with FileScheduler(
+        file_searcher,
+        TextPatternMatcher(["match"], OPTIONS),
+        jobs=2,
+        large_file_size=100,
+        max_batch_files=2,
+    ) as scheduler:
+        scheduler.run(files, input_processor)
+
+    expected_lines = [
+        f"{path}:match {index}" for index, path in enumerate(files)
+    ]
+    expected_lines[3:4] = [f"{large_file}:match large"] * 10
+    assert capsys.readouterr().out.splitlines() == expected_lines
+
+
+def test_file_scheduler_searches_single_batch_in_process(
+    file_searcher: FileSearcher,
+    files: List[Path],
+    capsys: CaptureFixture[str],
+    mocker: MockFixture,
+) -> None:
+    with FileScheduler(
+        file_searcher, TextPatternMatcher(["match"], OPTIONS), jobs=2
+    ) as scheduler:
+        submit = mocker.spy(scheduler.executor, "submit")
+        scheduler.run(files, mocker.Mock())
+
+    submit.assert_not_called()
+    assert capsys.readouterr().out.splitlines() == [
+        f"{path}:match {index}" for index, path in enumerate(files)
+    ]
+
+
+def test_file_scheduler_uses_result_cache(
+    file_searcher: FileSearcher,
+    files: List[Path],
+    capsys: CaptureFixture[str],
+    mocker: MockFixture,
+) -> None:
+    cached_output = ProcessingOutput(
+        matches=None,
+        path=files[1],
+        input_type=InputType.TEXT,
+        line="cached",
+        line_number=None,
+        match_count=1,
+    )
+    caching_input_processor = mocker.Mock()
+    caching_input_processor.lookup.side_effect = lambda path: (
+        ("fingerprint", [cached_output])
+        if path == files[1]
+        else ("fingerprint", None)
+    )
+
+    with FileScheduler(
+        file_searcher,
+        TextPatternMatcher(["match"], OPTIONS),
+        jobs=2,
+        max_batch_files=1,
+    ) as scheduler:
+        scheduler.run(
+            files[:3], caching_input_processor, caching_input_processor
+        )
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"{files[0]}:match 0",
+        f"{files[1]}:cached",
+        f"{files[2]}:match 2",
+    ]
+    stored = {
+        call.args[0]: [output.line for output in call.args[2]]
+        for call in caching_input_processor.store.call_args_list
+    }
+    assert stored == {files[0]: ["match 0"], files[2]: ["match 2"]}
+
+
+def test_file_searcher_search_time_budget_exceeded(
+    tmp_path: Path, mocker: MockFixture
+) -> None:
+    def process_slowly(path: Path) -> Iterator[ProcessingOutput]:
+        time.sleep(5)
+        yield from ()
+
+    path = tmp_path / "slow.txt"
+    path.write_text("match\n")
+    input_processor = mocker.Mock()
+    input_processor.process.side_effect = process_slowly
+    file_searcher = FileSearcher(
+        input_processor, mocker.Mock(), time_budget=0.05
+    )
+
+    result = file_searcher.search_captured(path, keep_outputs=True)
+
+    assert result.text == (
+        f"grep: {path}: time budget of 0.05 s exceeded, rest of the file "
+        "skipped\n"
+    )
+    assert result.outputs is None
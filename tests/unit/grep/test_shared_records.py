@@ -0,0 +1,171 @@
+import io
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from python_grep.grep.base import ProcessingOutput
+from python_grep.grep.shared_records import (
+    LineRecord,
+    LineRecordWriter,
+    PackedLines,
+    RecordRing,
+    pack_outputs,
+    read_line_records,
+    unpack_outputs,
+    write_line_records,
+)
+from python_grep.match import MatchPosition
+from python_grep.storage import InputType
+
+RECORDS: List[LineRecord] = [
+    (0, 0, "zażółć match", [MatchPosition(7, 12)]),
+    (1, 20, "context", None),
+    (3, 35, "", None),
+    (4, 36, "match and match", [MatchPosition(0, 5), MatchPosition(10, 15)]),
+]
+
+
+def pack_records(records: List[LineRecord]) -> PackedLines:
+    line_record_writer = LineRecordWriter()
+    for index, offset, line, matches in records:
+        line_record_writer.add(index, offset, line.encode(), matches)
+    return line_record_writer.pack()
+
+
+def test_read_line_records() -> None:
+    packed_lines = pack_records(RECORDS)
+
+    assert read_line_records(packed_lines, "utf-8") == RECORDS
+
+
+def test_pack_without_lines() -> None:
+    packed_lines = LineRecordWriter().pack()
+
+    assert packed_lines.data == b""
+    assert read_line_records(packed_lines, "utf-8") == []
+
+
+def test_pack_starts_over() -> None:
+    line_record_writer = LineRecordWriter()
+    line_record_writer.add(0, 0, b"first", [MatchPosition(0, 5)])
+    line_record_writer.pack()
+    line_record_writer.add(1, 6, b"second", [MatchPosition(0, 6)])
+
+    assert line_record_writer.size == 5 * 8 + len(b"second\n")
+    assert read_line_records(line_record_writer.pack(), "utf-8") == [
+        (1, 6, "second", [MatchPosition(0, 6)])
+    ]
+
+
+@pytest.mark.parametrize(
+    "first_line_number, byte_offsets, expected",
+    [
+        (
+            None,
+            False,
+            "f:zażółć match\nf:context\nf:\nf:match and match\n",
+        ),
+        (
+            10,
+            True,
+            "f:10:0:zażółć match\nf:11:20:context\nf:13:35:\n"
+            "f:14:36:match and match\n",
+        ),
+    ],
+)
+def test_write_line_records(
+    first_line_number: Optional[int], byte_offsets: bool, expected: str
+) -> None:
+    stream = io.BytesIO()
+
+    last_offset = write_line_records(
+        pack_records(RECORDS), stream, b"f:", first_line_number, byte_offsets
+    )
+
+    assert stream.getvalue().decode() == expected
+    assert last_offset == 36
+
+
+def test_record_ring_passes_frames_larger_than_it() -> None:
+    ring = RecordRing.create(capacity=64)
+    assert ring is not None
+    writer = RecordRing.attach(ring.name)
+    assert writer is not None
+    frames = [pack_records(RECORDS), pack_records(RECORDS[1:2])]
+
+    def write() -> None:
+        for packed_lines in frames:
+            assert writer.write(packed_lines)
+        writer.close_writer()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    read_frames = []
+    while (packed_lines := ring.read(lambda: False)) is not None:
+        read_frames.append(packed_lines)
+    thread.join()
+    ring.close_reader()
+
+    assert read_frames == frames
+    assert RecordRing.attach(ring.name) is None
+
+
+def test_record_ring_writer_stops_once_abandoned() -> None:
+    ring = RecordRing.create(capacity=64)
+    assert ring is not None
+    writer = RecordRing.attach(ring.name)
+    assert writer is not None
+
+    ring.close_reader()
+
+    assert not writer.write(pack_records(RECORDS))
+    writer.close_writer()
+
+
+def test_record_ring_read_ends_once_writer_is_done() -> None:
+    ring = RecordRing.create(capacity=64)
+    assert ring is not None
+
+    assert ring.read(lambda: True) is None
+    ring.close_reader()
+
+
+def test_pack_outputs() -> None:
+    path = Path("f.txt")
+    outputs = [
+        ProcessingOutput(
+            matches=[MatchPosition(7, 12)],
+            path=path,
+            input_type=InputType.TEXT,
+            line="zażółć match",
+            line_number=3,
+            byte_offset=40,
+        ),
+        ProcessingOutput(
+            matches=None,
+            path=path,
+            input_type=InputType.TEXT,
+            line="a\nb",
+            line_number=None,
+            line_count=2,
+        ),
+        ProcessingOutput(
+            matches=[MatchPosition(0, 1), MatchPosition(2, 3)],
+            path=path,
+            input_type=InputType.BINARY,
+            line=b"\x00a\xff",
+            line_number=0,
+            match_count=2,
+        ),
+        ProcessingOutput(
+            matches=[],
+            path=path,
+            input_type=InputType.TEXT,
+            line="",
+            line_number=1,
+        ),
+    ]
+
+    assert unpack_outputs(pack_outputs(outputs), path) == outputs
@@ -0,0 +1,34 @@
+import signal
+import time
+
+import pytest
+
+from python_grep.grep.exceptions import TimeBudgetExceededError
+from python_grep.grep.time_budget import time_budget
+
+
+def test_time_budget_exceeded() -> None:
+    previous_handler = signal.getsignal(signal.SIGALRM)
+    started = time.monotonic()
+
+    with pytest.raises(TimeBudgetExceededError, match="0.05 s exceeded"):
+        with time_budget(0.05):
+            time.sleep(5)
+
+    assert time.monotonic() - started < 1
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+    assert signal.getsignal(signal.SIGALRM) is previous_handler
+
+
+def test_time_budget_kept() -> None:
+    with time_budget(5):
+        time.sleep(0.01)
+
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+def test_time_budget_unlimited() -> None:
+    with time_budget(None):
+        time.sleep(0.01)
+
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
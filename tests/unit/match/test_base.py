@@ -0,0 +1,46 @@
+import pickle
+from array import array
+
+from python_grep.match import MatchBatch, MatchPosition, MatchPositions
+
+
+def test_match_batch_iter_lines() -> None:
+    match_batch = MatchBatch()
+    match_batch.add(0, [(0, 2), (3, 5)])
+    match_batch.add(2, [])
+    match_batch.add_empty(range(3, 5))
+    match_batch.add(7, [(1, 4)])
+
+    assert match_batch.line_indexes == array("l", [0, 3, 4, 7])
+    assert list(match_batch.iter_lines()) == [
+        (0, [MatchPosition(0, 2), MatchPosition(3, 5)]),
+        (3, [MatchPosition(0, 0)]),
+        (4, [MatchPosition(0, 0)]),
+        (7, [MatchPosition(1, 4)]),
+    ]
+
+
+def test_empty_match_batch_iter_lines() -> None:
+    assert list(MatchBatch().iter_lines()) == []
+
+
+def test_match_positions_view() -> None:
+    match_batch = MatchBatch()
+    match_batch.add(0, [(0, 1)])
+    match_batch.add(1, [(0, 2), (3, 5), (6, 7)])
+    (_, first_positions), (_, positions) = match_batch.iter_lines()
+
+    assert isinstance(positions, MatchPositions)
+    assert len(positions) == 3
+    assert positions[0] == MatchPosition(0, 2)
+    assert positions[-1] == MatchPosition(6, 7)
+    assert positions[1:] == [MatchPosition(3, 5), MatchPosition(6, 7)]
+    assert positions.starts == array("l", [0, 3, 6])
+    assert positions.ends == array("l", [2, 5, 7])
+    assert first_positions == [MatchPosition(0, 1)]
+    assert first_positions != positions
+    assert pickle.loads(pickle.dumps(positions)) == [
+        MatchPosition(0, 2),
+        MatchPosition(3, 5),
+        MatchPosition(6, 7),
+    ]
@@ -0,0 +1,129 @@
+import re
+from typing import AnyStr, List, Optional, Tuple
+
+import pytest
+
+from python_grep.match.boundaries import (
+    BoundedRegex,
+    compile_bounded_regexes,
+    wrap_pattern,
+)
+
+
+@pytest.mark.parametrize(
+    "pattern, line_regexp, line_separator, string, expected_spans",
+    [
+        ("ab", False, None, "ab xab ab_ ab-ab", [(0, 2), (11, 13), (14, 16)]),
+        ("-foo", False, None, "a-foo -foo", [(6, 10)]),
+        ("ab|abc", False, None, "abc ab", [(0, 3), (4, 6)]),
+        ("ab+", False, None, "abb xab ab", [(0, 3), (8, 10)]),
+        (b"caf\xe9", False, None, b"caf\xe9 caf\xe9x", [(0, 4)]),
+        ("ab", True, None, "ab", [(0, 2)]),
+        ("ab", True, None, "ab\n", []),
+        ("ab", True, "\n", "ab\nxab\nab", [(0, 2), (7, 9)]),
+        ("ab", True, "\0", "ab\0ab\nab\0", [(0, 2)]),
+        (b"a.", True, b"\0", b"ab\0a\n\0ax", [(0, 2), (6, 8)]),
+    ],
+)
+def test_compile_bounded_regexes_finditer(
+    pattern: AnyStr,
+    line_regexp: bool,
+    line_separator: Optional[AnyStr],
+    string: AnyStr,
+    expected_spans: List[Tuple[int, int]],
+) -> None:
+    (regex,) = compile_bounded_regexes(
+        (pattern,), 0, "backtracking", line_regexp, line_separator
+    )
+
+    assert isinstance(regex, BoundedRegex)
+    assert [
+        (match.start(), match.end()) for match in regex.finditer(string)
+    ] == (expected_spans)
+
+
+@pytest.mark.parametrize(
+    "pattern, string, pos, expected_span",
+    [
+        ("ab|a", "abc a", 0, (4, 5)),
+        ("a|ab", "abc ab", 0, (4, 6)),
+        ("ab", "xab ab", 0, (4, 6)),
+        ("ab", "ab ab", 1, (3, 5)),
+        ("ab", "abc", 0, None),
+    ],
+)
+def test_bounded_regex_search(
+    pattern: str,
+    string: str,
+    pos: int,
+    expected_span: Optional[Tuple[int, int]],
+) -> None:
+    (regex,) = compile_bounded_regexes((pattern,), 0, "backtracking", False)
+    match = regex.search(string, pos)
+
+    assert ((match.start(), match.end()) if match else None) == expected_span
+
+
+def test_bounded_regex_search_shorter_match() -> None:
+    (regex,) = compile_bounded_regexes(
+        ("a(?:b|bc)",), 0, "backtracking", False
+    )
+    match = regex.search("ab-abc")
+
+    assert match is not None
+    assert (match.start(), match.end()) == (0, 2)
+
+
+def test_bounded_regex_match() -> None:
+    (regex,) = compile_bounded_regexes(("ab|abc",), 0, "backtracking", False)
+
+    match = regex.match("abc", 0)
+    assert match is not None
+    assert (match.start(), match.end()) == (0, 3)
+    assert regex.match("xabc", 1) is None
+
+
+@pytest.mark.parametrize("regex_engine", ["backtracking", "linear"])
+def test_compile_bounded_regexes_case_insensitive(regex_engine: str) -> None:
+    (regex,) = compile_bounded_regexes(
+        ("hello",), re.IGNORECASE, regex_engine, False
+    )
+
+    assert [
+        (match.start(), match.end())
+        for match in regex.finditer("HeLLo helloX")
+    ] == [(0, 5)]
+
+
+def test_compile_bounded_regexes_without_literal_prefix() -> None:
+    (regex,) = compile_bounded_regexes(("[a-z]+ing",), 0, "auto", False)
+
+    assert not isinstance(regex, BoundedRegex)
+    assert [
+        (match.start(), match.end())
+        for match in regex.finditer("sing xing9 ring")
+    ] == [
+        (0, 4),
+        (11, 15),
+    ]
+
+
+@pytest.mark.parametrize(
+    "pattern, line_regexp, line_separator, expected",
+    [
+        ("ab", False, None, r"(?<!\w)(?:ab)(?!\w)"),
+        ("ab", True, None, r"\A(?:ab)\Z"),
+        ("ab", True, "\n", "(?m:^)(?:ab)(?m:$)"),
+        ("ab", True, "|", r"(?:\A|(?<=\|))(?:ab)(?=\||\Z)"),
+        ("(?i)ab", False, None, r"(?i)(?<!\w)(?:ab)(?!\w)"),
+        ("(?x)a b # c", True, None, "(?x)\\A(?:a b # c\n)\\Z"),
+        (b"ab", True, b"\n", b"(?m:^)(?:ab)(?m:$)"),
+    ],
+)
+def test_wrap_pattern(
+    pattern: AnyStr,
+    line_regexp: bool,
+    line_separator: Optional[AnyStr],
+    expected: AnyStr,
+) -> None:
+    assert wrap_pattern(pattern, line_regexp, line_separator) == expected
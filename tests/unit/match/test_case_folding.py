@@ -0,0 +1,121 @@
+import pickle
+import re
+from typing import AnyStr, List, Tuple
+
+import pytest
+
+from python_grep.match.case_folding import (
+    CaseFoldedRegex,
+    compile_case_folded,
+)
+
+
+@pytest.mark.parametrize(
+    "pattern, flags, string, expected_spans",
+    [
+        (
+            "hello",
+            re.IGNORECASE,
+            "Hello HELLO hello",
+            [(0, 5), (6, 11), (12, 17)],
+        ),
+        (r"[A-C]+\d", re.IGNORECASE, "xaBc1 cb2", [(1, 5), (6, 9)]),
+        ("[^X]y", re.IGNORECASE, "xy Xy zY", [(6, 8)]),
+        (
+            r"\bERR(or|no)\b",
+            re.IGNORECASE,
+            "errno Error errors",
+            [(0, 5), (6, 11)],
+        ),
+        (
+            "^ab$",
+            re.IGNORECASE | re.MULTILINE,
+            "AB\nab\nabc",
+            [(0, 2), (3, 5)],
+        ),
+        (
+            b"caf\xc9",
+            re.IGNORECASE,
+            b"CAF\xc9 caf\xc9 caf\xe9",
+            [(0, 4), (5, 9)],
+        ),
+    ],
+)
+def test_case_folded_regex_finditer(
+    pattern: AnyStr,
+    flags: int,
+    string: AnyStr,
+    expected_spans: List[Tuple[int, int]],
+) -> None:
+    regex = compile_case_folded(pattern, flags)
+
+    assert isinstance(regex, CaseFoldedRegex)
+    spans = [match.span() for match in regex.finditer(string)]
+    assert spans == expected_spans
+    assert [
+        match.span() for match in re.finditer(pattern, string, flags)
+    ] == expected_spans
+
+
+@pytest.mark.parametrize(
+    "string, expected_span",
+    [("Straße STRASSE", (7, 14)), ("K strasse", (2, 9))],
+)
+def test_case_folded_regex_search_non_ascii_text(
+    string: str, expected_span: Tuple[int, int]
+) -> None:
+    regex = compile_case_folded("strasse", re.IGNORECASE)
+
+    assert regex is not None
+    match = regex.search(string)
+    assert match is not None
+    assert match.span() == expected_span
+
+
+def test_case_folded_regex_search_from_positions() -> None:
+    regex = compile_case_folded("ab", re.IGNORECASE)
+    block = "AB\nxAb\naB"
+
+    assert regex is not None
+    starts = []
+    position = 0
+    while match := regex.search(block, position):
+        starts.append(match.start())
+        position = match.end()
+    assert starts == [0, 4, 7]
+
+
+def test_case_folded_regex_match() -> None:
+    regex = compile_case_folded("ab", re.IGNORECASE)
+
+    assert regex is not None
+    match = regex.match("xAB", 1)
+    assert match is not None
+    assert match.span() == (1, 3)
+    assert regex.match("xAB") is None
+
+
+@pytest.mark.parametrize(
+    "pattern, flags",
+    [
+        ("hello", 0),
+        ("café", re.IGNORECASE),
+        ("[0-z]", re.IGNORECASE),
+        ("a(?-i:b)", re.IGNORECASE),
+        ("(a)?(?(1)b|c)", re.IGNORECASE),
+        (b"abc", re.IGNORECASE | re.LOCALE),
+    ],
+)
+def test_compile_case_folded_unsupported(pattern: AnyStr, flags: int) -> None:
+    assert compile_case_folded(pattern, flags) is None
+
+
+def test_case_folded_regex_pickle() -> None:
+    regex = pickle.loads(
+        pickle.dumps(compile_case_folded("hello", re.IGNORECASE))
+    )
+
+    assert isinstance(regex, CaseFoldedRegex)
+    match = regex.search("say HELLO")
+    assert match is not None
+    assert match.span() == (4, 9)
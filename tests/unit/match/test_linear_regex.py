@@ -0,0 +1,111 @@
+import pickle
+import re
+from typing import AnyStr, Optional, Tuple
+
+import pytest
+
+from python_grep.match.linear_regex import (
+    LinearRegex,
+    UnsupportedPatternError,
+)
+
+
+@pytest.mark.parametrize(
+    "pattern, flags, string, expected_span",
+    [
+        (r"hello", 0, "say hello", (4, 9)),
+        (r"a|ab", 0, "xab", (1, 3)),
+        (r"(a|b)*c", 0, "abbac", (0, 5)),
+        (r"^foo", re.MULTILINE, "bar\nfoo", (4, 7)),
+        (r"foo$", 0, "foo\n", (0, 3)),
+        (r"\bword\b", 0, "sword word", (6, 10)),
+        (r"\Bor", 0, "or word", (4, 6)),
+        (r"(?<!\w)-x(?!\w)", 0, "a-x -x", (4, 6)),
+        (r"x*", 0, "abc", (0, 0)),
+        (r"[a-c]{2,3}", 0, "zabcd", (1, 4)),
+        (r"HELLO", re.IGNORECASE, "say hello", (4, 9)),
+        (r"missing", 0, "nothing here", None),
+    ],
+)
+def test_linear_regex_search(
+    pattern: str,
+    flags: int,
+    string: str,
+    expected_span: Optional[Tuple[int, int]],
+) -> None:
+    match = LinearRegex(pattern, flags).search(string)
+
+    assert (match.span() if match else None) == expected_span
+
+
+def test_linear_regex_search_bytes() -> None:
+    match = LinearRegex(rb"\d+", 0).search(b"id 1234 ok")
+
+    assert match is not None
+    assert match.span() == (3, 7)
+
+
+def test_linear_regex_search_from_position() -> None:
+    match = LinearRegex(r"ab", 0).search("ab ab", 1)
+
+    assert match is not None
+    assert match.span() == (3, 5)
+
+
+def test_linear_regex_match() -> None:
+    regex = LinearRegex(r"a|ab", 0)
+    match = regex.match("xab", 1)
+
+    assert match is not None
+    assert match.span() == (1, 3)
+    assert regex.match("xab") is None
+
+
+def test_linear_regex_finditer() -> None:
+    regex = LinearRegex(r"a*", 0)
+
+    assert [match.span() for match in regex.finditer("baab")] == [
+        (0, 0),
+        (1, 3),
+        (3, 3),
+        (4, 4),
+    ]
+
+
+@pytest.mark.parametrize(
+    "pattern, string",
+    [
+        (r"(a+)+$", "a" * 40 + "b"),
+        (r"(a|aa)*c", "a" * 40),
+        (r"(x+x+)+y", "x" * 40),
+    ],
+)
+def test_linear_regex_pathological_pattern(pattern: str, string: str) -> None:
+    assert LinearRegex(pattern, 0).search(string) is None
+
+
+@pytest.mark.parametrize(
+    "pattern, flags",
+    [
+        (r"(a)\1", 0),
+        (r"a(?=b)", 0),
+        (r"a+?", 0),
+        (rb"\w", re.LOCALE),
+    ],
+)
+def test_linear_regex_unsupported_pattern(pattern: AnyStr, flags: int) -> None:
+    with pytest.raises(UnsupportedPatternError):
+        LinearRegex(pattern, flags)
+
+
+def test_linear_regex_invalid_pattern() -> None:
+    with pytest.raises(re.error):
+        LinearRegex(r"(a", 0)
+
+
+def test_linear_regex_pickle() -> None:
+    regex = pickle.loads(pickle.dumps(LinearRegex(r"(a+)+b", 0)))
+    match = regex.search("xaab")
+
+    assert match is not None
+    assert match.span() == (1, 4)
@@ -0,0 +1,204 @@
+import re
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockFixture
+
+from python_grep.grep.context import PatternMatchingOptions
+from python_grep.match import (
+    BinaryMultiPatternMatcher,
+    MatchPosition,
+    TextMultiPatternMatcher,
+)
+from python_grep.match.multi_pattern_matcher import (
+    TrieRegexCache,
+    build_trie_regex,
+    find_required_literal,
+)
+
+
+@pytest.mark.parametrize(
+    "literals, text, expected_matches",
+    [
+        (["foo", "foobar", "bar"], "xfoobarx foo", ["foobar", "foo"]),
+        (["a.b", "a+b"], "a.b a+b axb", ["a.b", "a+b"]),
+    ],
+)
+def test_build_trie_regex(literals, text, expected_matches) -> None:
+    trie_regex = re.compile(build_trie_regex(literals))
+
+    assert trie_regex.findall(text) == expected_matches
+
+
+def test_trie_regex_cache_builds_source_once(
+    mocker: MockFixture, tmp_path: Path
+) -> None:
+    build_trie_regex_mock = mocker.patch(
+        "python_grep.match.multi_pattern_matcher.build_trie_regex",
+        wraps=build_trie_regex,
+    )
+
+    first_source = TrieRegexCache(tmp_path).build_trie_regex(
+        ["foo", "bar", "zaż\udcff"]
+    )
+    second_source = TrieRegexCache(tmp_path).build_trie_regex(
+        ["zaż\udcff", "foo", "bar", "foo"]
+    )
+    other_source = TrieRegexCache(tmp_path).build_trie_regex(["foo"])
+
+    assert (
+        first_source
+        == second_source
+        == build_trie_regex(["foo", "bar", "zaż\udcff"])
+    )
+    assert other_source == "foo"
+    assert build_trie_regex_mock.call_count == 2
+
+
+def test_trie_regex_cache_builds_source_if_it_cannot_be_stored(
+    tmp_path: Path,
+) -> None:
+    cache_dir = tmp_path / "file"
+    cache_dir.write_text("")
+
+    assert TrieRegexCache(cache_dir).build_trie_regex(["foo", "bar"]) == (
+        build_trie_regex(["foo", "bar"])
+    )
+
+
+@pytest.mark.parametrize(
+    "pattern, expected_literal",
+    [
+        (r"error code=\d+", "error code="),
+        (r"(timeout)+ after \d+ms", "timeout"),
+        (r"\d+ms", None),
+        (r"(?i)error", None),
+        (r"fail|error", None),
+    ],
+)
+def test_find_required_literal(pattern, expected_literal) -> None:
+    assert find_required_literal(pattern, 0) == expected_literal
+
+
+def test_text_multi_pattern_matcher_match() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = TextMultiPatternMatcher(
+        ["foo", "foobar", r"err\w+ code=\d+", r"\d+ms"], options
+    )
+    result = pattern_matcher.match("foobar errX code=12 took 5ms")
+
+    assert result == [
+        MatchPosition(0, 6),
+        MatchPosition(7, 19),
+        MatchPosition(25, 28),
+    ]
+
+
+def test_text_multi_pattern_matcher_match_many() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = TextMultiPatternMatcher(
+        ["foo", r"err\w+ code=\d+", r"\d+ms"], options
+    )
+    result = pattern_matcher.match_many(
+        ["foo", "errX code=1", "error", "5ms foo"]
+    )
+
+    assert list(result.iter_lines()) == [
+        (0, [MatchPosition(0, 3)]),
+        (1, [MatchPosition(0, 11)]),
+        (3, [MatchPosition(0, 3), MatchPosition(4, 7)]),
+    ]
+
+
+def test_text_multi_pattern_matcher_search_many_invert_match() -> None:
+    options = PatternMatchingOptions(
+        invert_match=True, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = TextMultiPatternMatcher(
+        ["foo", r"err\w+ code=\d+"], options
+    )
+    result = pattern_matcher.search_many(
+        ["foo", "error code=x", "errX code=1"]
+    )
+
+    assert list(result.iter_lines()) == [(1, [MatchPosition(0, 0)])]
+
+
+def test_text_multi_pattern_matcher_search_ignore_case() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=True
+    )
+    pattern_matcher = TextMultiPatternMatcher(
+        ["evil.example.com", r"token=[a-f0-9]{8}"], options
+    )
+
+    assert pattern_matcher.search("x TOKEN=DEADBEEF") == MatchPosition(2, 16)
+    assert pattern_matcher.search("EVIL.example.COM") == MatchPosition(0, 16)
+    assert pattern_matcher.search("token=xyz") is None
+
+
+def test_text_multi_pattern_matcher_search_invert() -> None:
+    options = PatternMatchingOptions(
+        invert_match=True, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = TextMultiPatternMatcher(["foo", r"ba+r"], options)
+
+    assert pattern_matcher.search("baar") is None
+    assert pattern_matcher.search("baz") == MatchPosition(0, 0)
+
+
+def test_text_multi_pattern_matcher_word_regexp() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=True, ignore_case=False
+    )
+    pattern_matcher = TextMultiPatternMatcher(["test", r"te\w+"], options)
+
+    assert pattern_matcher.match("testing test") == [
+        MatchPosition(0, 7),
+        MatchPosition(8, 12),
+    ]
+
+
+def test_binary_multi_pattern_matcher_match() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = BinaryMultiPatternMatcher(
+        ["zé", r"\xF0\x9F\x91\x8D"], options
+    )
+    result = pattern_matcher.match("zé \xf0".encode() + b"\xf0\x9f\x91\x8d")
+
+    assert result == [MatchPosition(0, 3), MatchPosition(6, 10)]
+
+
+def test_binary_multi_pattern_matcher_match_line_regexp() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False,
+        word_regexp=False,
+        ignore_case=False,
+        line_regexp=True,
+    )
+    pattern_matcher = BinaryMultiPatternMatcher(["ab", r"c\d"], options)
+    result = pattern_matcher.match(b"x\0\nab\nxc1\nc2\n")
+
+    assert result == [MatchPosition(3, 5), MatchPosition(10, 12)]
+
+
+def test_text_multi_pattern_matcher_iter_matches() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = TextMultiPatternMatcher(
+        ["foo", "foobar", r"\d+ms"], options
+    )
+    result = list(pattern_matcher.iter_matches("foobar foo 5ms"))
+
+    assert result == [
+        MatchPosition(0, 6),
+        MatchPosition(7, 10),
+        MatchPosition(11, 14),
+    ]
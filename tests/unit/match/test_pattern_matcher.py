@@ -1,4 +1,7 @@
+from pytest_mock import MockFixture
+
 from python_grep.grep.context import PatternMatchingOptions
+from python_grep.match import pattern_matcher
 from python_grep.match import (
     BinaryPatternMatcher,
     MatchPosition,
@@ -98,6 +101,15 @@ def test_text_pattern_matcher_match_invert() -> None:
     assert not result
 
 
+def test_text_pattern_matcher_match_invert_several_patterns() -> None:
+    options = PatternMatchingOptions(
+        invert_match=True, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = TextPatternMatcher(["a", "b"], options)
+    assert pattern_matcher.match("b") is None
+    assert pattern_matcher.match("c") == [MatchPosition(0, 0)]
+
+
 def test_text_pattern_matcher_match_word_regexp() -> None:
     options = PatternMatchingOptions(
         invert_match=False, word_regexp=True, ignore_case=False
@@ -107,6 +119,78 @@ def test_text_pattern_matcher_match_word_regexp() -> None:
     assert result == [MatchPosition(12, 16)]
 
 
+def test_text_pattern_matcher_match_word_regexp_pattern() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=True, ignore_case=False
+    )
+    pattern_matcher = TextPatternMatcher([r"te\w+"], options)
+    result = pattern_matcher.match("tests test_ atest test")
+    assert result == [
+        MatchPosition(0, 5),
+        MatchPosition(6, 11),
+        MatchPosition(18, 22),
+    ]
+
+
+def test_binary_pattern_matcher_match_word_regexp() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=True, ignore_case=False
+    )
+    pattern_matcher = BinaryPatternMatcher([r"te\w+"], options)
+    result = pattern_matcher.match(b"xtest test")
+    assert result == [MatchPosition(6, 10)]
+
+
+def test_text_pattern_matcher_match_line_regexp() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False,
+        word_regexp=False,
+        ignore_case=False,
+        line_regexp=True,
+    )
+    pattern_matcher = TextPatternMatcher(["ab", "a.c"], options)
+    assert pattern_matcher.match("ab") == [MatchPosition(0, 2)]
+    assert pattern_matcher.match("abc") == [MatchPosition(0, 3)]
+    assert pattern_matcher.match("xab") is None
+
+
+def test_binary_pattern_matcher_match_line_regexp() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False,
+        word_regexp=False,
+        ignore_case=False,
+        line_regexp=True,
+    )
+    pattern_matcher = BinaryPatternMatcher(["ab"], options)
+    assert pattern_matcher.match(b"x\0\nab\nxab\n") == [MatchPosition(3, 5)]
+    assert pattern_matcher.match(b"x\0ab\n") is None
+
+
+def test_binary_pattern_matcher_match_line_regexp_null_data() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False,
+        word_regexp=False,
+        ignore_case=False,
+        line_regexp=True,
+        null_data=True,
+    )
+    pattern_matcher = BinaryPatternMatcher(["ab"], options)
+    assert pattern_matcher.match(b"x\nab\0ab\0") == [MatchPosition(5, 7)]
+
+
+def test_text_pattern_matcher_iter_matches_multiline_line_regexp() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False,
+        word_regexp=False,
+        ignore_case=False,
+        line_regexp=True,
+        multiline=True,
+    )
+    pattern_matcher = TextPatternMatcher([r"a\nb"], options)
+    result = list(pattern_matcher.iter_matches("xa\nb\na\nb"))
+    assert result == [MatchPosition(5, 8)]
+
+
 def test_text_pattern_matcher_match_ignore_case() -> None:
     options = PatternMatchingOptions(
         invert_match=False, word_regexp=False, ignore_case=True
@@ -118,3 +202,81 @@ def test_text_pattern_matcher_match_ignore_case() -> None:
         MatchPosition(5, 9),
         MatchPosition(10, 14),
     ]
+
+
+def test_pattern_matcher_compiles_lazily(mocker: MockFixture) -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=False
+    )
+    compile_regexes_spy = mocker.spy(pattern_matcher, "compile_regexes")
+    text_pattern_matcher = TextPatternMatcher([r"test"], options)
+    BinaryPatternMatcher([r"test"], options)
+
+    compile_regexes_spy.assert_not_called()
+    text_pattern_matcher.search("test")
+    compile_regexes_spy.assert_called_once_with(("test",), 0, "auto")
+
+
+def test_compiled_patterns_are_shared_between_matchers() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=True
+    )
+    first_matcher = TextPatternMatcher([r"shared \d+"], options)
+    second_matcher = TextPatternMatcher([r"shared \d+"], options)
+    first_matcher.search("shared 1")
+    second_matcher.search("shared 2")
+
+    assert (
+        first_matcher._compiled_regex_patterns[0]
+        is second_matcher._compiled_regex_patterns[0]
+    )
+
+
+def test_text_pattern_matcher_iter_matches_multiline() -> None:
+    options = PatternMatchingOptions(
+        invert_match=True,
+        word_regexp=False,
+        ignore_case=False,
+        multiline=True,
+    )
+    pattern_matcher = TextPatternMatcher([r"^b", r"a\nb+"], options)
+    result = list(pattern_matcher.iter_matches("a\nbb\nb", 1))
+    assert result == [MatchPosition(2, 3), MatchPosition(5, 6)]
+
+
+def test_text_pattern_matcher_match_many() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = TextPatternMatcher(["cd", "ab"], options)
+    result = pattern_matcher.match_many(["ab", "x", "xab ab", "cd ab"])
+    assert list(result.iter_lines()) == [
+        (0, [MatchPosition(0, 2)]),
+        (2, [MatchPosition(1, 3), MatchPosition(4, 6)]),
+        (3, [MatchPosition(0, 2)]),
+    ]
+
+
+def test_text_pattern_matcher_match_many_invert_match() -> None:
+    options = PatternMatchingOptions(
+        invert_match=True, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = TextPatternMatcher(["cd", "ab"], options)
+    result = pattern_matcher.match_many(["ab", "x", "xab ab", "", "cd ab"])
+    assert list(result.iter_lines()) == [
+        (1, [MatchPosition(0, 0)]),
+        (3, [MatchPosition(0, 0)]),
+    ]
+
+
+def test_binary_pattern_matcher_search_many() -> None:
+    options = PatternMatchingOptions(
+        invert_match=False, word_regexp=False, ignore_case=False
+    )
+    pattern_matcher = BinaryPatternMatcher(["cd", "ab"], options)
+    result = pattern_matcher.search_many([b"ab", b"x", b"xab ab", b"ab cd"])
+    assert list(result.iter_lines()) == [
+        (0, [MatchPosition(0, 2)]),
+        (2, [MatchPosition(1, 3)]),
+        (3, [MatchPosition(3, 5)]),
+    ]
@@ -0,0 +1,55 @@
+import re
+
+import pytest
+
+from python_grep.match.case_folding import CaseFoldedRegex
+from python_grep.match.linear_regex import LinearRegex
+from python_grep.match.regex_engine import (
+    REGEX_ENGINES,
+    is_backtracking_prone,
+)
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        (r"(a+)+$", True),
+        (r"(a|aa)*", True),
+        (r"(?:\w+\s?)*x", True),
+        (r"a+b+", False),
+        (r"(ab)+", False),
+        (r"(a|b)c", False),
+        (r"(a+)?", False),
+    ],
+)
+def test_is_backtracking_prone(pattern: str, expected: bool) -> None:
+    assert is_backtracking_prone(pattern, 0) is expected
+
+
+def test_auto_regex_engine() -> None:
+    engine = REGEX_ENGINES["auto"]
+
+    assert isinstance(engine.compile(r"(a+)+$", 0), LinearRegex)
+    assert isinstance(engine.compile(r"a+b", 0), re.Pattern)
+
+
+def test_linear_regex_engine_falls_back_to_re() -> None:
+    engine = REGEX_ENGINES["linear"]
+
+    assert isinstance(engine.compile(r"a+b", 0), LinearRegex)
+    assert isinstance(engine.compile(r"(a)\1", 0), re.Pattern)
+
+
+def test_backtracking_regex_engine() -> None:
+    assert isinstance(
+        REGEX_ENGINES["backtracking"].compile(r"(a+)+$", 0), re.Pattern
+    )
+
+
+def test_backtracking_regex_engine_folds_case() -> None:
+    engine = REGEX_ENGINES["backtracking"]
+
+    assert isinstance(
+        engine.compile(r"error \d+", re.IGNORECASE), CaseFoldedRegex
+    )
+    assert isinstance(engine.compile("café", re.IGNORECASE), re.Pattern)
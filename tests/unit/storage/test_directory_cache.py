@@ -0,0 +1,40 @@
+import os
+from pathlib import Path
+
+from pytest_mock import MockFixture
+
+from python_grep.storage import DirectoryCache
+
+
+def _create_tree(root: Path) -> None:
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "c").mkdir()
+    for path in ["f1", "a/f2", "a/b/f3", "c/f4"]:
+        (root / path).write_text("x")
+
+
+def test_walk_yields_files_in_os_walk_order(tmp_path: Path) -> None:
+    _create_tree(tmp_path)
+    expected_paths = [
+        Path(root, file)
+        for root, _, files in os.walk(str(tmp_path))
+        for file in files
+    ]
+
+    assert list(DirectoryCache().walk(tmp_path)) == expected_paths
+
+
+def test_walk_reuses_unchanged_listings(
+    tmp_path: Path, mocker: MockFixture
+) -> None:
+    _create_tree(tmp_path)
+    directory_cache = DirectoryCache()
+    list(directory_cache.walk(tmp_path))
+    scandir = mocker.spy(os, "scandir")
+    (tmp_path / "a" / "f5").write_text("x")
+    paths = list(directory_cache.walk(tmp_path))
+
+    assert tmp_path / "a" / "f5" in paths
+    assert [call.args for call in scandir.call_args_list] == [
+        (str(tmp_path / "a"),)
+    ]
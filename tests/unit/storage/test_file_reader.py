@@ -1,3 +1,4 @@
+import os
 import re
 from pathlib import Path
 from typing import Callable
@@ -7,6 +8,7 @@ from _pytest.capture import CaptureFixture
 from pytest_mock import MockFixture
 
 from python_grep.storage import FileReader, InputType
+from python_grep.storage.line_window import LongLine
 
 
 @pytest.mark.parametrize(
@@ -92,3 +94,173 @@ def test_handling_exception_on_is_binary_file_check(
     captured_output = captured.out
 
     assert re.match(r"Error checking file .*: error_msg\n", captured_output)
+
+
+def test_read_lines_with_offsets(
+    tmp_text_file: Callable[[str], Path],
+) -> None:
+    path = tmp_text_file("first\nsecond\nthird\n")
+    lines = list(FileReader().read_lines_with_offsets(path))
+
+    assert lines == [(0, "first"), (6, "second"), (13, "third")]
+
+
+@pytest.mark.parametrize(
+    "start_offset, expected_lines",
+    [
+        (6, [(6, "second"), (13, "third")]),
+        (8, [(13, "third")]),
+    ],
+)
+def test_read_lines_with_offsets_from_start_offset(
+    tmp_text_file: Callable[[str], Path],
+    start_offset: int,
+    expected_lines,
+) -> None:
+    path = tmp_text_file("first\nsecond\nthird\n")
+    file_reader = FileReader(start_offset=start_offset)
+
+    assert list(file_reader.read_lines_with_offsets(path)) == expected_lines
+
+
+def test_count_newlines(tmp_text_file: Callable[[str], Path]) -> None:
+    path = tmp_text_file("first\nsecond\nthird\n")
+
+    assert FileReader().count_newlines(path, 13) == 2
+
+
+def test_read_lines_with_offsets_null_separated(
+    tmp_text_file: Callable[[str], Path],
+) -> None:
+    path = tmp_text_file("first\nline\0second\0third")
+    file_reader = FileReader(line_separator=b"\0", start_offset=3)
+
+    assert list(file_reader.read_lines_with_offsets(path)) == [
+        (11, "second"),
+        (18, "third"),
+    ]
+    assert file_reader.count_newlines(path, 18) == 2
+
+
+def test_read_blocks(
+    tmp_text_file: Callable[[str], Path], mocker: MockFixture
+) -> None:
+    mocker.patch("python_grep.storage.file_reader.READ_BLOCK_SIZE", 4)
+    path = tmp_text_file("first\nab\nc\nlast")
+
+    assert list(FileReader().read_blocks(path)) == [
+        (0, "first\n"),
+        (6, "ab\nc\n"),
+        (11, "last"),
+    ]
+
+
+LONG_LINE_CONTENT = "short\nabcdefghijklmnopqrst\nend"
+
+
+@pytest.mark.parametrize("read_block_size", [4, 1024 * 1024])
+def test_read_lines_with_offsets_long_line(
+    tmp_text_file: Callable[[str], Path],
+    monkeypatch: pytest.MonkeyPatch,
+    read_block_size: int,
+) -> None:
+    monkeypatch.setattr(
+        "python_grep.storage.file_reader.READ_BLOCK_SIZE", read_block_size
+    )
+    path = tmp_text_file(LONG_LINE_CONTENT)
+
+    lines = list(FileReader(max_line_length=8).read_lines_with_offsets(path))
+
+    assert lines == [(0, "short"), (6, "abcd"), (27, "end")]
+    assert isinstance(lines[1][1], LongLine)
+
+
+def test_read_lines_with_offsets_without_max_line_length(
+    tmp_text_file: Callable[[str], Path],
+) -> None:
+    path = tmp_text_file(LONG_LINE_CONTENT)
+
+    assert list(
+        FileReader(max_line_length=None).read_lines_with_offsets(path)
+    ) == [(0, "short"), (6, "abcdefghijklmnopqrst"), (27, "end")]
+
+
+def test_read_blocks_long_line(
+    tmp_text_file: Callable[[str], Path], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("python_grep.storage.file_reader.READ_BLOCK_SIZE", 4)
+    path = tmp_text_file(LONG_LINE_CONTENT + "\nlast\n")
+
+    blocks = list(FileReader(max_line_length=8).read_blocks(path))
+
+    assert blocks == [(0, "short\n"), (6, "abcd"), (27, "end\nlast\n")]
+    assert isinstance(blocks[1][1], LongLine)
+
+
+def test_read_lines_small_files(tmp_path: Path) -> None:
+    file_reader = FileReader()
+    long_path = tmp_path / "long.txt"
+    long_path.write_text("first line\nsecond line\n")
+    short_path = tmp_path / "short.txt"
+    short_path.write_text("ab\n")
+
+    assert list(file_reader.read_lines(long_path)) == [
+        "first line",
+        "second line",
+    ]
+    assert list(file_reader.read_lines(short_path)) == ["ab"]
+
+
+def test_read_lines_large_file(
+    tmp_text_file: Callable[[str], Path],
+    monkeypatch: pytest.MonkeyPatch,
+    mocker: MockFixture,
+) -> None:
+    monkeypatch.setattr("python_grep.storage.file_reader.SMALL_FILE_SIZE", 4)
+    path = tmp_text_file("first\nlast\n")
+    open_spy = mocker.spy(os, "open")
+    fstat_spy = mocker.spy(os, "fstat")
+
+    assert list(FileReader().read_lines(path)) == ["first", "last"]
+    open_spy.assert_called_once()
+    fstat_spy.assert_called_once()
+
+
+@pytest.mark.skipif(
+    not os.path.exists("/proc/version"), reason="requires /proc"
+)
+def test_read_lines_file_of_unreported_size() -> None:
+    path = Path("/proc/version")
+
+    assert os.stat(path).st_size == 0
+    assert list(FileReader().read_lines(path)) == [path.read_text().rstrip()]
+
+
+def test_read_lines_small_binary_file(
+    tmp_path: Path, mocker: MockFixture
+) -> None:
+    path = tmp_path / "binary"
+    path.write_bytes(b"ab\x00c\nd")
+    file_reader = FileReader()
+    mock_callback = mocker.Mock()
+    file_reader.before_file_traverse_hook(mock_callback)
+
+    assert list(file_reader.read_lines(path)) == [b"ab\x00c\nd"]
+    mock_callback.assert_called_once_with(InputType.BINARY)
+
+
+def test_undecodable_file_reported_once(
+    tmp_path: Path, capsys: CaptureFixture[str]
+) -> None:
+    path = tmp_path / "undecodable"
+    path.write_bytes(b"ok\n\xff\n")
+    file_reader = FileReader()
+
+    blocks = list(file_reader.read_blocks(path))
+    lines = list(file_reader.read_lines(path))
+
+    assert blocks == [(0, b"ok\n\xff\n")]
+    assert lines == ["ok", b"ok\n\xff\n"]
+    assert capsys.readouterr().out == (
+        f"grep: unicode decode error. Trying to read {path} as binary\n"
+    )
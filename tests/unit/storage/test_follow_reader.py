@@ -0,0 +1,115 @@
+import os
+from pathlib import Path
+
+from python_grep.storage import FollowFileReader
+
+
+def test_follow_file_reader_reads_appended_lines(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_bytes(b"first\nsec")
+    follow_file_reader = FollowFileReader()
+
+    first_read = list(follow_file_reader.read_lines_with_offsets(path))
+    with path.open("ab") as file:
+        file.write(b"ond\nthird\n")
+    second_read = list(follow_file_reader.read_lines_with_offsets(path))
+    follow_file_reader.close()
+
+    assert first_read == [(0, "first")]
+    assert second_read == [(6, "second"), (13, "third")]
+
+
+def test_follow_file_reader_counts_newlines_of_read_lines(
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "app.log"
+    path.write_bytes(b"first\nsecond\n")
+    follow_file_reader = FollowFileReader()
+    list(follow_file_reader.read_lines_with_offsets(path))
+    path.write_bytes(b"first\nsecond\nthird\n")
+
+    (offset, _), *_ = follow_file_reader.read_lines_with_offsets(path)
+    newline_count = follow_file_reader.count_newlines(path, offset)
+    follow_file_reader.close()
+
+    assert newline_count == 2
+
+
+def test_follow_file_reader_handles_truncation(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_bytes(b"first\nsecond\n")
+    follow_file_reader = FollowFileReader()
+    list(follow_file_reader.read_lines_with_offsets(path))
+    path.write_bytes(b"new\n")
+
+    lines = list(follow_file_reader.read_lines_with_offsets(path))
+    follow_file_reader.close()
+
+    assert lines == [(0, "new")]
+
+
+def test_follow_file_reader_handles_rotation(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_bytes(b"first\n")
+    follow_file_reader = FollowFileReader()
+    list(follow_file_reader.read_lines_with_offsets(path))
+    with path.open("ab") as file:
+        file.write(b"last")
+    os.rename(path, tmp_path / "app.log.1")
+    path.write_bytes(b"rotated\n")
+
+    rest_of_old_file = list(follow_file_reader.read_lines_with_offsets(path))
+    new_file = list(follow_file_reader.read_lines_with_offsets(path))
+    follow_file_reader.close()
+
+    assert rest_of_old_file == [(6, "last")]
+    assert new_file == [(0, "rotated")]
+
+
+def test_follow_file_reader_continues_rotated_file_under_new_path(
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "app.log"
+    rotated_path = tmp_path / "app.log.1"
+    path.write_bytes(b"first\n")
+    follow_file_reader = FollowFileReader()
+    list(follow_file_reader.read_lines_with_offsets(path))
+    os.rename(path, rotated_path)
+    path.write_bytes(b"rotated\n")
+
+    list(follow_file_reader.read_lines_with_offsets(path))
+    first_read_of_rotated_file = list(
+        follow_file_reader.read_lines_with_offsets(rotated_path)
+    )
+    with rotated_path.open("ab") as file:
+        file.write(b"late\n")
+    second_read_of_rotated_file = list(
+        follow_file_reader.read_lines_with_offsets(rotated_path)
+    )
+    follow_file_reader.close()
+
+    assert first_read_of_rotated_file == []
+    assert second_read_of_rotated_file == [(6, "late")]
+
+
+def test_follow_file_reader_takes_over_file_renamed_before_rotation(
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "app.log"
+    rotated_path = tmp_path / "app.log.1"
+    path.write_bytes(b"first\n")
+    follow_file_reader = FollowFileReader()
+    list(follow_file_reader.read_lines_with_offsets(path))
+    with path.open("ab") as file:
+        file.write(b"last\n")
+    os.rename(path, rotated_path)
+    path.write_bytes(b"rotated\n")
+
+    rotated_file = list(
+        follow_file_reader.read_lines_with_offsets(rotated_path)
+    )
+    new_file = list(follow_file_reader.read_lines_with_offsets(path))
+    follow_file_reader.close()
+
+    assert rotated_file == [(6, "last")]
+    assert new_file == [(0, "rotated")]
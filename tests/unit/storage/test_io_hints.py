@@ -0,0 +1,146 @@
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from python_grep.storage.base import IPathResolver
+from python_grep.storage.file_reader import FileReader
+from python_grep.storage.io_hints import (
+    MIN_PREFETCH_SIZE,
+    PREFETCH_SIZE,
+    PrefetchingPathResolver,
+    advise_dont_need,
+    advise_sequential,
+    prefetch,
+)
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "posix_fadvise"), reason="requires posix_fadvise"
+)
+
+
+def test_advise_sequential(mocker: MockerFixture, tmp_path: Path) -> None:
+    fadvise_mock = mocker.patch("os.posix_fadvise")
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("a\n")
+
+    with file_path.open("rb") as file:
+        advise_sequential(file, 10)
+        fd = file.fileno()
+
+    assert fadvise_mock.call_args_list == [
+        mocker.call(fd, 10, 0, os.POSIX_FADV_SEQUENTIAL),
+        mocker.call(fd, 10, PREFETCH_SIZE, os.POSIX_FADV_WILLNEED),
+    ]
+
+
+def test_advise_sequential_limits_prefetch_to_read_length(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    fadvise_mock = mocker.patch("os.posix_fadvise")
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("a\n")
+
+    with file_path.open("rb") as file:
+        advise_sequential(file, 10, 100)
+        fd = file.fileno()
+
+    assert fadvise_mock.call_args_list[1] == mocker.call(
+        fd, 10, 100, os.POSIX_FADV_WILLNEED
+    )
+
+
+def test_advise_dont_need_ignores_unsupported_files() -> None:
+    read_fd, write_fd = os.pipe()
+    try:
+        with os.fdopen(read_fd, "rb") as file:
+            advise_dont_need(file)
+    finally:
+        os.close(write_fd)
+
+
+def test_prefetch(mocker: MockerFixture, tmp_path: Path) -> None:
+    fadvise_mock = mocker.patch("os.posix_fadvise")
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("a\n")
+
+    prefetch(file_path)
+    prefetch(tmp_path / "missing.txt")
+
+    fadvise_mock.assert_called_once_with(
+        mocker.ANY, 0, PREFETCH_SIZE, os.POSIX_FADV_WILLNEED
+    )
+
+
+def test_prefetching_path_resolver_prefetches_next_file(
+    mocker: MockerFixture,
+) -> None:
+    paths = [Path("a.txt"), Path("b.txt"), Path("c.txt")]
+    path_resolver_mock = mocker.Mock(spec=IPathResolver)
+    path_resolver_mock.get_resolved_files_with_stats.return_value = iter(
+        (path, os.stat_result((0,) * 6 + (MIN_PREFETCH_SIZE,) + (0,) * 3))
+        for path in paths
+    )
+    prefetched_paths: List[Path] = []
+    mocker.patch(
+        "python_grep.storage.io_hints.prefetch",
+        side_effect=prefetched_paths.append,
+    )
+    resolved_paths = PrefetchingPathResolver(
+        path_resolver_mock
+    ).get_resolved_file_paths()
+
+    assert next(resolved_paths) == Path("a.txt")
+    assert prefetched_paths == [Path("b.txt")]
+    assert list(resolved_paths) == [Path("b.txt"), Path("c.txt")]
+    assert prefetched_paths == [Path("b.txt"), Path("c.txt")]
+
+
+def test_prefetching_path_resolver_prefetches_large_files_to_read(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    sizes = {"a.txt": 1, "small.txt": 1, "large.txt": 2, "cached.txt": 2}
+    for name, size in sizes.items():
+        (tmp_path / name).write_bytes(b"a" * (size * MIN_PREFETCH_SIZE // 2))
+    paths = [tmp_path / name for name in sizes]
+    paths.append(tmp_path / "missing.txt")
+    path_resolver_mock = mocker.Mock(spec=IPathResolver)
+    path_resolver_mock.get_resolved_files_with_stats.return_value = iter(
+        (path, None) for path in paths
+    )
+    prefetched_paths: List[Path] = []
+    mocker.patch(
+        "python_grep.storage.io_hints.prefetch",
+        side_effect=prefetched_paths.append,
+    )
+    needs_reading_mock = mocker.Mock(
+        side_effect=lambda path: path.name != "cached.txt"
+    )
+
+    resolved_paths = PrefetchingPathResolver(
+        path_resolver_mock, needs_reading=needs_reading_mock
+    ).get_resolved_file_paths()
+
+    assert list(resolved_paths) == paths
+    assert prefetched_paths == [tmp_path / "large.txt"]
+    assert needs_reading_mock.call_args_list == [
+        mocker.call(tmp_path / "large.txt"),
+        mocker.call(tmp_path / "cached.txt"),
+    ]
+
+
+@pytest.mark.parametrize("drop_cache", [False, True])
+def test_file_reader_drops_read_files_from_page_cache(
+    mocker: MockerFixture, tmp_path: Path, drop_cache: bool
+) -> None:
+    advise_dont_need_mock = mocker.patch(
+        "python_grep.storage.file_reader.advise_dont_need"
+    )
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("a\nb\n")
+    file_reader = FileReader(drop_cache=drop_cache)
+
+    assert list(file_reader.read_lines(file_path)) == ["a", "b"]
+    assert advise_dont_need_mock.called is drop_cache
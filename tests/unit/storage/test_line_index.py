@@ -0,0 +1,108 @@
+from pathlib import Path
+from typing import Callable, Optional
+
+import pytest
+from pytest_mock import MockFixture
+
+from python_grep.grep.result_cache import create_file_fingerprint
+from python_grep.storage import IndexedFileReader, LineIndex, LineIndexStore
+from python_grep.storage.file_reader import FileReader
+
+FILE_CONTENT = "first\nsecond\n\nthird line\nfourth"
+
+
+@pytest.mark.parametrize("stride", [1, 4, 64 * 1024])
+def test_count_newlines(
+    tmp_text_file: Callable[[str], Path], stride: int
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    line_index = LineIndex(path, stride=stride)
+
+    assert [
+        line_index.count_newlines(offset)
+        for offset in range(len(FILE_CONTENT) + 2)
+    ] == [
+        FILE_CONTENT[:offset].count("\n")
+        for offset in range(len(FILE_CONTENT) + 2)
+    ]
+
+
+@pytest.mark.parametrize("stride", [1, 4, 64 * 1024])
+@pytest.mark.parametrize(
+    "line_number, expected_offset",
+    [(1, 0), (2, 6), (3, 13), (4, 14), (5, 25), (6, None)],
+)
+def test_find_line_start(
+    tmp_text_file: Callable[[str], Path],
+    stride: int,
+    line_number: int,
+    expected_offset: Optional[int],
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+
+    assert (
+        LineIndex(path, stride=stride).find_line_start(line_number)
+        == expected_offset
+    )
+
+
+def test_find_line_start_after_trailing_separator(
+    tmp_text_file: Callable[[str], Path],
+) -> None:
+    path = tmp_text_file("first\0second\0")
+    line_index = LineIndex(path, b"\0", stride=2)
+
+    assert line_index.find_line_start(2) == 6
+    assert line_index.find_line_start(3) is None
+
+
+def test_store_reuses_saved_index(
+    tmp_text_file: Callable[[str], Path], tmp_path: Path
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    index_dir = tmp_path / "index"
+    file_reader = IndexedFileReader(
+        FileReader(),
+        LineIndexStore(index_dir, create_file_fingerprint, stride=4),
+    )
+    assert file_reader.find_line_offset(path, 5) == 25
+
+    line_index = LineIndexStore(
+        index_dir, create_file_fingerprint, stride=4
+    ).get(path)
+
+    assert list(line_index.newline_counts) == [0, 0, 1, 1, 3, 3, 3, 4]
+
+
+def test_store_rebuilds_index_of_changed_file(
+    tmp_text_file: Callable[[str], Path], tmp_path: Path
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    index_dir = tmp_path / "index"
+    line_index_store = LineIndexStore(
+        index_dir, create_file_fingerprint, stride=4
+    )
+    line_index_store.get(path).count_newlines(len(FILE_CONTENT))
+    line_index_store.save(path)
+    path.write_text("changed\n" + FILE_CONTENT)
+
+    line_index = LineIndexStore(
+        index_dir, create_file_fingerprint, stride=4
+    ).get(path)
+
+    assert list(line_index.newline_counts) == [0]
+    assert line_index.count_newlines(12) == 1
+
+
+def test_indexed_file_reader_counts_lines_with_index(
+    tmp_text_file: Callable[[str], Path], tmp_path: Path, mocker: MockFixture
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    file_reader = mocker.Mock()
+    indexed_file_reader = IndexedFileReader(
+        file_reader,
+        LineIndexStore(tmp_path / "index", create_file_fingerprint),
+    )
+
+    assert indexed_file_reader.count_newlines(path, 14) == 3
+    file_reader.count_newlines.assert_not_called()
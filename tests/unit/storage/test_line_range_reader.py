@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import pytest
+from pytest_mock import MockFixture
+
+from python_grep.storage import FileReader, LineRangeFileReader
+
+FILE_CONTENT = "one\ntwo\nthree\nfour\nfive\n"
+
+
+@pytest.mark.parametrize(
+    "first_line, last_line, expected_lines",
+    [
+        (2, 3, [(4, "two"), (8, "three")]),
+        (4, None, [(14, "four"), (19, "five")]),
+        (5, 9, [(19, "five")]),
+        (6, None, []),
+    ],
+)
+def test_read_lines_with_offsets(
+    tmp_text_file: Callable[[str], Path],
+    first_line: int,
+    last_line: Optional[int],
+    expected_lines: List[Tuple[int, str]],
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    file_reader = LineRangeFileReader(FileReader(), first_line, last_line)
+
+    assert list(file_reader.read_lines_with_offsets(path)) == expected_lines
+
+
+def test_read_lines_with_offsets_resumed_inside_range(
+    tmp_text_file: Callable[[str], Path],
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    file_reader = LineRangeFileReader(FileReader(), 2, 4)
+
+    assert list(file_reader.read_lines_with_offsets(path, 8)) == [
+        (8, "three"),
+        (14, "four"),
+    ]
+
+
+def test_read_blocks_cuts_block_behind_range(
+    tmp_text_file: Callable[[str], Path],
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    file_reader = LineRangeFileReader(FileReader(), 2, 3)
+
+    assert list(file_reader.read_blocks(path)) == [(4, "two\nthree\n")]
+
+
+def test_count_newlines_before_range_is_not_counted(
+    tmp_path: Path, mocker: MockFixture
+) -> None:
+    path = tmp_path / "file.txt"
+    file_reader = mocker.Mock()
+    file_reader.find_line_offset.return_value = 100
+    file_reader.read_lines_with_offsets.return_value = iter([])
+    line_range_file_reader = LineRangeFileReader(file_reader, 7)
+    list(line_range_file_reader.read_lines_with_offsets(path))
+
+    assert line_range_file_reader.count_newlines(path, 100) == 6
+    file_reader.count_newlines.assert_not_called()
@@ -0,0 +1,59 @@
+from io import BytesIO
+
+from python_grep.storage.file_reader import NEWLINE
+from python_grep.storage.line_window import LineWindowReader, LongLine
+
+
+def create_window_reader(
+    data: bytes, rest: bytes, window_size: int = 6, overlap: int = 2
+) -> LineWindowReader:
+    return LineWindowReader(
+        BytesIO(rest), data, NEWLINE, window_size, overlap, "utf-8"
+    )
+
+
+def test_read_window() -> None:
+    window_reader = create_window_reader(b"abcdef", b"ghijklmno\nnext\n")
+    windows = []
+    while (window := window_reader.read_window()) is not None:
+        windows.append(window)
+
+    assert windows == ["abcd", "cdefgh", "ghijkl", "klmno"]
+    assert window_reader.finish() == (15, True, b"")
+
+
+def test_read_window_decodes_characters_split_between_windows() -> None:
+    window_reader = create_window_reader(
+        "aé".encode(), b"bc", window_size=2, overlap=0
+    )
+
+    assert window_reader.read_window() == "a"
+    assert window_reader.read_window() == "éb"
+    assert window_reader.read_window() == "c"
+    assert window_reader.read_window() is None
+
+
+def test_finish_skips_rest_of_line() -> None:
+    window_reader = create_window_reader(b"abcdef", b"ghijklmno\nnext\n")
+    window_reader.read_window()
+
+    assert window_reader.finish() == (15, True, b"next\n")
+
+
+def test_finish_at_end_of_file() -> None:
+    window_reader = create_window_reader(b"abcdef", b"ghij")
+
+    assert window_reader.finish() == (10, False, b"")
+
+
+def test_long_line_iter_windows() -> None:
+    long_line = LongLine(create_window_reader(b"abcdef", b"ghijklmno\nnext\n"))
+
+    assert long_line == "abcd"
+    assert long_line.overlap == 2
+    assert list(long_line.iter_windows()) == [
+        ("abcd", False),
+        ("cdefgh", False),
+        ("ghijkl", False),
+        ("klmno", True),
+    ]
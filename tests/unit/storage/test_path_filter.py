@@ -0,0 +1,162 @@
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from pytest_mock import MockerFixture
+
+from python_grep.storage.base import IPathResolver
+from python_grep.storage.path_filter import (
+    KNOWN_BINARY_EXTENSIONS,
+    ExtensionFilter,
+    FileSizeFilter,
+    FilteringPathResolver,
+    ModificationTimeFilter,
+)
+
+
+def create_stat(size: int = 0, mtime: float = 0.0) -> os.stat_result:
+    return os.stat_result((0o100644, 0, 0, 1, 0, 0, size, 0, mtime, 0))
+
+
+@pytest.mark.parametrize(
+    "name, exclude, expected",
+    [
+        ("main.py", False, True),
+        ("MAIN.PY", False, True),
+        ("stubs.pyi", False, True),
+        ("notes.txt", False, False),
+        ("Makefile", False, False),
+        ("main.py", True, False),
+        ("notes.txt", True, True),
+    ],
+)
+def test_extension_filter(name: str, exclude: bool, expected: bool) -> None:
+    path_filter = ExtensionFilter([".py", ".PYI"], exclude)
+
+    assert not path_filter.requires_stat
+    assert path_filter.accepts(Path("src", name), None) is expected
+
+
+def test_known_binary_extensions_skip_archives_but_not_text() -> None:
+    path_filter = ExtensionFilter(KNOWN_BINARY_EXTENSIONS, exclude=True)
+
+    assert not path_filter.accepts(Path("dist/release.tar.GZ"), None)
+    assert not path_filter.accepts(Path("build/module.so"), None)
+    assert path_filter.accepts(Path("logs/app.log"), None)
+
+
+@pytest.mark.parametrize(
+    "size, expected", [(99, True), (100, True), (101, False)]
+)
+def test_file_size_filter(size: int, expected: bool) -> None:
+    path_filter = FileSizeFilter(100)
+
+    assert path_filter.requires_stat
+    assert (
+        path_filter.accepts(Path("a.txt"), create_stat(size=size)) is expected
+    )
+
+
+@pytest.mark.parametrize(
+    "newer_than, older_than, expected",
+    [
+        (None, None, True),
+        (50.0, None, True),
+        (100.0, None, False),
+        (None, 150.0, True),
+        (None, 100.0, False),
+        (50.0, 150.0, True),
+        (110.0, 150.0, False),
+    ],
+)
+def test_modification_time_filter(
+    newer_than: Optional[float], older_than: Optional[float], expected: bool
+) -> None:
+    path_filter = ModificationTimeFilter(newer_than, older_than)
+
+    assert (
+        path_filter.accepts(Path("a.txt"), create_stat(mtime=100.0))
+        is expected
+    )
+
+
+def create_path_resolver(
+    mocker: MockerFixture, paths: List[Path]
+) -> IPathResolver:
+    path_resolver = mocker.Mock(spec=IPathResolver)
+    path_resolver.get_resolved_file_paths.return_value = iter(paths)
+    return path_resolver
+
+
+def test_filtering_path_resolver(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    small_file = tmp_path / "small.log"
+    small_file.write_text("a\n")
+    large_file = tmp_path / "large.log"
+    large_file.write_text("a" * 100)
+    other_file = tmp_path / "small.txt"
+    other_file.write_text("a\n")
+    path_resolver = FilteringPathResolver(
+        create_path_resolver(mocker, [small_file, large_file, other_file]),
+        [FileSizeFilter(10), ExtensionFilter([".log"])],
+    )
+
+    assert list(path_resolver.get_resolved_file_paths()) == [small_file]
+
+
+def test_filtering_path_resolver_stats_only_files_selected_by_name(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    log_file = tmp_path / "app.log"
+    log_file.write_text("a\n")
+    stat_mock = mocker.patch(
+        "python_grep.storage.path_filter.os.stat", wraps=os.stat
+    )
+    path_resolver = FilteringPathResolver(
+        create_path_resolver(mocker, [log_file, tmp_path / "image.png"]),
+        [
+            FileSizeFilter(10),
+            ExtensionFilter(KNOWN_BINARY_EXTENSIONS, exclude=True),
+        ],
+    )
+
+    assert list(path_resolver.get_resolved_file_paths()) == [log_file]
+    stat_mock.assert_called_once_with(log_file)
+
+
+def test_filtering_path_resolver_yields_files_which_cannot_be_stated(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    missing_file = tmp_path / "missing.log"
+    path_resolver = FilteringPathResolver(
+        create_path_resolver(mocker, [missing_file]), [FileSizeFilter(10)]
+    )
+
+    assert list(path_resolver.get_resolved_file_paths()) == [missing_file]
+
+
+def test_filtering_path_resolver_yields_stats_taken(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    log_file = tmp_path / "app.log"
+    log_file.write_text("a\n")
+    missing_file = tmp_path / "missing.log"
+    files = [log_file, missing_file]
+
+    with_stat_filter = FilteringPathResolver(
+        create_path_resolver(mocker, files), [FileSizeFilter(10)]
+    )
+    without_stat_filter = FilteringPathResolver(
+        create_path_resolver(mocker, files), [ExtensionFilter([".log"])]
+    )
+
+    assert [
+        (path, stat and stat.st_size)
+        for path, stat in with_stat_filter.get_resolved_files_with_stats()
+    ] == [(log_file, 2), (missing_file, None)]
+    assert list(without_stat_filter.get_resolved_files_with_stats()) == [
+        (log_file, None),
+        (missing_file, None),
+    ]
@@ -8,7 +8,7 @@ from python_grep.storage import PathResolver
 
 
 def test_get_resolved_file_paths(
-    mock_pathlib_path_glob: Callable[[List[Path]], None]
+    mock_pathlib_path_glob: Callable[[List[Path]], None],
 ) -> None:
     mock_pathlib_path_glob([Path("test1.txt"), Path("test2.txt")])
     path_resolver = PathResolver(["*.txt"])
@@ -35,3 +35,18 @@ def test_is_dir_message_on_path_resolving(
     captured_output = captured.out
 
     assert captured_output == "grep: test1 is a directory\n"
+
+
+def test_is_dir_message_reported_once(
+    mock_pathlib_path_glob: Callable[[List[Path]], None],
+    mocker: MockFixture,
+    capsys: CaptureFixture[str],
+):
+    mock_pathlib_path_glob([Path("test1")])
+    path_resolver = PathResolver(["test1"])
+    mocker.patch("pathlib.Path.is_dir", return_value=True)
+
+    list(path_resolver.get_resolved_file_paths())
+    list(path_resolver.get_resolved_file_paths())
+
+    assert capsys.readouterr().out == "grep: test1 is a directory\n"
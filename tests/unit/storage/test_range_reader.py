@@ -0,0 +1,22 @@
+from typing import AnyStr, Tuple
+
+import pytest
+
+from python_grep.storage.range_reader import cut_lines
+
+
+@pytest.mark.parametrize(
+    "data, separator, line_count, expected_result",
+    [
+        ("a\nb\n", "\n", 3, ("a\nb\n", 1)),
+        ("a\nb\nc", "\n", 2, ("a\nb\n", 0)),
+        (b"a\0b\0", b"\0", 1, (b"a\0", 0)),
+    ],
+)
+def test_cut_lines(
+    data: AnyStr,
+    separator: AnyStr,
+    line_count: int,
+    expected_result: Tuple[AnyStr, int],
+) -> None:
+    assert cut_lines(data, separator, line_count) == expected_result
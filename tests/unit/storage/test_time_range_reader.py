@@ -0,0 +1,86 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import pytest
+
+from python_grep.storage import (
+    FileReader,
+    TimeRangeFileReader,
+    TimestampParser,
+)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+FILE_CONTENT = "".join(
+    f"2024-05-01 10:{minute:02}:00 entry {minute}\n  detail {minute}\n"
+    for minute in range(0, 60, 5)
+)
+
+
+@pytest.fixture
+def timestamp_parser() -> TimestampParser:
+    return TimestampParser(TIME_FORMAT)
+
+
+def test_parse_line(timestamp_parser: TimestampParser) -> None:
+    assert timestamp_parser.parse_line(
+        b"2024-05-01 10:05:00 entry"
+    ) == datetime(2024, 5, 1, 10, 5)
+    assert timestamp_parser.parse_line(b"  detail") is None
+
+
+@pytest.mark.parametrize("scan_threshold", [8, 64 * 1024])
+@pytest.mark.parametrize(
+    "since, until, expected_entries",
+    [
+        ("10:12:00", "10:20:00", [15, 20]),
+        ("10:50:00", None, [50, 55]),
+        (None, "10:05:00", [0, 5]),
+        ("10:56:00", None, []),
+        ("10:21:00", "10:24:00", []),
+    ],
+)
+def test_read_lines_with_offsets(
+    tmp_text_file: Callable[[str], Path],
+    timestamp_parser: TimestampParser,
+    monkeypatch: pytest.MonkeyPatch,
+    scan_threshold: int,
+    since: Optional[str],
+    until: Optional[str],
+    expected_entries: List[int],
+) -> None:
+    monkeypatch.setattr(
+        "python_grep.storage.time_range_reader.SCAN_THRESHOLD",
+        scan_threshold,
+    )
+    path = tmp_text_file(FILE_CONTENT)
+    file_reader = TimeRangeFileReader(
+        FileReader(),
+        timestamp_parser,
+        timestamp_parser.parse(f"2024-05-01 {since}") if since else None,
+        timestamp_parser.parse(f"2024-05-01 {until}") if until else None,
+    )
+
+    assert [line for _, line in file_reader.read_lines_with_offsets(path)] == [
+        line
+        for minute in expected_entries
+        for line in (
+            f"2024-05-01 10:{minute:02}:00 entry {minute}",
+            f"  detail {minute}",
+        )
+    ]
+
+
+def test_read_blocks_cuts_block_behind_range(
+    tmp_text_file: Callable[[str], Path], timestamp_parser: TimestampParser
+) -> None:
+    path = tmp_text_file(FILE_CONTENT)
+    file_reader = TimeRangeFileReader(
+        FileReader(),
+        timestamp_parser,
+        until=timestamp_parser.parse("2024-05-01 10:00:00"),
+    )
+
+    assert list(file_reader.read_blocks(path)) == [
+        (0, "2024-05-01 10:00:00 entry 0\n  detail 0\n")
+    ]
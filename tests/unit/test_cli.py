@@ -1,10 +1,26 @@
-from argparse import ArgumentTypeError, Namespace
+import time
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
 
 import pytest
 
 from python_grep.cli import (
     add_file_path_for_recursive,
+    add_patterns_from_files,
     merge_pattern_related_args,
+    parse_file_time,
+    parse_line_range,
+    parse_positive_float,
+    parse_positive_int,
+    parse_size,
+    validate_checkpoint_args,
+    validate_file_time_args,
+    validate_follow_args,
+    validate_line_range_args,
+    validate_multiline_args,
+    validate_time_range_args,
 )
 
 
@@ -35,3 +51,180 @@ def test_add_file_path_for_recursive_no_files_not_recursive() -> None:
 def test_add_file_path_for_recursive_no_files_but_recursive() -> None:
     args = add_file_path_for_recursive(Namespace(files=[], recursive=True))
     assert args.files == ["*"]
+
+
+def test_add_patterns_from_files(tmp_path: Path) -> None:
+    pattern_file = tmp_path / "patterns.txt"
+    pattern_file.write_text("pattern1\npattern2\n")
+    args = add_patterns_from_files(
+        Namespace(
+            pattern="test.txt",
+            patterns=["pattern0"],
+            pattern_files=[str(pattern_file)],
+            files=["test2.txt"],
+        )
+    )
+
+    assert args.patterns == ["pattern0", "pattern1", "pattern2"]
+    assert args.pattern is None
+    assert args.files == ["test.txt", "test2.txt"]
+
+
+def test_add_patterns_from_missing_file(tmp_path: Path) -> None:
+    with pytest.raises(ArgumentTypeError):
+        add_patterns_from_files(
+            Namespace(
+                pattern="test.txt",
+                patterns=None,
+                pattern_files=[str(tmp_path / "missing.txt")],
+                files=[],
+            )
+        )
+
+
+def test_validate_follow_args_with_count() -> None:
+    with pytest.raises(ArgumentTypeError):
+        validate_follow_args(Namespace(follow=True, count=True))
+
+
+def test_validate_checkpoint_args_resume_without_checkpoint() -> None:
+    with pytest.raises(ArgumentTypeError):
+        validate_checkpoint_args(
+            Namespace(resume=True, checkpoint=None, follow=False)
+        )
+
+
+def test_validate_checkpoint_args_with_follow() -> None:
+    with pytest.raises(ArgumentTypeError):
+        validate_checkpoint_args(
+            Namespace(resume=False, checkpoint="scan.checkpoint", follow=True)
+        )
+
+
+def test_validate_multiline_args_with_invert_match(
+    cli_parser: ArgumentParser,
+) -> None:
+    with pytest.raises(ArgumentTypeError):
+        validate_multiline_args(
+            cli_parser.parse_args(["-U", "-v", "pattern", "test.txt"])
+        )
+
+
+@pytest.mark.parametrize(
+    "value, expected_range",
+    [("2:5", (2, 5)), ("3:", (3, None)), (":4", (1, 4)), ("7:7", (7, 7))],
+)
+def test_parse_line_range(
+    value: str, expected_range: Tuple[int, Optional[int]]
+) -> None:
+    assert parse_line_range(value) == expected_range
+
+
+@pytest.mark.parametrize("value", ["5", "0:3", "a:b", "5:3", "1:2:3"])
+def test_parse_line_range_invalid(value: str) -> None:
+    with pytest.raises(ArgumentTypeError):
+        parse_line_range(value)
+
+
+def test_validate_line_range_args_with_from_offset(
+    cli_parser: ArgumentParser,
+) -> None:
+    with pytest.raises(ArgumentTypeError):
+        validate_line_range_args(
+            cli_parser.parse_args(
+                ["--lines", "2:3", "--from-offset", "9", "pattern", "a.txt"]
+            )
+        )
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--since", "yesterday"],
+        ["--since", "2024-05-02 00:00:00", "--until", "2024-05-01 00:00:00"],
+        ["--until", "2024-05-01", "--follow"],
+    ],
+)
+def test_validate_time_range_args_invalid(
+    cli_parser: ArgumentParser, args: List[str]
+) -> None:
+    with pytest.raises(ArgumentTypeError):
+        validate_time_range_args(
+            cli_parser.parse_args(args + ["pattern", "app.log"])
+        )
+
+
+def test_validate_time_range_args_with_time_format(
+    cli_parser: ArgumentParser,
+) -> None:
+    args = cli_parser.parse_args(
+        ["--since", "May 01 10:00", "--time-format", "%b %d %H:%M"]
+        + ["pattern", "app.log"]
+    )
+
+    assert validate_time_range_args(args) is args
+
+
+@pytest.mark.parametrize("value", ["0", "-3", "many"])
+def test_parse_positive_int_invalid(value: str) -> None:
+    with pytest.raises(ArgumentTypeError):
+        parse_positive_int(value)
+
+
+@pytest.mark.parametrize("value, expected", [("2", 2.0), ("0.5", 0.5)])
+def test_parse_positive_float(value: str, expected: float) -> None:
+    assert parse_positive_float(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0", "-1.5", "nan", "inf", "many"])
+def test_parse_positive_float_invalid(value: str) -> None:
+    with pytest.raises(ArgumentTypeError):
+        parse_positive_float(value)
+
+
+@pytest.mark.parametrize(
+    "value, expected_size",
+    [
+        ("0", 0),
+        ("512", 512),
+        ("4K", 4096),
+        ("2m", 2 * 1024**2),
+        ("1G", 1024**3),
+    ],
+)
+def test_parse_size(value: str, expected_size: int) -> None:
+    assert parse_size(value) == expected_size
+
+
+@pytest.mark.parametrize("value", ["", "K", "-1", "1.5M", "10T"])
+def test_parse_size_invalid(value: str) -> None:
+    with pytest.raises(ArgumentTypeError):
+        parse_size(value)
+
+
+def test_parse_file_time_date() -> None:
+    assert (
+        parse_file_time("2024-05-01T10:30")
+        == datetime(2024, 5, 1, 10, 30).timestamp()
+    )
+
+
+def test_parse_file_time_age() -> None:
+    assert parse_file_time("2h") == pytest.approx(time.time() - 7200, abs=5)
+
+
+@pytest.mark.parametrize("value", ["h", "2y", "-2h", "yesterday"])
+def test_parse_file_time_invalid(value: str) -> None:
+    with pytest.raises(ArgumentTypeError):
+        parse_file_time(value)
+
+
+def test_validate_file_time_args_empty_window(
+    cli_parser: ArgumentParser,
+) -> None:
+    with pytest.raises(ArgumentTypeError):
+        validate_file_time_args(
+            cli_parser.parse_args(
+                ["--newer", "1d", "--older", "2d", "pattern", "a.txt"]
+            )
+        )
@@ -0,0 +1,40 @@
+import io
+import socket
+from pathlib import Path
+
+from python_grep.ipc import (
+    STDOUT_CHANNEL,
+    forward_to_server,
+    parse_server_args,
+    receive_frame,
+    send_frame,
+)
+
+
+def test_parse_server_args() -> None:
+    server_args, grep_args = parse_server_args(
+        ["-n", "--socket", "grep.sock", "pattern", "file.txt"]
+    )
+
+    assert not server_args.server
+    assert server_args.socket == "grep.sock"
+    assert grep_args == ["-n", "pattern", "file.txt"]
+
+
+def test_send_and_receive_frame() -> None:
+    sending_socket, receiving_socket = socket.socketpair()
+    with sending_socket, receiving_socket:
+        send_frame(sending_socket, STDOUT_CHANNEL, b"line\n")
+        sending_socket.close()
+        reader = receiving_socket.makefile("rb")
+
+        assert receive_frame(reader) == (STDOUT_CHANNEL, b"line\n")
+        assert receive_frame(reader) is None
+
+
+def test_receive_truncated_frame() -> None:
+    assert receive_frame(io.BytesIO(b"o\x00\x00\x00\x05li")) is None
+
+
+def test_forward_to_server_without_server(tmp_path: Path) -> None:
+    assert forward_to_server(["pattern"], tmp_path / "grep.sock") is None
@@ -0,0 +1,58 @@
+import io
+import json
+import os
+import socket
+from pathlib import Path
+
+from python_grep.ipc import (
+    EXIT_CHANNEL,
+    REQUEST_CHANNEL,
+    STDOUT_CHANNEL,
+    receive_frame,
+    send_frame,
+)
+from python_grep.server import GrepServer
+
+
+def test_run(tmp_path: Path) -> None:
+    file = tmp_path / "file.txt"
+    file.write_text("test line\nother line\ntest\n")
+    server = GrepServer(tmp_path / "grep.sock")
+    stdout, stderr = io.StringIO(), io.StringIO()
+
+    for _ in range(2):
+        assert server.run(["-n", "test", str(file)], stdout, stderr) == 0
+    assert stdout.getvalue() == 2 * (f"{file}:1:test line\n{file}:3:test\n")
+    assert stderr.getvalue() == ""
+
+
+def test_run_refuses_follow(tmp_path: Path) -> None:
+    stdout, stderr = io.StringIO(), io.StringIO()
+    status = GrepServer(tmp_path / "grep.sock").run(
+        ["--follow", "test", "file.txt"], stdout, stderr
+    )
+
+    assert status == 2
+    assert "--follow is not supported by the server" in stderr.getvalue()
+
+
+def test_handle_runs_search_in_client_directory(tmp_path: Path) -> None:
+    (tmp_path / "file.txt").write_text("test line\n")
+    server = GrepServer(tmp_path / "grep.sock")
+    client_socket, server_socket = socket.socketpair()
+    with client_socket, server_socket:
+        request = {"args": ["test", "file.txt"], "cwd": str(tmp_path)}
+        send_frame(
+            client_socket, REQUEST_CHANNEL, json.dumps(request).encode()
+        )
+        server_cwd = os.getcwd()
+        server._handle(server_socket)
+        server_socket.close()
+        reader = client_socket.makefile("rb")
+        frames = list(iter(lambda: receive_frame(reader), None))
+
+    assert os.getcwd() == server_cwd
+    assert frames == [
+        (STDOUT_CHANNEL, b"file.txt:test line\n"),
+        (EXIT_CHANNEL, b"0"),
+    ]